@@ -0,0 +1,117 @@
+"""車位立方體與逐列讀取的分析延遲比較
+
+以合成資料寫入月份資料庫（v1 full 模式），比較整個月份的分析：
+
+- SQLite：iter_rows 讀取資料列後於 Python 計算每個停車場的平均值，
+  以及單一停車場的第 10 百分位數
+- 立方體：建立（全部重建與增量更新）時間，以及以 memory-map 載入後向量化計算相同結果
+
+使用方式：
+    uv run --extra analytics python benchmarks/bench_availability_cube.py --lots 1000 --days 7
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from parking_newtaipei.db.availability import AvailabilityRepository, get_monthly_db_path
+from parking_newtaipei.db.availability_cube import load_cube, to_float, update_cube
+from parking_newtaipei.db.availability_schema import get_schema
+from parking_newtaipei.db.connection import close_all_connections
+from parking_newtaipei.db.sync_runs import percentile
+
+START = datetime(2026, 3, 1)
+
+
+def load(repo: AvailabilityRepository, lots: int, days: int, seed: int = 42) -> None:
+    """寫入合成資料（每 5 分鐘一次同步）"""
+    rng = random.Random(seed)
+    values = {f"P{i:05d}": rng.randint(0, 300) for i in range(lots)}
+    repo.init_tables(START.year, START.month)
+    for step in range(days * 288):
+        for parking_id in values:
+            values[parking_id] = max(0, values[parking_id] + rng.randint(-3, 3))
+        repo.insert_batch(
+            [{"parking_id": pid, "available_car": v} for pid, v in values.items()],
+            recorded_at=START + timedelta(minutes=5 * step),
+        )
+
+
+def timed(func, repeat: int = 5) -> float:
+    """執行多次並回傳延遲中位數（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="車位立方體與逐列讀取的分析延遲比較")
+    parser.add_argument("--lots", type=int, default=1000, help="合成停車場數量")
+    parser.add_argument("--days", type=int, default=7, help="合成天數")
+    args = parser.parse_args()
+
+    print(f"合成資料: {args.lots:,} 個停車場 x {args.days * 288:,} 次同步")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = AvailabilityRepository(Path(tmp), persistent=True)
+        load(repo, args.lots, args.days)
+        db_path = get_monthly_db_path(Path(tmp), START.year, START.month)
+        db = repo._get_db(db_path)
+        schema = get_schema(1)
+
+        def sqlite_means():
+            totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+            with db.get_connection() as conn:
+                for parking_id, value, _ in schema.iter_rows(conn):
+                    total = totals[parking_id]
+                    total[0] += value
+                    total[1] += 1
+            return {parking_id: s / n for parking_id, (s, n) in totals.items()}
+
+        def sqlite_percentile():
+            with db.get_connection() as conn:
+                rows = schema.iter_rows(conn, parking_ids=["P00042"])
+                return percentile([float(value) for _, value, _ in rows], 10)
+
+        start = time.perf_counter()
+        update_cube(db_path)
+        build_ms = (time.perf_counter() - start) * 1000
+        repo.insert_batch(
+            [{"parking_id": f"P{i:05d}", "available_car": 1} for i in range(args.lots)],
+            recorded_at=START + timedelta(days=args.days),
+        )
+        start = time.perf_counter()
+        update_cube(db_path)
+        update_ms = (time.perf_counter() - start) * 1000
+
+        def cube_means():
+            cube = load_cube(db_path)
+            return np.nanmean(to_float(cube.window()), axis=1)
+
+        def cube_percentile():
+            cube = load_cube(db_path)
+            return np.nanpercentile(to_float(cube.lot("P00042")), 10)
+
+        rows = [
+            ("各停車場平均 (ms)", timed(sqlite_means), timed(cube_means)),
+            ("單一停車場百分位數 (ms)", timed(sqlite_percentile), timed(cube_percentile)),
+        ]
+        close_all_connections()
+
+    print(f"  建立立方體: {build_ms:,.0f} ms，增量更新一次同步: {update_ms:,.0f} ms")
+    print(f"  {'':24s}{'SQLite':>12s}{'立方體':>12s}{'加速':>10s}")
+    for label, sqlite_ms, cube_ms in rows:
+        print(f"  {label:24s}{sqlite_ms:>12.1f}{cube_ms:>12.1f}{sqlite_ms / cube_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
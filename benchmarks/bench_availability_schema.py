@@ -0,0 +1,121 @@
+"""即時車位資料庫結構版本比較
+
+以相同的合成資料分別寫入 v1 與 v2 結構（full 模式），比較檔案大小與查詢延遲。
+
+使用方式：
+    uv run python benchmarks/bench_availability_schema.py --lots 1000 --days 7
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    SCHEMA_V2,
+    AvailabilityRepository,
+    get_monthly_db_path,
+)
+from parking_newtaipei.db.availability_schema import get_schema
+from parking_newtaipei.db.connection import close_all_connections
+
+START = datetime(2026, 3, 1)
+
+
+def load(repo: AvailabilityRepository, lots: int, days: int, seed: int = 42) -> float:
+    """寫入合成資料，回傳寫入秒數"""
+    rng = random.Random(seed)
+    values = {f"P{i:05d}": rng.randint(0, 300) for i in range(lots)}
+    repo.init_tables(START.year, START.month)
+
+    start = time.perf_counter()
+    for step in range(days * 288):
+        for parking_id in values:
+            values[parking_id] = max(0, values[parking_id] + rng.randint(-3, 3))
+        repo.insert_batch(
+            [{"parking_id": pid, "available_car": v} for pid, v in values.items()],
+            recorded_at=START + timedelta(minutes=5 * step),
+        )
+    return time.perf_counter() - start
+
+
+def timed(func, repeat: int = 20) -> float:
+    """執行多次並回傳延遲中位數（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench(version: int, lots: int, days: int, tmp: Path) -> dict:
+    """建立指定版本的資料庫並量測"""
+    db_dir = tmp / f"v{version}"
+    repo = AvailabilityRepository(db_dir, persistent=True, schema_version=version)
+    load_seconds = load(repo, lots, days)
+
+    db_path = get_monthly_db_path(db_dir, START.year, START.month)
+    db = repo._get_db(db_path)
+    with db.get_connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = db_path.stat().st_size
+
+    schema = get_schema(version)
+    day_start = START + timedelta(days=days // 2)
+    hour_start = day_start + timedelta(hours=8)
+
+    def one_lot_one_day():
+        with db.get_connection() as conn:
+            list(schema.iter_rows(conn, day_start, day_start + timedelta(days=1), ["P00042"]))
+
+    def all_lots_one_hour():
+        with db.get_connection() as conn:
+            list(schema.iter_rows(conn, hour_start, hour_start + timedelta(hours=1)))
+
+    def snapshot():
+        with db.get_connection() as conn:
+            schema.snapshot_as_of(conn, hour_start)
+
+    result = {
+        "load_seconds": load_seconds,
+        "size": size,
+        "one_lot_one_day_ms": timed(one_lot_one_day),
+        "all_lots_one_hour_ms": timed(all_lots_one_hour, repeat=5),
+        "snapshot_ms": timed(snapshot, repeat=5),
+    }
+    close_all_connections()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="即時車位資料庫結構版本比較")
+    parser.add_argument("--lots", type=int, default=1000, help="合成停車場數量")
+    parser.add_argument("--days", type=int, default=7, help="合成天數")
+    args = parser.parse_args()
+
+    print(f"合成資料: {args.lots:,} 個停車場 x {args.days * 288:,} 次同步")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {v: bench(v, args.lots, args.days, Path(tmp)) for v in (SCHEMA_V1, SCHEMA_V2)}
+
+    rows = [
+        ("寫入時間 (s)", "load_seconds", "{:.2f}"),
+        ("檔案大小 (MB)", "size", "{:.1f}"),
+        ("單一停車場一天 (ms)", "one_lot_one_day_ms", "{:.2f}"),
+        ("全部停車場一小時 (ms)", "all_lots_one_hour_ms", "{:.1f}"),
+        ("時間點快照 (ms)", "snapshot_ms", "{:.1f}"),
+    ]
+    print(f"  {'':24s}{'v1':>12s}{'v2':>12s}{'v2/v1':>10s}")
+    for label, key, fmt in rows:
+        v1, v2 = results[SCHEMA_V1][key], results[SCHEMA_V2][key]
+        if key == "size":
+            v1, v2 = v1 / 1024 / 1024, v2 / 1024 / 1024
+        print(f"  {label:24s}{fmt.format(v1):>12s}{fmt.format(v2):>12s}{v2 / v1:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
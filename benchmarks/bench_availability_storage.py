@@ -0,0 +1,118 @@
+"""即時車位儲存模式效能比較
+
+以相同的同步序列分別寫入 full 與 delta 模式，比較寫入時間、筆數與檔案大小。
+
+使用方式：
+    # 合成資料（預設 1,000 個停車場、3 天、每 5 分鐘 30% 停車場變動）
+    uv run python benchmarks/bench_availability_storage.py --lots 1000 --days 3
+
+    # 以實際月份資料重播（讀取既有 availability_YYYYMM.db 的每次同步）
+    uv run python benchmarks/bench_availability_storage.py \
+        --from-db data/availability/availability_202602.db
+"""
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+
+from parking_newtaipei.db.availability import (
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+    get_monthly_db_path,
+)
+
+SnapshotStream = Iterator[tuple[datetime, list[dict]]]
+
+
+def synthetic_snapshots(lots: int, days: int, change_rate: float, seed: int = 42) -> SnapshotStream:
+    """產生合成同步序列（固定在同一個月份內）"""
+    rng = random.Random(seed)
+    values = {f"P{i:05d}": rng.randint(0, 300) for i in range(lots)}
+    start = datetime(2026, 3, 1)
+
+    for step in range(days * 288):
+        for parking_id in values:
+            if rng.random() < change_rate:
+                values[parking_id] = max(0, values[parking_id] + rng.randint(-5, 5))
+        yield start + timedelta(minutes=5 * step), [
+            {"parking_id": pid, "available_car": value} for pid, value in values.items()
+        ]
+
+
+def recorded_snapshots(db_path: Path) -> SnapshotStream:
+    """從既有月份資料庫依 recorded_at 重組每次同步的資料"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(
+            "SELECT recorded_at, parking_id, available_car FROM availability "
+            "ORDER BY recorded_at, id"
+        )
+        for recorded_at, rows in groupby(cursor, key=lambda row: row[0]):
+            yield datetime.fromisoformat(recorded_at), [
+                {"parking_id": pid, "available_car": value} for _, pid, value in rows
+            ]
+    finally:
+        conn.close()
+
+
+def replay(snapshots: list[tuple[datetime, list[dict]]], mode: str) -> dict:
+    """以指定儲存模式寫入整個同步序列"""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = AvailabilityRepository(Path(tmp), storage_mode=mode)
+        first = snapshots[0][0].astimezone()
+        repo.init_tables(first.year, first.month)
+
+        written = 0
+        start = time.perf_counter()
+        for recorded_at, records in snapshots:
+            written += repo.insert_batch(records, recorded_at=recorded_at)
+        elapsed = time.perf_counter() - start
+
+        db_path = get_monthly_db_path(Path(tmp), first.year, first.month)
+        size = db_path.stat().st_size
+
+    return {"rows": written, "seconds": elapsed, "size": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="即時車位儲存模式效能比較")
+    parser.add_argument("--lots", type=int, default=1000, help="合成停車場數量")
+    parser.add_argument("--days", type=int, default=3, help="合成天數")
+    parser.add_argument("--change-rate", type=float, default=0.3, help="每次同步的變動比例")
+    parser.add_argument("--from-db", type=Path, help="以既有月份資料庫重播")
+    args = parser.parse_args()
+
+    if args.from_db:
+        snapshots = list(recorded_snapshots(args.from_db))
+        print(f"重播 {args.from_db.name}: {len(snapshots):,} 次同步")
+    else:
+        snapshots = list(synthetic_snapshots(args.lots, args.days, args.change_rate))
+        print(
+            f"合成資料: {args.lots:,} 個停車場 x {len(snapshots):,} 次同步"
+            f"（變動比例 {args.change_rate:.0%}）"
+        )
+
+    results = {mode: replay(snapshots, mode) for mode in (STORAGE_MODE_FULL, STORAGE_MODE_DELTA)}
+    for mode, r in results.items():
+        print(
+            f"  {mode:6s} 筆數: {r['rows']:>12,}  寫入時間: {r['seconds']:8.2f}s  "
+            f"檔案大小: {r['size'] / 1024 / 1024:8.1f} MB"
+        )
+
+    full, delta = results[STORAGE_MODE_FULL], results[STORAGE_MODE_DELTA]
+    print(
+        f"  delta / full  筆數: {delta['rows'] / full['rows']:.1%}  "
+        f"寫入時間: {delta['seconds'] / full['seconds']:.1%}  "
+        f"檔案大小: {delta['size'] / full['size']:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
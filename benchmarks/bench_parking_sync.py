@@ -0,0 +1,105 @@
+"""停車場資料同步效能比較
+
+比較逐筆 upsert() + mark_deleted() 與集合式 bulk_upsert() 的執行時間。
+
+使用方式：
+    uv run python benchmarks/bench_parking_sync.py --lots 10000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+
+AREAS = ["板橋區", "三重區", "中和區", "永和區", "新莊區", "新店區", "土城區", "蘆洲區"]
+
+
+def generate_lots(count: int, seed: int = 42) -> list[dict]:
+    """產生合成停車場資料"""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"P{i:06d}",
+            "area": rng.choice(AREAS),
+            "name": f"合成停車場{i}",
+            "type": str(rng.randint(1, 3)),
+            "summary": "",
+            "address": f"新北市測試路{i}號",
+            "tel": "",
+            "pay_ex": "計時30元",
+            "service_time": "00:00~24:00",
+            "tw97x": 290000 + rng.random() * 20000,
+            "tw97y": 2760000 + rng.random() * 20000,
+            "total_car": rng.randint(10, 500),
+            "total_motor": rng.randint(0, 200),
+            "total_bike": 0,
+        }
+        for i in range(count)
+    ]
+
+
+def run_per_row(repo: ParkingLotRepository, lots: list[dict]) -> None:
+    """舊流程：逐筆 upsert 並逐筆標記刪除"""
+    existing_ids = repo.get_all_active_ids()
+    downloaded_ids = set()
+    for data in lots:
+        parking_id, _ = repo.upsert(data)
+        downloaded_ids.add(parking_id)
+    repo.mark_deleted(existing_ids - downloaded_ids)
+
+
+def run_bulk(repo: ParkingLotRepository, lots: list[dict]) -> None:
+    """新流程：單一交易集合式同步"""
+    repo.bulk_upsert(lots)
+
+
+def measure(runner, lots: list[dict], resync_lots: list[dict]) -> tuple[float, float]:
+    """量測冷啟動與重新同步的時間（秒）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ParkingLotRepository(DatabaseConnection(Path(tmp) / "parking.db"))
+        repo.init_tables()
+
+        start = time.perf_counter()
+        runner(repo, lots)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        runner(repo, resync_lots)
+        resync = time.perf_counter() - start
+
+    return cold, resync
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="停車場資料同步效能比較")
+    parser.add_argument("--lots", type=int, default=10000, help="合成停車場數量")
+    args = parser.parse_args()
+
+    lots = generate_lots(args.lots)
+    # 重新同步：移除 1% 並新增 1%，其餘內容不變（只比對 row_hash，不寫入）
+    drop = max(1, args.lots // 100)
+    resync_lots = lots[drop:] + generate_lots(drop, seed=7)
+    for i, data in enumerate(resync_lots[-drop:]):
+        data["id"] = f"N{i:06d}"
+
+    print(f"合成資料: {args.lots:,} 筆停車場")
+    results = {}
+    for label, runner in (("per-row", run_per_row), ("bulk", run_bulk)):
+        cold, resync = measure(runner, lots, resync_lots)
+        results[label] = (cold, resync)
+        print(f"  {label:8s} 冷啟動: {cold:8.3f}s  重新同步: {resync:8.3f}s")
+
+    base_cold, base_resync = results["per-row"]
+    bulk_cold, bulk_resync = results["bulk"]
+    print(
+        f"  加速倍數 冷啟動: {base_cold / bulk_cold:6.1f}x  "
+        f"重新同步: {base_resync / bulk_resync:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""ETL 規模效能測試
+
+以合成資料來源（synthetic_feed.py）在多個規模（目前停車場數的倍數）下量測各階段的吞吐量
+與峰值記憶體（RSS），結果輸出為 JSON，可與其他 commit 的結果比較：
+
+- parking_parse：停車場基本資料 CSV 解析
+- parking_sync：ParkingLotSync.sync() 冷啟動（含解析、暫存表與合併；另記錄重新同步時間）
+- availability_parse：即時車位 CSV 解析
+- availability_write：AvailabilityRepository.insert_batch() 寫入
+- availability_sync：AvailabilitySync.sync() 完整流程（含彙總與 JSON 發布）
+- archive_raw / archive_json：save_raw_response() / save_response() 備份
+- stats：availability-stats 的摘要讀取與完整掃描（compute_stats）
+
+每個階段在獨立的子程序執行，峰值 RSS 不受其他階段影響；下載以 httpx.MockTransport 回應，不連線網路。
+
+使用方式：
+    uv run python benchmarks/bench_scale.py --scales 1,10,100 --snapshots 288
+
+    # 與先前的結果比較（吞吐量與峰值 RSS 的比值）
+    uv run python benchmarks/bench_scale.py --compare benchmarks/results/scale-abc1234.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from synthetic_feed import BASE_LOTS, START_TIME, availability_feed, exchange_record, parking_csv
+
+from parking_newtaipei.api.client import STREAM_CHUNK_SIZE, APIClient
+from parking_newtaipei.db.availability import (
+    AvailabilityRepository,
+    compute_stats,
+    get_monthly_db_path,
+)
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.etl.availability_sync import (
+    AVAILABILITY_API_URL,
+    AvailabilitySync,
+    AvailabilitySyncResult,
+)
+from parking_newtaipei.etl.parking_sync import ParkingLotSync
+from parking_newtaipei.utils.logger import setup_logger
+from parking_newtaipei.utils.storage import save_raw_response, save_response
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _chunks(body: bytes) -> list[bytes]:
+    """與串流下載相同大小的區塊"""
+    return [body[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(body), STREAM_CHUNK_SIZE)]
+
+
+def _mock_client(work_dir: Path, bodies) -> APIClient:
+    """以 MockTransport 依序回應 bodies 的 API 客戶端（不備份交換記錄）"""
+    iterator = iter(bodies)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=next(iterator)))
+    return APIClient(base_url="", responses_dir=work_dir, auto_save=False, transport=transport)
+
+
+def bench_parking_parse(lots: int, snapshots: int, work_dir: Path) -> dict:
+    chunks = _chunks(parking_csv(lots))
+    sync = ParkingLotSync(DatabaseConnection(work_dir / "parse.db"), api_client=None)
+    start = time.perf_counter()
+    rows = sum(1 for _ in sync._parse_csv(chunks))
+    return {"items": rows, "unit": "rows", "seconds": time.perf_counter() - start}
+
+
+def bench_parking_sync(lots: int, snapshots: int, work_dir: Path) -> dict:
+    body = parking_csv(lots)
+    db = DatabaseConnection(work_dir / "parking.db")
+    api_client = _mock_client(work_dir, [body, body])
+    sync = ParkingLotSync(db, api_client)
+    try:
+        start = time.perf_counter()
+        sync.sync(force=True)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sync.sync(force=True)
+        resync = time.perf_counter() - start
+    finally:
+        api_client.close()
+        db.close()
+    return {"items": lots, "unit": "rows", "seconds": cold, "resync_seconds": resync}
+
+
+def bench_availability_parse(lots: int, snapshots: int, work_dir: Path) -> dict:
+    rows = 0
+    elapsed = 0.0
+    for _, body in availability_feed(lots, snapshots):
+        chunks = _chunks(body)
+        start = time.perf_counter()
+        rows += sum(1 for _ in AvailabilitySync._parse_csv(chunks, AvailabilitySyncResult()))
+        elapsed += time.perf_counter() - start
+    return {"items": rows, "unit": "rows", "seconds": elapsed}
+
+
+def _write_availability(lots: int, snapshots: int, db_dir: Path) -> tuple[int, float]:
+    """以 insert_batch() 寫入同步序列，回傳 (寫入筆數, 寫入秒數)"""
+    repo = AvailabilityRepository(db_dir)
+    repo.init_tables(START_TIME.year, START_TIME.month)
+    rows = 0
+    elapsed = 0.0
+    try:
+        for recorded_at, body in availability_feed(lots, snapshots):
+            records = list(AvailabilitySync._parse_csv([body], AvailabilitySyncResult()))
+            start = time.perf_counter()
+            rows += repo.insert_batch(records, recorded_at=recorded_at)
+            elapsed += time.perf_counter() - start
+    finally:
+        repo.close()
+    return rows, elapsed
+
+
+def bench_availability_write(lots: int, snapshots: int, work_dir: Path) -> dict:
+    rows, elapsed = _write_availability(lots, snapshots, work_dir / "availability")
+    db_path = get_monthly_db_path(work_dir / "availability", START_TIME.year, START_TIME.month)
+    return {
+        "items": rows,
+        "unit": "rows",
+        "seconds": elapsed,
+        "db_mb": db_path.stat().st_size / 1e6,
+    }
+
+
+def bench_availability_sync(lots: int, snapshots: int, work_dir: Path) -> dict:
+    feed = list(availability_feed(lots, snapshots))
+    api_client = _mock_client(work_dir, (body for _, body in feed))
+    sync = AvailabilitySync(work_dir / "availability_sync", api_client)
+    rows = 0
+    try:
+        start = time.perf_counter()
+        for recorded_at, _ in feed:
+            rows += sync.sync(recorded_at=recorded_at).total_downloaded
+        elapsed = time.perf_counter() - start
+    finally:
+        api_client.close()
+        sync.repo.close()
+    return {"items": rows, "unit": "rows", "seconds": elapsed}
+
+
+def _bench_archive(lots: int, snapshots: int, work_dir: Path, raw: bool) -> dict:
+    size = 0
+    elapsed = 0.0
+    for timestamp, body in availability_feed(lots, snapshots):
+        exchange = exchange_record(AVAILABILITY_API_URL, timestamp)
+        start = time.perf_counter()
+        if raw:
+            save_raw_response(exchange, body, work_dir, AVAILABILITY_API_URL, timestamp)
+        else:
+            exchange["response"]["body"] = body.decode("utf-8")
+            save_response(exchange, work_dir, AVAILABILITY_API_URL, timestamp)
+        elapsed += time.perf_counter() - start
+        size += len(body)
+    return {"items": size / 1e6, "unit": "MB", "seconds": elapsed}
+
+
+def bench_archive_raw(lots: int, snapshots: int, work_dir: Path) -> dict:
+    return _bench_archive(lots, snapshots, work_dir / "responses_raw", raw=True)
+
+
+def bench_archive_json(lots: int, snapshots: int, work_dir: Path) -> dict:
+    return _bench_archive(lots, snapshots, work_dir / "responses_json", raw=False)
+
+
+def bench_stats(lots: int, snapshots: int, work_dir: Path) -> dict:
+    db_dir = work_dir / "availability"
+    db_path = get_monthly_db_path(db_dir, START_TIME.year, START_TIME.month)
+    if not db_path.exists():
+        _write_availability(lots, snapshots, db_dir)
+
+    repo = AvailabilityRepository(db_dir)
+    start = time.perf_counter()
+    stats = repo.get_stats(START_TIME.year, START_TIME.month)
+    summary = time.perf_counter() - start
+    repo.close()
+
+    start = time.perf_counter()
+    compute_stats(db_path)
+    scan = time.perf_counter() - start
+    return {
+        "items": stats["total_records"],
+        "unit": "rows",
+        "seconds": scan,
+        "summary_ms": summary * 1000,
+    }
+
+
+PHASES = {
+    "parking_parse": bench_parking_parse,
+    "parking_sync": bench_parking_sync,
+    "availability_parse": bench_availability_parse,
+    "availability_write": bench_availability_write,
+    "availability_sync": bench_availability_sync,
+    "archive_raw": bench_archive_raw,
+    "archive_json": bench_archive_json,
+    "stats": bench_stats,
+}
+
+
+def run_phase(phase: str, lots: int, snapshots: int, work_dir: str) -> dict:
+    """於子程序執行一個階段，回傳量測結果與此程序的峰值 RSS"""
+    setup_logger(level="WARNING")
+    result = PHASES[phase](lots, snapshots, Path(work_dir))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 為 KB，macOS 為 bytes
+    result["peak_rss_mb"] = peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+    return result
+
+
+def git_commit() -> str:
+    """目前的 commit（無法取得時為 unknown）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: list[dict], baseline_path: Path) -> None:
+    """印出與先前結果的吞吐量與峰值 RSS 比值（> 1 表示吞吐量提升 / 記憶體增加）"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["phase"], r["scale"]): r for r in baseline["results"]}
+    print(f"\n與 {baseline_path.name}（commit {baseline.get('commit', '?')}）比較:")
+    for r in results:
+        old = previous.get((r["phase"], r["scale"]))
+        if old is None or not old["rate"]:
+            continue
+        print(
+            f"  {r['phase']:20s} {r['scale']:>4}x  吞吐量: {r['rate'] / old['rate']:6.2f}x  "
+            f"峰值 RSS: {r['peak_rss_mb'] / old['peak_rss_mb']:6.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ETL 規模效能測試")
+    parser.add_argument(
+        "--scales", default="1,10", help="規模（目前停車場數的倍數，逗號分隔，預設 1,10）"
+    )
+    parser.add_argument("--base-lots", type=int, default=BASE_LOTS, help="1x 的停車場數")
+    parser.add_argument("--snapshots", type=int, default=12, help="即時車位同步次數（每 5 分鐘）")
+    parser.add_argument(
+        "--phases", default=",".join(PHASES), help="執行的階段（逗號分隔，預設全部）"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="結果 JSON 路徑（預設 results/scale-<commit>.json）"
+    )
+    parser.add_argument("--compare", type=Path, metavar="JSON", help="與先前的結果 JSON 比較")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    phases = args.phases.split(",")
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        parser.error(f"未知的階段: {', '.join(sorted(unknown))}")
+
+    commit = git_commit()
+    print(f"commit {commit}，1x = {args.base_lots:,} 個停車場，{args.snapshots} 次同步")
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for scale in scales:
+        lots = args.base_lots * scale
+        with tempfile.TemporaryDirectory() as tmp:
+            for phase in phases:
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(run_phase, (phase, lots, args.snapshots, tmp))
+                result.update(
+                    phase=phase,
+                    scale=scale,
+                    lots=lots,
+                    rate=result["items"] / result["seconds"] if result["seconds"] else 0.0,
+                )
+                results.append(result)
+                print(
+                    f"  {phase:20s} {scale:>4}x  {result['rate']:14,.1f} {result['unit']}/s  "
+                    f"({result['seconds']:8.3f}s)  峰值 RSS: {result['peak_rss_mb']:7.1f} MB"
+                )
+
+    output = args.output or RESULTS_DIR / f"scale-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "benchmark": "scale",
+        "commit": commit,
+        "created_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "base_lots": args.base_lots,
+            "scales": scales,
+            "snapshots": args.snapshots,
+        },
+        "results": results,
+    }
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"結果已寫入: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
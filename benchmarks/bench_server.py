@@ -0,0 +1,148 @@
+"""讀取 API 伺服器負載測試
+
+以合成的停車場與即時車位資料啟動伺服器（本機、系統指定連接埠），
+由多個執行緒各自以 keep-alive 連線連續送出請求，量測各種請求的每秒請求數與延遲。
+
+使用方式：
+    uv run python benchmarks/bench_server.py --lots 1500 --clients 8 --duration 3
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.server import ReadAPIServer, SnapshotCache
+
+AREAS = ("板橋區", "三重區", "中和區", "永和區", "新莊區", "新店區", "土城區", "蘆洲區")
+
+
+def prepare(data_dir: Path, count: int) -> SnapshotCache:
+    """建立合成資料並載入快照"""
+    rng = random.Random(42)
+    lots = [
+        {
+            "id": f"P{i:06d}",
+            "area": rng.choice(AREAS),
+            "name": f"第{i}停車場",
+            "address": f"新北市某路{i}號",
+            "total_car": rng.randint(10, 500),
+        }
+        for i in range(count)
+    ]
+    repo = ParkingLotRepository(DatabaseConnection(data_dir / "parking.db"))
+    repo.init_tables()
+    repo.bulk_upsert(lots)
+    repo.set_content_hash("bench")
+
+    records = [
+        {"parking_id": lot["id"], "available_car": rng.randint(0, lot["total_car"])}
+        for lot in lots
+    ]
+    availability_path = data_dir / "availability.json"
+    with open(availability_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"updated_at": "2026-03-10T09:00:00+08:00", "total_count": count, "data": records},
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    cache = SnapshotCache(availability_path, data_dir / "parking.db")
+    cache.reload(force=True)
+    return cache
+
+
+def run_load(address, paths: list[str], headers: dict, clients: int, duration: float) -> dict:
+    """多個執行緒以 keep-alive 連線連續送出請求
+
+    Returns:
+        請求數、每秒請求數、延遲中位數與 p99（毫秒）、回應 bytes
+    """
+    deadline = time.perf_counter() + duration
+    latencies: list[list[float]] = [[] for _ in range(clients)]
+    sizes = [0] * clients
+
+    def worker(n: int) -> None:
+        conn = http.client.HTTPConnection(*address, timeout=10)
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            conn.request("GET", rng.choice(paths), headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            latencies[n].append((time.perf_counter() - start) * 1000)
+            sizes[n] = len(body)
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(latency for per_client in latencies for latency in per_client)
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / elapsed,
+        "p50": statistics.median(samples),
+        "p99": samples[int(len(samples) * 0.99) - 1],
+        "bytes": max(sizes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="讀取 API 伺服器負載測試")
+    parser.add_argument("--lots", type=int, default=1500, help="合成停車場數量")
+    parser.add_argument("--clients", type=int, default=8, help="同時連線數")
+    parser.add_argument("--duration", type=float, default=3.0, help="每個情境的秒數")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        cache = prepare(Path(tmp), args.lots)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        server = ReadAPIServer(("127.0.0.1", 0), cache)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        address = server.server_address[:2]
+
+        etag = cache.snapshot.availability.etag
+        ids = [f"/availability/P{i:06d}" for i in range(args.lots)]
+        scenarios = (
+            ("/availability", ["/availability"], {}),
+            ("/availability gzip", ["/availability"], {"Accept-Encoding": "gzip"}),
+            ("/availability 304", ["/availability"], {"If-None-Match": etag}),
+            ("/availability/{id}", ids, {}),
+            ("/lots?area= gzip", ["/lots?area=%E6%9D%BF%E6%A9%8B%E5%8D%80"], {
+                "Accept-Encoding": "gzip",
+            }),
+        )
+
+        print(
+            f"合成資料: {args.lots:,} 個停車場，{args.clients} 個連線，"
+            f"每個情境 {args.duration:g} 秒"
+        )
+        print(f"  載入快照（預先序列化與壓縮）: {load_ms:.1f} ms")
+        for label, paths, headers in scenarios:
+            stats = run_load(address, paths, headers, args.clients, args.duration)
+            print(
+                f"  {label:20s} {stats['rps']:9,.0f} req/s  p50: {stats['p50']:6.2f} ms  "
+                f"p99: {stats['p99']:6.2f} ms  回應: {stats['bytes']:,} bytes"
+            )
+
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""停車場空間索引效能比較
+
+以合成的 TWD97 座標比較網格索引與逐筆計算距離（brute force）的查詢延遲，並確認結果相同。
+
+使用方式：
+    uv run python benchmarks/bench_spatial_index.py --points 10000 --radius 500 --k 5
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+
+from parking_newtaipei.utils.spatial_index import DEFAULT_CELL_SIZE, GridIndex
+
+# 新北市大致範圍（TWD97，公尺）
+X_RANGE = (280000.0, 330000.0)
+Y_RANGE = (2740000.0, 2790000.0)
+
+
+def generate_points(count: int, seed: int = 42) -> list[tuple[str, float, float]]:
+    """產生合成座標"""
+    rng = random.Random(seed)
+    return [
+        (f"P{i:06d}", rng.uniform(*X_RANGE), rng.uniform(*Y_RANGE)) for i in range(count)
+    ]
+
+
+def brute_within(points, x: float, y: float, radius: float) -> list[tuple[str, float]]:
+    """逐筆計算距離的半徑查詢"""
+    result = [
+        (point_id, math.hypot(px - x, py - y))
+        for point_id, px, py in points
+        if math.hypot(px - x, py - y) <= radius
+    ]
+    return sorted(result, key=lambda item: (item[1], item[0]))
+
+
+def brute_nearest(points, x: float, y: float, k: int) -> list[tuple[str, float]]:
+    """逐筆計算距離的最近鄰查詢"""
+    result = [(point_id, math.hypot(px - x, py - y)) for point_id, px, py in points]
+    return sorted(result, key=lambda item: (item[1], item[0]))[:k]
+
+
+def timed(func, queries) -> float:
+    """對每個查詢點執行一次，回傳延遲中位數（微秒）"""
+    samples = []
+    for x, y in queries:
+        start = time.perf_counter()
+        func(x, y)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples)
+
+
+def same(a: list[tuple[str, float]], b: list[tuple[str, float]]) -> bool:
+    """比較兩個查詢結果（距離容許浮點誤差）"""
+    return [item[0] for item in a] == [item[0] for item in b] and all(
+        math.isclose(d1, d2) for (_, d1), (_, d2) in zip(a, b, strict=True)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="停車場空間索引效能比較")
+    parser.add_argument("--points", type=int, default=10000, help="合成停車場數量")
+    parser.add_argument("--queries", type=int, default=200, help="查詢次數")
+    parser.add_argument("--radius", type=float, default=500.0, help="半徑查詢（公尺）")
+    parser.add_argument("--k", type=int, default=5, help="最近鄰數量")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="網格大小")
+    args = parser.parse_args()
+
+    points = generate_points(args.points)
+    rng = random.Random(7)
+    queries = [(rng.uniform(*X_RANGE), rng.uniform(*Y_RANGE)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = GridIndex(points, cell_size=args.cell_size)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    for x, y in queries:
+        assert same(index.within(x, y, args.radius), brute_within(points, x, y, args.radius))
+        assert same(index.nearest(x, y, args.k), brute_nearest(points, x, y, args.k))
+
+    print(f"合成資料: {args.points:,} 個座標，{args.queries} 次查詢（結果與 brute force 相同）")
+    print(f"  建立索引: {build_ms:.1f} ms（網格 {args.cell_size:g} m）")
+    rows = (
+        (
+            f"within {args.radius:g} m",
+            lambda x, y: brute_within(points, x, y, args.radius),
+            lambda x, y: index.within(x, y, args.radius),
+        ),
+        (
+            f"nearest k={args.k}",
+            lambda x, y: brute_nearest(points, x, y, args.k),
+            lambda x, y: index.nearest(x, y, args.k),
+        ),
+    )
+    for label, brute, indexed in rows:
+        brute_us = timed(brute, queries)
+        indexed_us = timed(indexed, queries)
+        print(
+            f"  {label:16s} brute force: {brute_us:9.1f} us  網格: {indexed_us:7.1f} us  "
+            f"加速倍數: {brute_us / indexed_us:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
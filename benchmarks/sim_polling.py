@@ -0,0 +1,164 @@
+"""輪詢策略模擬
+
+以上游的發布時間比較固定間隔同步（cron / daemon 預設）與 daemon --adaptive 的
+下載次數、未變更的下載、錯過的版本與延遲（上游發布至下載的時間）；
+adaptive 錯過的版本多於固定間隔時以非零狀態結束：
+
+- 交換記錄模式：由 sync-availability 的交換記錄（依時間排序）找出內容變更的時間點。
+  交換記錄只知道變更發生在上一筆與變更那一筆之間，發布時間以區間中點估計
+  （區間超過 --interval 時以變更前 --interval 估計，例如只保留變更內容的交換記錄）
+- 合成模式：指定週期、相位、隨機延遲與每日停止更新的時段
+
+使用方式：
+    # 以一週的交換記錄模擬
+    uv run python benchmarks/sim_polling.py --responses data/responses \\
+        --from 2026-03-01 --to 2026-03-08
+
+    # 上游每 10 分鐘（第 3 分鐘起）發布、延遲 0-20 秒、01:00-06:00 停止更新
+    uv run python benchmarks/sim_polling.py --period 10 --phase 3 --jitter 20 --quiet 1-6 --days 7
+"""
+
+import argparse
+import hashlib
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from parking_newtaipei.cadence import AdaptivePoller, SimulationResult, simulate
+from parking_newtaipei.daemon import next_aligned_tick
+from parking_newtaipei.db.sync_runs import percentile
+from parking_newtaipei.etl.availability_sync import AVAILABILITY_API_URL
+from parking_newtaipei.utils.storage import find_responses, load_exchange
+
+
+def archive_publish_times(
+    responses_dir: Path, start: datetime, end: datetime, interval: timedelta
+) -> list[datetime]:
+    """由交換記錄估計上游的發布時間
+
+    Args:
+        responses_dir: 交換記錄目錄
+        start: 起始時間
+        end: 結束時間
+        interval: 記錄期間的同步間隔
+
+    Returns:
+        各次內容變更的估計發布時間
+    """
+    paths = reversed(
+        find_responses(responses_dir, start=start, end=end, endpoint=AVAILABILITY_API_URL)
+    )
+    published = []
+    previous: tuple[datetime, str] | None = None
+    for path in paths:
+        seen = datetime.strptime(path.name[:15], "%Y%m%d_%H%M%S")
+        digest = hashlib.sha256(load_exchange(path)[1]).hexdigest()
+        if previous is not None and digest != previous[1]:
+            published.append(seen - min(seen - previous[0], interval) / 2)
+        previous = (seen, digest)
+    return published
+
+
+def synthetic_publish_times(
+    start: datetime,
+    end: datetime,
+    period: timedelta,
+    phase: timedelta,
+    jitter: float,
+    quiet: tuple[int, int] | None,
+    seed: int = 42,
+) -> list[datetime]:
+    """產生週期性的發布時間
+
+    Args:
+        start: 起始時間
+        end: 結束時間
+        period: 發布週期
+        phase: 相對於午夜的位移
+        jitter: 每次發布的最大隨機延遲秒數
+        quiet: 每日停止更新的時段（起始小時, 結束小時），None 表示全天更新
+        seed: 亂數種子
+
+    Returns:
+        發布時間
+    """
+    rng = random.Random(seed)
+    published = []
+    moment = start.replace(hour=0, minute=0, second=0, microsecond=0) + phase
+    while moment < end:
+        if quiet is None or not quiet[0] <= moment.hour < quiet[1]:
+            published.append(moment + timedelta(seconds=rng.uniform(0, jitter)))
+        moment += period
+    return published
+
+
+def _report(name: str, result: SimulationResult) -> None:
+    """輸出模擬結果"""
+    print(
+        f"  {name:<10} 下載 {result.fetches:>6,} 次  "
+        f"未變更 {result.wasted:>6,}（{result.wasted_ratio:6.1%}）  錯過 {result.missed:>4} 版  "
+        f"延遲 p50 {percentile(result.lags, 50):6.0f}s  p95 {percentile(result.lags, 95):6.0f}s  "
+        f"max {max(result.lags, default=0.0):6.0f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比較固定間隔與依上游週期的輪詢策略")
+    parser.add_argument("--responses", type=Path, help="交換記錄目錄（交換記錄模式）")
+    parser.add_argument("--from", dest="start", type=datetime.fromisoformat, help="起始時間")
+    parser.add_argument("--to", dest="end", type=datetime.fromisoformat, help="結束時間")
+    parser.add_argument("--period", type=float, default=10.0, help="合成發布週期（分鐘）")
+    parser.add_argument("--phase", type=float, default=3.0, help="合成發布相位（分鐘）")
+    parser.add_argument("--jitter", type=float, default=20.0, help="合成發布的最大延遲（秒）")
+    parser.add_argument("--quiet", help="每日停止更新的時段（小時，例如 1-6）")
+    parser.add_argument("--days", type=float, default=7.0, help="合成模式的模擬天數")
+    parser.add_argument("--interval", type=float, default=5.0, help="固定同步間隔（分鐘）")
+    parser.add_argument("--max-interval", type=float, default=60.0, help="退避上限（分鐘）")
+    args = parser.parse_args()
+
+    interval = timedelta(minutes=args.interval)
+    if args.responses is not None:
+        if args.start is None or args.end is None:
+            parser.error("交換記錄模式需指定 --from 與 --to")
+        start, end = args.start, args.end
+        published = archive_publish_times(args.responses, start, end, interval)
+        print(f"交換記錄: {args.responses}（{start} ~ {end}）")
+    else:
+        start = args.start or datetime(2026, 3, 1)
+        end = start + timedelta(days=args.days)
+        quiet = tuple(int(hour) for hour in args.quiet.split("-")) if args.quiet else None
+        published = synthetic_publish_times(
+            start,
+            end,
+            timedelta(minutes=args.period),
+            timedelta(minutes=args.phase),
+            args.jitter,
+            quiet,
+        )
+        print(
+            f"合成發布: 每 {args.period:g} 分鐘（相位 {args.phase:g} 分鐘，延遲 0-{args.jitter:g}s"
+            f"{f'，{args.quiet} 時停止更新' if quiet else ''}），{args.days:g} 天"
+        )
+    print(f"上游發布 {len(published):,} 次")
+
+    fixed = simulate(
+        published, lambda now: next_aligned_tick(now, interval), lambda *_: None, start, end
+    )
+    poller = AdaptivePoller(interval=interval, max_interval=timedelta(minutes=args.max_interval))
+    adaptive = simulate(published, poller.next_poll, poller.observe, start, end)
+
+    _report(f"每 {args.interval:g} 分鐘", fixed)
+    _report("adaptive", adaptive)
+    if fixed.fetches:
+        print(f"下載次數減少 {1 - adaptive.fetches / fixed.fetches:.1%}")
+    estimate = poller.estimate()
+    if estimate is not None:
+        print(f"估計週期 {estimate.period.total_seconds() / 60:.2f} 分鐘")
+
+    # adaptive 的目標是減少未變更的下載而不錯過任何更新
+    if adaptive.missed > fixed.missed:
+        raise SystemExit(f"adaptive 錯過 {adaptive.missed} 版（固定間隔 {fixed.missed} 版）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""合成資料來源產生器
+
+以固定亂數種子產生與開放資料相同格式的 CSV（同樣的種子與參數產生完全相同的 bytes）：
+
+- 停車場基本資料：CSV_FIELD_MAPPING 的所有欄位
+- 即時車位：ID / AVAILABLECAR，每次同步部分停車場變動，約 1% 為無效值（-9）
+
+可直接輸出為 raw 格式的 API 交換記錄，供 sync-parking / sync-availability --replay 重播。
+
+使用方式：
+    # 1,500 個停車場、一天（288 次同步）的交換記錄
+    uv run python benchmarks/synthetic_feed.py --lots 1500 --snapshots 288 --out /tmp/responses
+"""
+
+import argparse
+import csv
+import io
+import random
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from parking_newtaipei.etl.availability_sync import AVAILABILITY_API_URL, INVALID_VALUE
+from parking_newtaipei.etl.parking_sync import CSV_FIELD_MAPPING, PARKING_LOT_API_URL
+from parking_newtaipei.utils.storage import save_raw_response
+
+# 目前開放資料的停車場數（量測規模以此為 1x）
+BASE_LOTS = 1500
+
+# 合成同步序列的起始時間與間隔
+START_TIME = datetime(2026, 3, 1)
+SYNC_INTERVAL = timedelta(minutes=5)
+
+AREAS = ("板橋區", "三重區", "中和區", "永和區", "新莊區", "新店區", "土城區", "蘆洲區")
+
+
+def parking_id(index: int) -> str:
+    """第 index 個停車場的 ID"""
+    return f"P{index:06d}"
+
+
+def _to_csv(header: list[str], rows: Iterator[list]) -> bytes:
+    """以開放資料相同的格式（UTF-8 BOM、CRLF）輸出 CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+
+def lot_capacities(lots: int, seed: int = 42) -> list[int]:
+    """各停車場的汽車格位數（停車場資料與即時車位共用）"""
+    rng = random.Random(seed)
+    return [rng.randint(10, 500) for _ in range(lots)]
+
+
+def parking_csv(lots: int, seed: int = 42) -> bytes:
+    """產生停車場基本資料 CSV
+
+    Args:
+        lots: 停車場數
+        seed: 亂數種子
+
+    Returns:
+        CSV 內容
+    """
+    rng = random.Random(seed + 1)
+    capacities = lot_capacities(lots, seed)
+
+    def rows() -> Iterator[list]:
+        for i, total_car in enumerate(capacities):
+            values = {
+                "ID": parking_id(i),
+                "AREA": rng.choice(AREAS),
+                "NAME": f"合成停車場{i}",
+                "TYPE": str(rng.randint(1, 3)),
+                "SUMMARY": "平面式，24 小時營業" if i % 3 else "",
+                "ADDRESS": f"新北市測試路{i}號",
+                "TEL": f"(02){rng.randint(20000000, 29999999)}",
+                "PAYEX": "計時30元，當日最高上限200元",
+                "SERVICETIME": "00:00~24:00",
+                "TW97X": f"{290000 + rng.random() * 20000:.3f}",
+                "TW97Y": f"{2760000 + rng.random() * 20000:.3f}",
+                "TOTALCAR": str(total_car),
+                "TOTALMOTOR": str(rng.randint(0, 200)),
+                "TOTALBIKE": "0",
+            }
+            yield [values[field] for field in CSV_FIELD_MAPPING]
+
+    return _to_csv(list(CSV_FIELD_MAPPING), rows())
+
+
+def availability_feed(
+    lots: int,
+    snapshots: int,
+    change_rate: float = 0.3,
+    seed: int = 42,
+) -> Iterator[tuple[datetime, bytes]]:
+    """產生即時車位同步序列
+
+    Args:
+        lots: 停車場數
+        snapshots: 同步次數（每 5 分鐘一次）
+        change_rate: 每次同步變動的停車場比例
+        seed: 亂數種子
+
+    Yields:
+        (同步時間, CSV 內容)
+    """
+    rng = random.Random(seed + 2)
+    capacities = lot_capacities(lots, seed)
+    values = [rng.randint(0, capacity) for capacity in capacities]
+
+    for step in range(snapshots):
+        if step:
+            for i, capacity in enumerate(capacities):
+                if rng.random() < change_rate:
+                    values[i] = min(capacity, max(0, values[i] + rng.randint(-5, 5)))
+        rows = (
+            [parking_id(i), INVALID_VALUE if (i + step) % 97 == 0 else value]
+            for i, value in enumerate(values)
+        )
+        yield START_TIME + SYNC_INTERVAL * step, _to_csv(["ID", "AVAILABLECAR"], rows)
+
+
+def exchange_record(url: str, timestamp: datetime) -> dict:
+    """建立交換記錄（body 另外寫入）"""
+    return {
+        "timestamp": timestamp.isoformat(),
+        "request": {"method": "GET", "url": url, "endpoint": url},
+        "response": {
+            "status_code": 200,
+            "headers": {"content-type": "text/csv; charset=utf-8"},
+            "body": None,
+        },
+    }
+
+
+def write_archive(responses_dir: Path, lots: int, snapshots: int, seed: int = 42) -> int:
+    """將合成資料寫入 raw 格式的 API 交換記錄
+
+    Args:
+        responses_dir: 交換記錄目錄
+        lots: 停車場數
+        snapshots: 即時車位同步次數
+        seed: 亂數種子
+
+    Returns:
+        寫入的交換記錄數
+    """
+    save_raw_response(
+        exchange_record(PARKING_LOT_API_URL, START_TIME),
+        parking_csv(lots, seed),
+        responses_dir,
+        PARKING_LOT_API_URL,
+        START_TIME,
+    )
+    for timestamp, body in availability_feed(lots, snapshots, seed=seed):
+        save_raw_response(
+            exchange_record(AVAILABILITY_API_URL, timestamp),
+            body,
+            responses_dir,
+            AVAILABILITY_API_URL,
+            timestamp,
+        )
+    return snapshots + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="產生合成的 API 交換記錄")
+    parser.add_argument("--lots", type=int, default=BASE_LOTS, help="停車場數")
+    parser.add_argument("--snapshots", type=int, default=288, help="即時車位同步次數")
+    parser.add_argument("--seed", type=int, default=42, help="亂數種子")
+    parser.add_argument("--out", type=Path, required=True, help="交換記錄輸出目錄")
+    args = parser.parse_args()
+
+    count = write_archive(args.out, args.lots, args.snapshots, args.seed)
+    print(f"已寫入 {count:,} 筆交換記錄: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
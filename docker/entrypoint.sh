@@ -28,10 +28,19 @@ echo "時區: ${TZ:-Asia/Taipei}"
 echo "日誌等級: ${LOG_LEVEL:-INFO}"
 echo "日誌保留天數: ${LOG_BACKUP_DAYS:-30}"
 echo ""
+echo "執行模式: ${RUN_MODE:-cron}"
 echo "排程任務:"
 echo "  - 即時車位同步: 每 5 分鐘"
 echo "  - 停車場資料同步: 每天 02:00"
 echo ""
+
+# 常駐模式：由程序內排程取代 cron（SIGTERM 時完成目前作業後結束）
+if [ "${RUN_MODE:-cron}" = "daemon" ]; then
+    echo "$(date '+%Y-%m-%d %H:%M:%S') [INFO] 常駐排程啟動中..."
+    echo "=============================================="
+    exec /app/.venv/bin/python -m parking_newtaipei daemon ${DAEMON_ARGS:-}
+fi
+
 echo "$(date '+%Y-%m-%d %H:%M:%S') [INFO] Cron 服務啟動中..."
 echo "=============================================="
 
@@ -21,7 +21,11 @@
 #   SYNC_TARGET  - 預設目標位置
 #   SSH_KEY      - SSH 私鑰路徑（用於 scp）
 #   AWS_PROFILE  - AWS profile 名稱（用於 awscli）
+#   SYNC_FORCE   - 設為 1 時不比對版本，一律傳輸即時車位檔案
 #
+# 即時車位檔案只在 availability.version.json 的版本號與上次傳輸時不同時才傳輸，
+# 版本檔最後傳輸（讀取端看到新版本時，其他檔案已傳輸完成）。
+# 記錄的是傳輸前讀取的版本號；傳輸期間若有新版本發布，下次執行會再傳輸。
 
 set -euo pipefail
 
@@ -30,11 +34,24 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
 cd "$PROJECT_ROOT"
 
-# 要同步的檔案
+# 要同步的檔案（每次都傳輸）
 FILES=(
     "data/db/parking.db"
+)
+
+# 即時車位檔案（版本變更時才傳輸，版本檔放最後）
+AVAILABILITY_FILES=(
     "data/availability/availability.json"
+    "data/availability/availability.json.gz"
+    "data/availability/availability.version.json"
 )
+VERSION_FILE="data/availability/availability.version.json"
+
+# 上次傳輸的即時車位版本號
+STATE_FILE="data/.sync-data.version"
+
+# 本次選擇檔案時讀取的即時車位版本號（傳輸成功後記錄此值）
+SELECTED_VERSION=""
 
 # 顏色定義
 RED='\033[0;31m'
@@ -75,6 +92,7 @@ TARGET (目標位置):
   SYNC_TARGET  預設目標位置
   SSH_KEY      SSH 私鑰路徑 (用於 scp)
   AWS_PROFILE  AWS profile 名稱 (用於 awscli)
+  SYNC_FORCE   設為 1 時一律傳輸即時車位檔案
 
 範例:
   $0 scp ubuntu@192.168.1.100:/data/parking
@@ -88,6 +106,35 @@ TARGET (目標位置):
 EOF
 }
 
+# 讀取即時車位版本號（版本檔不存在時為空字串）
+read_version() {
+    if [[ -f "$VERSION_FILE" ]]; then
+        grep -o '"version": *[0-9]*' "$VERSION_FILE" | grep -o '[0-9]*$' || true
+    fi
+}
+
+# 依版本號決定是否加入即時車位檔案
+select_files() {
+    local version last
+    version=$(read_version)
+    SELECTED_VERSION="$version"
+    last=$(cat "$STATE_FILE" 2>/dev/null || true)
+
+    if [[ "${SYNC_FORCE:-}" == "1" ]] || [[ -z "$version" ]] || [[ "$version" != "$last" ]]; then
+        FILES+=("${AVAILABILITY_FILES[@]}")
+        log_info "即時車位版本: ${last:-無} -> ${version:-未知}"
+    else
+        log_info "即時車位版本未變更 ($version)，跳過即時車位檔案"
+    fi
+}
+
+# 記錄已傳輸的即時車位版本號（不重新讀取版本檔，避免記錄傳輸期間才發布的版本）
+save_version() {
+    if [[ -n "$SELECTED_VERSION" ]]; then
+        echo "$SELECTED_VERSION" > "$STATE_FILE"
+    fi
+}
+
 # 檢查檔案是否存在
 check_files() {
     local missing=0
@@ -196,7 +243,8 @@ main() {
         exit 1
     fi
 
-    # 檢查檔案
+    # 選擇並檢查檔案
+    select_files
     check_files
 
     # 根據方法執行同步
@@ -217,6 +265,7 @@ main() {
             ;;
     esac
 
+    save_version
     log_info "同步完成！"
 }
 
@@ -1,5 +1,6 @@
 """API 客戶端模組"""
 
 from .client import APIClient
+from .validators import ValidatorStore
 
-__all__ = ["APIClient"]
+__all__ = ["APIClient", "ValidatorStore"]
@@ -3,6 +3,9 @@
 自動保存每次 API 呼叫的 request 和 response。
 """
 
+import hashlib
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -10,8 +13,111 @@ from urllib.parse import urljoin
 
 import httpx
 
+from parking_newtaipei.api.validators import ValidatorStore
+from parking_newtaipei.utils.archive_writer import ArchiveWriter, QueuedStreamWriter
 from parking_newtaipei.utils.logger import get_logger
-from parking_newtaipei.utils.storage import save_response
+from parking_newtaipei.utils.storage import (
+    ARCHIVE_FORMAT_JSON,
+    DEFAULT_COMPRESS_LEVEL,
+    RawResponseWriter,
+    ResponseStreamWriter,
+)
+from parking_newtaipei.utils.timing import PhaseTimer
+
+# 串流下載每次讀取的 bytes 數
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ResponseStream:
+    """串流下載中的 response
+
+    iter_bytes() 讀取 body 的同時計算 SHA256 並寫入交換記錄，只讀取一次。
+    """
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        writer: ResponseStreamWriter | RawResponseWriter | QueuedStreamWriter | None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        timer: PhaseTimer | None = None,
+    ):
+        """初始化串流 response
+
+        Args:
+            response: 以 stream 模式開啟的 HTTP response
+            writer: 交換記錄寫入器，None 表示不儲存
+            chunk_size: 每次讀取的 bytes 數
+            timer: 階段計時器（讀取計入 download、交換記錄計入 archive）
+        """
+        self.response = response
+        self.size = 0
+        self.complete = False
+        self._failed = False
+        self._discarded = False
+        self._writer = writer
+        self._hasher = hashlib.sha256()
+        self._chunks = response.iter_bytes(chunk_size)
+        self._timer = timer or PhaseTimer()
+
+    @property
+    def not_modified(self) -> bool:
+        """伺服器是否回應 304 Not Modified（內容與上次相同，無 body）"""
+        return self.response.status_code == httpx.codes.NOT_MODIFIED
+
+    @property
+    def sha256(self) -> str:
+        """已讀取內容的 SHA256 雜湊值（16 進位字串）"""
+        return self._hasher.hexdigest()
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """逐段讀取 response body
+
+        Yields:
+            bytes 區塊
+        """
+        try:
+            yield from self._timer.iterate("download", self._read())
+        except Exception:
+            self._failed = True
+            raise
+        self.complete = True
+
+    def _read(self) -> Iterator[bytes]:
+        """讀取 body 區塊，同時計算雜湊值並寫入交換記錄"""
+        for chunk in self._chunks:
+            self.size += len(chunk)
+            self._hasher.update(chunk)
+            if self._writer is not None:
+                with self._timer.span("archive"):
+                    self._writer.write(chunk)
+            yield chunk
+
+    def discard(self) -> None:
+        """不保留本次的交換記錄（例如內容與上次相同），於 finish() 時刪除"""
+        self._discarded = True
+
+    def finish(self) -> Path | None:
+        """讀完剩餘內容並關閉交換記錄
+
+        內容未完整讀取（例如下載中斷）或已呼叫 discard() 時刪除交換記錄。
+
+        Returns:
+            交換記錄檔案路徑，若未儲存則為 None
+        """
+        if not self.complete and not self._failed:
+            try:
+                for _ in self.iter_bytes():
+                    pass
+            except httpx.HTTPError:
+                pass
+
+        if self._writer is None:
+            return None
+        with self._timer.span("archive"):
+            if not self.complete or self._discarded:
+                self._writer.abort()
+                return None
+            return self._writer.close()
 
 
 class APIClient:
@@ -26,22 +132,38 @@ class APIClient:
         responses_dir: Path,
         timeout: float = 30.0,
         auto_save: bool = True,
+        validator_store: ValidatorStore | None = None,
+        archive_compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+        archive_format: str = ARCHIVE_FORMAT_JSON,
+        transport: httpx.BaseTransport | None = None,
     ):
         """初始化 API 客戶端
 
+        交換記錄由背景執行緒寫入，close() 時等待全部寫入完成。
+
         Args:
             base_url: API 基底 URL
             responses_dir: response 備份目錄
             timeout: 請求逾時時間（秒）
             auto_save: 是否自動儲存 request/response
+            validator_store: ETag / Last-Modified 儲存，None 表示不發送條件式請求
+            archive_compresslevel: 交換記錄的 gzip 壓縮等級（1-9）
+            archive_format: 交換記錄格式（json 或 raw）
+            transport: httpx transport（例如重播交換記錄的 ReplayTransport），None 表示連線網路
         """
         self.base_url = base_url.rstrip("/")
         self.responses_dir = responses_dir
         self.timeout = timeout
         self.auto_save = auto_save
+        self.validator_store = validator_store
         self.logger = get_logger()
 
-        self._client = httpx.Client(timeout=timeout)
+        self._client = httpx.Client(timeout=timeout, transport=transport)
+        self._archive = (
+            ArchiveWriter(archive_compresslevel, archive_format=archive_format)
+            if auto_save
+            else None
+        )
 
     def __enter__(self) -> "APIClient":
         return self
@@ -50,8 +172,15 @@ class APIClient:
         self.close()
 
     def close(self) -> None:
-        """關閉 HTTP 客戶端"""
+        """關閉 HTTP 客戶端，並等待交換記錄寫入完成"""
         self._client.close()
+        if self._archive is not None:
+            self._archive.close()
+
+    def flush_archive(self) -> None:
+        """等待目前已送出的交換記錄寫入完成"""
+        if self._archive is not None:
+            self._archive.flush()
 
     def _build_url(self, endpoint: str) -> str:
         """建立完整 URL
@@ -66,15 +195,15 @@ class APIClient:
             return endpoint
         return urljoin(self.base_url + "/", endpoint.lstrip("/"))
 
-    def _save_exchange(
+    def _exchange_data(
         self,
         endpoint: str,
         method: str,
         request_data: dict[str, Any] | None,
         response: httpx.Response,
         timestamp: datetime,
-    ) -> Path | None:
-        """儲存 request/response 交換記錄
+    ) -> dict[str, Any]:
+        """建立交換記錄（不含 response body）
 
         Args:
             endpoint: API endpoint
@@ -84,18 +213,9 @@ class APIClient:
             timestamp: 請求時間
 
         Returns:
-            儲存的檔案路徑，若未儲存則為 None
+            交換記錄字典，response.body 為 None
         """
-        if not self.auto_save:
-            return None
-
-        # 嘗試解析 response body 為 JSON
-        try:
-            response_body = response.json()
-        except (ValueError, httpx.DecodingError):
-            response_body = response.text
-
-        exchange_data = {
+        return {
             "timestamp": timestamp.isoformat(),
             "request": {
                 "method": method,
@@ -107,18 +227,45 @@ class APIClient:
             "response": {
                 "status_code": response.status_code,
                 "headers": dict(response.headers),
-                "body": response_body,
+                "body": None,
             },
         }
 
-        filepath = save_response(
-            data=exchange_data,
+    def _save_exchange(
+        self,
+        endpoint: str,
+        method: str,
+        request_data: dict[str, Any] | None,
+        response: httpx.Response,
+        timestamp: datetime,
+    ) -> Path | None:
+        """送出 request/response 交換記錄至背景寫入
+
+        body 的解析、序列化與壓縮皆在背景執行緒進行。
+
+        Args:
+            endpoint: API endpoint
+            method: HTTP 方法
+            request_data: 請求資料
+            response: HTTP response 物件
+            timestamp: 請求時間
+
+        Returns:
+            交換記錄檔案路徑（背景寫入完成後才會存在），若未儲存則為 None
+        """
+        if self._archive is None:
+            return None
+
+        filepath = self._archive.save(
+            data=self._exchange_data(endpoint, method, request_data, response, timestamp),
+            body=response.content,
+            encoding=response.encoding,
             output_dir=self.responses_dir,
             endpoint=endpoint,
             timestamp=timestamp,
         )
 
-        self.logger.debug(f"已儲存 API 交換記錄: {filepath}")
+        self.logger.debug(f"已送出 API 交換記錄: {filepath}")
         return filepath
 
     def get(
@@ -154,6 +301,81 @@ class APIClient:
 
         return response
 
+    @contextmanager
+    def stream_get(
+        self,
+        endpoint: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        conditional: bool = True,
+        timer: PhaseTimer | None = None,
+    ) -> Iterator[ResponseStream]:
+        """以串流方式發送 GET 請求
+
+        body 不會整個載入記憶體；讀取 body 時同步計算雜湊值，並將區塊交給背景執行緒寫入交換記錄。
+        設定 validator_store 時會附帶上次記錄的驗證值，伺服器回應 304 時
+        stream.not_modified 為 True，且不儲存交換記錄。處理成功後需呼叫
+        remember_validators() 記錄新的驗證值。
+
+        Args:
+            endpoint: API endpoint
+            params: 查詢參數
+            headers: 額外的 HTTP headers
+            chunk_size: 每次讀取的 bytes 數
+            conditional: 是否發送條件式請求（validator_store 未設定時無作用）
+            timer: 階段計時器（連線與讀取計入 download、交換記錄計入 archive）
+
+        Yields:
+            串流 response
+        """
+        timestamp = datetime.now()
+        url = self._build_url(endpoint)
+
+        if conditional and self.validator_store is not None:
+            request_url = str(httpx.URL(url, params=params))
+            headers = {**self.validator_store.conditional_headers(request_url), **(headers or {})}
+
+        self.logger.info(f"GET {url}（串流）")
+
+        timer = timer or PhaseTimer()
+        with ExitStack() as stack:
+            with timer.span("download"):
+                response = stack.enter_context(
+                    self._client.stream("GET", url, params=params, headers=headers)
+                )
+
+            writer = None
+            if self._archive is not None and response.status_code != httpx.codes.NOT_MODIFIED:
+                with timer.span("archive"):
+                    writer = self._archive.open_stream(
+                        data=self._exchange_data(
+                            endpoint, "GET", {"params": params}, response, timestamp
+                        ),
+                        output_dir=self.responses_dir,
+                        endpoint=endpoint,
+                        timestamp=timestamp,
+                    )
+
+            stream = ResponseStream(response, writer, chunk_size, timer)
+            try:
+                yield stream
+            finally:
+                with timer.span("download"):
+                    filepath = stream.finish()
+                if filepath is not None:
+                    self.logger.debug(f"已送出 API 交換記錄: {filepath}")
+
+    def remember_validators(self, stream: ResponseStream) -> None:
+        """記錄已成功處理的 response 驗證值，供下次條件式請求使用
+
+        Args:
+            stream: stream_get() 取得的串流 response
+        """
+        if self.validator_store is None or stream.not_modified:
+            return
+        self.validator_store.update(str(stream.response.request.url), stream.response)
+
     def post(
         self,
         endpoint: str,
@@ -0,0 +1,174 @@
+"""交換記錄重播模組
+
+以 httpx transport 的形式，由 API 交換記錄（json 或 raw 格式）回應請求，不連線網路：
+
+- 依序模式：同一 endpoint 的請求依時間順序取得下一筆交換記錄，可重播整段期間的資料
+- 時間點模式：一律回應指定時間（含）之前最後一筆交換記錄
+
+可選擇加入固定延遲與隨機錯誤，模擬網路狀況。交換記錄以 endpoint（不含查詢參數的 URL）查詢，
+因此只能重播 APIClient 以完整 URL 發出的請求（base_url 為空字串，與同步指令相同）。
+"""
+
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.storage import RAW_SUFFIX, find_responses, load_exchange, read_index
+
+# 重播時保留的 response headers（body 已解壓縮，不保留 content-encoding / content-length）
+REPLAY_HEADERS = ("content-type", "etag", "last-modified", "date")
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """由交換記錄回應請求的 httpx transport"""
+
+    def __init__(
+        self,
+        responses_dir: Path,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        at: datetime | None = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int | None = None,
+        seed: int = 0,
+    ):
+        """初始化重播 transport
+
+        Args:
+            responses_dir: 交換記錄目錄
+            start: 依序模式的起始時間（含），None 表示最早
+            end: 依序模式的結束時間（含），None 表示最晚
+            at: 指定時間點模式（設定時忽略 start / end）
+            latency: 每次請求的延遲（秒）
+            error_rate: 注入錯誤的機率（0-1）
+            error_status: 注入錯誤時回應的 HTTP 狀態碼，None 表示拋出連線錯誤
+            seed: 注入錯誤使用的亂數種子
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"錯誤機率需介於 0 與 1: {error_rate}")
+
+        self.responses_dir = responses_dir
+        self.start = start
+        self.end = end
+        self.at = at
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.logger = get_logger()
+        self._rng = random.Random(seed)
+        self._queues: dict[str, list[Path]] = {}
+        self._indexes: dict[Path, dict[str, dict[str, Any]]] = {}
+
+    def _queue(self, endpoint: str) -> list[Path]:
+        """取得 endpoint 尚未重播的交換記錄（依序模式，最新的在前，由尾端取出）"""
+        queue = self._queues.get(endpoint)
+        if queue is None:
+            queue = self._queues[endpoint] = find_responses(
+                self.responses_dir, start=self.start, end=self.end, endpoint=endpoint
+            )
+        return queue
+
+    def _index_entry(self, path: Path) -> dict[str, Any] | None:
+        """取得 raw 格式交換記錄的索引記錄（每個月份目錄的索引只讀取一次）
+
+        找不到時重新讀取該月份的索引一次（時間點模式下索引可能於重播期間增加）。
+
+        Args:
+            path: 交換記錄路徑
+
+        Returns:
+            索引記錄，json 格式為 None
+        """
+        if not path.name.endswith(RAW_SUFFIX):
+            return None
+        index = self._indexes.get(path.parent)
+        if index is None or path.name not in index:
+            index = self._indexes[path.parent] = read_index(path.parent)
+        return index.get(path.name)
+
+    def pending(self, endpoint: str) -> int:
+        """endpoint 尚未重播的交換記錄數（時間點模式固定為可重播時 1、否則 0）
+
+        Args:
+            endpoint: 完整 URL（不含查詢參數）
+
+        Returns:
+            交換記錄數
+        """
+        if self.at is not None:
+            return int(self._select(endpoint) is not None)
+        return len(self._queue(endpoint))
+
+    def next_timestamp(self, endpoint: str) -> datetime | None:
+        """endpoint 下一筆要重播的交換記錄時間
+
+        Args:
+            endpoint: 完整 URL（不含查詢參數）
+
+        Returns:
+            記錄時間（由檔名取得，精確至秒），沒有可重播的交換記錄時為 None
+        """
+        path = self._select(endpoint)
+        if path is None:
+            return None
+        return datetime.strptime(path.name[:15], "%Y%m%d_%H%M%S")
+
+    def _select(self, endpoint: str, consume: bool = False) -> Path | None:
+        """選擇要重播的交換記錄
+
+        Args:
+            endpoint: 完整 URL（不含查詢參數）
+            consume: 依序模式下是否取出（下次請求取得下一筆）
+
+        Returns:
+            交換記錄路徑，沒有可重播者時為 None
+        """
+        if self.at is not None:
+            paths = find_responses(self.responses_dir, end=self.at, endpoint=endpoint)
+            return paths[0] if paths else None
+
+        queue = self._queue(endpoint)
+        if not queue:
+            return None
+        return queue.pop() if consume else queue[-1]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = str(request.url.copy_with(query=None))
+        path = self._select(endpoint, consume=True)
+
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        # 注入錯誤時該筆交換記錄視同遺漏（已取出），重播不會卡在同一筆
+        if self.error_rate and self._rng.random() < self.error_rate:
+            if self.error_status is None:
+                raise httpx.ConnectError("重播注入的連線錯誤", request=request)
+            return httpx.Response(self.error_status, request=request)
+
+        if path is None:
+            self.logger.warning(f"沒有可重播的交換記錄: {endpoint}")
+            return httpx.Response(httpx.codes.NOT_FOUND, request=request)
+
+        data, body = load_exchange(path, self._index_entry(path))
+        recorded = data["response"]
+        headers = {
+            key: value
+            for key, value in recorded["headers"].items()
+            if key.lower() in REPLAY_HEADERS
+        }
+
+        # 與伺服器相同：ETag 相符時回應 304（不含 body）
+        etag = headers.get("etag") or headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(httpx.codes.NOT_MODIFIED, headers=headers, request=request)
+
+        self.logger.debug(f"重播交換記錄: {path.name}")
+        return httpx.Response(
+            recorded["status_code"], headers=headers, content=body, request=request
+        )
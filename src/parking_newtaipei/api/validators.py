@@ -0,0 +1,92 @@
+"""HTTP 快取驗證值儲存模組
+
+記錄每個 URL 最後一次成功處理的 ETag / Last-Modified，
+用於發送條件式請求（If-None-Match / If-Modified-Since）。
+"""
+
+import json
+import os
+from pathlib import Path
+
+import httpx
+
+from parking_newtaipei.utils.logger import get_logger
+
+
+class ValidatorStore:
+    """以 JSON 檔案保存的 URL 驗證值
+
+    檔案格式：{url: {"etag": ..., "last_modified": ...}}
+    """
+
+    def __init__(self, path: Path):
+        """初始化驗證值儲存
+
+        Args:
+            path: JSON 檔案路徑（不存在時視為空）
+        """
+        self.path = path
+        self.logger = get_logger()
+        self._data: dict[str, dict[str, str]] | None = None
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        """載入（並快取）檔案內容"""
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._data = {}
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"驗證值檔案無法讀取，視為空: {self.path}（{e}）")
+                self._data = {}
+        return self._data
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """取得條件式請求的 headers
+
+        Args:
+            url: 完整 URL（含查詢參數）
+
+        Returns:
+            If-None-Match / If-Modified-Since headers，無記錄時為空字典
+        """
+        validators = self._load().get(url, {})
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def update(self, url: str, response: httpx.Response) -> None:
+        """記錄 response 的驗證值（response 未提供時清除該 URL 的記錄）
+
+        以暫存檔 + rename 寫入，避免中斷時留下不完整的檔案。
+
+        Args:
+            url: 完整 URL（含查詢參數）
+            response: 已成功處理的 HTTP response
+        """
+        validators = {
+            key: value
+            for key, value in (
+                ("etag", response.headers.get("ETag")),
+                ("last_modified", response.headers.get("Last-Modified")),
+            )
+            if value
+        }
+
+        # 重新讀取檔案，避免覆蓋其他程序寫入的 URL
+        self._data = None
+        data = self._load()
+        if data.get(url, {}) == validators:
+            return
+        if validators:
+            data[url] = validators
+        else:
+            data.pop(url, None)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,235 @@
+"""上游更新週期學習模組
+
+依每次同步時內容是否變更，估計上游發布新資料的週期與相位，並據以安排下次同步：
+
+- 學習中（變更次數不足，或尚無相位資訊）：以固定間隔同步
+- 已估計週期：於預期更新時間之後 margin 同步；預期更新時間的不確定區間過寬時，
+  先於區間中點探測一次，每個週期將區間縮小一半
+- 同步時內容未變更（上游延遲或停止更新，例如夜間）：由 precision 起重試，之後每次未變更
+  間隔加倍，但不超過下一個預期更新區間與半個週期；再次觀察到變更後恢復對齊同步
+
+兩次同步之間最多只有一次上游更新時不會錯過版本：週期估計有誤差時，長時間停止更新期間
+依週期外推的預期時間會逐漸偏移，因此未變更時至少每半個週期同步一次。
+
+每次變更只知道發生在「上次未變更的同步」與「本次同步」之間，
+相位以最近各次變更區間的交集估計；交集為空（上游時間不固定）時只使用較新的變更。
+"""
+
+import bisect
+import statistics
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+# 估計週期所需的最少變更次數
+MIN_CHANGES = 4
+
+# 保留的變更記錄數
+HISTORY = 48
+
+# 估計相位使用的最近變更數
+PHASE_WINDOW = 12
+
+# 間隔超過週期中位數此倍數者視為停止更新的空窗，不計入週期
+GAP_FACTOR = 2.5
+
+
+@dataclass
+class Change:
+    """一次觀察到的變更：發生於 (after, seen] 之間"""
+
+    after: datetime  # 上次未變更的同步時間
+    seen: datetime  # 觀察到變更的同步時間
+
+
+@dataclass
+class CadenceEstimate:
+    """上游更新週期的估計值"""
+
+    period: timedelta
+    anchor: datetime  # 最近一次變更的觀察時間，相位以此為基準
+    earliest: timedelta  # 更新時間相對於 anchor + n * period 的下限（不含）
+    latest: timedelta  # 更新時間相對於 anchor + n * period 的上限（含，<= 0）
+
+    @property
+    def uncertainty(self) -> timedelta:
+        """更新時間不確定區間的寬度"""
+        return self.latest - self.earliest
+
+    def window(self, now: datetime) -> tuple[datetime, datetime]:
+        """下一個尚未結束的預期更新區間
+
+        Args:
+            now: 目前時間
+
+        Returns:
+            (區間起點, 區間終點)，終點晚於 now
+        """
+        cycles = max(1, (now - self.anchor - self.latest) // self.period + 1)
+        base = self.anchor + self.period * cycles
+        return base + self.earliest, base + self.latest
+
+
+def _offset(moment: datetime, anchor: datetime, period: timedelta) -> timedelta:
+    """moment 相對於 anchor + n * period 的位移，範圍 [-period/2, period/2)"""
+    return (moment - anchor + period / 2) % period - period / 2
+
+
+@dataclass
+class AdaptivePoller:
+    """依上游更新週期安排同步時間
+
+    Attributes:
+        interval: 學習中的固定同步間隔
+        max_interval: 退避的間隔上限（另受下一個預期更新區間與半個週期限制）
+        min_interval: 兩次同步的最短間隔
+        margin: 預期更新時間之後的等待時間
+        precision: 預期更新區間縮小至此寬度後不再探測，亦為未變更時重試的起始間隔
+    """
+
+    interval: timedelta = timedelta(minutes=5)
+    max_interval: timedelta = timedelta(hours=1)
+    min_interval: timedelta = timedelta(seconds=30)
+    margin: timedelta = timedelta(seconds=30)
+    precision: timedelta = timedelta(minutes=1)
+    changes: deque[Change] = field(default_factory=lambda: deque(maxlen=HISTORY))
+    last_poll: datetime | None = None
+    misses: int = 0  # 連續未變更的同步次數（不含探測）
+    _probe: datetime | None = field(default=None, init=False, repr=False)  # 已安排的探測時間
+
+    def observe(self, polled_at: datetime, changed: bool) -> None:
+        """記錄一次同步的結果
+
+        Args:
+            polled_at: 同步（送出請求）的時間
+            changed: 內容是否與上次同步不同
+        """
+        probing = self._probe is not None
+        self._probe = None
+        if changed:
+            if self.last_poll is not None:
+                self.changes.append(Change(after=self.last_poll, seen=polled_at))
+            self.misses = 0
+        elif not probing:
+            self.misses += 1
+        self.last_poll = polled_at
+
+    def estimate(self) -> CadenceEstimate | None:
+        """估計上游的更新週期與相位
+
+        Returns:
+            估計值，變更次數不足時為 None
+        """
+        if len(self.changes) < MIN_CHANGES:
+            return None
+
+        changes = list(self.changes)
+        gaps = [b.seen - a.seen for a, b in zip(changes, changes[1:], strict=False)]
+        typical = statistics.median(gaps)
+        # 同步間隔短於週期時每次更新都會被觀察到，平均間隔即為週期；排除停止更新的空窗
+        regular = [gap for gap in gaps if gap <= typical * GAP_FACTOR]
+        period = sum(regular, timedelta(0)) / len(regular)
+        if period <= timedelta(0):
+            return None
+
+        # 由新到舊取各次變更區間的交集，交集為空時停止
+        anchor = changes[-1].seen
+        earliest, latest = -period, timedelta(0)
+        for change in reversed(changes[-PHASE_WINDOW:]):
+            if change.seen - change.after >= period:
+                continue  # 區間涵蓋整個週期，沒有相位資訊
+            high = _offset(change.seen, anchor, period)
+            low = high - (change.seen - change.after)
+            if max(earliest, low) >= min(latest, high):
+                break
+            earliest, latest = max(earliest, low), min(latest, high)
+
+        return CadenceEstimate(period=period, anchor=anchor, earliest=earliest, latest=latest)
+
+    def next_poll(self, now: datetime) -> datetime:
+        """安排下次同步時間
+
+        Args:
+            now: 目前時間（上次同步完成後）
+
+        Returns:
+            下次同步時間
+        """
+        earliest = now if self.last_poll is None else max(now, self.last_poll + self.min_interval)
+
+        estimate = self.estimate()
+        if estimate is None or estimate.uncertainty >= estimate.period:
+            # 尚未估計週期或相位時不知道上游何時更新，拉長間隔可能錯過版本
+            return max(earliest, now + self.interval)
+
+        if self.misses:
+            backoff = now + min(self.max_interval, self.precision * 2 ** min(self.misses - 1, 16))
+            # 上游恢復更新時第一個版本可能晚於預期（週期誤差累積），退避不可跨過下一個版本
+            _, end = estimate.window(now)
+            return max(earliest, min(backoff, end + self.margin, now + estimate.period / 2))
+
+        start, end = estimate.window(now)
+        if estimate.uncertainty > self.precision:
+            probe = start + estimate.uncertainty / 2
+            if probe > earliest and (self.last_poll is None or self.last_poll < start):
+                self._probe = probe
+                return probe
+        return max(earliest, end + self.margin)
+
+
+@dataclass
+class SimulationResult:
+    """輪詢策略的模擬結果"""
+
+    fetches: int = 0
+    wasted: int = 0  # 內容未變更的下載次數
+    missed: int = 0  # 被下一版覆蓋而從未下載到的版本數
+    lags: list[float] = field(default_factory=list)  # 各版本發布至下載的秒數
+
+    @property
+    def wasted_ratio(self) -> float:
+        """未變更下載佔所有下載的比例"""
+        return self.wasted / self.fetches if self.fetches else 0.0
+
+
+def simulate(
+    published: Iterable[datetime],
+    next_poll: Callable[[datetime], datetime],
+    observe: Callable[[datetime, bool], None],
+    start: datetime,
+    end: datetime,
+) -> SimulationResult:
+    """以上游的發布時間模擬輪詢策略
+
+    Args:
+        published: 上游各版本的發布時間
+        next_poll: 由目前時間取得下次同步時間（例如 AdaptivePoller.next_poll）
+        observe: 回報同步時間與內容是否變更（例如 AdaptivePoller.observe）
+        start: 模擬起始時間（此時已持有 start 之前最新的版本）
+        end: 模擬結束時間
+
+    Returns:
+        模擬結果
+    """
+    times = sorted(published)
+    result = SimulationResult()
+    seen = bisect.bisect_right(times, start)  # 已下載的版本數
+    now = start
+
+    while True:
+        now = next_poll(now)
+        if now > end:
+            break
+        available = bisect.bisect_right(times, now)
+        result.fetches += 1
+        changed = available > seen
+        if changed:
+            result.missed += available - seen - 1
+            result.lags.append((now - times[available - 1]).total_seconds())
+            seen = available
+        else:
+            result.wasted += 1
+        observe(now, changed)
+
+    return result
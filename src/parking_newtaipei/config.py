@@ -8,6 +8,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from parking_newtaipei.utils.storage import DEFAULT_COMPRESS_LEVEL
+
 # 載入 .env 檔案
 load_dotenv()
 
@@ -22,6 +24,29 @@ AVAILABILITY_DB_DIR = Path(
 )  # 即時車位資料庫（每月一個檔案）
 RESPONSES_DIR = DATA_DIR / "responses"
 
+# 即時車位儲存模式：full（每次寫入全部）或 delta（只寫入變動），僅影響新建立的月份檔案
+AVAILABILITY_STORAGE_MODE = os.getenv("AVAILABILITY_STORAGE_MODE", "full").lower()
+
+# 即時車位資料庫結構版本：1（TEXT / ISO 8601）或 2（整數 key / epoch，WITHOUT ROWID），
+# 僅影響新建立的月份檔案
+AVAILABILITY_SCHEMA_VERSION = int(os.getenv("AVAILABILITY_SCHEMA_VERSION", "1"))
+
+# 發布 availability.json 時是否另外依行政區分檔輸出（availability_area/<行政區>.json）
+AVAILABILITY_JSON_SPLIT_AREA = os.getenv("AVAILABILITY_JSON_SPLIT_AREA", "false").lower() in (
+    "1", "true", "yes",
+)
+
+# 每月第一次同步時是否自動壓實已結束的月份資料庫（見 compact-month 指令）
+AVAILABILITY_AUTO_COMPACT = os.getenv("AVAILABILITY_AUTO_COMPACT", "false").lower() in (
+    "1", "true", "yes",
+)
+
+# 壓實時輸出 gzip 冷備份的目錄（未設定則不輸出）
+AVAILABILITY_COLD_DIR = os.getenv("AVAILABILITY_COLD_DIR", "")
+
+# 壓實已結束月份時是否一併建立車位立方體（需要 numpy，見 build-cube 指令）
+AVAILABILITY_CUBE = os.getenv("AVAILABILITY_CUBE", "false").lower() in ("1", "true", "yes")
+
 # 日誌目錄（支援環境變數覆蓋）
 LOGS_DIR = Path(os.getenv("LOGS_DIR", str(PROJECT_ROOT / "logs")))
 
@@ -31,6 +56,26 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 DB_PATH = Path(os.getenv("DB_PATH", str(DB_DIR / "parking.db")))
 RESPONSES_PATH = Path(os.getenv("RESPONSES_PATH", str(RESPONSES_DIR)))
 
+# API 交換記錄的 gzip 壓縮等級（1 最快、9 最小），由背景執行緒寫入
+ARCHIVE_COMPRESS_LEVEL = int(os.getenv("ARCHIVE_COMPRESS_LEVEL", str(DEFAULT_COMPRESS_LEVEL)))
+
+# API 交換記錄格式：raw（body 原樣壓縮 + 月份索引，可依日打包）或 json（整筆記錄序列化為 JSON）
+ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT", "raw").lower()
+
+# API 交換記錄重播目錄（設定時 sync-parking / sync-availability 由交換記錄重播，不連線網路）
+API_REPLAY_DIR = os.getenv("API_REPLAY_DIR", "")
+
+# HTTP 驗證值（ETag / Last-Modified）檔案，用於條件式下載
+HTTP_VALIDATORS_PATH = Path(
+    os.getenv("HTTP_VALIDATORS_PATH", str(DB_DIR / "http_validators.json"))
+)
+
+# 同步執行記錄（各階段耗時、下載 bytes、寫入筆數），供 runs 指令統計
+SYNC_RUNS_DB_PATH = Path(os.getenv("SYNC_RUNS_DB_PATH", str(DB_DIR / "sync_runs.db")))
+
+# SQLite 常駐連線模式（WAL + 調校過的 PRAGMA，連線於程序內重複使用）
+DB_PERSISTENT = os.getenv("DB_PERSISTENT", "false").lower() in ("1", "true", "yes")
+
 # 日誌設定
 LOG_FILE = LOGS_DIR / "app.log"
 LOG_BACKUP_DAYS = int(os.getenv("LOG_BACKUP_DAYS", "90"))  # 日誌保留天數
@@ -53,8 +98,18 @@ def get_config_summary() -> dict:
         "api_base_url": API_BASE_URL or "(未設定)",
         "log_level": LOG_LEVEL,
         "db_path": str(DB_PATH),
+        "db_persistent": DB_PERSISTENT,
         "availability_db_dir": str(AVAILABILITY_DB_DIR),
+        "availability_storage_mode": AVAILABILITY_STORAGE_MODE,
+        "availability_schema_version": AVAILABILITY_SCHEMA_VERSION,
+        "availability_json_split_area": AVAILABILITY_JSON_SPLIT_AREA,
+        "availability_auto_compact": AVAILABILITY_AUTO_COMPACT,
+        "availability_cold_dir": AVAILABILITY_COLD_DIR or "(未設定)",
+        "availability_cube": AVAILABILITY_CUBE,
         "responses_path": str(RESPONSES_PATH),
+        "archive_compress_level": ARCHIVE_COMPRESS_LEVEL,
+        "archive_format": ARCHIVE_FORMAT,
+        "http_validators_path": str(HTTP_VALIDATORS_PATH),
         "log_file": str(LOG_FILE),
         "log_backup_days": LOG_BACKUP_DAYS,
         "healthcheck_parking_url": HEALTHCHECK_PARKING_URL or "(未設定)",
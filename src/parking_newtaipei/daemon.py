@@ -0,0 +1,218 @@
+"""常駐排程模組
+
+在同一個程序內依對齊的時間點（例如每 5 分鐘、每天 02:00）執行同步作業，
+取代每次由 cron 啟動新程序；HTTP 連線池與資料庫連線在各次執行間重複使用。
+指定 poller 的作業改依上游更新週期安排時間（見 cadence 模組）。
+"""
+
+import random
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from parking_newtaipei.cadence import AdaptivePoller
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.process_lock import ProcessLock, ProcessLockAcquireError
+
+
+def next_aligned_tick(
+    now: datetime,
+    interval: timedelta,
+    offset: timedelta = timedelta(0),
+) -> datetime:
+    """計算下一個對齊的排程時間點
+
+    時間點為當地午夜起算 offset + n * interval，且嚴格晚於 now。
+
+    Args:
+        now: 目前時間
+        interval: 排程間隔（需能整除一天，或為一天的整數倍）
+        offset: 相對於午夜的位移
+
+    Returns:
+        下一個排程時間點
+    """
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tick = midnight + offset
+    if tick > now:
+        # 往前找到 now 之前的第一個時間點
+        tick -= interval * ((tick - now) // interval + 1)
+    return tick + interval * ((now - tick) // interval + 1)
+
+
+@dataclass
+class Job:
+    """排程作業"""
+
+    name: str
+    run: Callable[[], object]  # 回傳值若有非空的 errors 屬性視為失敗
+    interval: timedelta
+    offset: timedelta = timedelta(0)
+    jitter: float = 0.0  # 最大隨機延遲秒數，避免與其他客戶端同時請求
+    lock_name: str | None = None  # 與 CLI 指令共用的進程鎖名稱
+    poller: AdaptivePoller | None = None  # 指定時依上游更新週期安排，不使用對齊的時間點
+    next_tick: datetime | None = None
+    runs: int = 0
+    failures: int = 0
+    last_latency: float | None = None  # 排程時間點至執行完成的秒數
+    latencies: list[float] = field(default_factory=list)
+
+
+class Scheduler:
+    """常駐排程器
+
+    單執行緒依序執行到期的作業；stop() 可由 signal handler 呼叫，
+    正在執行的作業會完成後才結束。
+    """
+
+    # 保留的延遲樣本數（用於統計）
+    LATENCY_SAMPLES = 288
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now):
+        """初始化排程器
+
+        Args:
+            clock: 取得目前時間的函式（測試用）
+        """
+        self.jobs: list[Job] = []
+        self.clock = clock
+        self.logger = get_logger()
+        self._stop = threading.Event()
+
+    def add_job(self, job: Job) -> None:
+        """加入排程作業
+
+        Args:
+            job: 排程作業
+        """
+        job.next_tick = next_aligned_tick(self.clock(), job.interval, job.offset)
+        self.jobs.append(job)
+        self.logger.info(f"[{job.name}] 下次執行: {job.next_tick.isoformat(timespec='seconds')}")
+
+    def stop(self) -> None:
+        """要求排程器在目前作業完成後結束"""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        """是否已要求結束"""
+        return self._stop.is_set()
+
+    def _run_job(self, job: Job, tick: datetime) -> object | None:
+        """執行作業並記錄延遲
+
+        Args:
+            job: 排程作業
+            tick: 本次排程時間點
+
+        Returns:
+            作業的回傳值；執行失敗、結果含錯誤或跳過執行時為 None
+        """
+        result = None
+        lock = ProcessLock(job.lock_name) if job.lock_name else None
+        try:
+            if lock is None:
+                result = job.run()
+            else:
+                with lock.acquire():
+                    result = job.run()
+            # 同步結果含錯誤（例如下載失敗）時同樣計為失敗
+            if getattr(result, "errors", None):
+                job.failures += 1
+                result = None
+        except ProcessLockAcquireError:
+            self.logger.warning(f"[{job.name}] 跳過執行：已有進程正在執行 {job.lock_name}")
+            return None
+        except Exception as e:
+            job.failures += 1
+            self.logger.exception(f"[{job.name}] 執行失敗: {e}")
+
+        job.runs += 1
+        job.last_latency = (self.clock() - tick).total_seconds()
+        job.latencies = (job.latencies + [job.last_latency])[-self.LATENCY_SAMPLES:]
+        self.logger.info(
+            f"[{job.name}] 完成（排程時間 {tick.isoformat(timespec='seconds')}，"
+            f"延遲 {job.last_latency:.2f}s）"
+        )
+        return result
+
+    def _next_adaptive_tick(self, job: Job, started: datetime, result: object | None) -> datetime:
+        """依上游更新週期安排下次執行時間
+
+        結果的 skipped 屬性為真（HTTP 304 或內容與上次相同）時視為內容未變更；
+        執行失敗時不列入學習，以學習中的間隔重試。
+
+        Args:
+            job: 排程作業（需有 poller）
+            started: 本次開始執行的時間
+            result: _run_job() 的回傳值
+
+        Returns:
+            下次執行時間
+        """
+        poller = job.poller
+        now = self.clock()
+        if result is None:
+            return now + poller.interval
+
+        poller.observe(started, changed=not getattr(result, "skipped", False))
+        next_tick = poller.next_poll(now)
+        estimate = poller.estimate()
+        cadence = (
+            f"上游週期約 {estimate.period.total_seconds() / 60:.1f} 分鐘"
+            if estimate is not None
+            else "學習中"
+        )
+        if poller.misses:
+            cadence += f"，連續 {poller.misses} 次未變更"
+        self.logger.info(
+            f"[{job.name}] 下次執行: {next_tick.isoformat(timespec='seconds')}（{cadence}）"
+        )
+        return next_tick
+
+    def run(self) -> None:
+        """執行排程迴圈，直到 stop() 被呼叫"""
+        if not self.jobs:
+            return
+
+        while not self.stopped:
+            job = min(self.jobs, key=lambda j: j.next_tick)
+            tick = job.next_tick
+            due = tick + timedelta(seconds=random.uniform(0, job.jitter))
+
+            wait = (due - self.clock()).total_seconds()
+            if wait > 0 and self._stop.wait(wait):
+                break
+
+            if job.poller is not None:
+                started = self.clock()
+                result = self._run_job(job, tick)
+                job.next_tick = self._next_adaptive_tick(job, started, result)
+                continue
+
+            self._run_job(job, tick)
+
+            # 執行過久而錯過的時間點直接跳過
+            job.next_tick = next_aligned_tick(max(self.clock(), tick), job.interval, job.offset)
+
+        self.logger.info("排程器已停止")
+
+    def summary(self) -> dict[str, dict]:
+        """取得各作業的執行統計
+
+        Returns:
+            作業名稱對應 {"runs", "failures", "last_latency", "p50_latency", "max_latency"}
+        """
+        result = {}
+        for job in self.jobs:
+            samples = sorted(job.latencies)
+            result[job.name] = {
+                "runs": job.runs,
+                "failures": job.failures,
+                "last_latency": job.last_latency,
+                "p50_latency": samples[len(samples) // 2] if samples else None,
+                "max_latency": samples[-1] if samples else None,
+            }
+        return result
+
@@ -1,29 +1,87 @@
 """即時車位資料模組
 
 處理每月輪替的 SQLite 資料庫檔案。
+
+每個月份檔案的結構版本（v1 / v2，見 availability_schema）與儲存模式於建立時決定：
+- full：每次同步寫入所有停車場的車位數
+- delta：只寫入車位數有變動的停車場，並記錄每個停車場的最後已知值；
+  任一時間點的車位數為該時間點之前最後一筆記錄的值
 """
 
-from datetime import datetime
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from parking_newtaipei.db.availability_compact import (
+    compact_monthly_db,
+    is_compacted,
+    thaw_monthly_db,
+)
+from parking_newtaipei.db.availability_rollup import (
+    LotInfo,
+    RollupAccumulator,
+    create_rollup_tables,
+    iter_snapshots,
+    query_rollups,
+)
+from parking_newtaipei.db.availability_schema import (
+    SCHEMA_V1,
+    SCHEMA_V2,
+    SCHEMA_VERSIONS,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    STORAGE_MODES,
+    AvailabilitySchema,
+    create_schema,
+    get_schema,
+    migrate_to_delta,
+    read_schema_version,
+    read_storage_mode,
+    rewrite_monthly_db,
+)
+from parking_newtaipei.db.availability_snapshots import (
+    create_snapshots_table,
+    dedup_ratio,
+    has_snapshot_between,
+    last_snapshot_hash,
+    record_snapshot,
+    snapshot_counts,
+    snapshot_times,
+)
+from parking_newtaipei.db.availability_summary import (
+    SUMMARY_FIELDS,
+    build_summary,
+    freeze_summary,
+    open_summary,
+    read_summary,
+    update_summary,
+    write_summary,
+)
 from parking_newtaipei.db.connection import DatabaseConnection
 from parking_newtaipei.utils.logger import get_logger
-from parking_newtaipei.utils.time import now_iso
-
-# 即時車位資料表 SQL
-CREATE_AVAILABILITY_TABLE = """
-CREATE TABLE IF NOT EXISTS availability (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    parking_id TEXT NOT NULL,
-    available_car INTEGER NOT NULL,
-    recorded_at TEXT NOT NULL
-)
-"""
 
-# 建立索引
-CREATE_AVAILABILITY_INDEXES = [
-    "CREATE INDEX IF NOT EXISTS idx_availability_parking_id ON availability(parking_id)",
-    "CREATE INDEX IF NOT EXISTS idx_availability_recorded_at ON availability(recorded_at)",
+if TYPE_CHECKING:
+    from parking_newtaipei.db.availability_cube import AvailabilityCube
+
+__all__ = [
+    "SCHEMA_V1",
+    "SCHEMA_V2",
+    "SCHEMA_VERSIONS",
+    "STORAGE_MODE_DELTA",
+    "STORAGE_MODE_FULL",
+    "STORAGE_MODES",
+    "AvailabilityRepository",
+    "compact_monthly_db",
+    "compute_stats",
+    "get_monthly_db_path",
+    "is_closed_month",
+    "migrate_to_delta",
+    "parse_monthly_db_path",
+    "rewrite_monthly_db",
 ]
 
 
@@ -48,75 +106,607 @@ def get_monthly_db_path(base_dir: Path, year: int | None = None, month: int | No
     return base_dir / filename
 
 
+def parse_monthly_db_path(db_path: Path) -> tuple[int, int]:
+    """從資料庫檔名解析年月
+
+    Args:
+        db_path: 資料庫檔案路徑，格式：availability_YYYYMM.db
+
+    Returns:
+        (year, month)
+    """
+    name = db_path.stem  # availability_YYYYMM
+    return int(name[-6:-2]), int(name[-2:])
+
+
+def is_closed_month(db_path: Path) -> bool:
+    """資料庫檔案的月份是否已結束
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        是否早於當前月份
+    """
+    now = datetime.now()
+    return parse_monthly_db_path(db_path) < (now.year, now.month)
+
+
+def compute_stats(db_path: Path) -> dict:
+    """以唯讀連線掃描月份資料庫計算統計資訊（驗證摘要用，可於多個執行緒同時執行）
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        total_records、unique_parking_ids、first_record、last_record
+    """
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        schema = get_schema(read_schema_version(conn) or SCHEMA_V1)
+        return schema.stats(conn)
+    finally:
+        conn.close()
+
+
 class AvailabilityRepository:
     """即時車位資料存取類別
 
     使用每月輪替的資料庫檔案。
     """
 
-    def __init__(self, db_dir: Path):
+    def __init__(
+        self,
+        db_dir: Path,
+        persistent: bool = False,
+        storage_mode: str = STORAGE_MODE_FULL,
+        schema_version: int = SCHEMA_V1,
+    ):
         """初始化即時車位資料存取
 
         Args:
             db_dir: 資料庫目錄
+            persistent: 是否使用常駐連線（見 DatabaseConnection）
+            storage_mode: 新建資料庫檔案的儲存模式（full 或 delta）
+            schema_version: 新建資料庫檔案的結構版本（1 或 2）
         """
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"不支援的儲存模式: {storage_mode}")
+        if schema_version not in SCHEMA_VERSIONS:
+            raise ValueError(f"不支援的結構版本: {schema_version}")
+
         self.db_dir = db_dir
+        self.persistent = persistent
+        self.storage_mode = storage_mode
+        self.schema_version = schema_version
         self.logger = get_logger()
+        self._dbs: dict[Path, DatabaseConnection] = {}
+        self._file_formats: dict[Path, tuple[AvailabilitySchema, str]] = {}
 
         # 確保目錄存在
         self.db_dir.mkdir(parents=True, exist_ok=True)
 
+    def _get_db(self, db_path: Path) -> DatabaseConnection:
+        """取得指定資料庫檔案的連線管理器（依路徑快取，已壓實的檔案以 immutable 開啟）
+
+        Args:
+            db_path: 資料庫檔案路徑
+
+        Returns:
+            資料庫連線物件
+        """
+        db = self._dbs.get(db_path)
+        if db is None:
+            db = DatabaseConnection(
+                db_path, persistent=self.persistent, immutable=is_compacted(db_path)
+            )
+            self._dbs[db_path] = db
+        return db
+
+    def _get_writable_db(self, db_path: Path) -> DatabaseConnection:
+        """取得可寫入的連線管理器（已壓實的檔案先恢復為可寫入）
+
+        Args:
+            db_path: 資料庫檔案路徑
+
+        Returns:
+            資料庫連線物件
+        """
+        db = self._get_db(db_path)
+        if db.immutable:
+            self.logger.info(f"寫入已壓實的月份資料庫，解除壓實狀態: {db_path.name}")
+            db.close()
+            del self._dbs[db_path]
+            thaw_monthly_db(db_path)
+            db = self._get_db(db_path)
+        return db
+
     def _get_current_db(self) -> DatabaseConnection:
         """取得當前月份的資料庫連線
 
         Returns:
             資料庫連線物件
         """
-        db_path = get_monthly_db_path(self.db_dir)
-        return DatabaseConnection(db_path)
+        return self._get_db(get_monthly_db_path(self.db_dir))
+
+    def _get_format(self, db_path: Path) -> tuple[AvailabilitySchema, str]:
+        """取得資料庫檔案的結構實作與儲存模式（依路徑快取）
+
+        Args:
+            db_path: 資料庫檔案路徑
+
+        Returns:
+            (結構實作, 儲存模式)；未記錄者視為 v1 full 模式
+        """
+        file_format = self._file_formats.get(db_path)
+        if file_format is None:
+            with self._get_db(db_path).get_connection() as conn:
+                version = read_schema_version(conn) or SCHEMA_V1
+                mode = read_storage_mode(conn) or STORAGE_MODE_FULL
+            file_format = (get_schema(version), mode)
+            self._file_formats[db_path] = file_format
+        return file_format
+
+    def close(self) -> None:
+        """關閉所有常駐連線"""
+        for db in self._dbs.values():
+            db.close()
+        self._dbs.clear()
+
+    def init_tables(self, year: int | None = None, month: int | None = None) -> bool:
+        """初始化月份資料表
+
+        新檔案以目前設定的結構版本與儲存模式建立；
+        既有檔案維持原本的版本與模式（未記錄者視為 v1 full 模式），已壓實者恢復為可寫入。
+
+        Args:
+            year: 年份，預設為當前年份
+            month: 月份，預設為當前月份
+
+        Returns:
+            是否新建立月份檔案
+        """
+        db_path = get_monthly_db_path(self.db_dir, year, month)
+        db = self._get_writable_db(db_path)
+        with db.transaction() as conn:
+            version = read_schema_version(conn)
+            mode = read_storage_mode(conn)
+            created = version is None
+            if created:
+                version, mode = self.schema_version, self.storage_mode
+                create_schema(conn, version, mode)
+            elif mode is None:
+                mode = STORAGE_MODE_FULL
+                create_schema(conn, version, mode)
+            create_rollup_tables(conn)
+            create_snapshots_table(conn)
+            open_summary(conn, get_schema(version))
+
+        self._file_formats[db_path] = (get_schema(version), mode)
+        self.logger.debug(f"即時車位資料表初始化完成: {db_path}（v{version} {mode} 模式）")
+        return created
+
+    def get_storage_mode(self, db_path: Path) -> str:
+        """取得資料庫檔案的儲存模式
+
+        Args:
+            db_path: 資料庫檔案路徑
+
+        Returns:
+            儲存模式（未記錄者視為 full）
+        """
+        return self._get_format(db_path)[1]
+
+    def get_schema_version(self, db_path: Path) -> int:
+        """取得資料庫檔案的結構版本
+
+        Args:
+            db_path: 資料庫檔案路徑
 
-    def init_tables(self) -> None:
-        """初始化當前月份的資料表"""
-        db = self._get_current_db()
-        db.execute(CREATE_AVAILABILITY_TABLE)
-        for index_sql in CREATE_AVAILABILITY_INDEXES:
-            db.execute(index_sql)
-        self.logger.debug(f"即時車位資料表初始化完成: {get_monthly_db_path(self.db_dir)}")
+        Returns:
+            結構版本（未記錄者視為 v1）
+        """
+        return self._get_format(db_path)[0].version
 
-    def insert_batch(self, records: list[dict]) -> int:
+    def insert_batch(self, records: list[dict], recorded_at: datetime | None = None) -> int:
         """批次寫入即時車位資料
 
+        寫入記錄時間所在月份的資料庫（需先呼叫 init_tables）。
+        delta 模式只寫入車位數與最後已知值不同（或首次出現）的停車場。
+
         Args:
             records: 資料列表，每筆包含 parking_id 和 available_car
+            recorded_at: 記錄時間，預設為當前時間
 
         Returns:
-            成功寫入的筆數
+            實際寫入的筆數
         """
         if not records:
             return 0
 
-        db = self._get_current_db()
-        now = now_iso()
+        if recorded_at is None:
+            recorded_at = datetime.now()
+        recorded_at = recorded_at.astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        schema, mode = self._get_format(db_path)
+
+        with self._get_db(db_path).transaction() as conn:
+            inserted = schema.insert(conn, records, recorded_at, delta=mode == STORAGE_MODE_DELTA)
+            parking_ids = {record["parking_id"] for record in records}
+            update_summary(conn, schema, parking_ids, inserted, recorded_at)
+        return inserted
+
+    def insert_batches(
+        self,
+        batches: Iterable[list[dict]],
+        recorded_at: datetime | None = None,
+        rollup: RollupAccumulator | None = None,
+        content_hash: str | Callable[[], str] | None = None,
+        previous_hash: str | None = None,
+    ) -> int:
+        """分批寫入同一次同步的即時車位資料
+
+        所有批次共用同一個記錄時間並在單一交易內寫入，結果與將全部資料
+        一次傳入 insert_batch() 相同，但不需先將整份資料載入記憶體。
+
+        串流下載時內容的雜湊值要讀完才能取得：content_hash 可傳入讀完所有批次後
+        才呼叫的函式，與 previous_hash 相同時捨棄已寫入的資料列（同一交易內的 savepoint），
+        改為記錄重複快照，彙總仍累加本次同步（與 record_heartbeat 相同）。
+
+        Args:
+            batches: 資料批次，每筆包含 parking_id 和 available_car
+            recorded_at: 記錄時間，預設為當前時間
+            rollup: 彙總累加器，指定時於同一交易內累加本次同步的所有資料（含未變動者）
+            content_hash: 下載內容的雜湊值（或取得雜湊值的函式），指定時於同一交易內記錄快照
+            previous_hash: 上次同步的雜湊值，None 表示不判斷重複
+
+        Returns:
+            實際寫入的筆數（重複內容時為 0）
+        """
+        if recorded_at is None:
+            recorded_at = datetime.now()
+        recorded_at = recorded_at.astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        schema, mode = self._get_format(db_path)
+
+        inserted = 0
+        parking_ids: set[str] = set()
+        with self._get_db(db_path).transaction() as conn:
+            conn.execute("SAVEPOINT sync_rows")
+            for batch in batches:
+                if batch:
+                    inserted += schema.insert(
+                        conn, batch, recorded_at, delta=mode == STORAGE_MODE_DELTA
+                    )
+                    parking_ids.update(record["parking_id"] for record in batch)
+                    if rollup is not None:
+                        rollup.add(batch, recorded_at)
+            if callable(content_hash):
+                content_hash = content_hash()
+            duplicate = previous_hash is not None and content_hash == previous_hash
+            if duplicate:
+                conn.execute("ROLLBACK TO sync_rows")
+                inserted = 0
+            conn.execute("RELEASE sync_rows")
+            if parking_ids and not duplicate:
+                update_summary(conn, schema, parking_ids, inserted, recorded_at)
+            if rollup is not None:
+                rollup.flush(conn)
+            if content_hash is not None:
+                record_snapshot(conn, recorded_at, content_hash, duplicate=duplicate)
+        return inserted
+
+    def get_sync_records(self, recorded_at: datetime) -> list[dict]:
+        """取得一次同步的所有停車場車位數（串流寫入後發布 JSON 使用）
+
+        full 模式為該次同步寫入的資料列；delta 模式由最後已知值取得該次同步看到的停車場
+        （含未變動者），只適用於最後一次同步。
+
+        Args:
+            recorded_at: 同步的記錄時間
+
+        Returns:
+            {"parking_id", "available_car"} 列表，依 parking_id 排序
+        """
+        recorded_at = recorded_at.astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        schema, mode = self._get_format(db_path)
+        with self._get_db(db_path).get_connection() as conn:
+            records = schema.sync_records(conn, recorded_at, mode == STORAGE_MODE_DELTA)
+        return sorted(records, key=lambda record: record["parking_id"])
+
+    def get_last_snapshot_hash(self, recorded_at: datetime | None = None) -> str | None:
+        """取得記錄時間所在月份、記錄時間之前最後一次同步的內容雜湊值
+
+        只查詢同一個月份的檔案，每個月份的第一次同步一律寫入完整資料。
+
+        Args:
+            recorded_at: 記錄時間，預設為當前時間（回填時為交換記錄時間）
+
+        Returns:
+            雜湊值，該月份尚無快照記錄時為 None
+        """
+        recorded_at = (recorded_at or datetime.now()).astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        if not db_path.exists():
+            return None
+        with self._get_db(db_path).get_connection() as conn:
+            return last_snapshot_hash(conn, before=recorded_at)
+
+    def record_heartbeat(
+        self,
+        records: list[dict],
+        recorded_at: datetime,
+        content_hash: str,
+        rollup: RollupAccumulator | None = None,
+    ) -> dict:
+        """記錄內容與上次同步相同的快照（不寫入資料列）
+
+        車位數查詢取時間點之前的最後一筆資料列，結果與寫入整批資料相同；
+        彙總仍累加本次同步，每小時 / 每日平均值維持以每次同步為樣本。
+
+        Args:
+            records: 本次同步的資料（彙總使用）
+            recorded_at: 記錄時間
+            content_hash: 下載內容的雜湊值
+            rollup: 彙總累加器
+
+        Returns:
+            該月份的 {"snapshots", "duplicate_snapshots"}
+        """
+        recorded_at = recorded_at.astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+
+        with self._get_db(db_path).transaction() as conn:
+            record_snapshot(conn, recorded_at, content_hash, duplicate=True)
+            if rollup is not None:
+                rollup.add(records, recorded_at)
+                rollup.flush(conn)
+            return snapshot_counts(conn)
+
+    def get_snapshot_counts(self, recorded_at: datetime | None = None) -> dict:
+        """取得記錄時間所在月份的同步次數與重複快照數
+
+        Args:
+            recorded_at: 記錄時間，預設為當前時間
+
+        Returns:
+            {"snapshots", "duplicate_snapshots"}
+        """
+        recorded_at = (recorded_at or datetime.now()).astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        if not db_path.exists():
+            return {"snapshots": 0, "duplicate_snapshots": 0}
+        with self._get_db(db_path).get_connection() as conn:
+            return snapshot_counts(conn)
+
+    def rebuild_rollups(self, db_path: Path, lots: LotInfo) -> int:
+        """由原始資料重建月份資料庫的彙總表
+
+        依時間順序讀取資料列並組回每次同步的資料；delta 模式沿用未變動停車場的先前值。
+        只記錄於 snapshots 表的同步（重複快照）沿用前一次同步的資料，
+        與同步時累加的樣本數相同。
+
+        Args:
+            db_path: 月份資料庫檔案路徑
+            lots: 停車場資訊（行政區與總車位數）
+
+        Returns:
+            重建的同步次數
+        """
+        schema, mode = self._get_format(db_path)
+        rollup = RollupAccumulator(lots)
+        snapshots = 0
+
+        with self._get_writable_db(db_path).transaction() as conn:
+            create_rollup_tables(conn)
+            conn.execute("DELETE FROM rollup_lot")
+            conn.execute("DELETE FROM rollup_area")
+            rows = schema.iter_rows(conn, order="time")
+            # v2 的資料列時間精確至秒，快照時間換算為相同精度才能與資料列時間比對
+            heartbeats = [
+                datetime.fromisoformat(schema.format_time(moment))
+                for moment in snapshot_times(conn)
+            ]
+            for recorded_at, records in iter_snapshots(
+                rows, mode == STORAGE_MODE_DELTA, heartbeats
+            ):
+                rollup.add(records, recorded_at)
+                snapshots += 1
+            rollup.flush(conn)
+
+        self.logger.info(f"已重建彙總表 {db_path.name}: {snapshots} 次同步")
+        return snapshots
+
+    def query_rollups(
+        self,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        parking_id: str | None = None,
+        area: str | None = None,
+    ) -> list[dict]:
+        """跨月份查詢每小時 / 每日彙總值
+
+        Args:
+            granularity: 彙總粒度（hour 或 day）
+            start: 起始時間（含所在區間，naive datetime 視為本地時間）
+            end: 結束時間（含所在區間）
+            parking_id: 停車場編號（與 area 擇一），皆未指定時回傳所有停車場
+            area: 行政區
+
+        Returns:
+            彙總值列表（見 availability_rollup.query_rollups）
+        """
+        results = []
+        for db_path in self._db_files_between(start, end):
+            with self._get_db(db_path).transaction() as conn:
+                create_rollup_tables(conn)
+                results.extend(query_rollups(conn, granularity, start, end, parking_id, area))
+        key = "area" if area is not None else "parking_id"
+        return sorted(results, key=lambda row: (row[key], row["bucket"]))
+
+    def is_recorded(self, recorded_at: datetime, tolerance: timedelta) -> bool:
+        """記錄時間是否已有對應的同步資料（回填用）
+
+        full 模式檢查前後 tolerance 內是否有記錄或快照（同步時的記錄時間與交換記錄時間略有差距，
+        內容重複的同步只記錄快照）；
+        delta 模式未變動時不寫入資料列，改以最後寫入時間判斷，只能往後回填。
+
+        Args:
+            recorded_at: 記錄時間（naive datetime 視為本地時間）
+            tolerance: 容許的時間差
+
+        Returns:
+            是否已有資料
+        """
+        recorded_at = recorded_at.astimezone()
+        db_path = get_monthly_db_path(self.db_dir, recorded_at.year, recorded_at.month)
+        if not db_path.exists():
+            return False
+
+        schema, mode = self._get_format(db_path)
+        with self._get_db(db_path).get_connection() as conn:
+            if mode == STORAGE_MODE_DELTA:
+                last_seen = schema.last_seen(conn)
+                return last_seen is not None and recorded_at <= last_seen + tolerance
+            start, end = recorded_at - tolerance, recorded_at + tolerance
+            return schema.has_rows_between(conn, start, end) or has_snapshot_between(
+                conn, start, end
+            )
+
+    def _db_files_until(self, at: datetime) -> list[Path]:
+        """列出 at 所在月份（含）之前的資料庫檔案，新的在前
+
+        Args:
+            at: 查詢時間
+
+        Returns:
+            資料庫檔案路徑列表
+        """
+        local = at.astimezone()
+        target = (local.year, local.month)
+        return [
+            db_path
+            for db_path in reversed(self.list_db_files())
+            if parse_monthly_db_path(db_path) <= target
+        ]
+
+    def _db_files_between(self, start: datetime, end: datetime) -> list[Path]:
+        """列出與時間區間重疊的月份資料庫檔案，舊的在前
+
+        Args:
+            start: 起始時間
+            end: 結束時間
 
-        # 準備批次寫入資料
-        params_list = [
-            (record["parking_id"], record["available_car"], now)
-            for record in records
+        Returns:
+            資料庫檔案路徑列表
+        """
+        first = (start.astimezone().year, start.astimezone().month)
+        last = (end.astimezone().year, end.astimezone().month)
+        return [
+            db_path
+            for db_path in self.list_db_files()
+            if first <= parse_monthly_db_path(db_path) <= last
         ]
 
-        db.execute_many(
-            """
-            INSERT INTO availability (parking_id, available_car, recorded_at)
-            VALUES (?, ?, ?)
-            """,
-            params_list,
-        )
+    def query_range(
+        self,
+        start: datetime,
+        end: datetime,
+        parking_ids: list[str] | None = None,
+    ) -> Iterator[dict]:
+        """跨月份查詢時間區間內的即時車位資料
+
+        只 ATTACH 與區間重疊的月份檔案（一次一個、唯讀），時間與停車場條件
+        在各檔案內以索引過濾；月份檔案的時間區間互不重疊，依序串接即為時間順序。
+        delta 模式的檔案只回傳有變動的記錄，區間起點的數值可用 get_value_as_of() 取得。
+
+        Args:
+            start: 起始時間（含，naive datetime 視為本地時間）
+            end: 結束時間（含）
+            parking_ids: 停車場編號，None 表示全部
+
+        Yields:
+            {"parking_id", "available_car", "recorded_at"}，依記錄時間排序
+        """
+        db_files = self._db_files_between(start, end)
+        if not db_files:
+            return
+
+        conn = sqlite3.connect("file::memory:", uri=True)
+        try:
+            for db_path in db_files:
+                schema, _ = self._get_format(db_path)
+                conn.execute(
+                    "ATTACH DATABASE ? AS month", (f"{db_path.resolve().as_uri()}?mode=ro",)
+                )
+                rows = schema.iter_rows(conn, start, end, parking_ids, order="time", schema="month")
+                try:
+                    for parking_id, available_car, recorded_at in rows:
+                        yield {
+                            "parking_id": parking_id,
+                            "available_car": available_car,
+                            "recorded_at": recorded_at,
+                        }
+                finally:
+                    # 提前結束迭代時需先釋放查詢，才能 DETACH
+                    rows.close()
+                    conn.execute("DETACH DATABASE month")
+        finally:
+            conn.close()
+
+    def get_value_as_of(self, parking_id: str, at: datetime) -> dict | None:
+        """取得停車場在指定時間點的車位數
+
+        回傳 at（含）之前最後一筆記錄，full 與 delta 模式皆適用；
+        若當月檔案無記錄則往前一個月份查詢。
+
+        Args:
+            parking_id: 停車場編號
+            at: 查詢時間（naive datetime 視為本地時間）
+
+        Returns:
+            {"parking_id", "available_car", "recorded_at"}，若無記錄則為 None
+        """
+        for db_path in self._db_files_until(at):
+            schema, _ = self._get_format(db_path)
+            with self._get_db(db_path).get_connection() as conn:
+                row = schema.value_as_of(conn, parking_id, at)
+            if row is not None:
+                return row
+
+        return None
+
+    def get_snapshot_as_of(self, at: datetime) -> dict[str, dict]:
+        """取得所有停車場在指定時間點的車位數
+
+        以 at 所在月份檔案為主；delta 模式每個月份的首批資料包含所有停車場，
+        因此只有在當月尚無資料時才往前一個月份查詢。
+
+        Args:
+            at: 查詢時間（naive datetime 視為本地時間）
+
+        Returns:
+            停車場編號對應 {"parking_id", "available_car", "recorded_at"} 的字典
+        """
+        for db_path in self._db_files_until(at):
+            schema, _ = self._get_format(db_path)
+            with self._get_db(db_path).get_connection() as conn:
+                rows = schema.snapshot_as_of(conn, at)
+            if rows:
+                return {row["parking_id"]: row for row in rows}
 
-        return len(params_list)
+        return {}
 
     def get_stats(self, year: int | None = None, month: int | None = None) -> dict:
         """取得統計資訊
 
+        讀取月份檔案的摘要（file_summary），不掃描資料表；
+        已結束的月份會凍結摘要，未建立摘要的既有檔案於首次查詢時計算一次。
+        compacted 表示檔案已壓實（見 availability_compact）。
+        另外包含同步次數、重複快照數與重複比例（見 availability_snapshots）。
+
         Args:
             year: 年份，預設為當前年份
             month: 月份，預設為當前月份
@@ -134,24 +724,68 @@ class AvailabilityRepository:
                 "unique_parking_ids": 0,
                 "first_record": None,
                 "last_record": None,
+                "storage_mode": None,
+                "schema_version": None,
+                "frozen": False,
+                "compacted": False,
+                "snapshots": 0,
+                "duplicate_snapshots": 0,
+                "dedup_ratio": 0.0,
             }
 
-        db = DatabaseConnection(db_path)
-
-        total = db.fetch_one("SELECT COUNT(*) as count FROM availability")
-        unique = db.fetch_one("SELECT COUNT(DISTINCT parking_id) as count FROM availability")
-        first = db.fetch_one("SELECT MIN(recorded_at) as ts FROM availability")
-        last = db.fetch_one("SELECT MAX(recorded_at) as ts FROM availability")
+        schema, mode = self._get_format(db_path)
+        closed = is_closed_month(db_path)
+        with self._get_db(db_path).get_connection() as conn:
+            summary = read_summary(conn)
+            counts = snapshot_counts(conn)
+        if summary is None or (closed and not summary["frozen"]):
+            with self._get_db(db_path).transaction() as conn:
+                summary = freeze_summary(conn, schema) if closed else build_summary(conn, schema)
 
         return {
             "db_file": db_path.name,
             "exists": True,
-            "total_records": total["count"] if total else 0,
-            "unique_parking_ids": unique["count"] if unique else 0,
-            "first_record": first["ts"] if first else None,
-            "last_record": last["ts"] if last else None,
+            **summary,
+            "storage_mode": mode,
+            "schema_version": schema.version,
+            "compacted": self._get_db(db_path).immutable,
+            **counts,
+            "dedup_ratio": dedup_ratio(counts),
+        }
+
+    def verify_stats(self, workers: int | None = None) -> list[dict]:
+        """掃描所有月份檔案重新計算統計資訊，與摘要不符時以計算結果修正摘要
+
+        各月份檔案以唯讀連線平行掃描（SQLite 查詢期間釋放 GIL）。
+
+        Args:
+            workers: 同時掃描的檔案數，預設為 ThreadPoolExecutor 的預設值
+
+        Returns:
+            每個檔案的 {"db_file", "summary", "actual", "matched"}，依檔名排序
+        """
+        db_files = self.list_db_files()
+        summaries = {
+            db_path: self.get_stats(*parse_monthly_db_path(db_path)) for db_path in db_files
         }
 
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            actuals = dict(zip(db_files, executor.map(compute_stats, db_files), strict=True))
+
+        results = []
+        for db_path in db_files:
+            summary = {field: summaries[db_path][field] for field in SUMMARY_FIELDS}
+            actual = actuals[db_path]
+            matched = summary == actual
+            if not matched:
+                self.logger.warning(f"摘要與實際資料不符，已修正: {db_path.name}")
+                with self._get_writable_db(db_path).transaction() as conn:
+                    write_summary(conn, actual)
+            results.append(
+                {"db_file": db_path.name, "summary": summary, "actual": actual, "matched": matched}
+            )
+        return results
+
     def list_db_files(self) -> list[Path]:
         """列出所有月份的資料庫檔案
 
@@ -160,3 +794,114 @@ class AvailabilityRepository:
         """
         files = list(self.db_dir.glob("availability_*.db"))
         return sorted(files)
+
+    def pending_compaction(self) -> list[Path]:
+        """列出已結束但尚未壓實的月份資料庫
+
+        Returns:
+            資料庫檔案路徑列表（按時間排序）
+        """
+        return [
+            db_path
+            for db_path in self.list_db_files()
+            if is_closed_month(db_path) and not is_compacted(db_path)
+        ]
+
+    def compact_months(
+        self,
+        db_paths: list[Path],
+        workers: int | None = None,
+        cold_dir: Path | None = None,
+        cube: bool = False,
+    ) -> list[dict]:
+        """壓實已結束月份的資料庫（見 availability_compact）
+
+        各月份於子程序平行處理；呼叫端需確保期間沒有其他程序讀寫這些檔案。
+
+        Args:
+            db_paths: 月份資料庫檔案路徑
+            workers: 子程序數，預設為 CPU 數；只有一個檔案時於目前程序執行
+            cold_dir: 冷備份目錄，None 表示不輸出
+            cube: 壓實後是否一併建立車位立方體（需要 numpy，見 build_cubes）
+
+        Returns:
+            各檔案的壓實報告（見 compact_monthly_db），依傳入順序
+
+        Raises:
+            ValueError: 包含尚未結束的月份
+        """
+        open_months = [db_path.name for db_path in db_paths if not is_closed_month(db_path)]
+        if open_months:
+            raise ValueError(f"月份尚未結束，無法壓實: {', '.join(open_months)}")
+
+        for db_path in db_paths:
+            # 關閉常駐連線，壓實後依新檔重新開啟
+            db = self._dbs.pop(db_path, None)
+            if db is not None:
+                db.close()
+
+        if len(db_paths) <= 1 or workers == 1:
+            reports = [compact_monthly_db(db_path, cold_dir) for db_path in db_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reports = list(executor.map(compact_monthly_db, db_paths, repeat(cold_dir)))
+
+        for report in reports:
+            self.logger.info(
+                f"已壓實 {report['db_file']}（{report['format']}，{report['rows']:,} 筆）: "
+                f"{report['size_before']:,} -> {report['size_after']:,} bytes"
+            )
+        if cube:
+            self.build_cubes(db_paths, workers=workers)
+        return reports
+
+    def build_cubes(self, db_paths: list[Path], workers: int | None = None) -> list[dict]:
+        """建立或增量更新月份的車位立方體（見 availability_cube，需要 numpy）
+
+        Args:
+            db_paths: 月份資料庫檔案路徑
+            workers: 子程序數，預設為 CPU 數；只有一個檔案時於目前程序執行
+
+        Returns:
+            各檔案的更新報告（見 update_cube），依傳入順序
+        """
+        from parking_newtaipei.db.availability_cube import update_cube
+
+        if len(db_paths) <= 1 or workers == 1:
+            reports = [update_cube(db_path) for db_path in db_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reports = list(executor.map(update_cube, db_paths))
+
+        for report in reports:
+            action = "重建" if report["rebuilt"] else "更新"
+            self.logger.info(
+                f"已{action}車位立方體 {report['db_file']}: "
+                f"{report['lots']} 個停車場 × {report['slots']} 個時段，"
+                f"納入 {report['snapshots']} 次同步（{report['rows']:,} 筆）"
+            )
+        return reports
+
+    def get_cube(
+        self, year: int | None = None, month: int | None = None, refresh: bool = True
+    ) -> "AvailabilityCube | None":
+        """以 memory-map 載入月份的車位立方體（需要 numpy）
+
+        回傳陣列的切片為 numpy view，平均、百分位數等可直接向量化計算。
+
+        Args:
+            year: 年份，預設為當前年份
+            month: 月份，預設為當前月份
+            refresh: 載入前是否先納入新的資料列（已是最新時只讀取摘要）
+
+        Returns:
+            車位立方體，資料庫檔案不存在或尚未建立立方體時為 None
+        """
+        from parking_newtaipei.db.availability_cube import load_cube, update_cube
+
+        db_path = get_monthly_db_path(self.db_dir, year, month)
+        if not db_path.exists():
+            return None
+        if refresh:
+            update_cube(db_path)
+        return load_cube(db_path)
@@ -0,0 +1,228 @@
+"""月份資料庫壓實模組
+
+已結束的月份不再寫入（回填除外），壓實後只供查詢：
+
+1. 依 (停車場, 時間) 順序將資料列重寫至暫存檔，同一停車場的資料列集中於相鄰頁面；
+   v1 另改為不含 AUTOINCREMENT 的主鍵（不再需要 sqlite_sequence）
+2. 複製彙總表、快照記錄與凍結後的摘要，並執行 ANALYZE 供查詢規劃使用
+3. 以 VACUUM INTO 輸出無空閒頁面的新檔，rename 取代原檔
+4. 於 availability_meta 記錄 compacted_at 並移除寫入權限；
+   讀取時以 ?immutable=1 開啟，不需檔案鎖與 WAL 檢查
+5. 選擇性輸出 gzip 壓縮的冷備份（availability_YYYYMM.db.gz）
+
+再次寫入壓實過的檔案前（例如回填），需先以 thaw_monthly_db 恢復寫入權限並移除標記；
+此時不可有其他程序以 immutable 連線讀取該檔案。
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import stat
+from pathlib import Path
+
+from parking_newtaipei.db.availability_rollup import create_rollup_tables
+from parking_newtaipei.db.availability_schema import (
+    SCHEMA_V1,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    create_schema,
+    get_schema,
+    read_schema_version,
+    read_storage_mode,
+)
+from parking_newtaipei.db.availability_snapshots import create_snapshots_table
+from parking_newtaipei.db.availability_summary import (
+    CREATE_FILE_SUMMARY_TABLE,
+    freeze_summary,
+    read_summary,
+)
+from parking_newtaipei.utils.time import now_iso
+
+# 壓實後 v1 的資料表（不含 AUTOINCREMENT，回填時 rowid 由最大值遞增）
+CREATE_COMPACT_AVAILABILITY_TABLE = """
+CREATE TABLE IF NOT EXISTS availability (
+    id INTEGER PRIMARY KEY,
+    parking_id TEXT NOT NULL,
+    available_car INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL
+)
+"""
+
+# 原樣複製的附屬資料表（與建立函式的欄位順序相同）
+_AUX_TABLES = ("rollup_lot", "rollup_area", "file_summary", "snapshots")
+
+# 冷備份的副檔名
+COLD_SUFFIX = ".gz"
+
+
+def read_compacted_at(conn: sqlite3.Connection) -> str | None:
+    """讀取資料庫檔案的壓實時間
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        壓實時間（ISO 8601），未壓實時為 None
+    """
+    has_meta = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='availability_meta'"
+    ).fetchone()
+    if not has_meta:
+        return None
+    row = conn.execute(
+        "SELECT value FROM availability_meta WHERE key = 'compacted_at'"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def is_compacted(db_path: Path) -> bool:
+    """資料庫檔案是否已壓實（以唯讀連線讀取標記）
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        是否已壓實，檔案不存在時為 False
+    """
+    if not db_path.exists():
+        return False
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return read_compacted_at(conn) is not None
+    finally:
+        conn.close()
+
+
+def _set_writable(db_path: Path, writable: bool) -> None:
+    """設定或移除檔案的寫入權限"""
+    mode = stat.S_IMODE(db_path.stat().st_mode)
+    write_bits = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+    os.chmod(db_path, mode | stat.S_IWUSR if writable else mode & ~write_bits)
+
+
+def thaw_monthly_db(db_path: Path) -> None:
+    """恢復壓實檔案的寫入權限並移除壓實標記（再次寫入前呼叫）
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+    """
+    _set_writable(db_path, True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("DELETE FROM availability_meta WHERE key = 'compacted_at'")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _has_table(conn: sqlite3.Connection, name: str, schema: str = "main") -> bool:
+    """資料表是否存在"""
+    return conn.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone() is not None
+
+
+def write_cold_copy(db_path: Path, cold_dir: Path) -> Path:
+    """輸出 gzip 壓縮的冷備份（先寫入暫存檔再 rename）
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+        cold_dir: 冷備份目錄
+
+    Returns:
+        冷備份檔案路徑
+    """
+    cold_dir.mkdir(parents=True, exist_ok=True)
+    cold_path = cold_dir / (db_path.name + COLD_SUFFIX)
+    tmp_path = cold_path.with_name(cold_path.name + ".tmp")
+    with db_path.open("rb") as src, gzip.open(tmp_path, "wb", compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, cold_path)
+    return cold_path
+
+
+def compact_monthly_db(db_path: Path, cold_dir: Path | None = None) -> dict:
+    """壓實已結束月份的資料庫（可於子程序執行）
+
+    維持原結構版本與儲存模式。呼叫端需確保該月份已結束，且壓實期間沒有其他程序開啟此檔案。
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+        cold_dir: 冷備份目錄，None 表示不輸出
+
+    Returns:
+        壓實報告（版本、模式、筆數、檔案大小與冷備份路徑）
+    """
+    build_path = db_path.with_name(db_path.name + ".tmp")
+    compact_path = db_path.with_name(db_path.name + ".compact")
+    for path in (build_path, compact_path):
+        path.unlink(missing_ok=True)
+
+    # 重新壓實時原檔已移除寫入權限
+    _set_writable(db_path, True)
+    src = sqlite3.connect(db_path)
+    try:
+        version = read_schema_version(src) or SCHEMA_V1
+        mode = read_storage_mode(src) or STORAGE_MODE_FULL
+        schema = get_schema(version)
+        # 凍結摘要後複製，並將 WAL 內容寫回主檔
+        summary = read_summary(src)
+        if summary is None or not summary["frozen"]:
+            freeze_summary(src, schema)
+            src.commit()
+        src.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = db_path.stat().st_size
+        rows = schema.stats(src)["total_records"]
+    finally:
+        src.close()
+
+    dst = sqlite3.connect(build_path)
+    try:
+        dst.execute("ATTACH DATABASE ? AS src", (str(db_path),))
+        if version == SCHEMA_V1:
+            dst.execute(CREATE_COMPACT_AVAILABILITY_TABLE)
+        create_schema(dst, version, mode)
+        schema.load_rows(dst, schema.iter_rows(dst, order="lot", schema="src"))
+        if mode == STORAGE_MODE_DELTA:
+            schema.set_latest(dst, schema.get_latest(dst, schema="src"))
+
+        create_rollup_tables(dst)
+        dst.execute(CREATE_FILE_SUMMARY_TABLE)
+        create_snapshots_table(dst)
+        for table in _AUX_TABLES:
+            if _has_table(dst, table, schema="src"):
+                dst.execute(f"INSERT INTO main.{table} SELECT * FROM src.{table}")
+        if _has_table(dst, "availability_meta", schema="src"):
+            dst.execute(
+                "INSERT OR REPLACE INTO main.availability_meta SELECT * FROM src.availability_meta"
+            )
+        dst.execute(
+            "INSERT OR REPLACE INTO availability_meta (key, value) VALUES ('compacted_at', ?)",
+            (now_iso(),),
+        )
+        dst.commit()
+        dst.execute("DETACH DATABASE src")
+        dst.execute("ANALYZE")
+        dst.commit()
+        dst.execute("VACUUM INTO ?", (str(compact_path),))
+    finally:
+        dst.close()
+    build_path.unlink()
+
+    for suffix in ("-wal", "-shm"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+    os.replace(compact_path, db_path)
+    _set_writable(db_path, False)
+
+    cold_path = write_cold_copy(db_path, cold_dir) if cold_dir is not None else None
+
+    return {
+        "db_file": db_path.name,
+        "format": f"v{version} {mode}",
+        "rows": rows,
+        "size_before": size_before,
+        "size_after": db_path.stat().st_size,
+        "cold_copy": str(cold_path) if cold_path else None,
+        "cold_size": cold_path.stat().st_size if cold_path else None,
+    }
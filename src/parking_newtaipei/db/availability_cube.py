@@ -0,0 +1,331 @@
+"""月份車位立方體模組
+
+由月份資料庫衍生 numpy 陣列，分析整個月份時以 memory-map 載入，不需將數十萬筆資料列
+讀入 Python：
+
+- availability_YYYYMM.cube.npy：int16，形狀為（停車場數, 5 分鐘時段數）；
+  每格為該時段內最後一次同步時的車位數，該時段沒有同步或停車場未出現時為 MISSING
+- availability_YYYYMM.cube.json：停車場索引（列順序）、月份起點、時段長度，
+  以及已納入的最後同步時間與資料列數（增量更新用）
+
+delta 模式未變動的停車場與重複快照（只記錄於 snapshots 表）沿用先前值；
+full 模式每次寫入的同步只包含該次出現的停車場。
+
+立方體可隨時由資料庫重建。更新時只讀取上次之後的資料列，資料列數與摘要不符
+（例如回填了較早的時間或轉換了儲存模式）時改為全部重建。需要安裝 numpy
+（uv sync --extra analytics）。
+"""
+
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover - 依安裝環境而定
+    raise ImportError("車位立方體需要 numpy，請執行 uv sync --extra analytics") from e
+
+from parking_newtaipei.db.availability_schema import (
+    SCHEMA_V1,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    get_schema,
+    read_schema_version,
+    read_storage_mode,
+)
+from parking_newtaipei.db.availability_snapshots import snapshot_times
+from parking_newtaipei.db.availability_summary import read_summary
+
+# 時段長度
+SLOT = timedelta(minutes=5)
+
+# 無資料的標記值
+MISSING = np.iinfo(np.int16).min
+
+CUBE_SUFFIX = ".cube.npy"
+INDEX_SUFFIX = ".cube.json"
+
+
+def cube_paths(db_path: Path) -> tuple[Path, Path]:
+    """取得月份資料庫對應的立方體與索引檔案路徑
+
+    Args:
+        db_path: 月份資料庫檔案路徑（availability_YYYYMM.db）
+
+    Returns:
+        (立方體路徑, 索引路徑)
+    """
+    return db_path.with_suffix(CUBE_SUFFIX), db_path.with_suffix(INDEX_SUFFIX)
+
+
+def month_range(db_path: Path) -> tuple[datetime, int]:
+    """取得月份的起點（本地時區）與時段數
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        (月份起點, 時段數)
+    """
+    name = db_path.name.split(".")[0]  # availability_YYYYMM
+    year, month = int(name[-6:-2]), int(name[-2:])
+    start = datetime(year, month, 1).astimezone()
+    end = datetime(year + month // 12, month % 12 + 1, 1).astimezone()
+    return start, -(-(end - start) // SLOT)
+
+
+def to_float(values: np.ndarray) -> np.ndarray:
+    """轉為 float32 並以 NaN 表示無資料（供 np.nanmean、np.nanpercentile 等使用）
+
+    Args:
+        values: 立方體的切片
+
+    Returns:
+        新的 float32 陣列
+    """
+    result = values.astype(np.float32)
+    result[values == MISSING] = np.nan
+    return result
+
+
+@dataclass
+class AvailabilityCube:
+    """月份車位立方體（唯讀 memory-map）
+
+    Attributes:
+        values: int16 陣列，形狀為（停車場數, 時段數）
+        lots: 各列對應的停車場編號
+        start: 第一個時段的起點
+    """
+
+    values: np.ndarray
+    lots: list[str]
+    start: datetime
+    index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.index = {parking_id: row for row, parking_id in enumerate(self.lots)}
+
+    def slot_of(self, at: datetime) -> int:
+        """時間點所在的時段（超出月份時限制於 0 至時段數）
+
+        Args:
+            at: 時間點（未指定時區者視為本地時間）
+
+        Returns:
+            時段索引
+        """
+        return min(max((at.astimezone() - self.start) // SLOT, 0), self.values.shape[1])
+
+    def time_of(self, slot: int) -> datetime:
+        """時段的起點
+
+        Args:
+            slot: 時段索引
+
+        Returns:
+            起點時間
+        """
+        return self.start + SLOT * slot
+
+    def _slots(self, start: datetime | None, end: datetime | None) -> slice:
+        """時間區間（起點含、終點不含）對應的時段範圍"""
+        first = 0 if start is None else self.slot_of(start)
+        last = self.values.shape[1] if end is None else self.slot_of(end)
+        return slice(first, last)
+
+    def lot(
+        self, parking_id: str, start: datetime | None = None, end: datetime | None = None
+    ) -> np.ndarray:
+        """取得單一停車場於時間區間的車位數（memory-map 的 view，不複製）
+
+        Args:
+            parking_id: 停車場編號
+            start: 起始時間（含），None 表示月初
+            end: 結束時間（不含），None 表示月底
+
+        Returns:
+            一維 int16 陣列
+
+        Raises:
+            KeyError: 立方體中沒有此停車場
+        """
+        return self.values[self.index[parking_id], self._slots(start, end)]
+
+    def window(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        parking_ids: list[str] | None = None,
+    ) -> np.ndarray:
+        """取得多個停車場於時間區間的車位數
+
+        未指定停車場時為 memory-map 的 view；指定時依傳入順序複製所需的列。
+
+        Args:
+            start: 起始時間（含），None 表示月初
+            end: 結束時間（不含），None 表示月底
+            parking_ids: 停車場編號，None 表示全部（依 lots 順序）
+
+        Returns:
+            二維 int16 陣列（停車場, 時段）
+
+        Raises:
+            KeyError: 立方體中沒有指定的停車場
+        """
+        slots = self._slots(start, end)
+        if parking_ids is None:
+            return self.values[:, slots]
+        rows = [self.index[parking_id] for parking_id in parking_ids]
+        return self.values[rows, slots]
+
+
+def load_cube(db_path: Path) -> AvailabilityCube | None:
+    """以唯讀 memory-map 載入月份的立方體
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        立方體，尚未建立時為 None
+    """
+    cube_path, index_path = cube_paths(db_path)
+    if not cube_path.exists() or not index_path.exists():
+        return None
+    meta = json.loads(index_path.read_text(encoding="utf-8"))
+    return AvailabilityCube(
+        values=np.load(cube_path, mmap_mode="r"),
+        lots=meta["lots"],
+        start=datetime.fromisoformat(meta["start"]),
+    )
+
+
+def _read_new_rows(
+    conn: sqlite3.Connection, after: datetime | None
+) -> tuple[list[tuple[datetime, list[tuple[str, int]]]], list[datetime]]:
+    """讀取 after 之後的資料列（依同步時間分組）與同步快照時間"""
+    schema = get_schema(read_schema_version(conn) or SCHEMA_V1)
+    batches = []
+    rows = schema.iter_rows(conn, start=after, order="time")
+    for recorded_at, group in groupby(rows, key=lambda row: row[2]):
+        moment = datetime.fromisoformat(recorded_at)
+        if after is None or moment > after:
+            batches.append((moment, [(parking_id, value) for parking_id, value, _ in group]))
+
+    # v2 的資料列時間精確至秒，快照時間換算為相同精度才能與資料列時間比對
+    snapshots = []
+    for moment in snapshot_times(conn):
+        moment = datetime.fromisoformat(schema.format_time(moment))
+        if after is None or moment > after:
+            snapshots.append(moment)
+    return batches, snapshots
+
+
+def update_cube(db_path: Path) -> dict:
+    """建立或增量更新月份的立方體（以唯讀連線讀取資料庫，可於子程序執行）
+
+    新的陣列寫入暫存檔後 rename 取代原檔，已載入舊檔的讀取端不受影響。
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+
+    Returns:
+        更新報告（停車場數、時段數、新增的同步與資料列數、是否全部重建）
+    """
+    cube_path, index_path = cube_paths(db_path)
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        # 於同一讀取交易內讀取摘要與資料列，不受同步中的寫入影響
+        conn.execute("BEGIN")
+        mode = read_storage_mode(conn) or STORAGE_MODE_FULL
+        summary = read_summary(conn)
+        meta = None
+        if cube_path.exists() and index_path.exists():
+            meta = json.loads(index_path.read_text(encoding="utf-8"))
+            if meta["storage_mode"] != mode or meta["last_recorded_at"] is None:
+                meta = None
+        after = datetime.fromisoformat(meta["last_recorded_at"]) if meta else None
+        batches, snapshots = _read_new_rows(conn, after)
+        new_rows = sum(len(records) for _, records in batches)
+        # 摘要的資料列數與已納入者不符時表示較早的時間有變動，需全部重建
+        if meta and (summary is None or meta["rows"] + new_rows != summary["total_records"]):
+            meta = None
+            after = None
+            batches, snapshots = _read_new_rows(conn, None)
+            new_rows = sum(len(records) for _, records in batches)
+    finally:
+        conn.close()
+
+    start, slots = month_range(db_path)
+    if meta:
+        lots = meta["lots"]
+        values = np.load(cube_path)
+        state = values[:, (after - start) // SLOT].copy()
+        rows = meta["rows"]
+    else:
+        lots = []
+        values = np.full((0, slots), MISSING, dtype=np.int16)
+        state = np.full(0, MISSING, dtype=np.int16)
+        rows = 0
+
+    index = {parking_id: row for row, parking_id in enumerate(lots)}
+    new_lots = sorted(
+        {parking_id for _, records in batches for parking_id, _ in records} - index.keys()
+    )
+    if new_lots:
+        for parking_id in new_lots:
+            index[parking_id] = len(lots)
+            lots.append(parking_id)
+        extra = np.full((len(new_lots), slots), MISSING, dtype=np.int16)
+        values = np.concatenate([values, extra])
+        state = np.concatenate([state, extra[:, 0]])
+
+    # 依時間合併寫入資料列的同步與只記錄快照的同步
+    written = dict(batches)
+    moments = sorted(written.keys() | set(snapshots))
+    last = after
+    for moment in moments:
+        records = written.get(moment)
+        if records:
+            if mode != STORAGE_MODE_DELTA:
+                state.fill(MISSING)
+            state[[index[parking_id] for parking_id, _ in records]] = [v for _, v in records]
+        slot = (moment - start) // SLOT
+        if 0 <= slot < slots:
+            values[:, slot] = state
+        last = moment
+
+    # 先取代陣列再取代索引：新增的停車場附加於最後，舊索引仍對應新陣列的前幾列
+    tmp_path = cube_path.with_name(f"{cube_path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, cube_path)
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {
+                "lots": lots,
+                "start": start.isoformat(),
+                "slot_seconds": int(SLOT.total_seconds()),
+                "storage_mode": mode,
+                "last_recorded_at": last.isoformat() if last else None,
+                "rows": rows + new_rows,
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, index_path)
+
+    return {
+        "db_file": db_path.name,
+        "lots": len(lots),
+        "slots": slots,
+        "snapshots": len(moments),
+        "rows": new_rows,
+        "rebuilt": meta is None,
+    }
@@ -0,0 +1,323 @@
+"""即時車位彙總模組
+
+於月份資料庫中維護每小時 / 每日、依停車場與行政區的彙總表，
+儀表板查詢不需掃描原始的 5 分鐘資料。
+
+彙總表只保存可累加的欄位（筆數、總和、最小、最大），同步時以 UPSERT 累加本次資料，
+平均值與佔用率於查詢時計算。佔用率為 1 - 剩餘車位 / 總車位（parking_lots.total_car），
+總車位未知或為 0 的停車場不計入佔用率。
+"""
+
+import sqlite3
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+# 彙總粒度
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+GRANULARITIES = (GRANULARITY_HOUR, GRANULARITY_DAY)
+
+# 各粒度的時間區間格式（本地時間）
+BUCKET_FORMATS = {
+    GRANULARITY_HOUR: "%Y-%m-%dT%H:00",
+    GRANULARITY_DAY: "%Y-%m-%d",
+}
+
+# 彙總表：依停車場 / 依行政區（行政區每次同步先加總車位數，再計入彙總）
+ROLLUP_TABLES = {"parking_id": "rollup_lot", "area": "rollup_area"}
+
+CREATE_ROLLUP_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    {key} TEXT NOT NULL,
+    samples INTEGER NOT NULL,
+    sum_available INTEGER NOT NULL,
+    min_available INTEGER NOT NULL,
+    max_available INTEGER NOT NULL,
+    occupancy_samples INTEGER NOT NULL,
+    sum_occupancy REAL NOT NULL,
+    PRIMARY KEY (granularity, {key}, bucket)
+) WITHOUT ROWID
+"""
+
+# 累加 UPSERT（MIN / MAX 兩個參數時為純量函式）
+UPSERT_ROLLUP = """
+INSERT INTO {table} (
+    granularity, bucket, {key}, samples, sum_available, min_available, max_available,
+    occupancy_samples, sum_occupancy
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, {key}, bucket) DO UPDATE SET
+    samples = samples + excluded.samples,
+    sum_available = sum_available + excluded.sum_available,
+    min_available = MIN(min_available, excluded.min_available),
+    max_available = MAX(max_available, excluded.max_available),
+    occupancy_samples = occupancy_samples + excluded.occupancy_samples,
+    sum_occupancy = sum_occupancy + excluded.sum_occupancy
+"""
+
+# 停車場資訊：parking_id 對應 (行政區, 總車位數)
+LotInfo = dict[str, tuple[str | None, int | None]]
+
+# 彙總值：[筆數, 總和, 最小, 最大, 佔用率筆數, 佔用率總和]
+Stats = list
+
+
+def create_rollup_tables(conn: sqlite3.Connection) -> None:
+    """建立彙總表（既有檔案亦可呼叫）
+
+    Args:
+        conn: SQLite 連線
+    """
+    for key, table in ROLLUP_TABLES.items():
+        conn.execute(CREATE_ROLLUP_TABLE.format(table=table, key=key))
+
+
+def copy_rollups(src: sqlite3.Connection, dst: sqlite3.Connection) -> None:
+    """複製彙總表（重寫月份資料庫時保留，彙總值與儲存格式無關）
+
+    Args:
+        src: 原檔連線
+        dst: 新檔連線（呼叫端管理交易）
+    """
+    create_rollup_tables(dst)
+    for table in ROLLUP_TABLES.values():
+        has_table = src.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if has_table:
+            dst.executemany(
+                f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                src.execute(f"SELECT * FROM {table}"),
+            )
+
+
+def _occupancy(available: int, total: int | None) -> float | None:
+    """計算佔用率（限制於 0-1），總車位未知時為 None"""
+    if not total or total <= 0:
+        return None
+    return min(max(1 - available / total, 0.0), 1.0)
+
+
+def _accumulate(
+    stats: dict[tuple, Stats], key: tuple, available: int, occupancy: float | None
+) -> None:
+    """將一個樣本計入彙總值"""
+    entry = stats.get(key)
+    if entry is None:
+        entry = stats[key] = [0, 0, available, available, 0, 0.0]
+    entry[0] += 1
+    entry[1] += available
+    entry[2] = min(entry[2], available)
+    entry[3] = max(entry[3], available)
+    if occupancy is not None:
+        entry[4] += 1
+        entry[5] += occupancy
+
+
+class RollupAccumulator:
+    """彙總累加器
+
+    依序加入各次同步的資料（同一次同步可分多批加入），flush() 時一次累加至彙總表。
+    同步時每次只含一個記錄時間；重建時可依時間順序加入整個月份的資料。
+    """
+
+    def __init__(self, lots: LotInfo):
+        """初始化累加器
+
+        Args:
+            lots: 停車場資訊（行政區與總車位數），未列出的停車場不計入行政區彙總與佔用率
+        """
+        self.lots = lots
+        self._stats: dict[str, dict[tuple, Stats]] = {key: {} for key in ROLLUP_TABLES}
+        self._recorded_at: datetime | None = None
+        self._buckets: tuple[tuple[str, str], ...] = ()
+        self._areas: dict[str, list[int]] = {}
+
+    def _close_snapshot(self) -> None:
+        """將目前這次同步的行政區加總計入彙總值"""
+        for area, (available, capacity, capacity_available) in self._areas.items():
+            occupancy = _occupancy(capacity_available, capacity)
+            for granularity, bucket in self._buckets:
+                _accumulate(self._stats["area"], (granularity, bucket, area), available, occupancy)
+        self._areas = {}
+
+    def add(self, records: Iterable[dict], recorded_at: datetime) -> None:
+        """加入一批同步資料
+
+        Args:
+            records: 資料列表，每筆包含 parking_id 和 available_car
+            recorded_at: 記錄時間（naive datetime 視為本地時間）
+        """
+        if recorded_at != self._recorded_at:
+            self._close_snapshot()
+            self._recorded_at = recorded_at
+            local = recorded_at.astimezone()
+            self._buckets = tuple(
+                (granularity, local.strftime(BUCKET_FORMATS[granularity]))
+                for granularity in GRANULARITIES
+            )
+
+        lot_stats = self._stats["parking_id"]
+        for record in records:
+            parking_id = record["parking_id"]
+            available = record["available_car"]
+            area, total = self.lots.get(parking_id, (None, None))
+            occupancy = _occupancy(available, total)
+            for granularity, bucket in self._buckets:
+                _accumulate(lot_stats, (granularity, bucket, parking_id), available, occupancy)
+
+            if area:
+                # [剩餘車位, 已知總車位, 已知總車位的停車場剩餘車位]
+                sums = self._areas.setdefault(area, [0, 0, 0])
+                sums[0] += available
+                if total and total > 0:
+                    sums[1] += total
+                    sums[2] += min(available, total)
+
+    def flush(self, conn: sqlite3.Connection) -> int:
+        """將累加的彙總值寫入彙總表並清空
+
+        Args:
+            conn: SQLite 連線（呼叫端管理交易）
+
+        Returns:
+            更新的彙總列數
+        """
+        self._close_snapshot()
+        self._recorded_at = None
+        create_rollup_tables(conn)
+
+        count = 0
+        for key, table in ROLLUP_TABLES.items():
+            stats = self._stats[key]
+            conn.executemany(
+                UPSERT_ROLLUP.format(table=table, key=key),
+                (
+                    (granularity, bucket, name, *values)
+                    for (granularity, bucket, name), values in stats.items()
+                ),
+            )
+            count += len(stats)
+            stats.clear()
+        return count
+
+
+def iter_snapshots(
+    rows: Iterable[tuple[str, int, str]],
+    forward_fill: bool,
+    heartbeats: Iterable[datetime] = (),
+) -> Iterator[tuple[datetime, list[dict]]]:
+    """將依時間排序的資料列組回每次同步的完整資料（重建彙總用）
+
+    沒有寫入資料列的同步（重複快照，或 delta 模式中沒有停車場變動）只記錄於 snapshots 表，
+    於這些時間點沿用前一次同步的資料；早於第一次寫入資料列的時間點沒有資料可沿用，略過。
+
+    Args:
+        rows: (parking_id, available_car, recorded_at)，依記錄時間排序
+        forward_fill: 是否沿用先前的值（delta 模式未變動的停車場不會寫入資料列）
+        heartbeats: snapshots 表的記錄時間，與資料列時間相同者視為同一次同步
+
+    Yields:
+        (記錄時間, 資料列表)
+    """
+    pending = iter(sorted(heartbeats))
+    heartbeat = next(pending, None)
+    previous = None
+    for recorded_at, records in _iter_written(rows, forward_fill):
+        while heartbeat is not None and heartbeat <= recorded_at:
+            if heartbeat < recorded_at and previous is not None:
+                yield heartbeat, previous
+            heartbeat = next(pending, None)
+        yield recorded_at, records
+        previous = records
+    while heartbeat is not None and previous is not None:
+        yield heartbeat, previous
+        heartbeat = next(pending, None)
+
+
+def _iter_written(
+    rows: Iterable[tuple[str, int, str]], forward_fill: bool
+) -> Iterator[tuple[datetime, list[dict]]]:
+    """依記錄時間將資料列分組（只包含寫入資料列的同步）"""
+    current: dict[str, int] = {}
+    recorded_at = None
+    for parking_id, available_car, row_time in rows:
+        if row_time != recorded_at:
+            if recorded_at is not None:
+                yield datetime.fromisoformat(recorded_at), _records(current)
+            recorded_at = row_time
+            if not forward_fill:
+                current = {}
+        current[parking_id] = available_car
+    if recorded_at is not None:
+        yield datetime.fromisoformat(recorded_at), _records(current)
+
+
+def _records(values: dict[str, int]) -> list[dict]:
+    """將 parking_id 對應車位數的字典轉為資料列表"""
+    return [
+        {"parking_id": parking_id, "available_car": available_car}
+        for parking_id, available_car in values.items()
+    ]
+
+
+def query_rollups(
+    conn: sqlite3.Connection,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    parking_id: str | None = None,
+    area: str | None = None,
+) -> list[dict]:
+    """查詢彙總值
+
+    Args:
+        conn: SQLite 連線
+        granularity: 彙總粒度（hour 或 day）
+        start: 起始時間（含所在區間，naive datetime 視為本地時間）
+        end: 結束時間（含所在區間）
+        parking_id: 停車場編號（與 area 擇一），皆未指定時回傳所有停車場
+        area: 行政區
+
+    Returns:
+        {"bucket", "parking_id" 或 "area", "samples", "avg_available", "min_available",
+        "max_available", "avg_occupancy"} 列表，依鍵值與時間排序
+    """
+    key = "area" if area is not None else "parking_id"
+    conditions = ["granularity = ?", "bucket >= ?", "bucket <= ?"]
+    bucket_format = BUCKET_FORMATS[granularity]
+    params: list = [
+        granularity,
+        start.astimezone().strftime(bucket_format),
+        end.astimezone().strftime(bucket_format),
+    ]
+    name = area if area is not None else parking_id
+    if name is not None:
+        conditions.append(f"{key} = ?")
+        params.append(name)
+
+    rows = conn.execute(
+        f"""
+        SELECT bucket, {key}, samples, sum_available * 1.0 / samples,
+            min_available, max_available,
+            CASE WHEN occupancy_samples > 0 THEN sum_occupancy / occupancy_samples END
+        FROM {ROLLUP_TABLES[key]}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {key}, bucket
+        """,
+        params,
+    ).fetchall()
+    return [
+        {
+            "bucket": row[0],
+            key: row[1],
+            "samples": row[2],
+            "avg_available": row[3],
+            "min_available": row[4],
+            "max_available": row[5],
+            "avg_occupancy": row[6],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,998 @@
+"""即時車位資料庫結構模組
+
+定義月份資料庫的各版本結構（以 PRAGMA user_version 記錄），並提供版本間的轉換。
+
+- v1：availability 表以 TEXT 儲存 parking_id 與 ISO 8601 記錄時間，
+  AUTOINCREMENT 主鍵加上 parking_id、recorded_at 兩個索引
+- v2：lots 字典表將 parking_id 對應為整數 parking_key，
+  availability_v2 以 (parking_key, ts) 為叢集主鍵的 WITHOUT ROWID 表，ts 為 Unix epoch 秒數；
+  另提供 availability 檢視表供既有 SQL 查詢使用
+
+兩個版本皆支援 full / delta 儲存模式（記錄在 availability_meta）。
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+
+from parking_newtaipei.db.availability_rollup import copy_rollups
+from parking_newtaipei.db.availability_snapshots import copy_snapshots
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.time import epoch_to_iso, to_iso
+
+# 儲存模式
+STORAGE_MODE_FULL = "full"
+STORAGE_MODE_DELTA = "delta"
+STORAGE_MODES = (STORAGE_MODE_FULL, STORAGE_MODE_DELTA)
+
+# 結構版本
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+SCHEMA_VERSIONS = (SCHEMA_V1, SCHEMA_V2)
+
+# 資料庫檔案 metadata（儲存模式等）
+CREATE_AVAILABILITY_META_TABLE = """
+CREATE TABLE IF NOT EXISTS availability_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+)
+"""
+
+# === v1 ===
+
+# 即時車位資料表 SQL
+CREATE_AVAILABILITY_TABLE = """
+CREATE TABLE IF NOT EXISTS availability (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    parking_id TEXT NOT NULL,
+    available_car INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL
+)
+"""
+
+# 建立索引
+CREATE_AVAILABILITY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_availability_parking_id ON availability(parking_id)",
+    "CREATE INDEX IF NOT EXISTS idx_availability_recorded_at ON availability(recorded_at)",
+]
+
+# 每個停車場的最後已知值（delta 模式使用）
+CREATE_AVAILABILITY_LATEST_TABLE = """
+CREATE TABLE IF NOT EXISTS availability_latest (
+    parking_id TEXT PRIMARY KEY,
+    available_car INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL,
+    last_seen_at TEXT NOT NULL
+)
+"""
+
+# === v2 ===
+
+# 停車場字典表（delta 模式另以 available_car、recorded_ts、last_seen_ts 記錄最後已知值）
+CREATE_LOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS lots (
+    parking_key INTEGER PRIMARY KEY,
+    parking_id TEXT NOT NULL UNIQUE,
+    available_car INTEGER,
+    recorded_ts INTEGER,
+    last_seen_ts INTEGER
+)
+"""
+
+# 即時車位資料表 SQL（叢集主鍵，無 rowid）
+CREATE_AVAILABILITY_V2_TABLE = """
+CREATE TABLE IF NOT EXISTS availability_v2 (
+    parking_key INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    available_car INTEGER NOT NULL,
+    PRIMARY KEY (parking_key, ts)
+) WITHOUT ROWID
+"""
+
+# 相容 v1 欄位的檢視表（recorded_at 為本地時間，不含毫秒與時區）
+CREATE_AVAILABILITY_V2_VIEW = """
+CREATE VIEW IF NOT EXISTS availability AS
+SELECT
+    l.parking_id AS parking_id,
+    a.available_car AS available_car,
+    strftime('%Y-%m-%dT%H:%M:%S', a.ts, 'unixepoch', 'localtime') AS recorded_at
+FROM availability_v2 a
+JOIN lots l ON l.parking_key = a.parking_key
+"""
+
+# 每批寫入筆數（轉換時使用）
+LOAD_BATCH_SIZE = 10000
+
+# 查詢結果列：(parking_id, available_car, recorded_at ISO 8601 字串)
+Row = tuple[str, int, str]
+
+
+def _json_ids(parking_ids: Iterable[str]) -> str:
+    """將停車場編號序列轉為 JSON 陣列字串（供 json_each 使用）"""
+    return json.dumps(list(parking_ids), ensure_ascii=False)
+
+
+def read_storage_mode(conn: sqlite3.Connection) -> str | None:
+    """讀取資料庫檔案記錄的儲存模式
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        儲存模式，若未記錄則為 None
+    """
+    has_meta = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='availability_meta'"
+    ).fetchone()
+    if not has_meta:
+        return None
+    row = conn.execute(
+        "SELECT value FROM availability_meta WHERE key = 'storage_mode'"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def read_schema_version(conn: sqlite3.Connection) -> int | None:
+    """讀取資料庫檔案的結構版本
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        結構版本；空白檔案回傳 None，未記錄版本的既有檔案視為 v1
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version:
+        return version
+    has_objects = conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]
+    return SCHEMA_V1 if has_objects else None
+
+
+class AvailabilitySchemaV1:
+    """v1 結構：TEXT parking_id 與 ISO 8601 記錄時間"""
+
+    version = SCHEMA_V1
+
+    def create(self, conn: sqlite3.Connection, storage_mode: str) -> None:
+        """建立資料表
+
+        Args:
+            conn: SQLite 連線
+            storage_mode: 儲存模式
+        """
+        conn.execute(CREATE_AVAILABILITY_TABLE)
+        for index_sql in CREATE_AVAILABILITY_INDEXES:
+            conn.execute(index_sql)
+        if storage_mode == STORAGE_MODE_DELTA:
+            conn.execute(CREATE_AVAILABILITY_LATEST_TABLE)
+        conn.execute(f"PRAGMA user_version = {self.version}")
+
+    def insert(
+        self,
+        conn: sqlite3.Connection,
+        records: list[dict],
+        recorded_at: datetime,
+        delta: bool,
+    ) -> int:
+        """寫入一次同步的資料
+
+        Args:
+            conn: SQLite 連線
+            records: 資料列表，每筆包含 parking_id 和 available_car
+            recorded_at: 記錄時間
+            delta: 是否只寫入變動
+
+        Returns:
+            實際寫入的筆數
+        """
+        now = to_iso(recorded_at)
+        params_list = [(record["parking_id"], record["available_car"], now) for record in records]
+
+        if delta:
+            latest = dict(
+                conn.execute("SELECT parking_id, available_car FROM availability_latest")
+            )
+            params_list = [
+                params for params in params_list if latest.get(params[0]) != params[1]
+            ]
+
+        conn.executemany(
+            """
+            INSERT INTO availability (parking_id, available_car, recorded_at)
+            VALUES (?, ?, ?)
+            """,
+            params_list,
+        )
+
+        if delta:
+            conn.executemany(
+                """
+                INSERT INTO availability_latest
+                    (parking_id, available_car, recorded_at, last_seen_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(parking_id) DO UPDATE SET
+                    available_car = excluded.available_car,
+                    recorded_at = excluded.recorded_at,
+                    last_seen_at = excluded.last_seen_at
+                """,
+                [(*params, now) for params in params_list],
+            )
+            conn.execute(
+                """
+                UPDATE availability_latest SET last_seen_at = ?
+                WHERE parking_id IN (SELECT value FROM json_each(?))
+                """,
+                (now, _json_ids(record["parking_id"] for record in records)),
+            )
+
+        return len(params_list)
+
+    def load_rows(self, conn: sqlite3.Connection, rows: Iterable[Row]) -> None:
+        """直接寫入已排序的資料列（轉換用，不做變動判斷）
+
+        Args:
+            conn: SQLite 連線
+            rows: 資料列
+        """
+        conn.executemany(
+            "INSERT INTO availability (parking_id, available_car, recorded_at) VALUES (?, ?, ?)",
+            rows,
+        )
+
+    def set_latest(self, conn: sqlite3.Connection, latest: dict[str, tuple[int, str, str]]) -> None:
+        """寫入最後已知值（delta 模式，轉換用）
+
+        Args:
+            conn: SQLite 連線
+            latest: parking_id 對應 (available_car, recorded_at, last_seen_at)
+        """
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO availability_latest
+                (parking_id, available_car, recorded_at, last_seen_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(parking_id, *values) for parking_id, values in latest.items()],
+        )
+
+    def get_latest(
+        self, conn: sqlite3.Connection, schema: str = "main"
+    ) -> dict[str, tuple[int, str, str]]:
+        """讀取最後已知值（delta 模式，轉換用）
+
+        Args:
+            conn: SQLite 連線
+            schema: 資料庫名稱（ATTACH 時使用）
+
+        Returns:
+            parking_id 對應 (available_car, recorded_at, last_seen_at)
+        """
+        cursor = conn.execute(
+            f"""
+            SELECT parking_id, available_car, recorded_at, last_seen_at
+            FROM {schema}.availability_latest
+            """
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in cursor}
+
+    def value_as_of(self, conn: sqlite3.Connection, parking_id: str, at: datetime) -> dict | None:
+        """取得停車場在指定時間點（含）之前的最後一筆記錄
+
+        Args:
+            conn: SQLite 連線
+            parking_id: 停車場編號
+            at: 查詢時間
+
+        Returns:
+            {"parking_id", "available_car", "recorded_at"}，若無記錄則為 None
+        """
+        row = conn.execute(
+            """
+            SELECT parking_id, available_car, recorded_at FROM availability
+            WHERE parking_id = ? AND recorded_at <= ?
+            ORDER BY recorded_at DESC
+            LIMIT 1
+            """,
+            (parking_id, to_iso(at)),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def snapshot_as_of(self, conn: sqlite3.Connection, at: datetime) -> list[dict]:
+        """取得所有停車場在指定時間點（含）之前的最後一筆記錄
+
+        Args:
+            conn: SQLite 連線
+            at: 查詢時間
+
+        Returns:
+            {"parking_id", "available_car", "recorded_at"} 列表
+        """
+        # SQLite 的 MAX() 聚合會讓其他欄位取自同一列
+        rows = conn.execute(
+            """
+            SELECT parking_id, available_car, MAX(recorded_at) AS recorded_at
+            FROM availability
+            WHERE recorded_at <= ?
+            GROUP BY parking_id
+            """,
+            (to_iso(at),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def sync_records(
+        self, conn: sqlite3.Connection, recorded_at: datetime, delta: bool
+    ) -> list[dict]:
+        """取得一次同步的所有停車場車位數（delta 模式含未變動者）
+
+        Args:
+            conn: SQLite 連線
+            recorded_at: 同步的記錄時間
+            delta: 是否為 delta 模式（由最後已知值中該次同步看到的停車場取得）
+
+        Returns:
+            {"parking_id", "available_car"} 列表
+        """
+        if delta:
+            sql = """
+                SELECT parking_id, available_car FROM availability_latest
+                WHERE last_seen_at = ?
+                """
+        else:
+            sql = "SELECT parking_id, available_car FROM availability WHERE recorded_at = ?"
+        rows = conn.execute(sql, (to_iso(recorded_at),))
+        return [{"parking_id": row[0], "available_car": row[1]} for row in rows]
+
+    def has_rows_between(self, conn: sqlite3.Connection, start: datetime, end: datetime) -> bool:
+        """時間區間（含）內是否有任何記錄
+
+        Args:
+            conn: SQLite 連線
+            start: 起始時間
+            end: 結束時間
+
+        Returns:
+            是否有記錄
+        """
+        row = conn.execute(
+            "SELECT 1 FROM availability WHERE recorded_at BETWEEN ? AND ? LIMIT 1",
+            (to_iso(start), to_iso(end)),
+        ).fetchone()
+        return row is not None
+
+    def last_seen(self, conn: sqlite3.Connection) -> datetime | None:
+        """取得最後一次寫入（含未變動）的時間（delta 模式）
+
+        Args:
+            conn: SQLite 連線
+
+        Returns:
+            最後寫入時間，若無記錄則為 None
+        """
+        value = conn.execute("SELECT MAX(last_seen_at) FROM availability_latest").fetchone()[0]
+        return datetime.fromisoformat(value) if value else None
+
+    def format_time(self, recorded_at: datetime) -> str:
+        """記錄時間於統計資訊中的表示（與 stats() 的首末筆時間相同）
+
+        Args:
+            recorded_at: 記錄時間
+
+        Returns:
+            ISO 8601 字串
+        """
+        return to_iso(recorded_at)
+
+    def stats(self, conn: sqlite3.Connection) -> dict:
+        """計算統計資訊
+
+        Args:
+            conn: SQLite 連線
+
+        Returns:
+            total_records、unique_parking_ids、first_record、last_record
+        """
+        total = conn.execute("SELECT COUNT(*) FROM availability").fetchone()[0]
+        unique = conn.execute("SELECT COUNT(DISTINCT parking_id) FROM availability").fetchone()[0]
+        first = conn.execute("SELECT MIN(recorded_at) FROM availability").fetchone()[0]
+        last = conn.execute("SELECT MAX(recorded_at) FROM availability").fetchone()[0]
+        return {
+            "total_records": total,
+            "unique_parking_ids": unique,
+            "first_record": first,
+            "last_record": last,
+        }
+
+    def iter_rows(
+        self,
+        conn: sqlite3.Connection,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        parking_ids: list[str] | None = None,
+        order: str = "time",
+        schema: str = "main",
+    ) -> Iterator[Row]:
+        """依條件逐列讀取資料
+
+        Args:
+            conn: SQLite 連線
+            start: 起始時間（含），None 表示不限
+            end: 結束時間（含），None 表示不限
+            parking_ids: 停車場編號，None 表示全部
+            order: 排序方式，time 依時間、lot 依停車場再依時間
+            schema: 資料庫名稱（ATTACH 時使用）
+
+        Yields:
+            (parking_id, available_car, recorded_at)
+        """
+        conditions = []
+        params: list = []
+        if start is not None:
+            conditions.append("recorded_at >= ?")
+            params.append(to_iso(start))
+        if end is not None:
+            conditions.append("recorded_at <= ?")
+            params.append(to_iso(end))
+        if parking_ids is not None:
+            conditions.append("parking_id IN (SELECT value FROM json_each(?))")
+            params.append(_json_ids(parking_ids))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order_by = "recorded_at, id" if order == "time" else "parking_id, recorded_at, id"
+
+        cursor = conn.execute(
+            f"""
+            SELECT parking_id, available_car, recorded_at FROM {schema}.availability
+            {where}
+            ORDER BY {order_by}
+            """,
+            params,
+        )
+        for row in cursor:
+            yield row[0], row[1], row[2]
+
+
+class AvailabilitySchemaV2:
+    """v2 結構：整數 parking_key、epoch 時間與 WITHOUT ROWID 叢集主鍵"""
+
+    version = SCHEMA_V2
+
+    def create(self, conn: sqlite3.Connection, storage_mode: str) -> None:
+        """建立資料表
+
+        Args:
+            conn: SQLite 連線
+            storage_mode: 儲存模式（lots 表同時保存最後已知值，兩種模式結構相同）
+        """
+        conn.execute(CREATE_LOTS_TABLE)
+        conn.execute(CREATE_AVAILABILITY_V2_TABLE)
+        conn.execute(CREATE_AVAILABILITY_V2_VIEW)
+        conn.execute(f"PRAGMA user_version = {self.version}")
+
+    def _lot_keys(self, conn: sqlite3.Connection, parking_ids: Iterable[str]) -> dict[str, int]:
+        """取得停車場編號對應的整數 key，不存在者自動新增
+
+        Args:
+            conn: SQLite 連線
+            parking_ids: 停車場編號
+
+        Returns:
+            parking_id 對應 parking_key 的字典
+        """
+        conn.executemany(
+            "INSERT OR IGNORE INTO lots (parking_id) VALUES (?)",
+            ((parking_id,) for parking_id in parking_ids),
+        )
+        return dict(conn.execute("SELECT parking_id, parking_key FROM lots"))
+
+    def insert(
+        self,
+        conn: sqlite3.Connection,
+        records: list[dict],
+        recorded_at: datetime,
+        delta: bool,
+    ) -> int:
+        """寫入一次同步的資料
+
+        Args:
+            conn: SQLite 連線
+            records: 資料列表，每筆包含 parking_id 和 available_car
+            recorded_at: 記錄時間（以秒為單位保存）
+            delta: 是否只寫入變動
+
+        Returns:
+            實際寫入的筆數
+        """
+        ts = int(recorded_at.timestamp())
+        keys = self._lot_keys(conn, (record["parking_id"] for record in records))
+        params_list = [
+            (keys[record["parking_id"]], ts, record["available_car"]) for record in records
+        ]
+
+        if delta:
+            latest = dict(conn.execute("SELECT parking_key, available_car FROM lots"))
+            params_list = [
+                params for params in params_list if latest.get(params[0]) != params[2]
+            ]
+
+        # 同一秒重複寫入時以最後一次為準
+        conn.executemany(
+            "INSERT OR REPLACE INTO availability_v2 (parking_key, ts, available_car) "
+            "VALUES (?, ?, ?)",
+            params_list,
+        )
+
+        if delta:
+            conn.executemany(
+                "UPDATE lots SET available_car = ?, recorded_ts = ? WHERE parking_key = ?",
+                [(value, ts, key) for key, _, value in params_list],
+            )
+            conn.execute(
+                """
+                UPDATE lots SET last_seen_ts = ?
+                WHERE parking_key IN (SELECT value FROM json_each(?))
+                """,
+                (ts, json.dumps([keys[record["parking_id"]] for record in records])),
+            )
+
+        return len(params_list)
+
+    def load_rows(self, conn: sqlite3.Connection, rows: Iterable[Row]) -> None:
+        """直接寫入已排序的資料列（轉換用，不做變動判斷）
+
+        Args:
+            conn: SQLite 連線
+            rows: 資料列
+        """
+        keys: dict[str, int] = {}
+        batch: list[tuple[int, int, int]] = []
+
+        for parking_id, available_car, recorded_at in rows:
+            key = keys.get(parking_id)
+            if key is None:
+                conn.execute("INSERT OR IGNORE INTO lots (parking_id) VALUES (?)", (parking_id,))
+                key = conn.execute(
+                    "SELECT parking_key FROM lots WHERE parking_id = ?", (parking_id,)
+                ).fetchone()[0]
+                keys[parking_id] = key
+
+            ts = int(datetime.fromisoformat(recorded_at).timestamp())
+            batch.append((key, ts, available_car))
+            if len(batch) >= LOAD_BATCH_SIZE:
+                self._load_batch(conn, batch)
+                batch.clear()
+
+        self._load_batch(conn, batch)
+
+    def _load_batch(self, conn: sqlite3.Connection, batch: list[tuple[int, int, int]]) -> None:
+        """寫入一批 (parking_key, ts, available_car)"""
+        conn.executemany(
+            "INSERT OR REPLACE INTO availability_v2 (parking_key, ts, available_car) "
+            "VALUES (?, ?, ?)",
+            batch,
+        )
+
+    def set_latest(self, conn: sqlite3.Connection, latest: dict[str, tuple[int, str, str]]) -> None:
+        """寫入最後已知值（delta 模式，轉換用）
+
+        Args:
+            conn: SQLite 連線
+            latest: parking_id 對應 (available_car, recorded_at, last_seen_at)
+        """
+        self._lot_keys(conn, latest)
+        conn.executemany(
+            """
+            UPDATE lots SET available_car = ?, recorded_ts = ?, last_seen_ts = ?
+            WHERE parking_id = ?
+            """,
+            [
+                (
+                    value,
+                    int(datetime.fromisoformat(recorded_at).timestamp()),
+                    int(datetime.fromisoformat(last_seen_at).timestamp()),
+                    parking_id,
+                )
+                for parking_id, (value, recorded_at, last_seen_at) in latest.items()
+            ],
+        )
+
+    def get_latest(
+        self, conn: sqlite3.Connection, schema: str = "main"
+    ) -> dict[str, tuple[int, str, str]]:
+        """讀取最後已知值（delta 模式，轉換用）
+
+        Args:
+            conn: SQLite 連線
+            schema: 資料庫名稱（ATTACH 時使用）
+
+        Returns:
+            parking_id 對應 (available_car, recorded_at, last_seen_at)
+        """
+        cursor = conn.execute(
+            f"""
+            SELECT parking_id, available_car, recorded_ts, last_seen_ts FROM {schema}.lots
+            WHERE available_car IS NOT NULL
+            """
+        )
+        return {
+            row[0]: (row[1], epoch_to_iso(row[2]), epoch_to_iso(row[3])) for row in cursor
+        }
+
+    def value_as_of(self, conn: sqlite3.Connection, parking_id: str, at: datetime) -> dict | None:
+        """取得停車場在指定時間點（含）之前的最後一筆記錄
+
+        Args:
+            conn: SQLite 連線
+            parking_id: 停車場編號
+            at: 查詢時間
+
+        Returns:
+            {"parking_id", "available_car", "recorded_at"}，若無記錄則為 None
+        """
+        row = conn.execute(
+            """
+            SELECT a.available_car, a.ts FROM availability_v2 a
+            WHERE a.parking_key = (SELECT parking_key FROM lots WHERE parking_id = ?)
+              AND a.ts <= ?
+            ORDER BY a.ts DESC
+            LIMIT 1
+            """,
+            (parking_id, at.timestamp()),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "parking_id": parking_id,
+            "available_car": row[0],
+            "recorded_at": epoch_to_iso(row[1]),
+        }
+
+    def snapshot_as_of(self, conn: sqlite3.Connection, at: datetime) -> list[dict]:
+        """取得所有停車場在指定時間點（含）之前的最後一筆記錄
+
+        以 lots 為外層迴圈（CROSS JOIN 固定連接順序），每個停車場以主鍵定位，
+        不需要時間索引。
+
+        Args:
+            conn: SQLite 連線
+            at: 查詢時間
+
+        Returns:
+            {"parking_id", "available_car", "recorded_at"} 列表
+        """
+        rows = conn.execute(
+            """
+            SELECT l.parking_id, a.available_car, a.ts
+            FROM lots l
+            CROSS JOIN availability_v2 a
+            WHERE a.parking_key = l.parking_key
+              AND a.ts = (
+                SELECT MAX(ts) FROM availability_v2
+                WHERE parking_key = l.parking_key AND ts <= ?
+            )
+            """,
+            (at.timestamp(),),
+        ).fetchall()
+        return [
+            {"parking_id": row[0], "available_car": row[1], "recorded_at": epoch_to_iso(row[2])}
+            for row in rows
+        ]
+
+    def sync_records(
+        self, conn: sqlite3.Connection, recorded_at: datetime, delta: bool
+    ) -> list[dict]:
+        """取得一次同步的所有停車場車位數（delta 模式含未變動者）
+
+        Args:
+            conn: SQLite 連線
+            recorded_at: 同步的記錄時間（以秒為單位比對）
+            delta: 是否為 delta 模式（由 lots 的最後已知值中該次同步看到的停車場取得）
+
+        Returns:
+            {"parking_id", "available_car"} 列表
+        """
+        if delta:
+            sql = "SELECT parking_id, available_car FROM lots WHERE last_seen_ts = ?"
+        else:
+            sql = """
+                SELECT l.parking_id, a.available_car
+                FROM lots l
+                CROSS JOIN availability_v2 a
+                WHERE a.parking_key = l.parking_key AND a.ts = ?
+                """
+        rows = conn.execute(sql, (int(recorded_at.timestamp()),))
+        return [{"parking_id": row[0], "available_car": row[1]} for row in rows]
+
+    def has_rows_between(self, conn: sqlite3.Connection, start: datetime, end: datetime) -> bool:
+        """時間區間（含）內是否有任何記錄
+
+        以 lots 為外層迴圈，每個停車場以主鍵範圍搜尋，不需要時間索引。
+
+        Args:
+            conn: SQLite 連線
+            start: 起始時間
+            end: 結束時間
+
+        Returns:
+            是否有記錄
+        """
+        row = conn.execute(
+            """
+            SELECT 1 FROM lots l
+            CROSS JOIN availability_v2 a ON a.parking_key = l.parking_key
+            WHERE a.ts BETWEEN ? AND ?
+            LIMIT 1
+            """,
+            (start.timestamp(), end.timestamp()),
+        ).fetchone()
+        return row is not None
+
+    def last_seen(self, conn: sqlite3.Connection) -> datetime | None:
+        """取得最後一次寫入（含未變動）的時間（delta 模式）
+
+        Args:
+            conn: SQLite 連線
+
+        Returns:
+            最後寫入時間，若無記錄則為 None
+        """
+        value = conn.execute("SELECT MAX(last_seen_ts) FROM lots").fetchone()[0]
+        return datetime.fromtimestamp(value).astimezone() if value is not None else None
+
+    def format_time(self, recorded_at: datetime) -> str:
+        """記錄時間於統計資訊中的表示（與 stats() 的首末筆時間相同，精確至秒）
+
+        Args:
+            recorded_at: 記錄時間
+
+        Returns:
+            ISO 8601 字串
+        """
+        return epoch_to_iso(int(recorded_at.timestamp()))
+
+    def stats(self, conn: sqlite3.Connection) -> dict:
+        """計算統計資訊
+
+        Args:
+            conn: SQLite 連線
+
+        Returns:
+            total_records、unique_parking_ids、first_record、last_record
+        """
+        row = conn.execute(
+            """
+            SELECT COUNT(*), COUNT(DISTINCT parking_key), MIN(ts), MAX(ts)
+            FROM availability_v2
+            """
+        ).fetchone()
+        return {
+            "total_records": row[0],
+            "unique_parking_ids": row[1],
+            "first_record": epoch_to_iso(row[2]) if row[2] is not None else None,
+            "last_record": epoch_to_iso(row[3]) if row[3] is not None else None,
+        }
+
+    def iter_rows(
+        self,
+        conn: sqlite3.Connection,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        parking_ids: list[str] | None = None,
+        order: str = "time",
+        schema: str = "main",
+    ) -> Iterator[Row]:
+        """依條件逐列讀取資料
+
+        Args:
+            conn: SQLite 連線
+            start: 起始時間（含），None 表示不限
+            end: 結束時間（含），None 表示不限
+            parking_ids: 停車場編號，None 表示全部
+            order: 排序方式，time 依時間、lot 依停車場再依時間
+            schema: 資料庫名稱（ATTACH 時使用）
+
+        Yields:
+            (parking_id, available_car, recorded_at)
+        """
+        # 以 lots 為外層迴圈，時間區間查詢變成每個停車場一次主鍵範圍搜尋
+        conditions = []
+        params: list = []
+        if start is not None:
+            conditions.append("a.ts >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            conditions.append("a.ts <= ?")
+            params.append(end.timestamp())
+        if parking_ids is not None:
+            conditions.append("l.parking_id IN (SELECT value FROM json_each(?))")
+            params.append(_json_ids(parking_ids))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order_by = "a.ts, a.parking_key" if order == "time" else "a.parking_key, a.ts"
+
+        cursor = conn.execute(
+            f"""
+            SELECT l.parking_id, a.available_car, a.ts
+            FROM {schema}.lots l
+            CROSS JOIN {schema}.availability_v2 a ON a.parking_key = l.parking_key
+            {where}
+            ORDER BY {order_by}
+            """,
+            params,
+        )
+        # 同一次同步的資料列共用時間戳記，轉換結果可重複使用
+        iso_cache: dict[int, str] = {}
+        for parking_id, value, ts in cursor:
+            iso = iso_cache.get(ts)
+            if iso is None:
+                iso = iso_cache[ts] = epoch_to_iso(ts)
+            yield parking_id, value, iso
+
+
+AvailabilitySchema = AvailabilitySchemaV1 | AvailabilitySchemaV2
+
+_SCHEMAS: dict[int, AvailabilitySchema] = {
+    SCHEMA_V1: AvailabilitySchemaV1(),
+    SCHEMA_V2: AvailabilitySchemaV2(),
+}
+
+
+def get_schema(version: int) -> AvailabilitySchema:
+    """取得結構版本對應的實作
+
+    Args:
+        version: 結構版本
+
+    Returns:
+        結構實作物件
+    """
+    if version not in _SCHEMAS:
+        raise ValueError(f"不支援的結構版本: {version}")
+    return _SCHEMAS[version]
+
+
+def create_schema(conn: sqlite3.Connection, version: int, storage_mode: str) -> None:
+    """建立指定版本的資料表並記錄儲存模式
+
+    Args:
+        conn: SQLite 連線
+        version: 結構版本
+        storage_mode: 儲存模式
+    """
+    get_schema(version).create(conn, storage_mode)
+    conn.execute(CREATE_AVAILABILITY_META_TABLE)
+    conn.execute(
+        "INSERT OR REPLACE INTO availability_meta (key, value) VALUES ('storage_mode', ?)",
+        (storage_mode,),
+    )
+
+
+def rewrite_monthly_db(
+    db_path: Path,
+    schema_version: int | None = None,
+    storage_mode: str | None = None,
+    keep_backup: bool = True,
+) -> dict:
+    """以指定結構版本與儲存模式重寫月份資料庫
+
+    依 (停車場, 時間) 順序讀取原檔寫入暫存檔，轉為 delta 模式時只保留變動，
+    完成後以 rename 取代原檔。彙總表與快照記錄原樣複製，原檔已是 delta 模式時
+    最後已知值（含最後看到的時間）也原樣複製；摘要依新檔的資料列重新計算
+    （筆數與時間格式隨版本、模式改變），原檔已凍結者維持凍結。
+    呼叫端需確保轉換期間沒有其他程序寫入。
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+        schema_version: 目標結構版本，None 表示維持原版本
+        storage_mode: 目標儲存模式，None 表示維持原模式
+        keep_backup: 是否保留原檔為 .bak
+
+    Returns:
+        轉換報告（版本、模式、筆數與檔案大小）
+    """
+    # availability_summary 依賴本模組的結構實作，於函式內匯入避免循環匯入
+    from parking_newtaipei.db.availability_summary import (
+        build_summary,
+        freeze_summary,
+        read_summary,
+    )
+
+    logger = get_logger()
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    src = sqlite3.connect(db_path)
+    try:
+        src_version = read_schema_version(src) or SCHEMA_V1
+        src_mode = read_storage_mode(src) or STORAGE_MODE_FULL
+        dst_version = schema_version or src_version
+        dst_mode = storage_mode or src_mode
+
+        if src_mode == STORAGE_MODE_DELTA and dst_mode == STORAGE_MODE_FULL:
+            raise ValueError(f"delta 模式無法還原為 full 模式: {db_path.name}")
+        if (src_version, src_mode) == (dst_version, dst_mode):
+            raise ValueError(
+                f"資料庫已是 v{dst_version} {dst_mode} 模式: {db_path.name}"
+            )
+
+        # 將 WAL 內容寫回主檔，避免 rename 後殘留的 -wal 套用到新檔
+        src.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = db_path.stat().st_size
+        src_schema = get_schema(src_version)
+        dst_schema = get_schema(dst_version)
+        delta = dst_mode == STORAGE_MODE_DELTA
+
+        counts = {"before": 0, "after": 0}
+        latest: dict[str, tuple[int, str, str]] = {}
+
+        def transitions() -> Iterator[Row]:
+            for parking_id, available_car, recorded_at in src_schema.iter_rows(src, order="lot"):
+                counts["before"] += 1
+                previous = latest.get(parking_id)
+                if not delta or previous is None or previous[0] != available_car:
+                    latest[parking_id] = (available_car, recorded_at, recorded_at)
+                    counts["after"] += 1
+                    yield parking_id, available_car, recorded_at
+                else:
+                    latest[parking_id] = (previous[0], previous[1], recorded_at)
+
+        dst = sqlite3.connect(tmp_path)
+        try:
+            create_schema(dst, dst_version, dst_mode)
+            dst_schema.load_rows(dst, transitions())
+            if src_mode == STORAGE_MODE_DELTA:
+                # 資料列不含未變動的同步，最後看到的時間只能取自原檔的最後已知值
+                dst_schema.set_latest(dst, src_schema.get_latest(src))
+            elif delta:
+                dst_schema.set_latest(dst, latest)
+            copy_snapshots(src, dst)
+            copy_rollups(src, dst)
+            summary = read_summary(src)
+            if summary is not None:
+                build_summary(dst, dst_schema)
+                if summary["frozen"]:
+                    freeze_summary(dst, dst_schema)
+            dst.commit()
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+    if keep_backup:
+        backup_path = db_path.with_name(db_path.name + ".bak")
+        os.replace(db_path, backup_path)
+    for suffix in ("-wal", "-shm"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+    os.replace(tmp_path, db_path)
+
+    size_after = db_path.stat().st_size
+    logger.info(
+        f"已轉換 {db_path.name}: v{src_version} {src_mode} -> v{dst_version} {dst_mode} "
+        f"({counts['before']:,} -> {counts['after']:,} 筆, "
+        f"{size_before:,} -> {size_after:,} bytes)"
+    )
+
+    return {
+        "db_file": db_path.name,
+        "from": f"v{src_version} {src_mode}",
+        "to": f"v{dst_version} {dst_mode}",
+        "rows_before": counts["before"],
+        "rows_after": counts["after"],
+        "size_before": size_before,
+        "size_after": size_after,
+    }
+
+
+def migrate_to_delta(db_path: Path, keep_backup: bool = True) -> dict:
+    """將月份資料庫轉換為 delta 模式（維持原結構版本）
+
+    Args:
+        db_path: 月份資料庫檔案路徑
+        keep_backup: 是否保留原檔為 .bak
+
+    Returns:
+        轉換報告
+    """
+    return rewrite_monthly_db(db_path, storage_mode=STORAGE_MODE_DELTA, keep_backup=keep_backup)
@@ -0,0 +1,157 @@
+"""同步快照記錄模組
+
+於每個月份資料庫的 snapshots 表記錄每次同步下載內容的 SHA256 雜湊值。
+上游資料未更新時常連續回傳相同的 CSV，此時不再寫入整批資料列，
+只新增一筆 duplicate 標記的記錄（「於 T 時再次看到相同內容」）。
+
+查詢任一時間點的車位數時取該時間點之前最後一筆資料列，因此略過重複快照不影響結果；
+snapshots 表另外提供每個月份的同步次數與重複比例。
+"""
+
+import sqlite3
+from datetime import datetime
+
+from parking_newtaipei.utils.time import to_iso
+
+CREATE_SNAPSHOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    recorded_at TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    duplicate INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+
+def _has_snapshots_table(conn: sqlite3.Connection) -> bool:
+    """快照記錄表是否存在（早於快照記錄的檔案沒有此表）"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='snapshots'"
+    ).fetchone() is not None
+
+
+def create_snapshots_table(conn: sqlite3.Connection) -> None:
+    """建立快照記錄表（已存在時不處理）
+
+    Args:
+        conn: SQLite 連線（呼叫端管理交易）
+    """
+    conn.execute(CREATE_SNAPSHOTS_TABLE)
+
+
+def copy_snapshots(src: sqlite3.Connection, dst: sqlite3.Connection) -> None:
+    """複製快照記錄（重寫月份資料庫時保留同步次數與重複比例）
+
+    Args:
+        src: 原檔連線
+        dst: 新檔連線（呼叫端管理交易）
+    """
+    if not _has_snapshots_table(src):
+        return
+    create_snapshots_table(dst)
+    dst.executemany(
+        "INSERT INTO snapshots (recorded_at, content_hash, duplicate) VALUES (?, ?, ?)",
+        src.execute("SELECT recorded_at, content_hash, duplicate FROM snapshots"),
+    )
+
+
+def last_snapshot_hash(conn: sqlite3.Connection, before: datetime | None = None) -> str | None:
+    """取得最後一次同步的內容雜湊值
+
+    Args:
+        conn: SQLite 連線
+        before: 只取此時間之前的同步（回填較早的時間時使用），None 表示不限
+
+    Returns:
+        雜湊值，尚無記錄（或檔案早於快照記錄）時為 None
+    """
+    if not _has_snapshots_table(conn):
+        return None
+    row = conn.execute(
+        """
+        SELECT content_hash FROM snapshots WHERE ? IS NULL OR recorded_at < ?
+        ORDER BY recorded_at DESC LIMIT 1
+        """,
+        (None, None) if before is None else (to_iso(before),) * 2,
+    ).fetchone()
+    return row[0] if row else None
+
+
+def record_snapshot(
+    conn: sqlite3.Connection, recorded_at: datetime, content_hash: str, duplicate: bool
+) -> None:
+    """記錄一次同步
+
+    Args:
+        conn: SQLite 連線（與寫入資料列在同一交易）
+        recorded_at: 記錄時間
+        content_hash: 下載內容的 SHA256 雜湊值
+        duplicate: 內容是否與上次同步相同（未寫入資料列）
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO snapshots (recorded_at, content_hash, duplicate) VALUES (?, ?, ?)",
+        (to_iso(recorded_at), content_hash, int(duplicate)),
+    )
+
+
+def snapshot_times(conn: sqlite3.Connection) -> list[datetime]:
+    """取得所有同步的記錄時間（含只記錄快照的重複同步，重建彙總用）
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        依時間排序的記錄時間，檔案早於快照記錄時為空列表
+    """
+    if not _has_snapshots_table(conn):
+        return []
+    rows = conn.execute("SELECT recorded_at FROM snapshots ORDER BY recorded_at")
+    return [datetime.fromisoformat(recorded_at) for (recorded_at,) in rows]
+
+
+def has_snapshot_between(conn: sqlite3.Connection, start: datetime, end: datetime) -> bool:
+    """時間區間（含）內是否有同步快照記錄（含只記錄快照的重複同步）
+
+    Args:
+        conn: SQLite 連線
+        start: 起始時間
+        end: 結束時間
+
+    Returns:
+        是否有記錄
+    """
+    if not _has_snapshots_table(conn):
+        return False
+    row = conn.execute(
+        "SELECT 1 FROM snapshots WHERE recorded_at BETWEEN ? AND ? LIMIT 1",
+        (to_iso(start), to_iso(end)),
+    ).fetchone()
+    return row is not None
+
+
+def snapshot_counts(conn: sqlite3.Connection) -> dict:
+    """統計同步次數與重複快照數
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        {"snapshots", "duplicate_snapshots"}，尚無快照記錄時皆為 0
+    """
+    if not _has_snapshots_table(conn):
+        return {"snapshots": 0, "duplicate_snapshots": 0}
+    row = conn.execute("SELECT COUNT(*), COALESCE(SUM(duplicate), 0) FROM snapshots").fetchone()
+    return {"snapshots": row[0], "duplicate_snapshots": row[1]}
+
+
+def dedup_ratio(counts: dict) -> float:
+    """重複快照佔同步次數的比例
+
+    Args:
+        counts: snapshot_counts() 的結果
+
+    Returns:
+        0-1 的比例，無同步記錄時為 0
+    """
+    if not counts["snapshots"]:
+        return 0.0
+    return counts["duplicate_snapshots"] / counts["snapshots"]
@@ -0,0 +1,175 @@
+"""月份資料庫摘要模組
+
+於每個月份資料庫的 file_summary 表記錄總筆數、停車場數與首末筆時間，
+寫入時於同一交易內累加，統計時只需讀取一列，不需掃描整個 availability 表。
+
+- file_summary_lots 記錄已出現的停車場編號，用於累加不重複停車場數
+- 月份結束後凍結摘要：標記 frozen 並移除 file_summary_lots；
+  之後若再寫入（例如回填），會先由原始資料重新計算摘要並解除凍結
+"""
+
+import sqlite3
+from datetime import datetime
+
+from parking_newtaipei.db.availability_schema import AvailabilitySchema
+from parking_newtaipei.utils.time import now_iso
+
+CREATE_FILE_SUMMARY_TABLE = """
+CREATE TABLE IF NOT EXISTS file_summary (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_records INTEGER NOT NULL,
+    unique_parking_ids INTEGER NOT NULL,
+    first_record TEXT,
+    last_record TEXT,
+    frozen_at TEXT
+)
+"""
+
+CREATE_FILE_SUMMARY_LOTS_TABLE = """
+CREATE TABLE IF NOT EXISTS file_summary_lots (
+    parking_id TEXT PRIMARY KEY
+) WITHOUT ROWID
+"""
+
+# 摘要欄位（與 AvailabilitySchema.stats() 的鍵相同）
+SUMMARY_FIELDS = ("total_records", "unique_parking_ids", "first_record", "last_record")
+
+# 累加一次寫入（無寫入資料列時首末筆時間不變）
+UPDATE_SUMMARY = """
+UPDATE file_summary SET
+    total_records = total_records + :inserted,
+    unique_parking_ids = unique_parking_ids + :new_lots,
+    first_record = CASE WHEN :inserted > 0
+        THEN MIN(COALESCE(first_record, :recorded_at), :recorded_at) ELSE first_record END,
+    last_record = CASE WHEN :inserted > 0
+        THEN MAX(COALESCE(last_record, :recorded_at), :recorded_at) ELSE last_record END
+WHERE id = 1
+"""
+
+
+def read_summary(conn: sqlite3.Connection) -> dict | None:
+    """讀取摘要
+
+    Args:
+        conn: SQLite 連線
+
+    Returns:
+        摘要（SUMMARY_FIELDS 與 frozen），尚未建立時為 None
+    """
+    has_table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='file_summary'"
+    ).fetchone()
+    if not has_table:
+        return None
+    row = conn.execute(
+        f"SELECT {', '.join(SUMMARY_FIELDS)}, frozen_at FROM file_summary WHERE id = 1"
+    ).fetchone()
+    if row is None:
+        return None
+    return {**dict(zip(SUMMARY_FIELDS, row[:4], strict=True)), "frozen": row[4] is not None}
+
+
+def write_summary(conn: sqlite3.Connection, stats: dict) -> None:
+    """覆寫摘要值（不變更凍結狀態）
+
+    Args:
+        conn: SQLite 連線（呼叫端管理交易）
+        stats: SUMMARY_FIELDS 對應的值
+    """
+    conn.execute(
+        f"""
+        UPDATE file_summary SET {', '.join(f'{field} = ?' for field in SUMMARY_FIELDS)}
+        WHERE id = 1
+        """,
+        [stats[field] for field in SUMMARY_FIELDS],
+    )
+
+
+def build_summary(conn: sqlite3.Connection, schema: AvailabilitySchema) -> dict:
+    """由原始資料計算摘要並寫入（既有檔案首次使用或解除凍結時）
+
+    Args:
+        conn: SQLite 連線（呼叫端管理交易）
+        schema: 月份檔案的結構實作
+
+    Returns:
+        摘要
+    """
+    conn.execute(CREATE_FILE_SUMMARY_TABLE)
+    conn.execute(CREATE_FILE_SUMMARY_LOTS_TABLE)
+    conn.execute("DELETE FROM file_summary_lots")
+    conn.execute(
+        "INSERT INTO file_summary_lots (parking_id) SELECT DISTINCT parking_id FROM availability"
+    )
+    stats = schema.stats(conn)
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO file_summary (id, {', '.join(SUMMARY_FIELDS)}, frozen_at)
+        VALUES (1, ?, ?, ?, ?, NULL)
+        """,
+        [stats[field] for field in SUMMARY_FIELDS],
+    )
+    return {**stats, "frozen": False}
+
+
+def open_summary(conn: sqlite3.Connection, schema: AvailabilitySchema) -> None:
+    """確保摘要可累加：尚未建立或已凍結時由原始資料重新計算
+
+    Args:
+        conn: SQLite 連線（呼叫端管理交易）
+        schema: 月份檔案的結構實作
+    """
+    summary = read_summary(conn)
+    if summary is None or summary["frozen"]:
+        build_summary(conn, schema)
+
+
+def update_summary(
+    conn: sqlite3.Connection,
+    schema: AvailabilitySchema,
+    parking_ids: set[str],
+    inserted: int,
+    recorded_at: datetime,
+) -> None:
+    """累加一次同步的寫入
+
+    Args:
+        conn: SQLite 連線（與寫入資料列在同一交易）
+        schema: 月份檔案的結構實作
+        parking_ids: 本次同步的停車場編號（delta 模式首次出現的停車場必定寫入）
+        inserted: 實際寫入的筆數
+        recorded_at: 記錄時間
+    """
+    open_summary(conn, schema)
+    new_lots = conn.executemany(
+        "INSERT OR IGNORE INTO file_summary_lots (parking_id) VALUES (?)",
+        ((parking_id,) for parking_id in parking_ids),
+    ).rowcount
+    conn.execute(
+        UPDATE_SUMMARY,
+        {
+            "inserted": inserted,
+            "new_lots": max(new_lots, 0),
+            "recorded_at": schema.format_time(recorded_at),
+        },
+    )
+
+
+def freeze_summary(conn: sqlite3.Connection, schema: AvailabilitySchema) -> dict:
+    """凍結摘要（月份結束後）
+
+    Args:
+        conn: SQLite 連線（呼叫端管理交易）
+        schema: 月份檔案的結構實作
+
+    Returns:
+        凍結後的摘要
+    """
+    summary = read_summary(conn)
+    if summary is not None and summary["frozen"]:
+        return summary
+    if summary is None:
+        build_summary(conn, schema)
+    conn.execute("UPDATE file_summary SET frozen_at = ? WHERE id = 1", (now_iso(),))
+    conn.execute("DROP TABLE IF EXISTS file_summary_lots")
+    return read_summary(conn)
@@ -1,37 +1,126 @@
 """SQLite 連線管理模組"""
 
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Generator
 
 from parking_newtaipei.utils.logger import get_logger
 
+# 常駐連線模式的預設 PRAGMA 設定（連線開啟時套用一次）
+TUNED_PRAGMAS: dict[str, str | int] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # 負值單位為 KiB，約 16 MB
+    "mmap_size": 134217728,  # 128 MB
+    "temp_store": "MEMORY",
+}
+
+# 常駐連線池（每個執行緒各自持有，依 db_path 區分）
+_pool = threading.local()
+
+
+def _get_pool() -> dict[str, sqlite3.Connection]:
+    """取得當前執行緒的連線池"""
+    if not hasattr(_pool, "connections"):
+        _pool.connections = {}
+    return _pool.connections
 
-class DatabaseConnection:
-    """SQLite 資料庫連線管理器"""
 
-    def __init__(self, db_path: Path):
+def close_all_connections() -> None:
+    """關閉當前執行緒所有常駐連線"""
+    pool = _get_pool()
+    for conn in pool.values():
+        conn.close()
+    pool.clear()
+
+
+class DatabaseConnection:
+    """SQLite 資料庫連線管理器
+
+    預設每次操作開啟並關閉一條新連線。啟用 persistent 時改用常駐連線，
+    同一執行緒內相同 db_path 共用一條連線，並於開啟時套用 PRAGMA 設定。
+    啟用 immutable 時以 ?immutable=1 開啟（已壓實、不會再變更的檔案），不使用檔案鎖。
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        persistent: bool = False,
+        pragmas: dict[str, str | int] | None = None,
+        immutable: bool = False,
+    ):
         """初始化資料庫連線管理器
 
         Args:
             db_path: 資料庫檔案路徑
+            persistent: 是否使用常駐連線
+            pragmas: 連線開啟時套用的 PRAGMA 設定，預設常駐模式使用 TUNED_PRAGMAS
+            immutable: 是否以唯讀、不可變更的方式開啟（檔案需已存在）
         """
         self.db_path = db_path
+        self.persistent = persistent
+        self.immutable = immutable
+        if pragmas is None:
+            pragmas = TUNED_PRAGMAS if persistent else {}
+        self.pragmas = pragmas
         self.logger = get_logger()
+        self._local = threading.local()
 
         # 確保目錄存在
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
+    def _open(self) -> sqlite3.Connection:
+        """開啟新連線並套用 PRAGMA 設定
+
+        Returns:
+            SQLite 連線物件
+        """
+        if self.immutable:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?immutable=1", uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row  # 讓查詢結果可以用欄位名稱存取
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _pooled(self) -> sqlite3.Connection:
+        """取得（或建立）當前執行緒的常駐連線
+
+        Returns:
+            SQLite 連線物件
+        """
+        pool = _get_pool()
+        key = str(self.db_path.resolve())
+        conn = pool.get(key)
+        if conn is None:
+            conn = self._open()
+            pool[key] = conn
+            self.logger.debug(f"建立常駐資料庫連線: {self.db_path}")
+        return conn
+
+    @property
+    def _tx_conn(self) -> sqlite3.Connection | None:
+        """當前執行緒進行中交易所使用的連線"""
+        return getattr(self._local, "tx_conn", None)
+
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """取得資料庫連線（context manager）
 
+        在 transaction() 內呼叫時沿用交易連線，由交易統一 commit。
+
         Yields:
             SQLite 連線物件
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 讓查詢結果可以用欄位名稱存取
+        tx_conn = self._tx_conn
+        if tx_conn is not None:
+            yield tx_conn
+            return
+
+        conn = self._pooled() if self.persistent else self._open()
 
         try:
             yield conn
@@ -41,6 +130,36 @@ class DatabaseConnection:
             self.logger.error(f"資料庫操作失敗: {e}")
             raise
         finally:
+            if not self.persistent:
+                conn.close()
+
+    @contextmanager
+    def transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """以單一交易執行多個語句（context manager）
+
+        區塊內所有 execute/fetch 共用同一連線，離開時 commit 一次，
+        發生例外則 rollback。巢狀呼叫會併入最外層交易。
+
+        Yields:
+            SQLite 連線物件
+        """
+        if self._tx_conn is not None:
+            yield self._tx_conn
+            return
+
+        with self.get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            self._local.tx_conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.tx_conn = None
+
+    def close(self) -> None:
+        """關閉此資料庫在當前執行緒的常駐連線"""
+        conn = _get_pool().pop(str(self.db_path.resolve()), None)
+        if conn is not None:
             conn.close()
 
     @contextmanager
@@ -1,11 +1,21 @@
 """資料模型模組
 
 定義停車場資料表結構與操作。
+
+每筆停車場資料以 row_hash 記錄內容雜湊值，同步時只寫入新增、內容變更或恢復的資料列
+（updated_at 為內容最後變更的時間）；每次變更於 parking_lot_history 新增一個版本，
+以 valid_from / valid_to 記錄有效期間，可依時間與即時車位資料對應（例如總車位數的變更）。
 """
 
+import hashlib
+import json
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+
 from parking_newtaipei.db.connection import DatabaseConnection
 from parking_newtaipei.utils.logger import get_logger
-from parking_newtaipei.utils.time import now_iso
+from parking_newtaipei.utils.spatial_index import GridIndex
+from parking_newtaipei.utils.time import now_iso, to_iso
 
 # 同步 metadata 資料表 SQL（儲存雜湊值等資訊）
 CREATE_SYNC_METADATA_TABLE = """
@@ -35,10 +45,85 @@ CREATE TABLE IF NOT EXISTS parking_lots (
     total_bike INTEGER,
     created_at TEXT NOT NULL,
     updated_at TEXT NOT NULL,
-    deleted_at TEXT DEFAULT NULL
+    deleted_at TEXT DEFAULT NULL,
+    row_hash TEXT
+)
+"""
+
+# 停車場歷史版本資料表 SQL（valid_to 為 NULL 表示目前版本；changed_fields 為與前一版本不同的欄位）
+CREATE_PARKING_LOT_HISTORY_TABLE = """
+CREATE TABLE IF NOT EXISTS parking_lot_history (
+    parking_id TEXT NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT,
+    row_hash TEXT NOT NULL,
+    changed_fields TEXT,
+    area TEXT,
+    name TEXT,
+    type TEXT,
+    summary TEXT,
+    address TEXT,
+    tel TEXT,
+    pay_ex TEXT,
+    service_time TEXT,
+    tw97x REAL,
+    tw97y REAL,
+    total_car INTEGER,
+    total_motor INTEGER,
+    total_bike INTEGER,
+    PRIMARY KEY (parking_id, valid_from)
+) WITHOUT ROWID
+"""
+
+# 批次同步用暫存表（TEMP，僅存在於單一連線）
+CREATE_PARKING_LOT_STAGING_TABLE = """
+CREATE TEMP TABLE IF NOT EXISTS parking_lots_staging (
+    id TEXT NOT NULL,
+    area TEXT,
+    name TEXT,
+    type TEXT,
+    summary TEXT,
+    address TEXT,
+    tel TEXT,
+    pay_ex TEXT,
+    service_time TEXT,
+    tw97x REAL,
+    tw97y REAL,
+    total_car INTEGER,
+    total_motor INTEGER,
+    total_bike INTEGER,
+    row_hash TEXT NOT NULL
+)
+"""
+
+# 暫存表索引（供反向關聯 anti-join 查詢使用）
+CREATE_PARKING_LOT_STAGING_INDEX = (
+    "CREATE INDEX IF NOT EXISTS temp.idx_parking_lots_staging_id ON parking_lots_staging(id)"
+)
+
+# 停車場資料欄位（不含時間欄位）
+PARKING_LOT_COLUMNS = (
+    "id", "area", "name", "type", "summary", "address", "tel",
+    "pay_ex", "service_time", "tw97x", "tw97y",
+    "total_car", "total_motor", "total_bike",
 )
+
+# 停車場內容欄位（不含 id，計算 row_hash 與記錄歷史版本使用）
+PARKING_LOT_FIELDS = PARKING_LOT_COLUMNS[1:]
+
+# 數值欄位（計算雜湊值前依 SQLite 欄位型別轉換，與寫入後讀回的值相同）
+_REAL_FIELDS = ("tw97x", "tw97y")
+_INTEGER_FIELDS = ("total_car", "total_motor", "total_bike")
+
+# 本次資料中每個 ID 的最後一筆（同 ID 多筆時以最後一筆為準）
+_LATEST_STAGING = """
+SELECT * FROM parking_lots_staging
+WHERE rowid IN (SELECT MAX(rowid) FROM parking_lots_staging GROUP BY id)
 """
 
+# 內容未變更且未刪除（s 為暫存表、p 為正式表；p 不存在時為 false）
+_UNCHANGED = "p.deleted_at IS NULL AND p.row_hash IS s.row_hash"
+
 # 建立索引
 CREATE_INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_parking_lots_area ON parking_lots(area)",
@@ -46,6 +131,48 @@ CREATE_INDEXES = [
 ]
 
 
+def _lot_values(data: dict) -> tuple:
+    """取得停車場資料的內容欄位值（依 PARKING_LOT_FIELDS 順序，文字欄位預設為空字串）"""
+    return (
+        data.get("area", ""),
+        data.get("name", ""),
+        data.get("type", ""),
+        data.get("summary", ""),
+        data.get("address", ""),
+        data.get("tel", ""),
+        data.get("pay_ex", ""),
+        data.get("service_time", ""),
+        data.get("tw97x"),
+        data.get("tw97y"),
+        data.get("total_car"),
+        data.get("total_motor"),
+        data.get("total_bike"),
+    )
+
+
+def row_hash(values: Sequence) -> str:
+    """計算停車場資料列的內容雜湊值
+
+    Args:
+        values: 內容欄位值（依 PARKING_LOT_FIELDS 順序）
+
+    Returns:
+        SHA256 雜湊值（十六進位字串）
+    """
+    normalized = []
+    for field, value in zip(PARKING_LOT_FIELDS, values, strict=True):
+        if value is not None:
+            if field in _REAL_FIELDS:
+                value = float(value)
+            elif field in _INTEGER_FIELDS:
+                value = int(value)
+            else:
+                value = str(value)
+        normalized.append(value)
+    payload = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class ParkingLotRepository:
     """停車場資料存取類別"""
 
@@ -57,18 +184,91 @@ class ParkingLotRepository:
         """
         self.db = db
         self.logger = get_logger()
+        # 空間索引快取：(建立時的內容雜湊值, 索引)
+        self._spatial_index: tuple[str | None, GridIndex] | None = None
 
     def init_tables(self) -> None:
         """初始化資料表"""
-        self.db.execute(CREATE_SYNC_METADATA_TABLE)
-        self.db.execute(CREATE_PARKING_LOT_TABLE)
-        for index_sql in CREATE_INDEXES:
-            self.db.execute(index_sql)
+        with self.db.transaction():
+            self.db.execute(CREATE_SYNC_METADATA_TABLE)
+            self.db.execute(CREATE_PARKING_LOT_TABLE)
+            for index_sql in CREATE_INDEXES:
+                self.db.execute(index_sql)
+            self.db.execute(CREATE_PARKING_LOT_HISTORY_TABLE)
+            self._add_row_hash()
         self.logger.info("停車場資料表初始化完成")
 
+    def _add_row_hash(self) -> None:
+        """為既有資料表加入 row_hash 欄位，並以目前內容建立第一個歷史版本
+
+        升級前的變更時間不可考：第一個版本自停車場建立時間起有效，已刪除者於刪除時間結束。
+        需在 init_tables() 的交易內呼叫。
+        """
+        columns = {row["name"] for row in self.db.fetch_all("PRAGMA table_info(parking_lots)")}
+        if "row_hash" in columns:
+            return
+
+        fields = ", ".join(PARKING_LOT_FIELDS)
+        with self.db.get_connection() as conn:
+            conn.execute("ALTER TABLE parking_lots ADD COLUMN row_hash TEXT")
+            rows = conn.execute(f"SELECT id, {fields} FROM parking_lots").fetchall()
+            conn.executemany(
+                "UPDATE parking_lots SET row_hash = ? WHERE id = ?",
+                [(row_hash(tuple(row)[1:]), row["id"]) for row in rows],
+            )
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO parking_lot_history
+                    (parking_id, valid_from, valid_to, row_hash, {fields})
+                SELECT id, created_at, deleted_at, row_hash, {fields} FROM parking_lots
+                """
+            )
+        self.logger.info(f"已為 {len(rows)} 筆停車場資料加入內容雜湊值與歷史版本")
+
+    def _record_version(
+        self,
+        parking_id: str,
+        values: tuple,
+        content_hash: str,
+        changed_fields: list[str] | None,
+        now: str,
+    ) -> None:
+        """結束停車場目前的歷史版本並新增一個版本（逐筆寫入使用，需在交易內呼叫）
+
+        Args:
+            parking_id: 停車場 ID
+            values: 內容欄位值（依 PARKING_LOT_FIELDS 順序）
+            content_hash: 內容雜湊值
+            changed_fields: 與前一版本不同的欄位，新增的停車場為 None
+            now: 版本開始時間
+        """
+        fields = ", ".join(PARKING_LOT_FIELDS)
+        placeholders = ", ".join("?" for _ in PARKING_LOT_FIELDS)
+        self.db.execute(
+            "UPDATE parking_lot_history SET valid_to = ? "
+            "WHERE parking_id = ? AND valid_to IS NULL",
+            (now, parking_id),
+        )
+        self.db.execute(
+            f"""
+            INSERT OR REPLACE INTO parking_lot_history
+                (parking_id, valid_from, row_hash, changed_fields, {fields})
+            VALUES (?, ?, ?, ?, {placeholders})
+            """,
+            (
+                parking_id,
+                now,
+                content_hash,
+                ",".join(changed_fields) if changed_fields else None,
+                *values,
+            ),
+        )
+
     def upsert(self, data: dict) -> tuple[str, bool]:
         """新增或更新停車場資料
 
+        內容與目前相同（row_hash 相同）且未刪除時不寫入。
+
         Args:
             data: 停車場資料字典，需包含 id 欄位
 
@@ -76,80 +276,210 @@ class ParkingLotRepository:
             (id, is_new) - 停車場 ID 與是否為新增
         """
         parking_id = data["id"]
+        values = _lot_values(data)
+        content_hash = row_hash(values)
         now = now_iso()
 
-        # 檢查是否存在
-        existing = self.db.fetch_one(
-            "SELECT id, deleted_at FROM parking_lots WHERE id = ?",
-            (parking_id,),
-        )
-
-        if existing is None:
-            # 新增
-            self.db.execute(
-                """
-                INSERT INTO parking_lots (
-                    id, area, name, type, summary, address, tel,
-                    pay_ex, service_time, tw97x, tw97y,
-                    total_car, total_motor, total_bike,
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    parking_id,
-                    data.get("area", ""),
-                    data.get("name", ""),
-                    data.get("type", ""),
-                    data.get("summary", ""),
-                    data.get("address", ""),
-                    data.get("tel", ""),
-                    data.get("pay_ex", ""),
-                    data.get("service_time", ""),
-                    data.get("tw97x"),
-                    data.get("tw97y"),
-                    data.get("total_car"),
-                    data.get("total_motor"),
-                    data.get("total_bike"),
-                    now,
-                    now,
-                ),
+        with self.db.transaction():
+            # 檢查是否存在
+            existing = self.db.fetch_one(
+                f"SELECT {', '.join(PARKING_LOT_FIELDS)}, row_hash, deleted_at "
+                "FROM parking_lots WHERE id = ?",
+                (parking_id,),
             )
-            return parking_id, True
-        else:
+
+            if existing is None:
+                # 新增
+                self._record_version(parking_id, values, content_hash, None, now)
+                self.db.execute(
+                    f"""
+                    INSERT INTO parking_lots (
+                        {', '.join(PARKING_LOT_COLUMNS)}, row_hash, created_at, updated_at
+                    ) VALUES ({', '.join('?' for _ in PARKING_LOT_COLUMNS)}, ?, ?, ?)
+                    """,
+                    (parking_id, *values, content_hash, now, now),
+                )
+                return parking_id, True
+
+            if existing["deleted_at"] is None and existing["row_hash"] == content_hash:
+                return parking_id, False
+
             # 更新（包含恢復已刪除的資料）
+            changed = [
+                field
+                for field, value in zip(PARKING_LOT_FIELDS, values, strict=True)
+                if existing[field] != value
+            ]
+            self._record_version(parking_id, values, content_hash, changed, now)
+            assignments = ", ".join(f"{field} = ?" for field in PARKING_LOT_FIELDS)
             self.db.execute(
-                """
+                f"""
                 UPDATE parking_lots SET
-                    area = ?, name = ?, type = ?, summary = ?, address = ?, tel = ?,
-                    pay_ex = ?, service_time = ?, tw97x = ?, tw97y = ?,
-                    total_car = ?, total_motor = ?, total_bike = ?,
-                    updated_at = ?, deleted_at = NULL
+                    {assignments},
+                    row_hash = ?, updated_at = ?, deleted_at = NULL
                 WHERE id = ?
                 """,
-                (
-                    data.get("area", ""),
-                    data.get("name", ""),
-                    data.get("type", ""),
-                    data.get("summary", ""),
-                    data.get("address", ""),
-                    data.get("tel", ""),
-                    data.get("pay_ex", ""),
-                    data.get("service_time", ""),
-                    data.get("tw97x"),
-                    data.get("tw97y"),
-                    data.get("total_car"),
-                    data.get("total_motor"),
-                    data.get("total_bike"),
-                    now,
-                    parking_id,
-                ),
+                (*values, content_hash, now, parking_id),
             )
             return parking_id, False
 
+    def bulk_upsert(self, records: Iterable[dict]) -> tuple[int, int, int, int]:
+        """以集合式 SQL 批次同步停車場資料
+
+        將整份資料載入暫存表，於單一交易內完成新增、更新與軟刪除，只 commit 一次。
+        新增與刪除的計數與逐筆呼叫 upsert() + mark_deleted() 相同（重複 ID 的後續筆數視為更新）。
+
+        Args:
+            records: 停車場資料字典（需包含 id 欄位）
+
+        Returns:
+            (inserted, updated, unchanged, deleted) - 新增、內容變更、內容未變更與標記刪除的筆數
+        """
+        with self.db.transaction():
+            self.load_staging(records)
+            return self.merge_staging()
+
+    def load_staging(self, records: Iterable[dict]) -> int:
+        """將停車場資料載入暫存表（逐筆消耗 records，不需整份載入記憶體）
+
+        暫存表為連線層級的 TEMP 表，需與 merge_staging() 在同一個交易內呼叫。
+
+        Args:
+            records: 停車場資料字典（需包含 id 欄位）
+
+        Returns:
+            載入的筆數
+        """
+        columns = ", ".join(PARKING_LOT_COLUMNS)
+        placeholders = ", ".join("?" for _ in PARKING_LOT_COLUMNS)
+
+        def params(data: dict) -> tuple:
+            values = _lot_values(data)
+            return (data["id"], *values, row_hash(values))
+
+        with self.db.get_connection() as conn:
+            conn.execute(CREATE_PARKING_LOT_STAGING_TABLE)
+            conn.execute(CREATE_PARKING_LOT_STAGING_INDEX)
+            conn.execute("DELETE FROM parking_lots_staging")
+            cursor = conn.executemany(
+                f"INSERT INTO parking_lots_staging ({columns}, row_hash) "
+                f"VALUES ({placeholders}, ?)",
+                map(params, records),
+            )
+            return cursor.rowcount
+
+    def merge_staging(self) -> tuple[int, int, int, int]:
+        """將暫存表合併至正式表（新增、更新與軟刪除）並清空暫存表
+
+        只寫入新增、內容變更（row_hash 不同）或恢復的資料列，並記錄歷史版本；
+        內容未變更的資料列不更新 updated_at。
+
+        Returns:
+            (inserted, updated, unchanged, deleted) - 新增、內容變更、內容未變更與標記刪除的筆數
+        """
+        now = now_iso()
+        columns = ", ".join(PARKING_LOT_COLUMNS)
+        fields = ", ".join(PARKING_LOT_FIELDS)
+        source_columns = ", ".join(f"s.{column}" for column in PARKING_LOT_COLUMNS)
+        source_fields = ", ".join(f"s.{field}" for field in PARKING_LOT_FIELDS)
+        assignments = ", ".join(f"{field} = excluded.{field}" for field in PARKING_LOT_FIELDS)
+        # 與目前內容不同的欄位（以逗號串接）
+        changed_fields = " || ".join(
+            f"CASE WHEN p.{field} IS s.{field} THEN '' ELSE ',{field}' END"
+            for field in PARKING_LOT_FIELDS
+        )
+
+        with self.db.get_connection() as conn:
+            # 計算新增數（不存在於正式表的相異 ID）、內容未變更數與總處理數
+            row = conn.execute(
+                f"""
+                SELECT
+                    (SELECT COUNT(*) FROM parking_lots_staging) AS total,
+                    (SELECT COUNT(DISTINCT s.id) FROM parking_lots_staging s
+                     WHERE NOT EXISTS (SELECT 1 FROM parking_lots p WHERE p.id = s.id)
+                    ) AS inserted,
+                    (SELECT COUNT(*) FROM ({_LATEST_STAGING}) s
+                     JOIN parking_lots p ON p.id = s.id
+                     WHERE {_UNCHANGED}
+                    ) AS unchanged
+                """
+            ).fetchone()
+            total, inserted, unchanged = row["total"], row["inserted"], row["unchanged"]
+
+            # 結束內容變更或即將刪除的停車場的目前版本
+            conn.execute(
+                f"""
+                UPDATE parking_lot_history SET valid_to = ?
+                WHERE valid_to IS NULL AND parking_id NOT IN (
+                    SELECT s.id FROM ({_LATEST_STAGING}) s
+                    JOIN parking_lots p ON p.id = s.id
+                    WHERE {_UNCHANGED}
+                )
+                """,
+                (now,),
+            )
+
+            # 新增、內容變更或恢復的停車場新增一個版本
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO parking_lot_history
+                    (parking_id, valid_from, row_hash, changed_fields, {fields})
+                SELECT
+                    s.id, ?, s.row_hash,
+                    CASE WHEN p.id IS NULL THEN NULL
+                        ELSE NULLIF(substr({changed_fields}, 2), '') END,
+                    {source_fields}
+                FROM ({_LATEST_STAGING}) s
+                LEFT JOIN parking_lots p ON p.id = s.id
+                WHERE NOT ({_UNCHANGED})
+                """,
+                (now,),
+            )
+
+            # 新增或更新（只寫入內容變更者，並恢復已刪除的資料）
+            conn.execute(
+                f"""
+                INSERT INTO parking_lots ({columns}, row_hash, created_at, updated_at)
+                SELECT {source_columns}, s.row_hash, ?, ?
+                FROM ({_LATEST_STAGING}) s
+                LEFT JOIN parking_lots p ON p.id = s.id
+                WHERE NOT ({_UNCHANGED})
+                ON CONFLICT(id) DO UPDATE SET
+                    {assignments},
+                    row_hash = excluded.row_hash,
+                    updated_at = excluded.updated_at,
+                    deleted_at = NULL
+                """,
+                (now, now),
+            )
+
+            # 軟刪除：正式表中有效、但不在本次資料中的停車場
+            cursor = conn.execute(
+                """
+                UPDATE parking_lots
+                SET deleted_at = ?
+                WHERE deleted_at IS NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM parking_lots_staging s WHERE s.id = parking_lots.id
+                  )
+                """,
+                (now,),
+            )
+            deleted = cursor.rowcount
+
+            conn.execute("DELETE FROM parking_lots_staging")
+
+        return inserted, total - inserted - unchanged, unchanged, deleted
+
+    def clear_staging(self) -> None:
+        """清空暫存表（放棄本次載入的資料）"""
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM parking_lots_staging")
+
     def mark_deleted(self, parking_ids: set[str]) -> int:
         """標記停車場為已刪除
 
-        只標記尚未被刪除的資料，已刪除的不更新刪除時間。
+        只標記尚未被刪除的資料，已刪除的不更新刪除時間；同時結束目前的歷史版本。
 
         Args:
             parking_ids: 要標記刪除的停車場 ID 集合
@@ -163,21 +493,64 @@ class ParkingLotRepository:
         now = now_iso()
         count = 0
 
-        for parking_id in parking_ids:
-            # 只更新 deleted_at 為 NULL 的資料
-            with self.db.get_cursor() as cursor:
-                cursor.execute(
-                    """
-                    UPDATE parking_lots
-                    SET deleted_at = ?
-                    WHERE id = ? AND deleted_at IS NULL
-                    """,
-                    (now, parking_id),
-                )
-                count += cursor.rowcount
+        with self.db.transaction():
+            for parking_id in parking_ids:
+                # 只更新 deleted_at 為 NULL 的資料
+                with self.db.get_cursor() as cursor:
+                    cursor.execute(
+                        """
+                        UPDATE parking_lots
+                        SET deleted_at = ?
+                        WHERE id = ? AND deleted_at IS NULL
+                        """,
+                        (now, parking_id),
+                    )
+                    count += cursor.rowcount
+                    cursor.execute(
+                        "UPDATE parking_lot_history SET valid_to = ? "
+                        "WHERE parking_id = ? AND valid_to IS NULL",
+                        (now, parking_id),
+                    )
 
         return count
 
+    def get_history(self, parking_id: str) -> list[dict]:
+        """取得停車場的歷史版本
+
+        Args:
+            parking_id: 停車場 ID
+
+        Returns:
+            歷史版本字典列表（valid_from、valid_to、changed_fields 與內容欄位），依 valid_from 排序
+        """
+        rows = self.db.fetch_all(
+            f"""
+            SELECT valid_from, valid_to, changed_fields, {', '.join(PARKING_LOT_FIELDS)}
+            FROM parking_lot_history WHERE parking_id = ? ORDER BY valid_from
+            """,
+            (parking_id,),
+        )
+        return [dict(row) for row in rows]
+
+    def get_capacities_as_of(self, at: datetime) -> dict[str, tuple[str | None, int | None]]:
+        """取得指定時間點有效的行政區與總車位數（依時間對應即時車位資料）
+
+        Args:
+            at: 時間點（naive datetime 視為本地時間）
+
+        Returns:
+            停車場 ID 對應 (行政區, 總車位數) 的字典，不含當時不存在或已刪除的停車場
+        """
+        moment = to_iso(at)
+        rows = self.db.fetch_all(
+            """
+            SELECT parking_id, area, total_car FROM parking_lot_history
+            WHERE valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+            """,
+            (moment, moment),
+        )
+        return {row["parking_id"]: (row["area"], row["total_car"]) for row in rows}
+
     def get_all_active_ids(self) -> set[str]:
         """取得所有未刪除的停車場 ID
 
@@ -189,6 +562,77 @@ class ParkingLotRepository:
         )
         return {row["id"] for row in rows}
 
+    def get_capacities(self) -> dict[str, tuple[str | None, int | None]]:
+        """取得未刪除停車場的行政區與總車位數（彙總與佔用率使用）
+
+        Returns:
+            停車場 ID 對應 (行政區, 總車位數) 的字典
+        """
+        rows = self.db.fetch_all(
+            "SELECT id, area, total_car FROM parking_lots WHERE deleted_at IS NULL"
+        )
+        return {row["id"]: (row["area"], row["total_car"]) for row in rows}
+
+    def get_all_active(self) -> list[dict]:
+        """取得所有未刪除的停車場資料（不含時間欄位）
+
+        Returns:
+            停車場資料字典列表，依 ID 排序
+        """
+        rows = self.db.fetch_all(
+            f"SELECT {', '.join(PARKING_LOT_COLUMNS)} FROM parking_lots "
+            "WHERE deleted_at IS NULL ORDER BY id"
+        )
+        return [dict(row) for row in rows]
+
+    def get_by_ids(self, parking_ids: Iterable[str]) -> dict[str, dict]:
+        """依 ID 取得停車場資料
+
+        Args:
+            parking_ids: 停車場 ID
+
+        Returns:
+            停車場 ID 對應資料字典（不存在者不列出）
+        """
+        ids = list(parking_ids)
+        if not ids:
+            return {}
+        placeholders = ", ".join("?" for _ in ids)
+        rows = self.db.fetch_all(
+            f"SELECT * FROM parking_lots WHERE id IN ({placeholders})", tuple(ids)
+        )
+        return {row["id"]: dict(row) for row in rows}
+
+    def get_locations(self) -> list[tuple[str, float, float]]:
+        """取得未刪除且有座標的停車場 TWD97 座標
+
+        Returns:
+            (停車場 ID, tw97x, tw97y) 列表
+        """
+        rows = self.db.fetch_all(
+            """
+            SELECT id, tw97x, tw97y FROM parking_lots
+            WHERE deleted_at IS NULL AND tw97x IS NOT NULL AND tw97y IS NOT NULL
+              AND tw97x != 0 AND tw97y != 0
+            """
+        )
+        return [(row["id"], row["tw97x"], row["tw97y"]) for row in rows]
+
+    def get_spatial_index(self) -> GridIndex:
+        """取得停車場空間索引（TWD97 座標）
+
+        索引保留於記憶體，只有在內容雜湊值（parking_lots_hash）變更時才重建。
+
+        Returns:
+            空間索引
+        """
+        content_hash = self.get_content_hash()
+        if self._spatial_index is None or self._spatial_index[0] != content_hash:
+            index = GridIndex(self.get_locations())
+            self._spatial_index = (content_hash, index)
+            self.logger.debug(f"已建立停車場空間索引: {len(index)} 筆")
+        return self._spatial_index[1]
+
     def get_stats(self) -> dict:
         """取得統計資訊
 
@@ -0,0 +1,205 @@
+"""同步執行記錄模組
+
+每次 sync-parking / sync-availability 執行的耗時、各階段耗時、下載 bytes 與寫入筆數
+記錄於 sync_runs 資料表，供 runs 指令統計各階段的 p50 / p95。
+"""
+
+import json
+import math
+from datetime import datetime
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.time import to_iso
+
+# 執行狀態
+STATUS_OK = "ok"
+STATUS_NOT_MODIFIED = "not_modified"  # 伺服器回應 304
+STATUS_SKIPPED = "skipped"  # 內容未變更，未寫入
+STATUS_ERROR = "error"
+
+CREATE_SYNC_RUNS_TABLE = """
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    phases TEXT NOT NULL,
+    error TEXT
+)
+"""
+
+CREATE_SYNC_RUNS_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_sync_runs_job_started ON sync_runs(job, started_at)"
+)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """計算百分位數（nearest-rank）
+
+    Args:
+        values: 樣本（不需排序）
+        q: 百分位（0-100）
+
+    Returns:
+        百分位數，無樣本時為 0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_runs(runs: list[dict]) -> dict[str, dict[str, float]]:
+    """統計各階段與整體耗時的 p50 / p95
+
+    沒有執行某階段的記錄（例如 304 時沒有 write）不計入該階段的樣本。
+
+    Args:
+        runs: query() 取得的執行記錄
+
+    Returns:
+        {階段: {"count", "p50", "p95", "max"}}，整體耗時的階段名稱為 total
+    """
+    samples: dict[str, list[float]] = {"total": [run["duration"] for run in runs]}
+    for run in runs:
+        for phase, seconds in run["phases"].items():
+            samples.setdefault(phase, []).append(seconds)
+
+    return {
+        phase: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values, default=0.0),
+        }
+        for phase, values in samples.items()
+    }
+
+
+class SyncRunRepository:
+    """同步執行記錄存取類別"""
+
+    def __init__(self, db: DatabaseConnection):
+        """初始化同步執行記錄存取
+
+        Args:
+            db: 資料庫連線物件
+        """
+        self.db = db
+        self.logger = get_logger()
+        self._initialized = False
+
+    def init_tables(self) -> None:
+        """初始化資料表（同一個實例只執行一次）"""
+        if self._initialized:
+            return
+        with self.db.transaction():
+            self.db.execute(CREATE_SYNC_RUNS_TABLE)
+            self.db.execute(CREATE_SYNC_RUNS_INDEX)
+        self._initialized = True
+
+    def record(
+        self,
+        job: str,
+        started_at: datetime,
+        duration: float,
+        status: str,
+        phases: dict[str, float],
+        bytes_downloaded: int = 0,
+        rows_written: int = 0,
+        error: str | None = None,
+    ) -> None:
+        """新增一筆執行記錄
+
+        Args:
+            job: 作業名稱（sync-parking / sync-availability）
+            started_at: 開始時間
+            duration: 整體耗時（秒）
+            status: 執行狀態（ok / not_modified / skipped / error）
+            phases: 各階段耗時（秒）
+            bytes_downloaded: 下載的 bytes 數
+            rows_written: 寫入的筆數
+            error: 錯誤訊息
+        """
+        self.init_tables()
+        self.db.execute(
+            """
+            INSERT INTO sync_runs
+                (job, started_at, duration, status, bytes_downloaded, rows_written, phases, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                job,
+                to_iso(started_at),
+                round(duration, 6),
+                status,
+                bytes_downloaded,
+                rows_written,
+                json.dumps(phases, separators=(",", ":")),
+                error,
+            ),
+        )
+
+    def record_result(self, job: str, started_at: datetime, result) -> None:
+        """由同步結果新增執行記錄（記錄失敗只寫入日誌，不影響同步）
+
+        Args:
+            job: 作業名稱
+            started_at: 開始時間
+            result: SyncResult 或 AvailabilitySyncResult
+        """
+        if result.errors:
+            status = STATUS_ERROR
+        elif result.not_modified:
+            status = STATUS_NOT_MODIFIED
+        elif getattr(result, "skipped", False):
+            status = STATUS_SKIPPED
+        else:
+            status = STATUS_OK
+
+        try:
+            self.record(
+                job,
+                started_at,
+                result.duration,
+                status,
+                result.phases,
+                bytes_downloaded=result.bytes_downloaded,
+                rows_written=result.rows_written,
+                error="; ".join(result.errors) or None,
+            )
+        except Exception as e:
+            self.logger.warning(f"同步執行記錄寫入失敗: {e}")
+
+    def query(self, job: str | None = None, since: datetime | None = None) -> list[dict]:
+        """查詢執行記錄
+
+        Args:
+            job: 作業名稱，None 表示全部
+            since: 開始時間下限（含），None 表示不限
+
+        Returns:
+            執行記錄列表（依開始時間排序，phases 已解析為字典）
+        """
+        if not self.db.table_exists("sync_runs"):
+            return []
+
+        conditions = []
+        params: list = []
+        if job is not None:
+            conditions.append("job = ?")
+            params.append(job)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            params.append(to_iso(since))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        rows = self.db.fetch_all(
+            f"SELECT * FROM sync_runs {where} ORDER BY started_at, id", tuple(params)
+        )
+        return [{**dict(row), "phases": json.loads(row["phases"])} for row in rows]
@@ -0,0 +1,286 @@
+"""即時車位資料回填模組
+
+由 API 交換記錄重建月份資料庫：以目錄索引找出時間區間內的即時車位交換記錄，
+於多個子程序解壓縮並解析 body，再依時間順序以交換記錄時間為記錄時間寫入。
+
+- 冪等：已有對應同步資料的時間點會跳過（見 AvailabilityRepository.is_recorded），
+  重複執行不會重複寫入
+- 可續傳：處理進度定期寫入檢查點檔案，中斷後以相同區間重新執行會從上次的位置繼續
+- 與同步相同記錄 body 的 SHA256 快照；內容與前一次同步相同時只記錄快照，不寫入資料列
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import batched
+from pathlib import Path
+from typing import Any
+
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+)
+from parking_newtaipei.db.availability_rollup import RollupAccumulator
+from parking_newtaipei.etl.availability_sync import (
+    AVAILABILITY_API_URL,
+    AvailabilitySync,
+    AvailabilitySyncResult,
+    load_lot_info,
+)
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.storage import (
+    RAW_SUFFIX,
+    find_responses,
+    load_raw_body,
+    load_response,
+    read_index,
+)
+
+# 檢查點檔名（位於資料庫目錄）
+CHECKPOINT_FILENAME = "availability_backfill.json"
+
+# 每處理幾筆交換記錄更新一次檢查點
+CHECKPOINT_EVERY = 100
+
+# 同步時的記錄時間與交換記錄時間的容許差距
+RECORDED_AT_TOLERANCE = timedelta(seconds=30)
+
+# 每個子程序預先排入的交換記錄數（限制尚未寫入的解析結果佔用的記憶體）
+PREFETCH_PER_WORKER = 8
+
+# 解析工作：(交換記錄路徑, raw 格式的索引記錄；json 格式為 None)
+ArchiveTask = tuple[Path, dict[str, Any] | None]
+
+
+@dataclass
+class BackfillResult:
+    """回填結果"""
+
+    archives: int = 0  # 區間內的交換記錄數
+    inserted: int = 0
+    backfilled: int = 0  # 實際寫入的交換記錄數
+    duplicates: int = 0  # 內容與前一次同步相同、只記錄快照的交換記錄數（計入 backfilled）
+    already_recorded: int = 0  # 已有同步資料而跳過的交換記錄數
+    resumed: int = 0  # 依檢查點略過的交換記錄數
+    skipped_invalid: int = 0  # 非 200 回應或無法讀取的交換記錄數
+    errors: list[str] = None
+
+    def __post_init__(self):
+        if self.errors is None:
+            self.errors = []
+
+
+def _archive_time(task: ArchiveTask) -> datetime:
+    """取得交換記錄的記錄時間（不需解壓縮）"""
+    path, entry = task
+    if entry is not None:
+        return datetime.fromisoformat(entry["timestamp"])
+    return datetime.strptime(path.name[:15], "%Y%m%d_%H%M%S")
+
+
+def _load_archive(task: ArchiveTask) -> tuple[str, list[dict] | None, str | None]:
+    """解壓縮並解析一筆交換記錄（於子程序執行）
+
+    Args:
+        task: (交換記錄路徑, raw 格式的索引記錄)
+
+    Returns:
+        (交換記錄時間, 有效的資料列表, body 的 SHA256 雜湊值)；
+        非 200 回應或無法讀取時資料列表與雜湊值為 None
+    """
+    path, entry = task
+    try:
+        if entry is not None:
+            if entry.get("status_code") != 200:
+                return entry["timestamp"], None, None
+            body = load_raw_body(path, entry)
+            timestamp = entry["timestamp"]
+        else:
+            data = load_response(path)
+            if data["response"]["status_code"] != 200:
+                return data["timestamp"], None, None
+            body = data["response"]["body"]
+            if not isinstance(body, str):
+                return data["timestamp"], None, None
+            body = body.encode("utf-8")
+            timestamp = data["timestamp"]
+    except (OSError, ValueError, KeyError):
+        return _archive_time(task).isoformat(), None, None
+
+    records = list(AvailabilitySync._parse_csv([body], AvailabilitySyncResult()))
+    return timestamp, records, hashlib.sha256(body).hexdigest()
+
+
+class AvailabilityBackfill:
+    """由交換記錄回填即時車位資料"""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        responses_dir: Path,
+        workers: int | None = None,
+        storage_mode: str = STORAGE_MODE_FULL,
+        schema_version: int = SCHEMA_V1,
+        parking_db_path: Path | None = None,
+    ):
+        """初始化回填器
+
+        Args:
+            db_dir: 資料庫目錄
+            responses_dir: 交換記錄目錄
+            workers: 解析用的子程序數，預設為 CPU 數；1 表示在目前程序內解析
+            storage_mode: 新月份資料庫的儲存模式（full 或 delta）
+            schema_version: 新月份資料庫的結構版本（1 或 2）
+            parking_db_path: 停車場基本資料庫路徑（彙總的行政區與佔用率使用），None 表示不計入
+        """
+        self.db_dir = db_dir
+        self.responses_dir = responses_dir
+        self.parking_db_path = parking_db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.repo = AvailabilityRepository(
+            db_dir,
+            persistent=True,
+            storage_mode=storage_mode,
+            schema_version=schema_version,
+        )
+        self.checkpoint_path = db_dir / CHECKPOINT_FILENAME
+        self.logger = get_logger()
+
+    def _tasks(self, start: datetime, end: datetime) -> list[ArchiveTask]:
+        """列出區間內的即時車位交換記錄（舊的在前）
+
+        raw 格式的月份索引只讀取一次，隨工作傳給子程序。
+
+        Args:
+            start: 起始時間（含）
+            end: 結束時間（含）
+
+        Returns:
+            解析工作列表
+        """
+        paths = find_responses(
+            self.responses_dir, start=start, end=end, endpoint=AVAILABILITY_API_URL
+        )
+        indexes: dict[Path, dict[str, dict[str, Any]]] = {}
+        tasks = []
+        for path in reversed(paths):
+            entry = None
+            if path.name.endswith(RAW_SUFFIX):
+                if path.parent not in indexes:
+                    indexes[path.parent] = read_index(path.parent)
+                entry = indexes[path.parent].get(path.name)
+                if entry is None:
+                    continue
+            tasks.append((path, entry))
+        return tasks
+
+    def _read_checkpoint(self, start: datetime, end: datetime) -> datetime | None:
+        """讀取相同區間的檢查點
+
+        Returns:
+            已完成的最後一筆交換記錄時間，若無則為 None
+        """
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get("start"), checkpoint.get("end")) != (start.isoformat(), end.isoformat()):
+            return None
+        return datetime.fromisoformat(checkpoint["last"])
+
+    def _write_checkpoint(self, start: datetime, end: datetime, last: datetime) -> None:
+        """寫入檢查點（暫存檔加 rename）"""
+        tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"start": start.isoformat(), "end": end.isoformat(), "last": last.isoformat()}, f
+            )
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _parsed(
+        self, tasks: list[ArchiveTask]
+    ) -> Iterator[tuple[str, list[dict] | None, str | None]]:
+        """依序產生解析結果（多個子程序平行解析，結果維持原順序）"""
+        if self.workers <= 1:
+            yield from map(_load_archive, tasks)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for window in batched(tasks, self.workers * PREFETCH_PER_WORKER):
+                yield from executor.map(_load_archive, window)
+
+    def backfill(self, start: datetime, end: datetime, resume: bool = True) -> BackfillResult:
+        """回填時間區間內的即時車位資料
+
+        Args:
+            start: 起始時間（含）
+            end: 結束時間（含）
+            resume: 是否依檢查點略過已完成的交換記錄
+
+        Returns:
+            回填結果
+        """
+        result = BackfillResult()
+        tasks = self._tasks(start, end)
+        result.archives = len(tasks)
+
+        last = self._read_checkpoint(start, end) if resume else None
+        if last is not None:
+            remaining = [task for task in tasks if _archive_time(task) > last]
+            result.resumed = len(tasks) - len(remaining)
+            tasks = remaining
+            self.logger.info(f"由檢查點繼續: 略過 {result.resumed} 筆（至 {last.isoformat()}）")
+
+        self.logger.info(f"回填 {len(tasks)} 筆交換記錄（{self.workers} 個解析程序）")
+
+        # 與同步相同，回填的資料同時累加至每小時 / 每日彙總
+        lots = load_lot_info(self.parking_db_path)
+        months: set[tuple[int, int]] = set()
+        try:
+            for done, (timestamp, records, content_hash) in enumerate(
+                self._parsed(tasks), start=1
+            ):
+                recorded_at = datetime.fromisoformat(timestamp)
+                if records is None:
+                    result.skipped_invalid += 1
+                elif self.repo.is_recorded(recorded_at, RECORDED_AT_TOLERANCE):
+                    result.already_recorded += 1
+                else:
+                    local = recorded_at.astimezone()
+                    if (local.year, local.month) not in months:
+                        self.repo.init_tables(local.year, local.month)
+                        months.add((local.year, local.month))
+                    rollup = RollupAccumulator(lots)
+                    if self.repo.get_last_snapshot_hash(recorded_at) == content_hash:
+                        self.repo.record_heartbeat(records, recorded_at, content_hash, rollup)
+                        result.duplicates += 1
+                    else:
+                        result.inserted += self.repo.insert_batches(
+                            [records], recorded_at, rollup, content_hash
+                        )
+                    result.backfilled += 1
+
+                if done % CHECKPOINT_EVERY == 0:
+                    self._write_checkpoint(start, end, _archive_time(tasks[done - 1]))
+        except Exception as e:
+            error_msg = f"回填失敗: {e}"
+            self.logger.error(error_msg)
+            result.errors.append(error_msg)
+            return result
+        finally:
+            self.repo.close()
+
+        # 完成後移除檢查點，之後以相同區間執行會重新檢查（已有資料者仍會跳過）
+        self.checkpoint_path.unlink(missing_ok=True)
+
+        self.logger.info(
+            f"回填完成 - 寫入: {result.inserted} 筆（{result.backfilled} 次同步，"
+            f"{result.duplicates} 次內容重複）, "
+            f"已有資料: {result.already_recorded}, 無效: {result.skipped_invalid}"
+        )
+        return result
@@ -0,0 +1,179 @@
+"""即時車位 JSON 發布模組
+
+將最新一次同步的即時車位輸出為 availability.json，供網站或其他伺服器直接讀取：
+
+- 原子寫入：先寫入暫存檔再 rename，讀取端不會讀到寫入到一半的檔案
+- 精簡格式：不縮排，另輸出預先 gzip 壓縮的 .gz 檔
+- 內容未變更時不重寫：以車位資料的雜湊值比對上次發布的內容
+- 版本號：每次內容變更遞增，記錄於版本檔，下游複製（scripts/sync-data.sh）可只在版本變更時傳輸
+- 可選依行政區分檔輸出
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from parking_newtaipei.db.availability_rollup import LotInfo
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.time import now_iso
+
+# 最新即時車位檔名
+AVAILABILITY_JSON = "availability.json"
+
+# 版本檔名（最後寫入；下游讀到新版本時，版本內列出的檔案都已寫入完成）
+VERSION_FILENAME = "availability.version.json"
+
+# 依行政區分檔的目錄名
+AREA_DIRNAME = "availability_area"
+
+# 預先壓縮的 gzip 等級
+GZIP_LEVEL = 9
+
+
+@dataclass
+class PublishResult:
+    """發布結果"""
+
+    version: int
+    changed: bool  # False 表示內容與上次發布相同，未重寫
+    files: list[str] = field(default_factory=list)  # 寫入的檔案（相對於輸出目錄）
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """以暫存檔 + rename 寫入檔案
+
+    Args:
+        path: 目標路徑
+        data: 檔案內容
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def content_hash(records: list[dict]) -> str:
+    """計算車位資料的雜湊值（與輸出順序無關）
+
+    Args:
+        records: 資料列表，每筆包含 parking_id 和 available_car
+
+    Returns:
+        SHA-256 十六進位字串
+    """
+    digest = hashlib.sha256()
+    for record in sorted(records, key=lambda r: r["parking_id"]):
+        digest.update(f"{record['parking_id']}\t{record['available_car']}\n".encode())
+    return digest.hexdigest()
+
+
+class AvailabilityPublisher:
+    """即時車位 JSON 發布器"""
+
+    def __init__(self, output_dir: Path, split_by_area: bool = False):
+        """初始化發布器
+
+        Args:
+            output_dir: 輸出目錄
+            split_by_area: 是否另外依行政區分檔輸出
+        """
+        self.output_dir = output_dir
+        self.split_by_area = split_by_area
+        self.version_path = output_dir / VERSION_FILENAME
+        self.logger = get_logger()
+
+    def read_version(self) -> dict[str, Any]:
+        """讀取上次發布的版本資訊
+
+        Returns:
+            版本資訊（version、content_hash、updated_at、files），尚未發布或無法讀取時為空字典
+        """
+        try:
+            return json.loads(self.version_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"版本檔無法讀取，視為尚未發布: {self.version_path}（{e}）")
+            return {}
+
+    def _write_json(self, relative: str, data: dict) -> list[str]:
+        """原子寫入精簡 JSON 與其 gzip 版本
+
+        Returns:
+            寫入的檔案（相對於輸出目錄）
+        """
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        path = self.output_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, body)
+        write_atomic(path.with_name(path.name + ".gz"), gzip.compress(body, GZIP_LEVEL, mtime=0))
+        return [relative, relative + ".gz"]
+
+    def _write_areas(self, header: dict, records: list[dict], lots: LotInfo) -> list[str]:
+        """依行政區分檔輸出（行政區未知的停車場不輸出），並移除已無資料的行政區檔案
+
+        Returns:
+            寫入的檔案（相對於輸出目錄）
+        """
+        areas: dict[str, list[dict]] = {}
+        for record in records:
+            area = lots.get(record["parking_id"], (None, None))[0]
+            if area:
+                areas.setdefault(area, []).append(record)
+
+        files = []
+        for area, items in sorted(areas.items()):
+            files += self._write_json(
+                f"{AREA_DIRNAME}/{area}.json",
+                {**header, "area": area, "total_count": len(items), "data": items},
+            )
+
+        area_dir = self.output_dir / AREA_DIRNAME
+        kept = {Path(name).name for name in files}
+        for path in area_dir.glob("*.json*"):
+            if path.name not in kept:
+                path.unlink()
+        return files
+
+    def publish(self, records: list[dict], lots: LotInfo | None = None) -> PublishResult:
+        """發布最新即時車位
+
+        內容與上次發布相同時不寫入任何檔案（updated_at 維持上次內容變更的時間）。
+
+        Args:
+            records: 資料列表，每筆包含 parking_id 和 available_car
+            lots: 停車場資訊（依行政區分檔時使用）
+
+        Returns:
+            發布結果
+        """
+        previous = self.read_version()
+        digest = content_hash(records)
+        if previous.get("content_hash") == digest:
+            self.logger.info(f"即時車位內容未變更，沿用版本 {previous['version']}")
+            return PublishResult(version=previous["version"], changed=False)
+
+        version = previous.get("version", 0) + 1
+        updated_at = now_iso()
+        header = {"version": version, "updated_at": updated_at}
+        ordered = sorted(records, key=lambda r: r["parking_id"])
+
+        files = self._write_json(
+            AVAILABILITY_JSON, {**header, "total_count": len(ordered), "data": ordered}
+        )
+        if self.split_by_area:
+            files += self._write_areas(header, ordered, lots or {})
+
+        # 版本檔最後寫入
+        version_info = {**header, "content_hash": digest, "files": files}
+        write_atomic(
+            self.version_path,
+            json.dumps(version_info, ensure_ascii=False, indent=2).encode("utf-8"),
+        )
+
+        self.logger.info(f"即時車位已發布: 版本 {version}（{len(files)} 個檔案）")
+        return PublishResult(version=version, changed=True, files=files)
@@ -3,18 +3,29 @@
 從新北市開放資料平台下載即時剩餘車位數並寫入資料庫。
 """
 
-import csv
-import json
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from io import StringIO
+from datetime import datetime
+from itertools import batched
 from pathlib import Path
 
 from parking_newtaipei.api.client import APIClient
 from parking_newtaipei.config import HEALTHCHECK_AVAILABILITY_URL
-from parking_newtaipei.db.availability import AvailabilityRepository
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+)
+from parking_newtaipei.db.availability_rollup import LotInfo, RollupAccumulator
+from parking_newtaipei.db.availability_snapshots import dedup_ratio
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.db.sync_runs import SyncRunRepository
+from parking_newtaipei.etl.availability_publish import AvailabilityPublisher
+from parking_newtaipei.utils.csv_stream import iter_csv_rows
 from parking_newtaipei.utils.healthcheck import ping_healthcheck
 from parking_newtaipei.utils.logger import get_logger
-from parking_newtaipei.utils.time import now_iso
+from parking_newtaipei.utils.timing import PhaseTimer, format_phases
 
 # 新北市公有路外停車場即時賸餘車位數 API
 AVAILABILITY_API_URL = (
@@ -25,19 +36,63 @@ AVAILABILITY_API_URL = (
 # 無效資料的標記值
 INVALID_VALUE = -9
 
+# 每批寫入資料庫的筆數
+BATCH_SIZE = 1000
+
+
+def load_lot_info(parking_db_path: Path | None) -> LotInfo:
+    """讀取停車場的行政區與總車位數（彙總使用）
+
+    Args:
+        parking_db_path: 停車場基本資料庫路徑
+
+    Returns:
+        停車場資訊；未設定或尚未同步停車場基本資料時為空字典
+    """
+    if parking_db_path is None or not parking_db_path.exists():
+        return {}
+    return ParkingLotRepository(DatabaseConnection(parking_db_path)).get_capacities()
+
 
 @dataclass
 class AvailabilitySyncResult:
     """同步結果"""
 
     inserted: int = 0
+    unchanged: int = 0  # delta 模式下車位數未變動而未寫入的筆數
     skipped_invalid: int = 0
     total_downloaded: int = 0
+    not_modified: bool = False  # 伺服器回應 304，未下載內容
+    duplicate: bool = False  # 內容與上次同步相同，只記錄快照未寫入資料列
+    snapshots: int = 0  # 本月份的同步次數（含本次）
+    duplicate_snapshots: int = 0  # 本月份內容重複的同步次數
+    bytes_downloaded: int = 0
+    duration: float = 0.0  # 整體耗時（秒）
+    phases: dict[str, float] = None  # 各階段耗時（秒）
     errors: list[str] = None
 
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.phases is None:
+            self.phases = {}
+
+    @property
+    def rows_written(self) -> int:
+        """寫入資料庫的筆數"""
+        return self.inserted
+
+    @property
+    def skipped(self) -> bool:
+        """內容未變更而未寫入資料列（304 或重複快照）"""
+        return self.not_modified or self.duplicate
+
+    @property
+    def dedup_ratio(self) -> float:
+        """本月份內容重複的同步次數比例"""
+        return dedup_ratio(
+            {"snapshots": self.snapshots, "duplicate_snapshots": self.duplicate_snapshots}
+        )
 
 
 class AvailabilitySync:
@@ -47,38 +102,61 @@ class AvailabilitySync:
         self,
         db_dir: Path,
         api_client: APIClient,
+        persistent: bool = False,
+        storage_mode: str = STORAGE_MODE_FULL,
+        schema_version: int = SCHEMA_V1,
+        parking_db_path: Path | None = None,
+        split_by_area: bool = False,
+        ledger: SyncRunRepository | None = None,
+        auto_compact: bool = False,
+        cold_dir: Path | None = None,
+        build_cube: bool = False,
     ):
         """初始化同步器
 
         Args:
             db_dir: 資料庫目錄
             api_client: API 客戶端
+            persistent: 是否使用常駐資料庫連線
+            storage_mode: 新月份資料庫的儲存模式（full 或 delta）
+            schema_version: 新月份資料庫的結構版本（1 或 2）
+            parking_db_path: 停車場基本資料庫路徑（彙總的行政區與佔用率使用），None 表示不計入
+            split_by_area: 發布 JSON 時是否另外依行政區分檔輸出
+            ledger: 同步執行記錄，None 表示不記錄
+            auto_compact: 每月第一次同步（建立新月份檔案）後是否壓實已結束的月份
+            cold_dir: 壓實時輸出冷備份的目錄，None 表示不輸出
+            build_cube: 壓實後是否一併建立車位立方體（需要 numpy）
         """
         self.db_dir = db_dir
         self.api_client = api_client
-        self.repo = AvailabilityRepository(db_dir)
+        self.parking_db_path = parking_db_path
+        self.repo = AvailabilityRepository(
+            db_dir,
+            persistent=persistent,
+            storage_mode=storage_mode,
+            schema_version=schema_version,
+        )
+        self.publisher = AvailabilityPublisher(db_dir, split_by_area=split_by_area)
+        self.ledger = ledger
+        self.auto_compact = auto_compact
+        self.cold_dir = cold_dir
+        self.build_cube = build_cube
         self.logger = get_logger()
 
-    def _parse_csv(self, csv_content: str) -> list[dict]:
-        """解析 CSV 內容
+    @staticmethod
+    def _parse_csv(chunks: Iterable[bytes], result: AvailabilitySyncResult) -> Iterator[dict]:
+        """解析 CSV 內容（不使用實例狀態，回填時於子程序呼叫）
 
         Args:
-            csv_content: CSV 字串內容
+            chunks: CSV 內容的 bytes 區塊（開頭的 BOM 會被移除）
+            result: 同步結果，累計總下載與跳過無效的筆數
 
-        Returns:
-            解析後的有效資料列表
+        Yields:
+            有效的資料字典
         """
-        # 移除 BOM
-        if csv_content.startswith("\ufeff"):
-            csv_content = csv_content[1:]
-
-        reader = csv.DictReader(StringIO(csv_content))
-        records = []
-        skipped = 0
-
-        for row in reader:
-            parking_id = row.get("ID", "").strip()
-            available_car_str = row.get("AVAILABLECAR", "").strip()
+        for row in iter_csv_rows(chunks):
+            parking_id = (row.get("ID") or "").strip()
+            available_car_str = (row.get("AVAILABLECAR") or "").strip()
 
             if not parking_id or not available_car_str:
                 continue
@@ -88,108 +166,188 @@ class AvailabilitySync:
             except ValueError:
                 continue
 
+            result.total_downloaded += 1
+
             # 跳過無效資料（-9 表示無效）
             if available_car == INVALID_VALUE:
-                skipped += 1
+                result.skipped_invalid += 1
                 continue
 
-            records.append({
+            yield {
                 "parking_id": parking_id,
                 "available_car": available_car,
-            })
+            }
 
-        return records, skipped
+    def download(
+        self,
+        result: AvailabilitySyncResult,
+        recorded_at: datetime | None = None,
+        timer: PhaseTimer | None = None,
+    ) -> int:
+        """串流下載即時車位資料並分批寫入資料庫
+
+        下載內容不會整份載入記憶體：解析、雜湊與備份在同一次讀取中完成，
+        每解析 BATCH_SIZE 筆即寫入資料庫，所有批次、彙總與快照記錄在單一交易內寫入。
+        讀完後比對內容的 SHA256 與當月最後一次同步，相同時（上游尚未更新）捨棄本次寫入的
+        資料列、只記錄重複快照並累加彙總，不保留交換記錄。
+        下載中斷時不會留下部分資料；伺服器回應 304 時不寫入任何資料。
 
-    def download(self) -> str:
-        """下載即時車位資料
+        Args:
+            result: 同步結果，更新寫入、未變動、總下載、跳過無效的筆數、是否未變更與重複快照數
+            recorded_at: 資料記錄時間（重播交換記錄時使用），None 表示現在
+            timer: 階段計時器（download、archive、parse、write）
 
         Returns:
-            CSV 內容字串
+            有效的資料筆數，304 時為 0
         """
         self.logger.info(f"正在下載即時車位資料: {AVAILABILITY_API_URL}")
 
-        response = self.api_client.get(AVAILABILITY_API_URL)
-        response.raise_for_status()
-
-        content = response.text
-        self.logger.info(f"下載完成，資料大小: {len(content)} bytes")
-
-        return content
-
-    def _save_json(self, records: list[dict]) -> None:
-        """將即時車位資料輸出為 JSON 檔案
+        recorded_at = recorded_at or datetime.now()
+        timer = timer or PhaseTimer()
+
+        with timer.span("write"):
+            previous_hash = self.repo.get_last_snapshot_hash(recorded_at)
+            rollup = RollupAccumulator(load_lot_info(self.parking_db_path))
+
+        with self.api_client.stream_get(AVAILABILITY_API_URL, timer=timer) as stream:
+            if stream.not_modified:
+                self.logger.info("伺服器回應 304，內容未變更")
+                result.not_modified = True
+                return 0
+            stream.response.raise_for_status()
+            records = timer.iterate("parse", self._parse_csv(stream.iter_bytes(), result))
+            with timer.span("write"):
+                result.inserted = self.repo.insert_batches(
+                    batched(records, BATCH_SIZE),
+                    recorded_at,
+                    rollup,
+                    content_hash=lambda: stream.sha256,
+                    previous_hash=previous_hash,
+                )
+                counts = self.repo.get_snapshot_counts(recorded_at)
+            result.duplicate = stream.sha256 == previous_hash
+            if result.duplicate:
+                stream.discard()
+            valid = result.total_downloaded - result.skipped_invalid
+            result.unchanged = valid - result.inserted
+            result.snapshots = counts["snapshots"]
+            result.duplicate_snapshots = counts["duplicate_snapshots"]
+        result.bytes_downloaded = stream.size
+
+        self.logger.info(f"下載完成，資料大小: {stream.size} bytes")
+        self.api_client.remember_validators(stream)
+
+        return valid
+
+    def _publish(self, records: list[dict]) -> None:
+        """發布最新即時車位 JSON（內容未變更時不重寫）
 
         Args:
             records: 資料列表，每筆包含 parking_id 和 available_car
         """
-        json_path = self.db_dir / "availability.json"
-
-        data = {
-            "updated_at": now_iso(),
-            "total_count": len(records),
-            "data": records,
-        }
-
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        lots = load_lot_info(self.parking_db_path) if self.publisher.split_by_area else None
+        self.publisher.publish(records, lots)
 
-        self.logger.info(f"JSON 檔案已輸出: {json_path}")
-
-    def sync(self) -> AvailabilitySyncResult:
+    def sync(self, recorded_at: datetime | None = None) -> AvailabilitySyncResult:
         """執行同步作業
 
+        Args:
+            recorded_at: 資料記錄時間（重播交換記錄時使用，不發送 healthcheck 通報），
+                None 表示現在
+
         Returns:
             同步結果
         """
         result = AvailabilitySyncResult()
+        timer = PhaseTimer()
+        started_at = datetime.now()
+        start = timer.clock()
+
+        try:
+            created = self._sync(result, recorded_at, timer)
+            if created and self.auto_compact:
+                with timer.span("compact"):
+                    self._compact_closed_months()
+        finally:
+            result.duration = timer.clock() - start
+            result.phases = timer.as_dict()
+            self.logger.info(f"耗時 {result.duration:.2f}s（{format_phases(result.phases)}）")
+            if self.ledger is not None:
+                self.ledger.record_result("sync-availability", started_at, result)
+
+        return result
 
-        # 確保資料表存在
-        self.repo.init_tables()
+    def _sync(
+        self, result: AvailabilitySyncResult, recorded_at: datetime | None, timer: PhaseTimer
+    ) -> bool:
+        """執行同步作業的各階段（由 sync() 計時與記錄）
 
-        # 下載資料
+        Returns:
+            是否建立了新月份檔案（重播時固定為 False）
+        """
+        # 確保資料表存在（重播時為記錄時間所在月份）
+        with timer.span("write"):
+            if recorded_at is None:
+                created = self.repo.init_tables()
+            else:
+                local = recorded_at.astimezone()
+                self.repo.init_tables(local.year, local.month)
+                created = False
+
+        # 串流下載並批次寫入
+        moment = recorded_at or datetime.now()
         try:
-            csv_content = self.download()
+            valid = self.download(result, moment, timer)
         except Exception as e:
-            error_msg = f"下載失敗: {e}"
+            error_msg = f"下載或寫入失敗: {e}"
             self.logger.error(error_msg)
             result.errors.append(error_msg)
-            return result
-
-        # 解析 CSV
-        records, skipped = self._parse_csv(csv_content)
-        result.total_downloaded = len(records) + skipped
-        result.skipped_invalid = skipped
-
-        # 批次寫入
-        if records:
-            try:
-                inserted = self.repo.insert_batch(records)
-                result.inserted = inserted
-            except Exception as e:
-                error_msg = f"寫入失敗: {e}"
-                self.logger.error(error_msg)
-                result.errors.append(error_msg)
-                return result
+            return created
 
-            # 輸出 JSON 檔案（最新資料）
+        # 發布 JSON 檔案（最新資料，寫入後由資料庫讀回；重複內容已於上次同步發布）
+        if valid and not result.duplicate:
             try:
-                self._save_json(records)
+                with timer.span("publish"):
+                    self._publish(self.repo.get_sync_records(moment))
             except Exception as e:
                 error_msg = f"JSON 輸出失敗: {e}"
                 self.logger.error(error_msg)
                 result.errors.append(error_msg)
 
         # 記錄結果
-        self.logger.info(
-            f"同步完成 - 寫入: {result.inserted}, "
-            f"跳過無效: {result.skipped_invalid}, "
-            f"總下載: {result.total_downloaded}"
-        )
+        if result.not_modified:
+            self.logger.info("同步完成 - 內容未變更（HTTP 304），未寫入資料")
+        elif result.duplicate:
+            self.logger.info(
+                f"同步完成 - 內容與上次相同，只記錄快照"
+                f"（本月重複比例: {result.dedup_ratio:.1%}，"
+                f"{result.duplicate_snapshots}/{result.snapshots}）"
+            )
+        else:
+            self.logger.info(
+                f"同步完成 - 寫入: {result.inserted}, "
+                f"未變動: {result.unchanged}, "
+                f"跳過無效: {result.skipped_invalid}, "
+                f"總下載: {result.total_downloaded}"
+            )
 
         if result.errors:
             self.logger.warning(f"同步過程中發生 {len(result.errors)} 個錯誤")
-        else:
+        elif recorded_at is None:
             # 同步成功，發送 healthcheck 通報
-            ping_healthcheck(HEALTHCHECK_AVAILABILITY_URL, "即時車位資料同步")
+            with timer.span("healthcheck"):
+                ping_healthcheck(HEALTHCHECK_AVAILABILITY_URL, "即時車位資料同步")
 
-        return result
+        return created
+
+    def _compact_closed_months(self) -> None:
+        """壓實已結束但尚未壓實的月份（失敗時只記錄錯誤，不影響同步結果）"""
+        try:
+            pending = self.repo.pending_compaction()
+            if pending:
+                self.logger.info(f"新月份開始，壓實已結束的月份: {len(pending)} 個檔案")
+                self.repo.compact_months(
+                    pending, cold_dir=self.cold_dir, cube=self.build_cube
+                )
+        except Exception as e:
+            self.logger.error(f"壓實已結束月份失敗: {e}")
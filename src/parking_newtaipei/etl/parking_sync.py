@@ -3,18 +3,19 @@
 從新北市開放資料平台下載停車場資訊並同步至本地資料庫。
 """
 
-import csv
-import hashlib
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from io import StringIO
-from typing import Iterator
+from datetime import datetime
 
-from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.api.client import APIClient, ResponseStream
 from parking_newtaipei.config import HEALTHCHECK_PARKING_URL
 from parking_newtaipei.db.connection import DatabaseConnection
 from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.db.sync_runs import SyncRunRepository
+from parking_newtaipei.utils.csv_stream import iter_csv_rows
 from parking_newtaipei.utils.healthcheck import ping_healthcheck
 from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.timing import PhaseTimer, format_phases
 
 # 新北市路外公共停車場資訊 API
 PARKING_LOT_API_URL = (
@@ -46,15 +47,27 @@ class SyncResult:
     """同步結果"""
 
     inserted: int = 0
-    updated: int = 0
+    updated: int = 0  # 內容變更（含恢復已刪除）而寫入的筆數
+    unchanged: int = 0  # 內容未變更而未寫入的筆數
     deleted: int = 0
     total_processed: int = 0
     skipped: bool = False  # 是否因內容未變更而跳過
+    not_modified: bool = False  # 伺服器回應 304，未下載內容
+    bytes_downloaded: int = 0
+    duration: float = 0.0  # 整體耗時（秒）
+    phases: dict[str, float] = None  # 各階段耗時（秒）
     errors: list[str] = None
 
     def __post_init__(self):
         if self.errors is None:
             self.errors = []
+        if self.phases is None:
+            self.phases = {}
+
+    @property
+    def rows_written(self) -> int:
+        """寫入資料庫的筆數（新增、更新與標記刪除）"""
+        return self.inserted + self.updated + self.deleted
 
 
 class ParkingLotSync:
@@ -64,37 +77,34 @@ class ParkingLotSync:
         self,
         db: DatabaseConnection,
         api_client: APIClient,
+        ledger: SyncRunRepository | None = None,
     ):
         """初始化同步器
 
         Args:
             db: 資料庫連線物件
             api_client: API 客戶端
+            ledger: 同步執行記錄，None 表示不記錄
         """
         self.db = db
         self.api_client = api_client
+        self.ledger = ledger
         self.repo = ParkingLotRepository(db)
         self.logger = get_logger()
 
-    def _parse_csv(self, csv_content: str) -> Iterator[dict]:
+    def _parse_csv(self, chunks: Iterable[bytes]) -> Iterator[dict]:
         """解析 CSV 內容
 
         Args:
-            csv_content: CSV 字串內容
+            chunks: CSV 內容的 bytes 區塊（開頭的 BOM 會被移除）
 
         Yields:
             解析後的資料字典
         """
-        # 移除 BOM（Byte Order Mark）
-        if csv_content.startswith("\ufeff"):
-            csv_content = csv_content[1:]
-
-        reader = csv.DictReader(StringIO(csv_content))
-
-        for row in reader:
+        for row in iter_csv_rows(chunks):
             data = {}
             for csv_field, db_field in CSV_FIELD_MAPPING.items():
-                value = row.get(csv_field, "").strip()
+                value = (row.get(csv_field) or "").strip()
 
                 # 數值欄位轉換
                 if db_field in ("tw97x", "tw97y"):
@@ -108,32 +118,39 @@ class ParkingLotSync:
             if data.get("id"):
                 yield data
 
-    def download(self) -> str:
-        """下載停車場資料
+    def download(
+        self, conditional: bool = True, timer: PhaseTimer | None = None
+    ) -> ResponseStream:
+        """串流下載停車場資料並逐筆載入暫存表
+
+        下載內容不會整份載入記憶體，解析、雜湊與備份在同一次讀取中完成。
+        需在 self.db.transaction() 內呼叫，並接著呼叫 merge_staging() 或 clear_staging()；
+        伺服器回應 304 時不會載入暫存表。
+
+        Args:
+            conditional: 是否發送條件式請求（ETag / Last-Modified）
+            timer: 階段計時器（download、archive、parse；載入暫存表計入外層）
 
         Returns:
-            CSV 內容字串
+            已讀取完畢的串流 response（含 SHA256 雜湊值）
         """
         self.logger.info(f"正在下載停車場資料: {PARKING_LOT_API_URL}")
 
-        response = self.api_client.get(PARKING_LOT_API_URL)
-        response.raise_for_status()
+        timer = timer or PhaseTimer()
+        with self.api_client.stream_get(
+            PARKING_LOT_API_URL, conditional=conditional, timer=timer
+        ) as stream:
+            if stream.not_modified:
+                self.logger.info("伺服器回應 304，內容未變更")
+                return stream
+            stream.response.raise_for_status()
+            loaded = self.repo.load_staging(
+                timer.iterate("parse", self._parse_csv(stream.iter_bytes()))
+            )
 
-        content = response.text
-        self.logger.info(f"下載完成，資料大小: {len(content)} bytes")
+        self.logger.info(f"下載完成，資料大小: {stream.size} bytes，共 {loaded} 筆")
 
-        return content
-
-    def _compute_hash(self, content: str) -> str:
-        """計算內容的 SHA256 雜湊值
-
-        Args:
-            content: 要計算雜湊的字串內容
-
-        Returns:
-            SHA256 雜湊值（16 進位字串）
-        """
-        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return stream
 
     def sync(self, force: bool = False) -> SyncResult:
         """執行同步作業
@@ -145,79 +162,98 @@ class ParkingLotSync:
             同步結果
         """
         result = SyncResult()
+        timer = PhaseTimer()
+        started_at = datetime.now()
+        start = timer.clock()
+
+        try:
+            self._sync(result, force, timer)
+        finally:
+            result.duration = timer.clock() - start
+            result.phases = timer.as_dict()
+            self.logger.info(f"耗時 {result.duration:.2f}s（{format_phases(result.phases)}）")
+            if self.ledger is not None:
+                self.ledger.record_result("sync-parking", started_at, result)
+
+        return result
 
+    def _sync(self, result: SyncResult, force: bool, timer: PhaseTimer) -> None:
+        """執行同步作業的各階段（由 sync() 計時與記錄）"""
         # 確保資料表存在
-        self.repo.init_tables()
+        with timer.span("write"):
+            self.repo.init_tables()
+
+        previous_hash = self.repo.get_content_hash()
+        has_data = self.repo.has_data()
+        stream = None
 
-        # 下載資料
+        # 以單一交易串流下載並批次同步（新增、更新、軟刪除）
         try:
-            csv_content = self.download()
+            with timer.span("write"), self.db.transaction():
+                try:
+                    # 強制同步或資料庫無資料時不發送條件式請求，確保取得完整內容
+                    stream = self.download(conditional=not force and has_data, timer=timer)
+                    result.bytes_downloaded = stream.size
+                except Exception as e:
+                    error_msg = f"下載失敗: {e}"
+                    self.logger.error(error_msg)
+                    result.errors.append(error_msg)
+                    raise
+
+                # 檢查是否需要同步（304 時不需解析、雜湊或備份）
+                if stream.not_modified:
+                    result.not_modified = True
+                    result.skipped = True
+                elif not force and previous_hash == stream.sha256 and has_data:
+                    self.repo.clear_staging()
+                    result.skipped = True
+                else:
+                    inserted, updated, unchanged, deleted = self.repo.merge_staging()
+                    result.inserted = inserted
+                    result.updated = updated
+                    result.unchanged = unchanged
+                    result.deleted = deleted
+                    result.total_processed = inserted + updated + unchanged
         except Exception as e:
-            error_msg = f"下載失敗: {e}"
+            if stream is None:
+                return
+            error_msg = f"批次同步失敗: {e}"
             self.logger.error(error_msg)
             result.errors.append(error_msg)
-            return result
 
-        # 計算下載內容的雜湊值
-        current_hash = self._compute_hash(csv_content)
-        previous_hash = self.repo.get_content_hash()
-
-        # 檢查是否需要同步
-        if not force and previous_hash == current_hash and self.repo.has_data():
-            self.logger.info(f"內容未變更（hash: {current_hash[:16]}...），跳過同步")
-            result.skipped = True
+        if result.skipped:
+            if result.not_modified:
+                self.logger.info("內容未變更（HTTP 304），跳過同步")
+            else:
+                self.logger.info(f"內容未變更（hash: {stream.sha256[:16]}...），跳過同步")
+                self.api_client.remember_validators(stream)
             # 跳過同步但仍發送 healthcheck 通報，讓監控知道排程有正常執行
-            ping_healthcheck(HEALTHCHECK_PARKING_URL, "停車場基本資料同步")
-            return result
+            with timer.span("healthcheck"):
+                ping_healthcheck(HEALTHCHECK_PARKING_URL, "停車場基本資料同步")
+            return
 
+        current_hash = stream.sha256
         if previous_hash != current_hash:
             self.logger.info(f"偵測到內容變更（hash: {current_hash[:16]}...）")
-
-        # 取得目前資料庫中所有有效的 ID
-        existing_ids = self.repo.get_all_active_ids()
-        downloaded_ids: set[str] = set()
-
-        # 解析並更新資料
-        for data in self._parse_csv(csv_content):
-            try:
-                parking_id, is_new = self.repo.upsert(data)
-                downloaded_ids.add(parking_id)
-
-                if is_new:
-                    result.inserted += 1
-                    self.logger.debug(f"新增停車場: {parking_id} - {data.get('name')}")
-                else:
-                    result.updated += 1
-                    self.logger.debug(f"更新停車場: {parking_id} - {data.get('name')}")
-
-                result.total_processed += 1
-
-            except Exception as e:
-                error_msg = f"處理資料失敗 (ID={data.get('id')}): {e}"
-                self.logger.error(error_msg)
-                result.errors.append(error_msg)
-
-        # 標記已刪除的停車場（在資料庫中但不在下載資料中）
-        ids_to_delete = existing_ids - downloaded_ids
-        if ids_to_delete:
-            deleted_count = self.repo.mark_deleted(ids_to_delete)
-            result.deleted = deleted_count
-            self.logger.info(f"標記 {deleted_count} 筆資料為已刪除")
+        if result.deleted:
+            self.logger.info(f"標記 {result.deleted} 筆資料為已刪除")
 
         # 同步成功後更新雜湊值
         if not result.errors:
-            self.repo.set_content_hash(current_hash)
+            with timer.span("write"):
+                self.repo.set_content_hash(current_hash)
+            self.api_client.remember_validators(stream)
 
         # 記錄結果
         self.logger.info(
             f"同步完成 - 新增: {result.inserted}, 更新: {result.updated}, "
-            f"刪除: {result.deleted}, 總處理: {result.total_processed}"
+            f"未變更: {result.unchanged}, 刪除: {result.deleted}, "
+            f"總處理: {result.total_processed}"
         )
 
         if result.errors:
             self.logger.warning(f"同步過程中發生 {len(result.errors)} 個錯誤")
         else:
             # 同步成功，發送 healthcheck 通報
-            ping_healthcheck(HEALTHCHECK_PARKING_URL, "停車場基本資料同步")
-
-        return result
+            with timer.span("healthcheck"):
+                ping_healthcheck(HEALTHCHECK_PARKING_URL, "停車場基本資料同步")
@@ -1,16 +1,31 @@
 """CLI 進入點
 
-支援 --help、sync-parking 等指令。
+支援 --help、sync-parking、daemon、serve 等指令。
 """
 
 import argparse
 import sys
+import time
+from datetime import datetime
+from pathlib import Path
 
 from parking_newtaipei import __version__
 from parking_newtaipei.config import (
+    API_REPLAY_DIR,
+    ARCHIVE_COMPRESS_LEVEL,
+    ARCHIVE_FORMAT,
+    AVAILABILITY_AUTO_COMPACT,
+    AVAILABILITY_COLD_DIR,
+    AVAILABILITY_CUBE,
     AVAILABILITY_DB_DIR,
+    AVAILABILITY_JSON_SPLIT_AREA,
+    AVAILABILITY_SCHEMA_VERSION,
+    AVAILABILITY_STORAGE_MODE,
     DB_PATH,
+    DB_PERSISTENT,
+    HTTP_VALIDATORS_PATH,
     RESPONSES_PATH,
+    SYNC_RUNS_DB_PATH,
     ensure_directories,
     get_config_summary,
 )
@@ -18,6 +33,49 @@ from parking_newtaipei.utils.logger import get_logger
 from parking_newtaipei.utils.process_lock import ProcessLock, ProcessLockAcquireError
 
 
+def add_replay_arguments(parser: argparse.ArgumentParser) -> None:
+    """加入由 API 交換記錄重播的參數（sync-parking / sync-availability）"""
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=Path(API_REPLAY_DIR) if API_REPLAY_DIR else None,
+        metavar="DIR",
+        help="由交換記錄目錄重播，不連線網路（預設為 API_REPLAY_DIR）",
+    )
+    parser.add_argument(
+        "--replay-from",
+        type=datetime.fromisoformat,
+        metavar="DATETIME",
+        help="依序重播的起始時間（含），預設為最早",
+    )
+    parser.add_argument(
+        "--replay-to",
+        type=datetime.fromisoformat,
+        metavar="DATETIME",
+        help="依序重播的結束時間（含），預設為最晚",
+    )
+    parser.add_argument(
+        "--replay-at",
+        type=datetime.fromisoformat,
+        metavar="DATETIME",
+        help="只重播此時間（含）之前最後一筆交換記錄",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="每次請求加入的延遲秒數（預設 0）",
+    )
+    parser.add_argument(
+        "--replay-error-rate",
+        type=float,
+        default=0.0,
+        metavar="RATE",
+        help="注入連線錯誤的機率（0-1，預設 0）",
+    )
+
+
 def create_parser() -> argparse.ArgumentParser:
     """建立命令列參數解析器"""
     parser = argparse.ArgumentParser(
@@ -55,6 +113,7 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="強制同步，忽略內容雜湊檢查",
     )
+    add_replay_arguments(sync_parser)
 
     # sync-availability 指令
     avail_parser = subparsers.add_parser(
@@ -66,6 +125,249 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="測試模式，顯示設定但不實際執行",
     )
+    add_replay_arguments(avail_parser)
+
+    # migrate-availability 指令
+    migrate_parser = subparsers.add_parser(
+        "migrate-availability",
+        help="將既有月份資料庫轉換為指定的結構版本與儲存模式",
+    )
+    migrate_parser.add_argument(
+        "--schema",
+        type=int,
+        choices=[1, 2],
+        default=AVAILABILITY_SCHEMA_VERSION,
+        help="目標結構版本（預設為 AVAILABILITY_SCHEMA_VERSION）",
+    )
+    migrate_parser.add_argument(
+        "--mode",
+        choices=["full", "delta"],
+        default=AVAILABILITY_STORAGE_MODE,
+        help="目標儲存模式（預設為 AVAILABILITY_STORAGE_MODE；delta 無法轉回 full）",
+    )
+    migrate_parser.add_argument(
+        "--month",
+        action="append",
+        metavar="YYYYMM",
+        help="指定月份（可重複），預設為所有與目標不同的月份",
+    )
+    migrate_parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="不保留原檔（預設保留為 .bak）",
+    )
+
+    # rebuild-rollups 指令
+    rollup_parser = subparsers.add_parser(
+        "rebuild-rollups",
+        help="由原始資料重建即時車位的每小時 / 每日彙總表",
+    )
+    rollup_parser.add_argument(
+        "--month",
+        action="append",
+        metavar="YYYYMM",
+        help="指定月份（可重複），預設為所有月份",
+    )
+
+    # compact-month 指令
+    compact_parser = subparsers.add_parser(
+        "compact-month",
+        help="壓實已結束月份的即時車位資料庫（排序重寫、ANALYZE、VACUUM INTO、唯讀）",
+    )
+    compact_parser.add_argument(
+        "--month",
+        action="append",
+        metavar="YYYYMM",
+        help="指定月份（可重複，可重新壓實），預設為所有尚未壓實的已結束月份",
+    )
+    compact_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="同時壓實的子程序數（預設為 CPU 數）",
+    )
+    compact_parser.add_argument(
+        "--cold-dir",
+        type=Path,
+        default=get_cold_dir(),
+        metavar="DIR",
+        help="輸出 gzip 冷備份的目錄（預設為 AVAILABILITY_COLD_DIR，未設定則不輸出）",
+    )
+    compact_parser.add_argument(
+        "--cube",
+        action="store_true",
+        default=AVAILABILITY_CUBE,
+        help="壓實後一併建立車位立方體（需要 numpy，預設為 AVAILABILITY_CUBE）",
+    )
+
+    # build-cube 指令
+    cube_parser = subparsers.add_parser(
+        "build-cube",
+        help="建立或更新即時車位的月份立方體（停車場 × 5 分鐘，numpy memory-map）",
+    )
+    cube_parser.add_argument(
+        "--month",
+        action="append",
+        metavar="YYYYMM",
+        help="指定月份（可重複），預設為所有月份",
+    )
+    cube_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="同時建立的子程序數（預設為 CPU 數）",
+    )
+
+    # backfill-availability 指令
+    backfill_parser = subparsers.add_parser(
+        "backfill-availability",
+        help="由 API 交換記錄回填即時車位資料（可重複執行、可續傳）",
+    )
+    backfill_parser.add_argument(
+        "--from",
+        dest="from_date",
+        required=True,
+        metavar="YYYY-MM-DD",
+        help="起始日期（含）",
+    )
+    backfill_parser.add_argument(
+        "--to",
+        dest="to_date",
+        required=True,
+        metavar="YYYY-MM-DD",
+        help="結束日期（含）",
+    )
+    backfill_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="解析用的子程序數（預設為 CPU 數）",
+    )
+    backfill_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="忽略上次中斷留下的檢查點，從頭開始",
+    )
+
+    # daemon 指令
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="常駐執行，於程序內排程 sync-availability 與 sync-parking（取代 cron）",
+    )
+    daemon_parser.add_argument(
+        "--availability-interval",
+        type=int,
+        default=5,
+        metavar="MINUTES",
+        help="即時車位同步間隔（分鐘，需能整除 1440，預設 5）",
+    )
+    daemon_parser.add_argument(
+        "--parking-time",
+        default="02:00",
+        metavar="HH:MM",
+        help="每日停車場資料同步時間（預設 02:00）",
+    )
+    daemon_parser.add_argument(
+        "--jitter",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="每次執行的最大隨機延遲秒數（預設 10）",
+    )
+    daemon_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="依上游更新週期安排即時車位同步（學習中以 --availability-interval 同步）",
+    )
+    daemon_parser.add_argument(
+        "--max-interval",
+        type=int,
+        default=60,
+        metavar="MINUTES",
+        help=(
+            "--adaptive 時內容持續未變更的同步間隔上限"
+            "（分鐘，預設 60；另不超過下一個預期更新時間與半個週期）"
+        ),
+    )
+
+    # pack-responses 指令
+    pack_parser = subparsers.add_parser(
+        "pack-responses",
+        help="將 raw 格式的 API 交換記錄依日打包為單一檔案",
+    )
+    pack_parser.add_argument(
+        "--before",
+        metavar="YYYY-MM-DD",
+        help="只打包此日期（不含）之前的資料，預設為今天",
+    )
+
+    # reindex-responses 指令
+    subparsers.add_parser(
+        "reindex-responses",
+        help="掃描磁碟重建 API 交換記錄的目錄索引",
+    )
+
+    # nearby 指令
+    nearby_parser = subparsers.add_parser(
+        "nearby",
+        help="依 TWD97 座標查詢附近的停車場",
+    )
+    nearby_parser.add_argument("--x", type=float, required=True, help="TWD97 X 座標（公尺）")
+    nearby_parser.add_argument("--y", type=float, required=True, help="TWD97 Y 座標（公尺）")
+    nearby_parser.add_argument(
+        "--radius",
+        type=float,
+        metavar="METERS",
+        help="查詢半徑內的所有停車場（未指定時查詢最近的 --k 個）",
+    )
+    nearby_parser.add_argument(
+        "-k",
+        "--k",
+        type=int,
+        default=5,
+        help="最近停車場數（預設 5）",
+    )
+
+    # serve 指令
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="啟動讀取 API 伺服器（最新即時車位與停車場資料）",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="監聽位址（預設 127.0.0.1）",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="監聽連接埠（預設 8080）",
+    )
+    serve_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="檢查資料更新的間隔秒數（預設 2）",
+    )
+
+    # runs 指令
+    runs_parser = subparsers.add_parser(
+        "runs",
+        help="顯示同步執行記錄的各階段耗時統計（p50 / p95）",
+    )
+    runs_parser.add_argument(
+        "--job",
+        choices=["sync-parking", "sync-availability"],
+        help="只顯示指定作業（預設全部）",
+    )
+    runs_parser.add_argument(
+        "--hours",
+        type=float,
+        default=24.0,
+        help="統計最近幾小時的執行記錄（預設 24）",
+    )
 
     # stats 指令
     subparsers.add_parser(
@@ -74,14 +376,120 @@ def create_parser() -> argparse.ArgumentParser:
     )
 
     # availability-stats 指令
-    subparsers.add_parser(
+    avail_stats_parser = subparsers.add_parser(
         "availability-stats",
         help="顯示即時車位資料庫統計資訊",
     )
+    avail_stats_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="平行掃描所有月份資料庫重新計算統計，並修正與摘要不符者",
+    )
+    avail_stats_parser.add_argument(
+        "--workers",
+        type=int,
+        help="--verify 同時掃描的檔案數（預設依 CPU 數）",
+    )
 
     return parser
 
 
+def create_sync_ledger(args: argparse.Namespace):
+    """建立同步執行記錄（重播時不記錄，避免混入線上同步的統計）
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        SyncRunRepository，重播時為 None
+    """
+    from parking_newtaipei.db.connection import DatabaseConnection
+    from parking_newtaipei.db.sync_runs import SyncRunRepository
+
+    if getattr(args, "replay", None) is not None:
+        return None
+    return SyncRunRepository(DatabaseConnection(SYNC_RUNS_DB_PATH))
+
+
+def create_sync_api_client(args: argparse.Namespace):
+    """建立同步指令使用的 API 客戶端
+
+    重播模式下由交換記錄回應請求，不備份交換記錄也不使用 HTTP 驗證值
+    （避免覆寫線上同步的狀態）。
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        (APIClient, ReplayTransport 或 None)
+    """
+    from parking_newtaipei.api.client import APIClient
+    from parking_newtaipei.api.replay import ReplayTransport
+    from parking_newtaipei.api.validators import ValidatorStore
+
+    if args.replay is None:
+        api_client = APIClient(
+            base_url="",  # 使用完整 URL，不需要 base_url
+            responses_dir=RESPONSES_PATH,
+            auto_save=True,
+            validator_store=ValidatorStore(HTTP_VALIDATORS_PATH),
+            archive_compresslevel=ARCHIVE_COMPRESS_LEVEL,
+            archive_format=ARCHIVE_FORMAT,
+        )
+        return api_client, None
+
+    transport = ReplayTransport(
+        args.replay,
+        start=args.replay_from,
+        end=args.replay_to,
+        at=args.replay_at,
+        latency=args.replay_latency,
+        error_rate=args.replay_error_rate,
+    )
+    api_client = APIClient(
+        base_url="",
+        responses_dir=args.replay,
+        auto_save=False,
+        transport=transport,
+    )
+    return api_client, transport
+
+
+def run_replay(transport, endpoint: str, run_sync) -> int:
+    """依序重播 endpoint 的交換記錄，每筆執行一次同步
+
+    Args:
+        transport: ReplayTransport
+        endpoint: 同步使用的 API URL
+        run_sync: 執行一次同步的函式，參數為交換記錄時間，回傳同步結果
+
+    Returns:
+        結束代碼（0 = 全部成功，1 = 有同步失敗）
+    """
+    logger = get_logger()
+    total = transport.pending(endpoint)
+    if not total:
+        logger.warning(f"沒有可重播的交換記錄: {transport.responses_dir}")
+        return 0
+
+    logger.info(f"開始重播 {total} 筆交換記錄: {transport.responses_dir}")
+    runs = failures = 0
+    start = time.perf_counter()
+    while transport.pending(endpoint):
+        result = run_sync(transport.next_timestamp(endpoint))
+        runs += 1
+        failures += bool(result.errors)
+        if transport.at is not None:
+            break
+    elapsed = time.perf_counter() - start
+
+    logger.info("=== 重播結果 ===")
+    logger.info(f"  同步次數: {runs}")
+    logger.info(f"  失敗: {failures}")
+    logger.info(f"  耗時: {elapsed:.2f} 秒（{runs / elapsed if elapsed else 0:.1f} 次/秒）")
+    return 1 if failures else 0
+
+
 def cmd_sync_parking(args: argparse.Namespace) -> int:
     """執行停車場資料同步
 
@@ -91,7 +499,6 @@ def cmd_sync_parking(args: argparse.Namespace) -> int:
     Returns:
         結束代碼（0 = 成功，1 = 錯誤，2 = 跳過）
     """
-    from parking_newtaipei.api.client import APIClient
     from parking_newtaipei.db.connection import DatabaseConnection
     from parking_newtaipei.etl.parking_sync import PARKING_LOT_API_URL, ParkingLotSync
 
@@ -112,28 +519,37 @@ def cmd_sync_parking(args: argparse.Namespace) -> int:
             logger.info("開始同步停車場資料...")
 
             # 初始化元件
-            db = DatabaseConnection(DB_PATH)
-            api_client = APIClient(
-                base_url="",  # 使用完整 URL，不需要 base_url
-                responses_dir=RESPONSES_PATH,
-                auto_save=True,
-            )
+            db = DatabaseConnection(DB_PATH, persistent=DB_PERSISTENT)
+            api_client, transport = create_sync_api_client(args)
 
             try:
+                sync = ParkingLotSync(
+                    db=db, api_client=api_client, ledger=create_sync_ledger(args)
+                )
+                if transport is not None:
+                    return run_replay(
+                        transport,
+                        PARKING_LOT_API_URL,
+                        lambda recorded_at: sync.sync(force=args.force),
+                    )
+
                 # 執行同步
-                sync = ParkingLotSync(db=db, api_client=api_client)
                 result = sync.sync(force=args.force)
 
                 # 檢查是否跳過
                 if result.skipped:
                     logger.info("=== 同步跳過 ===")
-                    logger.info("  原因: 內容未變更")
+                    if result.not_modified:
+                        logger.info("  原因: 內容未變更（HTTP 304）")
+                    else:
+                        logger.info("  原因: 內容未變更")
                     return 0
 
                 # 顯示結果
                 logger.info("=== 同步結果 ===")
                 logger.info(f"  新增: {result.inserted}")
                 logger.info(f"  更新: {result.updated}")
+                logger.info(f"  未變更: {result.unchanged}")
                 logger.info(f"  刪除: {result.deleted}")
                 logger.info(f"  總處理: {result.total_processed}")
 
@@ -145,6 +561,7 @@ def cmd_sync_parking(args: argparse.Namespace) -> int:
 
             finally:
                 api_client.close()
+                db.close()
 
     except ProcessLockAcquireError:
         logger.warning("跳過執行：已有進程正在執行 sync-parking")
@@ -160,7 +577,6 @@ def cmd_sync_availability(args: argparse.Namespace) -> int:
     Returns:
         結束代碼（0 = 成功，1 = 錯誤，2 = 跳過）
     """
-    from parking_newtaipei.api.client import APIClient
     from parking_newtaipei.db.availability import get_monthly_db_path
     from parking_newtaipei.etl.availability_sync import AVAILABILITY_API_URL, AvailabilitySync
 
@@ -182,22 +598,48 @@ def cmd_sync_availability(args: argparse.Namespace) -> int:
             logger.info("開始同步即時車位資料...")
 
             # 初始化元件
-            api_client = APIClient(
-                base_url="",
-                responses_dir=RESPONSES_PATH,
-                auto_save=True,
+            api_client, transport = create_sync_api_client(args)
+
+            sync = AvailabilitySync(
+                db_dir=AVAILABILITY_DB_DIR,
+                api_client=api_client,
+                persistent=DB_PERSISTENT,
+                storage_mode=AVAILABILITY_STORAGE_MODE,
+                schema_version=AVAILABILITY_SCHEMA_VERSION,
+                parking_db_path=DB_PATH,
+                split_by_area=AVAILABILITY_JSON_SPLIT_AREA,
+                ledger=create_sync_ledger(args),
+                auto_compact=AVAILABILITY_AUTO_COMPACT,
+                cold_dir=get_cold_dir(),
+                build_cube=AVAILABILITY_CUBE,
             )
 
             try:
+                if transport is not None:
+                    return run_replay(transport, AVAILABILITY_API_URL, sync.sync)
+
                 # 執行同步
-                sync = AvailabilitySync(db_dir=AVAILABILITY_DB_DIR, api_client=api_client)
                 result = sync.sync()
 
+                if result.not_modified:
+                    logger.info("=== 同步跳過 ===")
+                    logger.info("  原因: 內容未變更（HTTP 304）")
+                    return 0
+
                 # 顯示結果
                 logger.info("=== 同步結果 ===")
+                if result.duplicate:
+                    logger.info("  內容與上次相同，只記錄快照")
                 logger.info(f"  寫入: {result.inserted}")
+                if result.unchanged:
+                    logger.info(f"  未變動: {result.unchanged}")
                 logger.info(f"  跳過無效: {result.skipped_invalid}")
                 logger.info(f"  總下載: {result.total_downloaded}")
+                if result.snapshots:
+                    logger.info(
+                        f"  本月重複比例: {result.dedup_ratio:.1%}"
+                        f"（{result.duplicate_snapshots}/{result.snapshots} 次同步）"
+                    )
 
                 if result.errors:
                     logger.warning(f"  錯誤數: {len(result.errors)}")
@@ -207,14 +649,50 @@ def cmd_sync_availability(args: argparse.Namespace) -> int:
 
             finally:
                 api_client.close()
+                sync.repo.close()
 
     except ProcessLockAcquireError:
         logger.warning("跳過執行：已有進程正在執行 sync-availability")
         return 2
 
 
-def cmd_availability_stats(args: argparse.Namespace) -> int:
-    """顯示即時車位資料庫統計資訊
+def cmd_pack_responses(args: argparse.Namespace) -> int:
+    """將 raw 格式的 API 交換記錄依日打包
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤）
+    """
+    from datetime import date
+
+    from parking_newtaipei.utils.storage import pack_responses
+
+    logger = get_logger()
+
+    before = None
+    if args.before:
+        try:
+            before = date.fromisoformat(args.before)
+        except ValueError:
+            logger.error(f"日期格式錯誤（需為 YYYY-MM-DD）: {args.before}")
+            return 1
+
+    packed = pack_responses(RESPONSES_PATH, before)
+    if not packed:
+        logger.info("沒有需要打包的交換記錄")
+        return 0
+
+    logger.info("=== 打包交換記錄 ===")
+    for day, count in packed.items():
+        logger.info(f"  [{day.isoformat()}] {count} 筆")
+
+    return 0
+
+
+def cmd_reindex_responses(args: argparse.Namespace) -> int:
+    """掃描磁碟重建 API 交換記錄的目錄索引
 
     Args:
         args: 命令列參數
@@ -222,7 +700,446 @@ def cmd_availability_stats(args: argparse.Namespace) -> int:
     Returns:
         結束代碼（0 = 成功）
     """
+    from parking_newtaipei.utils.storage import reindex_responses
+
+    logger = get_logger()
+
+    count = reindex_responses(RESPONSES_PATH)
+    logger.info(f"已重建交換記錄目錄索引: {count} 筆")
+
+    return 0
+
+
+def cmd_rebuild_rollups(args: argparse.Namespace) -> int:
+    """由原始資料重建即時車位的每小時 / 每日彙總表
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，2 = 跳過）
+    """
     from parking_newtaipei.db.availability import AvailabilityRepository
+    from parking_newtaipei.etl.availability_sync import load_lot_info
+
+    logger = get_logger()
+
+    repo = AvailabilityRepository(AVAILABILITY_DB_DIR)
+    db_files = repo.list_db_files()
+    if args.month:
+        db_files = [f for f in db_files if f.stem[-6:] in set(args.month)]
+
+    if not db_files:
+        logger.info("沒有需要重建彙總的月份資料庫")
+        return 0
+
+    # 與 sync-availability 共用鎖，避免重建期間寫入
+    lock = ProcessLock("sync-availability")
+    try:
+        with lock.acquire():
+            lots = load_lot_info(DB_PATH)
+            if not lots:
+                logger.warning("停車場基本資料不存在，彙總將不含行政區與佔用率")
+
+            logger.info("=== 重建彙總表 ===")
+            for db_file in db_files:
+                snapshots = repo.rebuild_rollups(db_file, lots)
+                logger.info(f"  [{db_file.name}] {snapshots} 次同步")
+            return 0
+
+    except ProcessLockAcquireError:
+        logger.warning("跳過執行：已有進程正在執行 sync-availability")
+        return 2
+
+
+def get_cold_dir() -> Path | None:
+    """取得壓實時輸出冷備份的目錄（AVAILABILITY_COLD_DIR），未設定時為 None"""
+    return Path(AVAILABILITY_COLD_DIR) if AVAILABILITY_COLD_DIR else None
+
+
+def cmd_compact_month(args: argparse.Namespace) -> int:
+    """壓實已結束月份的即時車位資料庫
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤，2 = 跳過）
+    """
+    from parking_newtaipei.db.availability import AvailabilityRepository, is_closed_month
+
+    logger = get_logger()
+
+    repo = AvailabilityRepository(AVAILABILITY_DB_DIR)
+    if args.month:
+        db_files = [f for f in repo.list_db_files() if f.stem[-6:] in set(args.month)]
+        open_months = [f.name for f in db_files if not is_closed_month(f)]
+        if open_months:
+            logger.error(f"月份尚未結束，無法壓實: {', '.join(open_months)}")
+            return 1
+    else:
+        db_files = repo.pending_compaction()
+
+    if not db_files:
+        logger.info("沒有需要壓實的月份資料庫")
+        return 0
+
+    # 與 sync-availability 共用鎖，避免壓實期間寫入
+    lock = ProcessLock("sync-availability")
+    try:
+        with lock.acquire():
+            logger.info("=== 壓實月份資料庫 ===")
+            try:
+                reports = repo.compact_months(
+                    db_files, workers=args.workers, cold_dir=args.cold_dir, cube=args.cube
+                )
+            except Exception as e:
+                logger.error(f"壓實失敗: {e}")
+                return 1
+
+            total_before = 0
+            total_after = 0
+            for report in reports:
+                total_before += report["size_before"]
+                total_after += report["size_after"]
+                logger.info(
+                    f"  [{report['db_file']}] {report['format']}，{report['rows']:,} 筆"
+                )
+                logger.info(
+                    f"    檔案大小: {report['size_before']:,} -> {report['size_after']:,} bytes"
+                )
+                if report["cold_copy"]:
+                    logger.info(
+                        f"    冷備份: {report['cold_copy']}（{report['cold_size']:,} bytes）"
+                    )
+
+            if total_before:
+                logger.info(
+                    f"  合計檔案大小: {total_before:,} -> {total_after:,} bytes "
+                    f"({total_after / total_before:.1%})"
+                )
+            return 0
+
+    except ProcessLockAcquireError:
+        logger.warning("跳過執行：已有進程正在執行 sync-availability")
+        return 2
+
+
+def cmd_build_cube(args: argparse.Namespace) -> int:
+    """建立或增量更新即時車位的月份立方體
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤）
+    """
+    from parking_newtaipei.db.availability import AvailabilityRepository
+
+    logger = get_logger()
+
+    repo = AvailabilityRepository(AVAILABILITY_DB_DIR)
+    db_files = repo.list_db_files()
+    if args.month:
+        db_files = [f for f in db_files if f.stem[-6:] in set(args.month)]
+
+    if not db_files:
+        logger.info("沒有需要建立立方體的月份資料庫")
+        return 0
+
+    # 以唯讀連線讀取資料庫，不需與 sync-availability 互斥
+    logger.info("=== 建立車位立方體 ===")
+    try:
+        reports = repo.build_cubes(db_files, workers=args.workers)
+    except ImportError as e:
+        logger.error(str(e))
+        return 1
+    except Exception as e:
+        logger.error(f"建立立方體失敗: {e}")
+        return 1
+
+    for report in reports:
+        action = "全部重建" if report["rebuilt"] else "增量更新"
+        logger.info(
+            f"  [{report['db_file']}] {action}，{report['lots']} 個停車場 × "
+            f"{report['slots']} 個時段，納入 {report['snapshots']} 次同步"
+        )
+    return 0
+
+
+def cmd_backfill_availability(args: argparse.Namespace) -> int:
+    """由 API 交換記錄回填即時車位資料
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤，2 = 跳過）
+    """
+    from datetime import datetime, time
+
+    from parking_newtaipei.etl.availability_backfill import AvailabilityBackfill
+
+    logger = get_logger()
+
+    try:
+        start = datetime.combine(datetime.strptime(args.from_date, "%Y-%m-%d"), time.min)
+        end = datetime.combine(datetime.strptime(args.to_date, "%Y-%m-%d"), time.max)
+    except ValueError:
+        logger.error(f"日期格式錯誤（需為 YYYY-MM-DD）: {args.from_date} / {args.to_date}")
+        return 1
+
+    # 與 sync-availability 共用鎖，避免回填期間同時寫入
+    lock = ProcessLock("sync-availability")
+    try:
+        with lock.acquire():
+            backfill = AvailabilityBackfill(
+                db_dir=AVAILABILITY_DB_DIR,
+                responses_dir=RESPONSES_PATH,
+                workers=args.workers,
+                storage_mode=AVAILABILITY_STORAGE_MODE,
+                schema_version=AVAILABILITY_SCHEMA_VERSION,
+                parking_db_path=DB_PATH,
+            )
+            result = backfill.backfill(start, end, resume=not args.restart)
+
+            logger.info("=== 回填結果 ===")
+            logger.info(f"  交換記錄數: {result.archives}")
+            if result.resumed:
+                logger.info(f"  依檢查點略過: {result.resumed}")
+            logger.info(f"  回填: {result.backfilled} 次同步，{result.inserted} 筆")
+            if result.duplicates:
+                logger.info(f"  內容重複（只記錄快照）: {result.duplicates}")
+            logger.info(f"  已有資料: {result.already_recorded}")
+            logger.info(f"  無效: {result.skipped_invalid}")
+
+            if result.errors:
+                logger.warning(f"  錯誤數: {len(result.errors)}")
+                return 1
+
+            return 0
+
+    except ProcessLockAcquireError:
+        logger.warning("跳過執行：已有進程正在執行 sync-availability")
+        return 2
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    """常駐執行同步排程
+
+    共用同一個 APIClient（HTTP 連線池）與常駐資料庫連線，
+    收到 SIGTERM / SIGINT 時等目前作業完成後結束。
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤）
+    """
+    import signal
+    from datetime import timedelta
+
+    from parking_newtaipei.api.client import APIClient
+    from parking_newtaipei.api.validators import ValidatorStore
+    from parking_newtaipei.cadence import AdaptivePoller
+    from parking_newtaipei.daemon import Job, Scheduler
+    from parking_newtaipei.db.connection import DatabaseConnection
+    from parking_newtaipei.etl.availability_sync import AvailabilitySync
+    from parking_newtaipei.etl.parking_sync import ParkingLotSync
+    from parking_newtaipei.utils.storage import pack_responses
+
+    logger = get_logger()
+
+    if args.availability_interval <= 0 or 1440 % args.availability_interval:
+        logger.error(f"即時車位同步間隔需能整除 1440 分鐘: {args.availability_interval}")
+        return 1
+    if args.adaptive and args.max_interval < args.availability_interval:
+        logger.error(f"同步間隔上限不可小於即時車位同步間隔: {args.max_interval}")
+        return 1
+    try:
+        hour, minute = (int(part) for part in args.parking_time.split(":"))
+        parking_offset = timedelta(hours=hour, minutes=minute)
+    except ValueError:
+        logger.error(f"每日同步時間格式錯誤（需為 HH:MM）: {args.parking_time}")
+        return 1
+    if not timedelta(0) <= parking_offset < timedelta(days=1):
+        logger.error(f"每日同步時間超出範圍: {args.parking_time}")
+        return 1
+
+    api_client = APIClient(
+        base_url="",
+        responses_dir=RESPONSES_PATH,
+        auto_save=True,
+        validator_store=ValidatorStore(HTTP_VALIDATORS_PATH),
+        archive_compresslevel=ARCHIVE_COMPRESS_LEVEL,
+        archive_format=ARCHIVE_FORMAT,
+    )
+    db = DatabaseConnection(DB_PATH, persistent=True)
+    ledger = create_sync_ledger(args)
+    parking = ParkingLotSync(db=db, api_client=api_client, ledger=ledger)
+    availability = AvailabilitySync(
+        db_dir=AVAILABILITY_DB_DIR,
+        api_client=api_client,
+        persistent=True,
+        storage_mode=AVAILABILITY_STORAGE_MODE,
+        schema_version=AVAILABILITY_SCHEMA_VERSION,
+        parking_db_path=DB_PATH,
+        split_by_area=AVAILABILITY_JSON_SPLIT_AREA,
+        ledger=ledger,
+        auto_compact=AVAILABILITY_AUTO_COMPACT,
+        cold_dir=get_cold_dir(),
+        build_cube=AVAILABILITY_CUBE,
+    )
+
+    availability_interval = timedelta(minutes=args.availability_interval)
+    poller = (
+        AdaptivePoller(
+            interval=availability_interval,
+            max_interval=timedelta(minutes=args.max_interval),
+        )
+        if args.adaptive
+        else None
+    )
+
+    scheduler = Scheduler()
+    scheduler.add_job(Job(
+        name="sync-availability",
+        run=availability.sync,
+        interval=availability_interval,
+        jitter=args.jitter,
+        lock_name="sync-availability",
+        poller=poller,
+    ))
+    scheduler.add_job(Job(
+        name="sync-parking",
+        run=parking.sync,
+        interval=timedelta(days=1),
+        offset=parking_offset,
+        jitter=args.jitter,
+        lock_name="sync-parking",
+    ))
+    scheduler.add_job(Job(
+        name="pack-responses",
+        run=lambda: pack_responses(RESPONSES_PATH),
+        interval=timedelta(days=1),
+        offset=timedelta(minutes=15),
+    ))
+
+    def handle_signal(signum: int, frame) -> None:
+        logger.info(f"收到 {signal.Signals(signum).name}，完成目前作業後結束")
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info("=== 常駐排程啟動 ===")
+    try:
+        scheduler.run()
+    finally:
+        api_client.close()
+        availability.repo.close()
+        db.close()
+
+    logger.info("=== 常駐排程統計 ===")
+    for name, stats in scheduler.summary().items():
+        line = f"  [{name}] 執行: {stats['runs']}, 失敗: {stats['failures']}"
+        if stats["p50_latency"] is not None:
+            line += f", 延遲 p50: {stats['p50_latency']:.2f}s, 最大: {stats['max_latency']:.2f}s"
+        logger.info(line)
+
+    return 0
+
+
+def cmd_migrate_availability(args: argparse.Namespace) -> int:
+    """將月份資料庫轉換為指定的結構版本與儲存模式
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤，2 = 跳過）
+    """
+    from parking_newtaipei.db.availability import (
+        STORAGE_MODE_DELTA,
+        AvailabilityRepository,
+        rewrite_monthly_db,
+    )
+
+    logger = get_logger()
+
+    repo = AvailabilityRepository(AVAILABILITY_DB_DIR)
+    db_files = repo.list_db_files()
+    if args.month:
+        db_files = [f for f in db_files if f.stem[-6:] in set(args.month)]
+
+    # 跳過已符合目標者；delta 檔案維持 delta
+    targets = []
+    for db_file in db_files:
+        mode = repo.get_storage_mode(db_file)
+        target_mode = STORAGE_MODE_DELTA if mode == STORAGE_MODE_DELTA else args.mode
+        if (repo.get_schema_version(db_file), mode) != (args.schema, target_mode):
+            targets.append((db_file, target_mode))
+
+    if not targets:
+        logger.info("沒有需要轉換的月份資料庫")
+        return 0
+
+    # 與 sync-availability 共用鎖，避免轉換期間寫入
+    lock = ProcessLock("sync-availability")
+    try:
+        with lock.acquire():
+            total_before = 0
+            total_after = 0
+            logger.info("=== 轉換月份資料庫 ===")
+            for db_file, target_mode in targets:
+                try:
+                    report = rewrite_monthly_db(
+                        db_file,
+                        schema_version=args.schema,
+                        storage_mode=target_mode,
+                        keep_backup=not args.no_backup,
+                    )
+                except Exception as e:
+                    logger.error(f"轉換失敗 ({db_file.name}): {e}")
+                    return 1
+
+                total_before += report["size_before"]
+                total_after += report["size_after"]
+                rows_before = report["rows_before"]
+                ratio = report["rows_after"] / rows_before if rows_before else 0
+                logger.info(f"  [{report['db_file']}] {report['from']} -> {report['to']}")
+                logger.info(
+                    f"    筆數: {report['rows_before']:,} -> {report['rows_after']:,} "
+                    f"({ratio:.1%})"
+                )
+                logger.info(
+                    f"    檔案大小: {report['size_before']:,} -> {report['size_after']:,} bytes"
+                )
+
+            if total_before:
+                logger.info(
+                    f"  合計檔案大小: {total_before:,} -> {total_after:,} bytes "
+                    f"({total_after / total_before:.1%})"
+                )
+            return 0
+
+    except ProcessLockAcquireError:
+        logger.warning("跳過執行：已有進程正在執行 sync-availability")
+        return 2
+
+
+def cmd_availability_stats(args: argparse.Namespace) -> int:
+    """顯示即時車位資料庫統計資訊
+
+    讀取各月份檔案的摘要，不掃描資料表；--verify 時另外重新計算並比對。
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 驗證發現摘要不符）
+    """
+    from parking_newtaipei.db.availability import AvailabilityRepository, parse_monthly_db_path
 
     logger = get_logger()
 
@@ -238,18 +1155,167 @@ def cmd_availability_stats(args: argparse.Namespace) -> int:
 
     for db_file in db_files:
         # 從檔名解析年月
-        name = db_file.stem  # availability_YYYYMM
-        year = int(name[-6:-2])
-        month = int(name[-2:])
+        year, month = parse_monthly_db_path(db_file)
 
         stats = repo.get_stats(year, month)
-        logger.info(f"  [{stats['db_file']}]")
+        state = "（已壓實）" if stats["compacted"] else "（已結束）" if stats["frozen"] else ""
+        logger.info(f"  [{stats['db_file']}]{state}")
+        logger.info(f"    結構版本: v{stats['schema_version']}")
+        logger.info(f"    儲存模式: {stats['storage_mode']}")
         logger.info(f"    總筆數: {stats['total_records']:,}")
         logger.info(f"    停車場數: {stats['unique_parking_ids']}")
         if stats['first_record']:
             logger.info(f"    首筆時間: {stats['first_record']}")
         if stats['last_record']:
             logger.info(f"    末筆時間: {stats['last_record']}")
+        if stats['snapshots']:
+            logger.info(
+                f"    同步次數: {stats['snapshots']:,}"
+                f"（內容重複 {stats['duplicate_snapshots']:,}，{stats['dedup_ratio']:.1%}）"
+            )
+
+    if not args.verify:
+        return 0
+
+    logger.info("=== 驗證摘要 ===")
+    results = repo.verify_stats(workers=args.workers)
+    mismatched = [result for result in results if not result["matched"]]
+    for result in mismatched:
+        for field, value in result["summary"].items():
+            actual = result["actual"][field]
+            if value != actual:
+                logger.warning(f"  [{result['db_file']}] {field}: 摘要 {value} / 實際 {actual}")
+    logger.info(f"  已驗證 {len(results)} 個檔案，不符並已修正: {len(mismatched)}")
+    return 1 if mismatched else 0
+
+
+def cmd_runs(args: argparse.Namespace) -> int:
+    """顯示同步執行記錄的各階段耗時統計
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功）
+    """
+    from collections import Counter
+    from datetime import timedelta
+
+    from parking_newtaipei.db.connection import DatabaseConnection
+    from parking_newtaipei.db.sync_runs import SyncRunRepository, percentile, summarize_runs
+
+    logger = get_logger()
+
+    if not SYNC_RUNS_DB_PATH.exists():
+        logger.warning(f"同步執行記錄不存在: {SYNC_RUNS_DB_PATH}")
+        return 0
+
+    repo = SyncRunRepository(DatabaseConnection(SYNC_RUNS_DB_PATH))
+    since = datetime.now() - timedelta(hours=args.hours)
+    jobs = [args.job] if args.job else ["sync-availability", "sync-parking"]
+
+    for job in jobs:
+        runs = repo.query(job, since)
+        logger.info(f"=== {job}（最近 {args.hours:g} 小時，{len(runs)} 次）===")
+        if not runs:
+            continue
+
+        statuses = Counter(run["status"] for run in runs)
+        logger.info(f"  狀態: {', '.join(f'{s} {n}' for s, n in statuses.most_common())}")
+        logger.info(
+            f"  下載 p50: {percentile([r['bytes_downloaded'] for r in runs], 50):,.0f} bytes  "
+            f"寫入 p50: {percentile([r['rows_written'] for r in runs], 50):,.0f} 筆"
+        )
+        logger.info(f"  {'階段':<12}{'次數':>6}{'p50':>10}{'p95':>10}{'max':>10}")
+        for phase, stats in summarize_runs(runs).items():
+            logger.info(
+                f"  {phase:<12}{stats['count']:>6}{stats['p50']:>9.3f}s"
+                f"{stats['p95']:>9.3f}s{stats['max']:>9.3f}s"
+            )
+
+    return 0
+
+
+def cmd_nearby(args: argparse.Namespace) -> int:
+    """依 TWD97 座標查詢附近的停車場
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功）
+    """
+    from parking_newtaipei.db.connection import DatabaseConnection
+    from parking_newtaipei.db.models import ParkingLotRepository
+
+    logger = get_logger()
+
+    if not DB_PATH.exists():
+        logger.warning(f"資料庫不存在: {DB_PATH}")
+        logger.info("請先執行 sync-parking 指令建立資料庫")
+        return 0
+
+    repo = ParkingLotRepository(DatabaseConnection(DB_PATH))
+    index = repo.get_spatial_index()
+    if args.radius is not None:
+        neighbors = index.within(args.x, args.y, args.radius)
+        logger.info(f"=== 半徑 {args.radius:g} 公尺內的停車場（{len(neighbors)} 筆）===")
+    else:
+        neighbors = index.nearest(args.x, args.y, args.k)
+        logger.info(f"=== 最近的 {len(neighbors)} 個停車場 ===")
+
+    lots = repo.get_by_ids(parking_id for parking_id, _ in neighbors)
+    for parking_id, distance in neighbors:
+        lot = lots.get(parking_id, {})
+        logger.info(
+            f"  {distance:8.1f} m  [{parking_id}] {lot.get('name', '')}（{lot.get('address', '')}）"
+        )
+
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    """啟動讀取 API 伺服器
+
+    收到 SIGTERM / SIGINT 時停止接受請求並結束。
+
+    Args:
+        args: 命令列參數
+
+    Returns:
+        結束代碼（0 = 成功，1 = 錯誤）
+    """
+    import signal
+    import threading
+
+    from parking_newtaipei.server import ReadAPIServer, SnapshotCache
+
+    logger = get_logger()
+
+    cache = SnapshotCache(AVAILABILITY_DB_DIR / "availability.json", DB_PATH)
+    cache.reload(force=True)
+    try:
+        server = ReadAPIServer((args.host, args.port), cache)
+    except OSError as e:
+        logger.error(f"無法監聽 {args.host}:{args.port}: {e}")
+        return 1
+
+    def handle_signal(signum: int, frame) -> None:
+        logger.info(f"收到 {signal.Signals(signum).name}，停止伺服器")
+        # shutdown() 會等待 serve_forever() 結束，不能在同一個執行緒呼叫
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    cache.start(args.reload_interval)
+    host, port = server.server_address[:2]
+    logger.info(f"=== 讀取 API 伺服器啟動: http://{host}:{port} ===")
+    try:
+        server.serve_forever()
+    finally:
+        cache.stop()
+        server.server_close()
 
     return 0
 
@@ -311,6 +1377,28 @@ def main() -> int:
         return cmd_sync_parking(args)
     elif args.command == "sync-availability":
         return cmd_sync_availability(args)
+    elif args.command == "migrate-availability":
+        return cmd_migrate_availability(args)
+    elif args.command == "rebuild-rollups":
+        return cmd_rebuild_rollups(args)
+    elif args.command == "compact-month":
+        return cmd_compact_month(args)
+    elif args.command == "build-cube":
+        return cmd_build_cube(args)
+    elif args.command == "backfill-availability":
+        return cmd_backfill_availability(args)
+    elif args.command == "pack-responses":
+        return cmd_pack_responses(args)
+    elif args.command == "reindex-responses":
+        return cmd_reindex_responses(args)
+    elif args.command == "daemon":
+        return cmd_daemon(args)
+    elif args.command == "nearby":
+        return cmd_nearby(args)
+    elif args.command == "serve":
+        return cmd_serve(args)
+    elif args.command == "runs":
+        return cmd_runs(args)
     elif args.command == "stats":
         return cmd_stats(args)
     elif args.command == "availability-stats":
@@ -0,0 +1,327 @@
+"""讀取 API 伺服器模組
+
+以標準函式庫 http.server 提供最新一次同步的即時車位與停車場基本資料：
+
+- GET /availability：最新即時車位（合併停車場名稱、行政區與總車位）
+- GET /availability/{id}：單一停車場的即時車位
+- GET /lots?area=板橋區：停車場基本資料（可依行政區篩選）
+
+所有回應於載入快照時預先序列化並 gzip 壓縮，請求只需查表後寫出 bytes；
+回應附 ETag，帶 If-None-Match 的請求於內容未變更時回 304。
+背景執行緒定期檢查 availability.json 與停車場資料是否更新，有變更時建立新快照後整個替換。
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.utils.logger import get_logger
+
+# 預設檢查資料更新的間隔（秒）
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# 預先壓縮的 gzip 等級（只在載入快照時壓縮一次，取最小）
+GZIP_LEVEL = 9
+
+# /availability 合併的停車場欄位
+AVAILABILITY_LOT_FIELDS = ("name", "area", "total_car")
+
+# 快照來源版本：(availability.json 的 (mtime_ns, size), 停車場內容雜湊值)
+SourceVersion = tuple[tuple[int, int] | None, str | None]
+
+
+@dataclass(frozen=True)
+class Payload:
+    """預先序列化的回應內容"""
+
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+    @classmethod
+    def from_data(cls, data: Any) -> "Payload":
+        """序列化為 JSON 並預先壓縮
+
+        Args:
+            data: 可序列化為 JSON 的資料
+
+        Returns:
+            回應內容
+        """
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # 弱 ETag：identity 與 gzip 兩種編碼的內容相同，共用同一個值
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        return cls(body, gzip.compress(body, GZIP_LEVEL, mtime=0), etag)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match 標頭是否符合 ETag（RFC 9110 弱比較，忽略 W/ 前綴）
+
+    Args:
+        if_none_match: If-None-Match 標頭值（以逗號分隔的 ETag 列表或 *），None 表示未帶此標頭
+        etag: 目前內容的 ETag
+
+    Returns:
+        是否符合（* 符合任何內容）
+    """
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for entry in if_none_match.split(","):
+        entry = entry.strip()
+        if entry == "*" or entry.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+NOT_FOUND = Payload.from_data({"error": "not found"})
+NO_LOTS = Payload.from_data({"total_count": 0, "data": []})
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """某一時間點的完整回應內容（建立後不再修改，可被多個執行緒同時讀取）"""
+
+    version: SourceVersion
+    updated_at: str | None
+    availability: Payload
+    by_id: dict[str, Payload] = field(default_factory=dict)
+    lots_by_area: dict[str | None, Payload] = field(default_factory=dict)
+
+    def lookup(self, path: str, query: dict[str, list[str]]) -> Payload | None:
+        """依路徑取得回應內容
+
+        Args:
+            path: 請求路徑（已 URL 解碼）
+            query: 查詢參數
+
+        Returns:
+            回應內容，找不到時為 None
+        """
+        path = path.rstrip("/")
+        if path == "/availability":
+            return self.availability
+        if path.startswith("/availability/"):
+            return self.by_id.get(path[len("/availability/"):])
+        if path == "/lots":
+            area = query.get("area", [None])[0]
+            return self.lots_by_area.get(area, NO_LOTS)
+        return None
+
+
+def build_snapshot(
+    version: SourceVersion, availability: dict | None, lots: list[dict]
+) -> Snapshot:
+    """建立快照並預先序列化所有回應
+
+    Args:
+        version: 來源版本
+        availability: availability.json 內容，None 表示尚未同步
+        lots: 停車場基本資料列表
+
+    Returns:
+        快照
+    """
+    lots_by_id = {lot["id"]: lot for lot in lots}
+    updated_at = availability["updated_at"] if availability else None
+
+    records = []
+    for record in (availability or {}).get("data", []):
+        lot = lots_by_id.get(record["parking_id"], {})
+        records.append(
+            {**record, **{key: lot.get(key) for key in AVAILABILITY_LOT_FIELDS}}
+        )
+
+    by_id = {
+        record["parking_id"]: Payload.from_data({"updated_at": updated_at, **record})
+        for record in records
+    }
+
+    areas: dict[str | None, list[dict]] = {None: lots}
+    for lot in lots:
+        areas.setdefault(lot["area"], []).append(lot)
+
+    return Snapshot(
+        version=version,
+        updated_at=updated_at,
+        availability=Payload.from_data(
+            {"updated_at": updated_at, "total_count": len(records), "data": records}
+        ),
+        by_id=by_id,
+        lots_by_area={
+            area: Payload.from_data({"total_count": len(items), "data": items})
+            for area, items in areas.items()
+        },
+    )
+
+
+class SnapshotCache:
+    """最新快照的快取
+
+    請求只讀取 snapshot 屬性（單一參考），重新載入時建立完整的新快照後才替換參考，
+    因此請求不會看到載入到一半的資料，也不需要加鎖。
+    """
+
+    def __init__(self, availability_path: Path, parking_db_path: Path | None = None):
+        """初始化快取
+
+        Args:
+            availability_path: availability.json 路徑
+            parking_db_path: 停車場基本資料庫路徑，None 表示不合併停車場資料
+        """
+        self.availability_path = availability_path
+        self.parking_db_path = parking_db_path
+        self.snapshot = build_snapshot((None, None), None, [])
+        self.logger = get_logger()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _repo(self) -> ParkingLotRepository | None:
+        """取得停車場資料存取物件，資料庫不存在時為 None"""
+        if self.parking_db_path is None or not self.parking_db_path.exists():
+            return None
+        return ParkingLotRepository(DatabaseConnection(self.parking_db_path))
+
+    def _version(self) -> SourceVersion:
+        """取得目前的來源版本（只讀取檔案資訊與內容雜湊值）"""
+        try:
+            stat = self.availability_path.stat()
+            file_version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            file_version = None
+        repo = self._repo()
+        return file_version, repo.get_content_hash() if repo else None
+
+    def reload(self, force: bool = False) -> bool:
+        """來源有變更時重新載入快照
+
+        Args:
+            force: 是否不論來源是否變更都重新載入
+
+        Returns:
+            True 表示已替換為新快照
+        """
+        version = self._version()
+        if not force and version == self.snapshot.version:
+            return False
+
+        availability = None
+        if version[0] is not None:
+            try:
+                with open(self.availability_path, encoding="utf-8") as f:
+                    availability = json.load(f)
+            except (OSError, ValueError) as e:
+                # 檔案可能正在寫入，沿用目前的快照，下次檢查再載入
+                self.logger.warning(f"讀取即時車位資料失敗，沿用目前快照: {e}")
+                return False
+
+        repo = self._repo()
+        lots = repo.get_all_active() if repo else []
+
+        self.snapshot = build_snapshot(version, availability, lots)
+        self.logger.info(
+            f"已載入快照: 即時車位 {len(self.snapshot.by_id)} 筆, 停車場 {len(lots)} 筆"
+            f"（更新時間 {self.snapshot.updated_at}）"
+        )
+        return True
+
+    def _watch(self, interval: float) -> None:
+        """定期檢查來源是否更新"""
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                self.logger.error(f"重新載入快照失敗: {e}")
+
+    def start(self, interval: float = DEFAULT_RELOAD_INTERVAL) -> None:
+        """啟動背景檢查執行緒
+
+        Args:
+            interval: 檢查間隔（秒）
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, args=(interval,), name="snapshot-reload", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止背景檢查執行緒"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """讀取 API 請求處理（HTTP/1.1 keep-alive）"""
+
+    protocol_version = "HTTP/1.1"
+    # 標頭與 body 分兩次寫出，關閉 Nagle 避免小回應在 keep-alive 連線上等待 delayed ACK
+    disable_nagle_algorithm = True
+    server: "ReadAPIServer"
+
+    def _respond(self, send_body: bool) -> None:
+        """查表並寫出回應"""
+        url = urlsplit(self.path)
+        payload = self.server.cache.snapshot.lookup(unquote(url.path), parse_qs(url.query))
+        status = HTTPStatus.OK
+        if payload is None:
+            payload, status = NOT_FOUND, HTTPStatus.NOT_FOUND
+        elif etag_matches(self.headers.get("If-None-Match"), payload.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", payload.etag)
+            self.end_headers()
+            return
+
+        body = payload.body
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = payload.gzip_body
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        if status == HTTPStatus.OK:
+            self.send_header("ETag", payload.etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(send_body=False)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        get_logger().debug(f"{self.address_string()} - {format % args}")
+
+
+class ReadAPIServer(ThreadingHTTPServer):
+    """讀取 API 伺服器（每個連線一個執行緒）"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], cache: SnapshotCache):
+        """初始化伺服器
+
+        Args:
+            address: (主機, 連接埠)，連接埠 0 表示由系統指定
+            cache: 快照快取
+        """
+        self.cache = cache
+        super().__init__(address, RequestHandler)
@@ -0,0 +1,242 @@
+"""背景交換記錄寫入模組
+
+以單一背景執行緒依序處理交換記錄的解析、序列化與 gzip 壓縮，
+讓同步流程不必等待備份完成。佇列有上限，寫入跟不上時 submit 端會阻塞（backpressure）。
+"""
+
+import json
+import queue
+import threading
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.storage import (
+    ARCHIVE_FORMAT_JSON,
+    ARCHIVE_FORMAT_RAW,
+    ARCHIVE_FORMATS,
+    DEFAULT_COMPRESS_LEVEL,
+    JSON_SUFFIX,
+    RAW_SUFFIX,
+    RawResponseWriter,
+    ResponseStreamWriter,
+    response_path,
+    save_raw_response,
+    save_response,
+)
+
+# 佇列上限（串流寫入時每個項目為一個 chunk）
+DEFAULT_MAX_PENDING = 64
+
+# 佇列結束標記
+_STOP = object()
+
+
+class QueuedStreamWriter:
+    """經由 ArchiveWriter 背景寫入的串流交換記錄
+
+    介面與 ResponseStreamWriter 相同；實際的檔案操作在背景執行緒依序進行，
+    依 ArchiveWriter 的格式使用 ResponseStreamWriter 或 RawResponseWriter。
+    """
+
+    def __init__(
+        self,
+        archive: "ArchiveWriter",
+        data: dict[str, Any],
+        output_dir: Path,
+        endpoint: str,
+        timestamp: datetime,
+    ):
+        """開始一筆串流交換記錄
+
+        Args:
+            archive: 背景寫入器
+            data: 交換記錄（response.body 會被串流寫入的內容取代）
+            output_dir: 輸出目錄
+            endpoint: API endpoint（用於產生檔名）
+            timestamp: 時間戳記
+        """
+        raw = archive.archive_format == ARCHIVE_FORMAT_RAW
+        suffix = RAW_SUFFIX if raw else JSON_SUFFIX
+        self.filepath = response_path(output_dir, endpoint, timestamp, suffix)
+        self._archive = archive
+        self._writer: ResponseStreamWriter | RawResponseWriter | None = None
+
+        def open_writer() -> None:
+            writer_class = RawResponseWriter if raw else ResponseStreamWriter
+            self._writer = writer_class(
+                data, output_dir, endpoint, timestamp, compresslevel=archive.compresslevel
+            )
+
+        archive.submit(open_writer)
+
+    def _call(self, method: str, *args) -> None:
+        """於背景執行緒呼叫寫入器方法（開啟失敗時略過）"""
+
+        def task() -> None:
+            if self._writer is not None:
+                getattr(self._writer, method)(*args)
+
+        self._archive.submit(task)
+
+    def write(self, chunk: bytes) -> None:
+        """寫入一段 body
+
+        Args:
+            chunk: response body 的 bytes 區塊
+        """
+        self._call("write", chunk)
+
+    def close(self) -> Path:
+        """完成交換記錄
+
+        Returns:
+            交換記錄檔案路徑（背景寫入完成後才會存在）
+        """
+        self._call("close")
+        return self.filepath
+
+    def abort(self) -> None:
+        """放棄寫入並刪除不完整的檔案"""
+        self._call("abort")
+
+
+class ArchiveWriter:
+    """背景交換記錄寫入器
+
+    close() 會等待佇列中的工作全部完成；關閉後送出的工作直接在呼叫端執行。
+    """
+
+    def __init__(
+        self,
+        compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        archive_format: str = ARCHIVE_FORMAT_JSON,
+    ):
+        """初始化並啟動背景執行緒
+
+        Args:
+            compresslevel: gzip 壓縮等級（1-9）
+            max_pending: 佇列上限，超過時 submit 會阻塞
+            archive_format: 交換記錄格式（json 或 raw，見 storage 模組）
+        """
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"不支援的交換記錄格式: {archive_format}")
+
+        self.compresslevel = compresslevel
+        self.archive_format = archive_format
+        self.logger = get_logger()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._worker, name="archive-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _worker(self) -> None:
+        """依序執行佇列中的工作"""
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _STOP:
+                    return
+                self._run(task)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, task: Callable[[], object]) -> None:
+        """執行單一工作，失敗只記錄警告"""
+        try:
+            task()
+        except Exception as e:
+            self.logger.warning(f"交換記錄寫入失敗: {e}")
+
+    def submit(self, task: Callable[[], object]) -> None:
+        """送出背景工作（佇列已滿時阻塞）
+
+        Args:
+            task: 無參數的函式
+        """
+        if self._closed:
+            self._run(task)
+            return
+        self._queue.put(task)
+
+    def save(
+        self,
+        data: dict[str, Any],
+        body: bytes,
+        encoding: str | None,
+        output_dir: Path,
+        endpoint: str,
+        timestamp: datetime,
+    ) -> Path:
+        """背景儲存交換記錄
+
+        json 格式的 body 於背景解析為 JSON（失敗則為文字）；raw 格式原樣保存。
+
+        Args:
+            data: 交換記錄（response.body 會被取代）
+            body: 原始 response body
+            encoding: body 的文字編碼，None 表示 UTF-8
+            output_dir: 輸出目錄
+            endpoint: API endpoint（用於產生檔名）
+            timestamp: 時間戳記
+
+        Returns:
+            交換記錄檔案路徑（背景寫入完成後才會存在）
+        """
+        if self.archive_format == ARCHIVE_FORMAT_RAW:
+            self.submit(
+                lambda: save_raw_response(
+                    data, body, output_dir, endpoint, timestamp, self.compresslevel
+                )
+            )
+            return response_path(output_dir, endpoint, timestamp, RAW_SUFFIX)
+
+        def task() -> None:
+            text = body.decode(encoding or "utf-8", errors="replace")
+            try:
+                response_body = json.loads(text)
+            except ValueError:
+                response_body = text
+            exchange_data = {**data, "response": {**data["response"], "body": response_body}}
+            save_response(exchange_data, output_dir, endpoint, timestamp, self.compresslevel)
+
+        self.submit(task)
+        return response_path(output_dir, endpoint, timestamp)
+
+    def open_stream(
+        self,
+        data: dict[str, Any],
+        output_dir: Path,
+        endpoint: str,
+        timestamp: datetime,
+    ) -> QueuedStreamWriter:
+        """開始一筆背景寫入的串流交換記錄
+
+        Args:
+            data: 交換記錄（response.body 會被串流寫入的內容取代）
+            output_dir: 輸出目錄
+            endpoint: API endpoint（用於產生檔名）
+            timestamp: 時間戳記
+
+        Returns:
+            串流寫入器
+        """
+        return QueuedStreamWriter(self, data, output_dir, endpoint, timestamp)
+
+    def flush(self) -> None:
+        """等待目前佇列中的工作全部完成"""
+        if not self._closed:
+            self._queue.join()
+
+    def close(self) -> None:
+        """完成所有工作並結束背景執行緒"""
+        if self._closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._closed = True
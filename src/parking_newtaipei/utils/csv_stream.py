@@ -0,0 +1,52 @@
+"""串流 CSV 解析模組
+
+將 HTTP 下載的 bytes 區塊逐步解碼並解析為 CSV 資料列，
+記憶體用量只與區塊與批次大小有關，與檔案大小無關。
+"""
+
+import codecs
+import csv
+from collections.abc import Iterable, Iterator
+
+
+def iter_lines(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    """將 bytes 區塊逐步解碼為文字行
+
+    使用增量解碼器，多位元組字元或 BOM 被切在區塊邊界時也能正確解碼；
+    utf-8-sig 會移除開頭的 BOM。
+
+    Args:
+        chunks: bytes 區塊序列
+        encoding: 文字編碼
+
+    Yields:
+        文字行（保留結尾的換行字元）
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if "\n" not in pending:
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[dict[str, str]]:
+    """將 bytes 區塊逐步解析為 CSV 資料列
+
+    Args:
+        chunks: bytes 區塊序列
+        encoding: 文字編碼
+
+    Yields:
+        以第一列為欄位名稱的資料字典
+    """
+    # csv 模組會自行處理跨行的引號欄位
+    yield from csv.DictReader(iter_lines(chunks, encoding))
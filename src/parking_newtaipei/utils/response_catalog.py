@@ -0,0 +1,185 @@
+"""交換記錄目錄索引模組
+
+在 RESPONSES_PATH 下以 SQLite（catalog.db）記錄每筆交換記錄的時間、endpoint、
+URL、狀態碼與 body 大小 / 雜湊，列出與查詢時不需 glob 與 stat 整個目錄。
+"""
+
+import hashlib
+import sqlite3
+from collections.abc import Iterable
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from parking_newtaipei.utils.time import now_iso
+
+# 目錄索引檔名
+CATALOG_FILENAME = "catalog.db"
+
+CREATE_CATALOG_TABLES = """
+CREATE TABLE IF NOT EXISTS responses (
+    path TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    endpoint_hash TEXT NOT NULL,
+    url TEXT,
+    status_code INTEGER,
+    body_size INTEGER,
+    body_sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses(timestamp);
+CREATE INDEX IF NOT EXISTS idx_responses_endpoint ON responses(endpoint_hash, timestamp);
+CREATE TABLE IF NOT EXISTS catalog_metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+CATALOG_COLUMNS = (
+    "path", "timestamp", "endpoint_hash", "url", "status_code", "body_size", "body_sha256",
+)
+
+
+def endpoint_hash(endpoint: str) -> str:
+    """計算 endpoint 雜湊（與備份檔名中的雜湊相同）
+
+    Args:
+        endpoint: API endpoint 路徑
+
+    Returns:
+        8 碼 16 進位字串
+    """
+    return hashlib.md5(endpoint.encode()).hexdigest()[:8]
+
+
+def _sort_key(timestamp: datetime) -> str:
+    """將時間轉為可排序的本地時間字串（含時區者先轉為本地時間）"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp.isoformat()
+
+
+class ResponseCatalog:
+    """交換記錄目錄索引
+
+    路徑以相對於 responses 目錄的形式保存（例如 202602/xxx.body.gz），
+    時間統一保存為本地時間，以字串比較查詢範圍。
+    """
+
+    def __init__(self, responses_dir: Path):
+        """初始化目錄索引
+
+        Args:
+            responses_dir: responses 目錄路徑
+        """
+        self.responses_dir = responses_dir
+        self.db_path = responses_dir / CATALOG_FILENAME
+
+    def _connect(self) -> sqlite3.Connection:
+        """開啟連線並確保資料表存在"""
+        self.responses_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.executescript(CREATE_CATALOG_TABLES)
+        return conn
+
+    def _row(self, filepath: Path, entry: dict[str, Any]) -> tuple:
+        """將索引資料轉為資料列"""
+        return (
+            filepath.relative_to(self.responses_dir).as_posix(),
+            _sort_key(datetime.fromisoformat(entry["timestamp"])),
+            filepath.name.split("_")[2].split(".")[0],
+            entry.get("url"),
+            entry.get("status_code"),
+            entry.get("body_size"),
+            entry.get("body_sha256"),
+        )
+
+    def add(self, filepath: Path, entry: dict[str, Any]) -> None:
+        """新增（或取代）一筆記錄
+
+        Args:
+            filepath: 交換記錄檔案路徑（位於 responses 目錄下）
+            entry: {"timestamp", "url", "status_code", "body_size", "body_sha256"}
+        """
+        placeholders = ", ".join("?" for _ in CATALOG_COLUMNS)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO responses ({', '.join(CATALOG_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                self._row(filepath, entry),
+            )
+
+    def rebuild(self, entries: Iterable[tuple[Path, dict[str, Any]]]) -> int:
+        """以完整的記錄清單重建目錄索引
+
+        Args:
+            entries: (檔案路徑, 索引資料)
+
+        Returns:
+            記錄筆數
+        """
+        placeholders = ", ".join("?" for _ in CATALOG_COLUMNS)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM responses")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO responses ({', '.join(CATALOG_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                (self._row(filepath, entry) for filepath, entry in entries),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO catalog_metadata (key, value) VALUES ('indexed_at', ?)",
+                (now_iso(),),
+            )
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def is_indexed(self) -> bool:
+        """是否已完成過完整索引（reindex）
+
+        Returns:
+            是否已索引；尚未索引時，既有的備份檔案可能不在目錄索引中
+        """
+        if not self.db_path.exists():
+            return False
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM catalog_metadata WHERE key = 'indexed_at'"
+            ).fetchone()
+        return row is not None
+
+    def find(
+        self,
+        pattern: str = "*",
+        start: datetime | None = None,
+        end: datetime | None = None,
+        endpoint: str | None = None,
+    ) -> list[Path]:
+        """查詢交換記錄
+
+        Args:
+            pattern: 檔名 glob 模式
+            start: 起始時間（含）
+            end: 結束時間（含）
+            endpoint: API endpoint
+
+        Returns:
+            交換記錄檔案路徑列表（最新的在前）
+        """
+        conditions = ["path GLOB ?"]
+        params: list[Any] = [f"*/{pattern}"]
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_sort_key(start))
+        if end is not None:
+            conditions.append("timestamp <= ?")
+            params.append(_sort_key(end))
+        if endpoint is not None:
+            conditions.append("endpoint_hash = ?")
+            params.append(endpoint_hash(endpoint))
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT path FROM responses WHERE {' AND '.join(conditions)} "
+                "ORDER BY timestamp DESC, path DESC",
+                params,
+            ).fetchall()
+        return [self.responses_dir / path for (path,) in rows]
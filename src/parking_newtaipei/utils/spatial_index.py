@@ -0,0 +1,143 @@
+"""空間索引模組
+
+以均勻網格索引 TWD97 投影座標（公尺），提供最近鄰與半徑查詢。
+TWD97 為平面座標，距離直接以歐氏距離計算。
+"""
+
+import heapq
+import math
+from collections.abc import Iterable, Iterator
+
+# 預設網格大小（公尺），約為常見查詢半徑
+DEFAULT_CELL_SIZE = 500.0
+
+# 查詢結果：(停車場 ID, 距離公尺)
+Neighbor = tuple[str, float]
+
+
+class GridIndex:
+    """均勻網格空間索引
+
+    每個點依座標放入邊長 cell_size 的網格；半徑查詢只檢查與圓相交的網格，
+    最近鄰查詢由查詢點所在網格一圈一圈向外擴展，直到更外圈不可能更近為止。
+    """
+
+    def __init__(
+        self,
+        points: Iterable[tuple[str, float, float]],
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ):
+        """建立索引
+
+        Args:
+            points: (ID, x, y)
+            cell_size: 網格邊長（公尺）
+        """
+        if cell_size <= 0:
+            raise ValueError(f"網格大小需大於 0: {cell_size}")
+
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[tuple[float, float, str]]] = {}
+        self._size = 0
+        for point_id, x, y in points:
+            self._cells.setdefault(self._cell(x, y), []).append((x, y, point_id))
+            self._size += 1
+
+        if self._cells:
+            xs = [cx for cx, _ in self._cells]
+            ys = [cy for _, cy in self._cells]
+            self._bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        """取得座標所在的網格"""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _ring(self, cx: int, cy: int, d: int) -> Iterator[tuple[int, int]]:
+        """列出與 (cx, cy) 的切比雪夫距離恰為 d、且在資料範圍內的網格"""
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        if d == 0:
+            yield cx, cy
+            return
+        xs = range(max(cx - d, min_cx), min(cx + d, max_cx) + 1)
+        for y in (cy - d, cy + d):
+            if min_cy <= y <= max_cy:
+                for x in xs:
+                    yield x, y
+        ys = range(max(cy - d + 1, min_cy), min(cy + d - 1, max_cy) + 1)
+        for x in (cx - d, cx + d):
+            if min_cx <= x <= max_cx:
+                for y in ys:
+                    yield x, y
+
+    def within(self, x: float, y: float, radius: float) -> list[Neighbor]:
+        """查詢半徑內的點
+
+        Args:
+            x: 查詢點 TWD97 X 座標
+            y: 查詢點 TWD97 Y 座標
+            radius: 半徑（公尺，含）
+
+        Returns:
+            (ID, 距離) 列表，依距離排序
+        """
+        if not self._cells:
+            return []
+
+        # 只檢查與圓的外接正方形相交、且在資料範圍內的網格
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        min_cx, min_cy = max(min_cx, self._bounds[0]), max(min_cy, self._bounds[1])
+        max_cx, max_cy = min(max_cx, self._bounds[2]), min(max_cy, self._bounds[3])
+        limit = radius * radius
+
+        result = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for px, py, point_id in self._cells.get((cx, cy), ()):
+                    dist2 = (px - x) ** 2 + (py - y) ** 2
+                    if dist2 <= limit:
+                        result.append((point_id, math.sqrt(dist2)))
+
+        result.sort(key=lambda item: (item[1], item[0]))
+        return result
+
+    def nearest(self, x: float, y: float, k: int = 1) -> list[Neighbor]:
+        """查詢最近的 k 個點
+
+        Args:
+            x: 查詢點 TWD97 X 座標
+            y: 查詢點 TWD97 Y 座標
+            k: 回傳筆數
+
+        Returns:
+            (ID, 距離) 列表，依距離排序（點數不足 k 時回傳全部）
+        """
+        if k <= 0 or not self._cells:
+            return []
+
+        cx, cy = self._cell(x, y)
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        # 查詢點在資料範圍外時，由最接近資料範圍的一圈開始（內圈沒有任何網格）
+        min_ring = max(min_cx - cx, cx - max_cx, min_cy - cy, cy - max_cy, 0)
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy, 0)
+
+        # 以負距離平方維持目前最近的 k 個點（堆頂為其中最遠者）
+        heap: list[tuple[float, str]] = []
+        for d in range(min_ring, max_ring + 1):
+            for cell in self._ring(cx, cy, d):
+                for px, py, point_id in self._cells.get(cell, ()):
+                    item = (-((px - x) ** 2 + (py - y) ** 2), point_id)
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    elif item > heap[0]:
+                        heapq.heapreplace(heap, item)
+            # 第 d 圈以外的點與查詢點的距離至少為 d * cell_size
+            if len(heap) == k and -heap[0][0] <= (d * self.cell_size) ** 2:
+                break
+
+        result = [(point_id, math.sqrt(-neg_dist2)) for neg_dist2, point_id in heap]
+        result.sort(key=lambda item: (item[1], item[0]))
+        return result
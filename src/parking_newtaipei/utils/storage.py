@@ -1,24 +1,61 @@
 """檔案儲存模組
 
-提供 JSON 序列化與 gzip 壓縮儲存功能。
+提供 API 交換記錄的 gzip 壓縮儲存功能（含串流寫入），支援兩種格式：
+- json：整筆交換記錄（含 body）序列化為 JSON 後壓縮，檔名 *.json.gz
+- raw：body 原樣壓縮為 *.body.gz，metadata 以一行 JSON 附加至月份目錄的 index.jsonl；
+  可依日打包為單一可附加的 YYYYMMDD.pack.gz（多個 gzip member 串接）
+
+兩種格式寫入時皆會登錄至 responses 目錄下的目錄索引（catalog.db，見 response_catalog 模組），
+列出與查詢交換記錄時不需掃描目錄。
 """
 
+import codecs
 import gzip
 import hashlib
 import json
-from datetime import datetime
+import os
+import sqlite3
+from collections.abc import Iterator
+from datetime import date, datetime
 from pathlib import Path
 from typing import Any
 
+from parking_newtaipei.utils.logger import get_logger
+from parking_newtaipei.utils.response_catalog import ResponseCatalog, endpoint_hash
+
+# gzip 壓縮等級預設值（1 最快、9 最小；ARCHIVE_COMPRESS_LEVEL 未設定時亦使用此值）
+DEFAULT_COMPRESS_LEVEL = 6
+
+# 交換記錄格式
+ARCHIVE_FORMAT_JSON = "json"
+ARCHIVE_FORMAT_RAW = "raw"
+ARCHIVE_FORMATS = (ARCHIVE_FORMAT_JSON, ARCHIVE_FORMAT_RAW)
+
+# 各格式的檔名後綴
+JSON_SUFFIX = ".json.gz"
+RAW_SUFFIX = ".body.gz"
+PACK_SUFFIX = ".pack.gz"
+
+# raw 格式的月份索引檔名
+INDEX_FILENAME = "index.jsonl"
+
+# raw 格式索引保留的 response headers（其餘不重複保存）
+RAW_INDEX_HEADERS = ("content-type", "content-length", "etag", "last-modified", "date")
 
-def generate_filename(endpoint: str, timestamp: datetime | None = None) -> str:
+
+def generate_filename(
+    endpoint: str,
+    timestamp: datetime | None = None,
+    suffix: str = JSON_SUFFIX,
+) -> str:
     """產生唯一檔名
 
-    格式：{timestamp}_{endpoint_hash}.json.gz
+    格式：{timestamp}_{endpoint_hash}{suffix}
 
     Args:
         endpoint: API endpoint 路徑
         timestamp: 時間戳記，預設為當前時間
+        suffix: 檔名後綴
 
     Returns:
         產生的檔名
@@ -27,9 +64,81 @@ def generate_filename(endpoint: str, timestamp: datetime | None = None) -> str:
         timestamp = datetime.now()
 
     timestamp_str = timestamp.strftime("%Y%m%d_%H%M%S")
-    endpoint_hash = hashlib.md5(endpoint.encode()).hexdigest()[:8]
 
-    return f"{timestamp_str}_{endpoint_hash}.json.gz"
+    return f"{timestamp_str}_{endpoint_hash(endpoint)}{suffix}"
+
+
+def response_path(
+    output_dir: Path,
+    endpoint: str,
+    timestamp: datetime,
+    suffix: str = JSON_SUFFIX,
+) -> Path:
+    """取得備份檔案路徑（YYYYMM 子目錄）
+
+    Args:
+        output_dir: 輸出目錄
+        endpoint: API endpoint（用於產生檔名）
+        timestamp: 時間戳記
+        suffix: 檔名後綴
+
+    Returns:
+        備份檔案路徑
+    """
+    return (
+        output_dir / timestamp.strftime("%Y%m") / generate_filename(endpoint, timestamp, suffix)
+    )
+
+
+def _catalog_entry(
+    data: dict[str, Any],
+    timestamp: datetime,
+    body_size: int,
+    body_sha256: str,
+) -> dict[str, Any]:
+    """由交換記錄組出目錄索引資料
+
+    Args:
+        data: 交換記錄
+        timestamp: 時間戳記（交換記錄未含 timestamp 時使用）
+        body_size: body 大小（bytes）
+        body_sha256: body 的 SHA256
+
+    Returns:
+        目錄索引資料
+    """
+    request = data.get("request") or {}
+    response = data.get("response") or {}
+    return {
+        "timestamp": data.get("timestamp", timestamp.isoformat()),
+        "url": request.get("url"),
+        "status_code": response.get("status_code"),
+        "body_size": body_size,
+        "body_sha256": body_sha256,
+    }
+
+
+def _body_bytes(body: Any) -> bytes:
+    """取得 json 格式 body 的 bytes（用於計算大小與雜湊）"""
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def _catalog_add(output_dir: Path, filepath: Path, entry: dict[str, Any]) -> None:
+    """登錄至目錄索引（失敗只記錄警告，不影響交換記錄本身）
+
+    Args:
+        output_dir: 輸出目錄（目錄索引所在位置）
+        filepath: 交換記錄檔案路徑
+        entry: 目錄索引資料
+    """
+    try:
+        ResponseCatalog(output_dir).add(filepath, entry)
+    except sqlite3.Error as e:
+        get_logger().warning(f"目錄索引更新失敗（可執行 reindex-responses 重建）: {e}")
 
 
 def save_response(
@@ -37,6 +146,7 @@ def save_response(
     output_dir: Path,
     endpoint: str,
     timestamp: datetime | None = None,
+    compresslevel: int = DEFAULT_COMPRESS_LEVEL,
 ) -> Path:
     """儲存 API response 為 gzip 壓縮的 JSON 檔案
 
@@ -45,6 +155,7 @@ def save_response(
         output_dir: 輸出目錄
         endpoint: API endpoint（用於產生檔名）
         timestamp: 時間戳記，預設為當前時間
+        compresslevel: gzip 壓縮等級（1-9）
 
     Returns:
         儲存的檔案路徑
@@ -53,23 +164,301 @@ def save_response(
         timestamp = datetime.now()
 
     # 建立 YYYYMM 子目錄
-    month_subdir = timestamp.strftime("%Y%m")
-    actual_output_dir = output_dir / month_subdir
-    actual_output_dir.mkdir(parents=True, exist_ok=True)
-
-    filename = generate_filename(endpoint, timestamp)
-    filepath = actual_output_dir / filename
+    filepath = response_path(output_dir, endpoint, timestamp)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
 
     json_bytes = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
 
-    with gzip.open(filepath, "wb") as f:
+    with gzip.open(filepath, "wb", compresslevel=compresslevel) as f:
         f.write(json_bytes)
 
+    body = _body_bytes((data.get("response") or {}).get("body"))
+    _catalog_add(
+        output_dir,
+        filepath,
+        _catalog_entry(data, timestamp, len(body), hashlib.sha256(body).hexdigest()),
+    )
+
     return filepath
 
 
+class ResponseStreamWriter:
+    """以串流方式寫入 API 交換記錄
+
+    檔案格式與 save_response() 相同（gzip 壓縮的 JSON，body 為字串），
+    但 body 逐段寫入，不需將整個 response 內容載入記憶體。
+    """
+
+    # body 在 JSON 中的佔位字串，用於切出 body 前後的 JSON 片段
+    _BODY_PLACEHOLDER = "\x00body\x00"
+
+    def __init__(
+        self,
+        data: dict[str, Any],
+        output_dir: Path,
+        endpoint: str,
+        timestamp: datetime | None = None,
+        compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+    ):
+        """開啟備份檔案並寫入 body 之前的 JSON 內容
+
+        Args:
+            data: 交換記錄（response.body 會被串流寫入的內容取代）
+            output_dir: 輸出目錄
+            endpoint: API endpoint（用於產生檔名）
+            timestamp: 時間戳記，預設為當前時間
+            compresslevel: gzip 壓縮等級（1-9）
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        self.filepath = response_path(output_dir, endpoint, timestamp)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._output_dir = output_dir
+        self._entry = _catalog_entry(data, timestamp, 0, "")
+        self._size = 0
+        self._hasher = hashlib.sha256()
+
+        envelope = {**data, "response": {**data["response"], "body": self._BODY_PLACEHOLDER}}
+        text = json.dumps(envelope, ensure_ascii=False, indent=2)
+        self._prefix, self._suffix = text.split(json.dumps(self._BODY_PLACEHOLDER))
+
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._file = gzip.open(
+            self.filepath, "wt", encoding="utf-8", compresslevel=compresslevel
+        )
+        self._file.write(self._prefix + '"')
+
+    def write(self, chunk: bytes) -> None:
+        """寫入一段 body
+
+        Args:
+            chunk: response body 的 bytes 區塊
+        """
+        self._size += len(chunk)
+        self._hasher.update(chunk)
+        text = self._decoder.decode(chunk)
+        if text:
+            self._file.write(json.dumps(text, ensure_ascii=False)[1:-1])
+
+    def close(self) -> Path:
+        """完成 JSON 並關閉檔案
+
+        Returns:
+            儲存的檔案路徑
+        """
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            self._file.write(json.dumps(text, ensure_ascii=False)[1:-1])
+        self._file.write('"' + self._suffix)
+        self._file.close()
+        _catalog_add(
+            self._output_dir,
+            self.filepath,
+            {**self._entry, "body_size": self._size, "body_sha256": self._hasher.hexdigest()},
+        )
+        return self.filepath
+
+    def abort(self) -> None:
+        """放棄寫入並刪除不完整的檔案"""
+        self._file.close()
+        self.filepath.unlink(missing_ok=True)
+
+
+def _append_index(month_dir: Path, entries: list[dict[str, Any]]) -> None:
+    """附加索引記錄（每筆一行，以單次 write 附加）
+
+    Args:
+        month_dir: 月份目錄
+        entries: 索引記錄
+    """
+    lines = "".join(
+        json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n" for entry in entries
+    )
+    with open(month_dir / INDEX_FILENAME, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+def read_index(month_dir: Path) -> dict[str, dict[str, Any]]:
+    """讀取 raw 格式的月份索引
+
+    同一檔名的後續記錄（例如打包後的位置）會合併覆蓋先前的欄位。
+
+    Args:
+        month_dir: 月份目錄
+
+    Returns:
+        檔名對應索引記錄的字典
+    """
+    index_path = month_dir / INDEX_FILENAME
+    if not index_path.exists():
+        return {}
+
+    entries: dict[str, dict[str, Any]] = {}
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 寫入中斷留下的不完整行
+                continue
+            entries.setdefault(entry["name"], {}).update(entry)
+    return entries
+
+
+def _raw_catalog_entry(entry: dict[str, Any]) -> dict[str, Any]:
+    """由 raw 格式索引記錄組出目錄索引資料"""
+    return {
+        "timestamp": entry["timestamp"],
+        "url": entry["request"].get("url"),
+        "status_code": entry.get("status_code"),
+        "body_size": entry.get("size"),
+        "body_sha256": entry.get("sha256"),
+    }
+
+
+class RawResponseWriter:
+    """以 raw 格式串流寫入 API 交換記錄
+
+    body 原樣以 gzip 壓縮（不解碼、不轉義），完成時將 metadata、大小與 SHA256
+    附加至月份索引。介面與 ResponseStreamWriter 相同。
+    """
+
+    def __init__(
+        self,
+        data: dict[str, Any],
+        output_dir: Path,
+        endpoint: str,
+        timestamp: datetime | None = None,
+        compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+    ):
+        """開啟 body 檔案
+
+        Args:
+            data: 交換記錄（response.body 不使用）
+            output_dir: 輸出目錄
+            endpoint: API endpoint（用於產生檔名）
+            timestamp: 時間戳記，預設為當前時間
+            compresslevel: gzip 壓縮等級（1-9）
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+
+        self.filepath = response_path(output_dir, endpoint, timestamp, RAW_SUFFIX)
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self._output_dir = output_dir
+
+        request = data.get("request", {})
+        response = data.get("response", {})
+        headers = {k.lower(): v for k, v in response.get("headers", {}).items()}
+        self._entry = {
+            "name": self.filepath.name,
+            "timestamp": data.get("timestamp", timestamp.isoformat()),
+            "request": {key: value for key, value in request.items() if key != "headers"},
+            "status_code": response.get("status_code"),
+            "headers": {key: headers[key] for key in RAW_INDEX_HEADERS if key in headers},
+        }
+        self._size = 0
+        self._hasher = hashlib.sha256()
+        self._file = gzip.open(self.filepath, "wb", compresslevel=compresslevel)
+
+    def write(self, chunk: bytes) -> None:
+        """寫入一段 body
+
+        Args:
+            chunk: response body 的 bytes 區塊
+        """
+        self._size += len(chunk)
+        self._hasher.update(chunk)
+        self._file.write(chunk)
+
+    def close(self) -> Path:
+        """關閉 body 檔案並寫入索引
+
+        Returns:
+            body 檔案路徑
+        """
+        self._file.close()
+        entry = {**self._entry, "size": self._size, "sha256": self._hasher.hexdigest()}
+        _append_index(self.filepath.parent, [entry])
+        _catalog_add(self._output_dir, self.filepath, _raw_catalog_entry(entry))
+        return self.filepath
+
+    def abort(self) -> None:
+        """放棄寫入並刪除不完整的檔案"""
+        self._file.close()
+        self.filepath.unlink(missing_ok=True)
+
+
+def save_raw_response(
+    data: dict[str, Any],
+    body: bytes,
+    output_dir: Path,
+    endpoint: str,
+    timestamp: datetime | None = None,
+    compresslevel: int = DEFAULT_COMPRESS_LEVEL,
+) -> Path:
+    """以 raw 格式儲存 API 交換記錄
+
+    Args:
+        data: 交換記錄（response.body 不使用）
+        body: 原始 response body
+        output_dir: 輸出目錄
+        endpoint: API endpoint（用於產生檔名）
+        timestamp: 時間戳記，預設為當前時間
+        compresslevel: gzip 壓縮等級（1-9）
+
+    Returns:
+        body 檔案路徑
+    """
+    writer = RawResponseWriter(data, output_dir, endpoint, timestamp, compresslevel)
+    writer.write(body)
+    return writer.close()
+
+
+def _read_raw_body(filepath: Path, entry: dict[str, Any]) -> bytes:
+    """讀取 raw 格式的 body（未打包的檔案或打包檔中的 gzip member）
+
+    Args:
+        filepath: body 檔案路徑
+        entry: 索引記錄
+
+    Returns:
+        原始 body
+    """
+    if "pack" not in entry:
+        with gzip.open(filepath, "rb") as f:
+            return f.read()
+
+    with open(filepath.parent / entry["pack"], "rb") as f:
+        f.seek(entry["offset"])
+        return gzip.decompress(f.read(entry["length"]))
+
+
+def load_raw_body(filepath: Path, entry: dict[str, Any] | None = None) -> bytes:
+    """載入 raw 格式交換記錄的原始 body
+
+    Args:
+        filepath: body 檔案路徑（打包後檔案已不存在，但路徑仍可使用）
+        entry: 索引記錄（大量讀取時由呼叫端先以 read_index() 取得），None 表示讀取索引
+
+    Returns:
+        原始 body
+    """
+    if entry is None:
+        entry = read_index(filepath.parent).get(filepath.name)
+    if entry is None:
+        raise FileNotFoundError(f"索引中找不到交換記錄: {filepath}")
+    return _read_raw_body(filepath, entry)
+
+
 def load_response(filepath: Path) -> dict[str, Any]:
-    """載入 gzip 壓縮的 JSON 檔案
+    """載入交換記錄
+
+    支援 json 與 raw 格式；raw 格式會組回與 json 格式相同結構的字典
+    （body 可解析為 JSON 時為 JSON，否則為文字）。
 
     Args:
         filepath: 檔案路徑
@@ -77,28 +466,218 @@ def load_response(filepath: Path) -> dict[str, Any]:
     Returns:
         解析後的資料字典
     """
+    if filepath.name.endswith(RAW_SUFFIX):
+        entry = read_index(filepath.parent).get(filepath.name)
+        if entry is None:
+            raise FileNotFoundError(f"索引中找不到交換記錄: {filepath}")
+        text = _read_raw_body(filepath, entry).decode("utf-8", errors="replace")
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = text
+        return {
+            "timestamp": entry["timestamp"],
+            "request": entry["request"],
+            "response": {
+                "status_code": entry["status_code"],
+                "headers": entry["headers"],
+                "body": body,
+            },
+        }
+
     with gzip.open(filepath, "rb") as f:
         json_bytes = f.read()
 
     return json.loads(json_bytes.decode("utf-8"))
 
 
+def load_exchange(
+    filepath: Path, entry: dict[str, Any] | None = None
+) -> tuple[dict[str, Any], bytes]:
+    """載入交換記錄與原始 body（重播用）
+
+    raw 格式的 body 為下載時的原始 bytes；json 格式的 body 由儲存的文字（或 JSON）重新編碼。
+
+    Args:
+        filepath: 檔案路徑
+        entry: raw 格式的索引記錄（大量讀取時由呼叫端先以 read_index() 取得），None 表示讀取索引
+
+    Returns:
+        (交換記錄（response.body 為 None）, body)
+    """
+    if filepath.name.endswith(RAW_SUFFIX):
+        if entry is None:
+            entry = read_index(filepath.parent).get(filepath.name)
+        if entry is None:
+            raise FileNotFoundError(f"索引中找不到交換記錄: {filepath}")
+        data = {
+            "timestamp": entry["timestamp"],
+            "request": entry["request"],
+            "response": {
+                "status_code": entry["status_code"],
+                "headers": entry["headers"],
+                "body": None,
+            },
+        }
+        return data, _read_raw_body(filepath, entry)
+
+    data = load_response(filepath)
+    body = _body_bytes(data["response"]["body"])
+    data["response"]["body"] = None
+    return data, body
+
+
+def _scan_archive(responses_dir: Path) -> Iterator[tuple[Path, dict[str, Any]]]:
+    """掃描磁碟上的交換記錄並組出目錄索引資料（重建索引用）"""
+    # json 格式：YYYYMM 子目錄中的檔案（需解壓縮以取得 URL 與 body）
+    for path in responses_dir.glob(f"*/*{JSON_SUFFIX}"):
+        try:
+            data = load_response(path)
+        except (OSError, ValueError) as e:
+            get_logger().warning(f"略過無法讀取的交換記錄 {path.name}: {e}")
+            continue
+        timestamp = datetime.strptime(path.name[:15], "%Y%m%d_%H%M%S")
+        body = _body_bytes((data.get("response") or {}).get("body"))
+        yield path, _catalog_entry(data, timestamp, len(body), hashlib.sha256(body).hexdigest())
+
+    # raw 格式：由月份索引列出（含已打包者）
+    for index_path in responses_dir.glob(f"*/{INDEX_FILENAME}"):
+        for name, entry in read_index(index_path.parent).items():
+            if "timestamp" in entry:
+                yield index_path.parent / name, _raw_catalog_entry(entry)
+
+
+def reindex_responses(responses_dir: Path) -> int:
+    """掃描磁碟重建交換記錄目錄索引
+
+    Args:
+        responses_dir: responses 目錄路徑
+
+    Returns:
+        索引的交換記錄數
+    """
+    return ResponseCatalog(responses_dir).rebuild(_scan_archive(responses_dir))
+
+
+def find_responses(
+    responses_dir: Path,
+    pattern: str = "*",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    endpoint: str | None = None,
+) -> list[Path]:
+    """由目錄索引查詢交換記錄
+
+    目錄索引尚未建立時（例如既有的 responses 目錄）會先掃描磁碟重建。
+
+    Args:
+        responses_dir: responses 目錄路徑
+        pattern: 檔名 glob 模式
+        start: 起始時間（含）
+        end: 結束時間（含）
+        endpoint: API endpoint
+
+    Returns:
+        符合條件的檔案路徑列表（最新的在前；raw 格式已打包者的路徑可直接傳給 load_response）
+    """
+    if not responses_dir.exists():
+        return []
+
+    catalog = ResponseCatalog(responses_dir)
+    if not catalog.is_indexed():
+        reindex_responses(responses_dir)
+    return catalog.find(pattern, start, end, endpoint)
+
+
 def list_responses(
     responses_dir: Path,
-    pattern: str = "*.json.gz",
+    pattern: str = "*",
 ) -> list[Path]:
     """列出所有備份檔案
 
     Args:
         responses_dir: responses 目錄路徑
-        pattern: 檔案 glob 模式
+        pattern: 檔名 glob 模式
 
     Returns:
-        符合條件的檔案路徑列表（按修改時間排序，最新的在前）
+        符合條件的檔案路徑列表（最新的在前；raw 格式已打包者的路徑可直接傳給 load_response）
     """
+    return find_responses(responses_dir, pattern)
+
+
+def pack_day(responses_dir: Path, day: date) -> int:
+    """將某日 raw 格式的 body 檔案打包為單一檔案
+
+    每個 body 檔案本身即為完整的 gzip member，直接依時間順序附加至
+    YYYYMM/YYYYMMDD.pack.gz（不需重新壓縮），再於索引附加打包位置並刪除原檔。
+    打包檔可重複附加；中斷後重新執行只會留下未被索引引用的重複內容。
+
+    Args:
+        responses_dir: responses 目錄路徑
+        day: 要打包的日期
+
+    Returns:
+        打包的檔案數
+    """
+    month_dir = responses_dir / day.strftime("%Y%m")
+    entries = [
+        entry
+        for entry in read_index(month_dir).values()
+        if "pack" not in entry
+        and datetime.fromisoformat(entry["timestamp"]).date() == day
+        and (month_dir / entry["name"]).exists()
+    ]
+    if not entries:
+        return 0
+
+    entries.sort(key=lambda entry: entry["timestamp"])
+    pack_name = day.strftime("%Y%m%d") + PACK_SUFFIX
+    locations = []
+
+    with open(month_dir / pack_name, "ab") as pack:
+        for entry in entries:
+            member = (month_dir / entry["name"]).read_bytes()
+            offset = pack.tell()
+            pack.write(member)
+            locations.append(
+                {"name": entry["name"], "pack": pack_name, "offset": offset, "length": len(member)}
+            )
+        pack.flush()
+        os.fsync(pack.fileno())
+
+    _append_index(month_dir, locations)
+    for entry in entries:
+        (month_dir / entry["name"]).unlink()
+
+    return len(entries)
+
+
+def pack_responses(responses_dir: Path, before: date | None = None) -> dict[date, int]:
+    """打包 before（不含）之前所有日期的 raw 格式 body 檔案
+
+    Args:
+        responses_dir: responses 目錄路徑
+        before: 截止日期，預設為今天（當日資料仍在寫入，不打包）
+
+    Returns:
+        日期對應打包檔案數的字典（只含有打包的日期）
+    """
+    if before is None:
+        before = date.today()
     if not responses_dir.exists():
-        return []
+        return {}
+
+    days = set()
+    for index_path in responses_dir.glob(f"*/{INDEX_FILENAME}"):
+        for entry in read_index(index_path.parent).values():
+            if "pack" not in entry:
+                day = datetime.fromisoformat(entry["timestamp"]).date()
+                if day < before:
+                    days.add(day)
 
-    # 搜尋 YYYYMM 子目錄中的檔案
-    files = list(responses_dir.glob(f"*/{pattern}"))
-    return sorted(files, key=lambda p: p.stat().st_mtime, reverse=True)
+    result = {}
+    for day in sorted(days):
+        count = pack_day(responses_dir, day)
+        if count:
+            result[day] = count
+    return result
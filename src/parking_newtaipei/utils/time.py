@@ -15,3 +15,29 @@ def now_iso() -> str:
         ISO 8601 格式的時間字串（含時區）
     """
     return datetime.now().astimezone().isoformat()
+
+
+def to_iso(dt: datetime) -> str:
+    """將 datetime 轉為與 now_iso() 相同格式的字串
+
+    naive datetime 視為系統本地時間。
+
+    Args:
+        dt: 時間
+
+    Returns:
+        ISO 8601 格式的時間字串（含時區）
+    """
+    return dt.astimezone().isoformat()
+
+
+def epoch_to_iso(ts: float) -> str:
+    """將 Unix epoch 秒數轉為與 now_iso() 相同格式的字串
+
+    Args:
+        ts: Unix epoch 秒數
+
+    Returns:
+        ISO 8601 格式的時間字串（系統本地時區）
+    """
+    return datetime.fromtimestamp(ts).astimezone().isoformat()
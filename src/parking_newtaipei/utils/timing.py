@@ -0,0 +1,91 @@
+"""階段計時模組
+
+記錄同步作業各階段（下載、解析、寫入等）的耗時。串流處理時各階段交錯執行
+（例如解析時才向下讀取下載內容），因此以巢狀方式計時：內層階段執行時外層暫停計時，
+各階段的時間互不重疊，總和即為整體耗時。
+"""
+
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class PhaseTimer:
+    """同步作業的階段計時器（單執行緒使用）"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        """初始化計時器
+
+        Args:
+            clock: 取得目前時間（秒）的函式（測試用）
+        """
+        self.clock = clock
+        self.phases: dict[str, float] = {}
+        self._stack: list[str] = []
+        self._mark = 0.0
+
+    def _switch(self) -> None:
+        """將上次切換至今的時間計入目前的階段"""
+        now = self.clock()
+        if self._stack:
+            self.phases[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """計時一個階段（可巢狀，內層的時間不計入外層）
+
+        Args:
+            phase: 階段名稱
+        """
+        self._switch()
+        self.phases.setdefault(phase, 0.0)
+        self._stack.append(phase)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def iterate(self, phase: str, iterable: Iterable[T]) -> Iterator[T]:
+        """逐項讀取 iterable，讀取下一項的時間計入指定階段
+
+        Args:
+            phase: 階段名稱
+            iterable: 來源
+
+        Yields:
+            來源的每一項
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.span(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @property
+    def total(self) -> float:
+        """所有階段的總耗時（秒）"""
+        return sum(self.phases.values())
+
+    def as_dict(self) -> dict[str, float]:
+        """各階段耗時（秒，四捨五入至微秒）"""
+        return {phase: round(seconds, 6) for phase, seconds in self.phases.items()}
+
+
+def format_phases(phases: dict[str, float]) -> str:
+    """將各階段耗時格式化為日誌字串，例如 download 1.20s, parse 0.31s
+
+    Args:
+        phases: 各階段耗時（秒）
+
+    Returns:
+        格式化字串
+    """
+    return ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phases.items())
@@ -0,0 +1,54 @@
+"""背景交換記錄寫入測試"""
+
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from parking_newtaipei.utils.archive_writer import ArchiveWriter
+from parking_newtaipei.utils.storage import load_response
+
+TIMESTAMP = datetime(2026, 2, 4, 10, 30, 45)
+DATA = {"request": {"url": "/api/test"}, "response": {"status_code": 200, "body": None}}
+
+
+class TestArchiveWriter:
+    """ArchiveWriter 測試"""
+
+    def test_save_parses_json_body_on_close(self, tmp_path: Path) -> None:
+        """測試背景解析 JSON body，close() 後檔案已寫入"""
+        archive = ArchiveWriter(compresslevel=1)
+        filepath = archive.save(DATA, b'{"a": 1}', None, tmp_path, "/api/test", TIMESTAMP)
+        archive.close()
+
+        assert load_response(filepath)["response"]["body"] == {"a": 1}
+
+    def test_stream_writes_text_body(self, tmp_path: Path) -> None:
+        """測試串流寫入的 body 與原始內容相同"""
+        archive = ArchiveWriter()
+        writer = archive.open_stream(DATA, tmp_path, "/api/test", TIMESTAMP)
+        for chunk in (b"ID,NAME\n1,", "中文".encode(), b"\n"):
+            writer.write(chunk)
+        filepath = writer.close()
+        archive.flush()
+
+        assert load_response(filepath)["response"]["body"] == "ID,NAME\n1,中文\n"
+        archive.close()
+
+    def test_backpressure_blocks_when_full(self) -> None:
+        """測試佇列已滿時 submit 會阻塞，直到背景工作完成"""
+        archive = ArchiveWriter(max_pending=1)
+        release = threading.Event()
+        archive.submit(release.wait)  # 背景執行緒卡在此工作
+        archive.submit(lambda: None)  # 佔滿佇列
+
+        submitted = threading.Event()
+        thread = threading.Thread(
+            target=lambda: (archive.submit(lambda: None), submitted.set())
+        )
+        thread.start()
+
+        assert not submitted.wait(0.1)
+        release.set()
+        assert submitted.wait(1)
+        thread.join()
+        archive.close()
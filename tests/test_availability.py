@@ -0,0 +1,513 @@
+"""即時車位資料模組測試"""
+
+import gzip
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    SCHEMA_V2,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+    compute_stats,
+    get_monthly_db_path,
+    migrate_to_delta,
+    rewrite_monthly_db,
+)
+from parking_newtaipei.db.availability_schema import get_schema
+from parking_newtaipei.etl.availability_sync import AvailabilitySync
+
+# 測試用時間（固定在 2026 年 3 月）
+BASE_TIME = datetime(2026, 3, 10, 8, 0, 0)
+STEP = timedelta(minutes=5)
+
+# 每次同步的資料：A 變動兩次、B 不變、C 第三次才出現
+SNAPSHOTS = [
+    [{"parking_id": "A", "available_car": 10}, {"parking_id": "B", "available_car": 5}],
+    [{"parking_id": "A", "available_car": 10}, {"parking_id": "B", "available_car": 5}],
+    [
+        {"parking_id": "A", "available_car": 8},
+        {"parking_id": "B", "available_car": 5},
+        {"parking_id": "C", "available_car": 1},
+    ],
+    [
+        {"parking_id": "A", "available_car": 9},
+        {"parking_id": "B", "available_car": 5},
+        {"parking_id": "C", "available_car": 1},
+    ],
+]
+
+
+def _load(repo: AvailabilityRepository) -> list[int]:
+    """依序寫入 SNAPSHOTS，回傳每次寫入筆數"""
+    repo.init_tables(2026, 3)
+    return [
+        repo.insert_batch(records, recorded_at=BASE_TIME + STEP * i)
+        for i, records in enumerate(SNAPSHOTS)
+    ]
+
+
+def _count(db_path: Path) -> int:
+    """計算 availability 表（或 v2 相容檢視表）筆數"""
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM availability").fetchone()[0]
+
+
+class TestDeltaStorage:
+    """delta 儲存模式測試"""
+
+    def test_full_mode_writes_everything(self, tmp_path: Path) -> None:
+        """測試 full 模式寫入所有資料"""
+        repo = AvailabilityRepository(tmp_path)
+
+        assert _load(repo) == [2, 2, 3, 3]
+
+    def test_delta_mode_writes_only_changes(self, tmp_path: Path) -> None:
+        """測試 delta 模式只寫入變動"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA)
+
+        assert _load(repo) == [2, 0, 2, 1]
+        assert _count(get_monthly_db_path(tmp_path, 2026, 3)) == 5
+
+    def test_existing_file_keeps_its_mode(self, tmp_path: Path) -> None:
+        """測試既有檔案維持建立時的儲存模式"""
+        _load(AvailabilityRepository(tmp_path))
+
+        repo = AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA)
+        repo.init_tables(2026, 3)
+
+        assert repo.get_storage_mode(get_monthly_db_path(tmp_path, 2026, 3)) == STORAGE_MODE_FULL
+
+    def test_invalid_mode(self, tmp_path: Path) -> None:
+        """測試不支援的儲存模式"""
+        with pytest.raises(ValueError):
+            AvailabilityRepository(tmp_path, storage_mode="zip")
+
+
+class TestValueAsOf:
+    """時間點查詢測試"""
+
+    @pytest.mark.parametrize("version", [SCHEMA_V1, SCHEMA_V2])
+    @pytest.mark.parametrize("mode", [STORAGE_MODE_FULL, STORAGE_MODE_DELTA])
+    def test_value_as_of(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試各結構版本與儲存模式重建出相同的時間點數值"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        _load(repo)
+
+        def value(parking_id: str, at: datetime) -> int | None:
+            row = repo.get_value_as_of(parking_id, at)
+            return row["available_car"] if row else None
+
+        assert value("A", BASE_TIME - STEP) is None
+        assert value("A", BASE_TIME + STEP) == 10
+        assert value("A", BASE_TIME + STEP * 2) == 8
+        assert value("A", BASE_TIME + STEP * 2 + timedelta(seconds=30)) == 8
+        assert value("B", BASE_TIME + STEP * 3) == 5
+        assert value("C", BASE_TIME + STEP) is None
+
+    @pytest.mark.parametrize("version", [SCHEMA_V1, SCHEMA_V2])
+    @pytest.mark.parametrize("mode", [STORAGE_MODE_FULL, STORAGE_MODE_DELTA])
+    def test_snapshot_as_of(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試時間點快照"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        _load(repo)
+
+        snapshot = repo.get_snapshot_as_of(BASE_TIME + STEP * 3)
+
+        assert {pid: row["available_car"] for pid, row in snapshot.items()} == {
+            "A": 9,
+            "B": 5,
+            "C": 1,
+        }
+
+    def test_falls_back_to_previous_month(self, tmp_path: Path) -> None:
+        """測試當月無資料時查詢前一個月份"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA)
+        _load(repo)
+
+        at = datetime(2026, 4, 1, 0, 1, 0)
+        repo.init_tables(2026, 4)
+
+        assert repo.get_value_as_of("A", at)["available_car"] == 9
+        assert len(repo.get_snapshot_as_of(at)) == 3
+
+
+class TestMigrateToDelta:
+    """migrate_to_delta 測試"""
+
+    def test_migration_preserves_values(self, tmp_path: Path) -> None:
+        """測試轉換後時間點查詢結果不變"""
+        repo = AvailabilityRepository(tmp_path)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        times = [BASE_TIME + STEP * i for i in range(len(SNAPSHOTS))]
+        before = [repo.get_snapshot_as_of(at) for at in times]
+
+        report = migrate_to_delta(db_path)
+
+        migrated = AvailabilityRepository(tmp_path)
+        assert report["rows_before"] == 10
+        assert report["rows_after"] == 5
+        assert migrated.get_storage_mode(db_path) == STORAGE_MODE_DELTA
+        assert db_path.with_name(db_path.name + ".bak").exists()
+        for at, expected in zip(times, before, strict=True):
+            actual = migrated.get_snapshot_as_of(at)
+            assert {k: v["available_car"] for k, v in actual.items()} == {
+                k: v["available_car"] for k, v in expected.items()
+            }
+
+    def test_migrated_file_continues_in_delta(self, tmp_path: Path) -> None:
+        """測試轉換後的檔案可繼續以 delta 模式寫入"""
+        _load(AvailabilityRepository(tmp_path))
+        migrate_to_delta(get_monthly_db_path(tmp_path, 2026, 3), keep_backup=False)
+
+        repo = AvailabilityRepository(tmp_path)
+        repo.init_tables(2026, 3)
+        written = repo.insert_batch(SNAPSHOTS[-1], recorded_at=BASE_TIME + STEP * 10)
+
+        assert written == 0
+
+    def test_reject_already_delta(self, tmp_path: Path) -> None:
+        """測試已是 delta 模式的檔案不可重複轉換"""
+        _load(AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA))
+
+        with pytest.raises(ValueError):
+            migrate_to_delta(get_monthly_db_path(tmp_path, 2026, 3))
+
+
+class TestSchemaV2:
+    """v2 結構測試"""
+
+    @pytest.mark.parametrize("mode", [STORAGE_MODE_FULL, STORAGE_MODE_DELTA])
+    def test_writes_match_v1(self, tmp_path: Path, mode: str) -> None:
+        """測試 v2 寫入筆數與 v1 相同"""
+        v1 = AvailabilityRepository(tmp_path / "v1", storage_mode=mode)
+        v2 = AvailabilityRepository(tmp_path / "v2", storage_mode=mode, schema_version=SCHEMA_V2)
+
+        assert _load(v1) == _load(v2)
+
+    def test_compat_view_and_stats(self, tmp_path: Path) -> None:
+        """測試相容檢視表與統計資訊"""
+        repo = AvailabilityRepository(tmp_path, schema_version=SCHEMA_V2)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+
+        stats = repo.get_stats(2026, 3)
+
+        assert _count(db_path) == 10
+        assert stats["schema_version"] == SCHEMA_V2
+        assert stats["total_records"] == 10
+        assert stats["unique_parking_ids"] == 3
+        assert datetime.fromisoformat(stats["first_record"]) == BASE_TIME.astimezone()
+
+    def test_rewrite_v1_to_v2(self, tmp_path: Path) -> None:
+        """測試 v1 轉換為 v2 後查詢結果不變"""
+        repo = AvailabilityRepository(tmp_path)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        at = BASE_TIME + STEP * 2
+        before = repo.get_snapshot_as_of(at)
+
+        report = rewrite_monthly_db(db_path, schema_version=SCHEMA_V2)
+
+        migrated = AvailabilityRepository(tmp_path)
+        after = migrated.get_snapshot_as_of(at)
+        assert report["rows_after"] == report["rows_before"] == 10
+        assert migrated.get_schema_version(db_path) == SCHEMA_V2
+        assert {k: v["available_car"] for k, v in after.items()} == {
+            k: v["available_car"] for k, v in before.items()
+        }
+
+    def test_rewrite_to_v2_delta_then_append(self, tmp_path: Path) -> None:
+        """測試同時轉換為 v2 delta 後可繼續寫入"""
+        _load(AvailabilityRepository(tmp_path))
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+
+        report = rewrite_monthly_db(
+            db_path, schema_version=SCHEMA_V2, storage_mode=STORAGE_MODE_DELTA
+        )
+
+        repo = AvailabilityRepository(tmp_path)
+        repo.init_tables(2026, 3)
+        assert report["rows_after"] == 5
+        assert repo.insert_batch(SNAPSHOTS[-1], recorded_at=BASE_TIME + STEP * 10) == 0
+
+    def test_rewrite_delta_keeps_last_seen(self, tmp_path: Path) -> None:
+        """測試 delta 檔案轉換版本後保留最後已知值（未變動停車場最後看到的時間）"""
+        _load(AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA))
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        with sqlite3.connect(db_path) as conn:
+            before = get_schema(SCHEMA_V1).get_latest(conn)
+
+        rewrite_monthly_db(db_path, schema_version=SCHEMA_V2, keep_backup=False)
+
+        with sqlite3.connect(db_path) as conn:
+            after = get_schema(SCHEMA_V2).get_latest(conn)
+        last_seen = (BASE_TIME + STEP * 3).astimezone()
+        assert datetime.fromisoformat(after["B"][2]) == last_seen
+        assert {
+            parking_id: (value, *map(datetime.fromisoformat, times))
+            for parking_id, (value, *times) in after.items()
+        } == {
+            parking_id: (value, *map(datetime.fromisoformat, times))
+            for parking_id, (value, *times) in before.items()
+        }
+
+    def test_reject_delta_to_full(self, tmp_path: Path) -> None:
+        """測試 delta 模式不可轉回 full 模式"""
+        _load(AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA))
+
+        with pytest.raises(ValueError):
+            rewrite_monthly_db(
+                get_monthly_db_path(tmp_path, 2026, 3), storage_mode=STORAGE_MODE_FULL
+            )
+
+
+class TestQueryRange:
+    """跨月份查詢測試"""
+
+    @staticmethod
+    def _load_months(tmp_path: Path) -> AvailabilityRepository:
+        """寫入 2 月（v1）、3 月（v2）、4 月（v1 delta）各兩次同步"""
+        formats = {2: (SCHEMA_V1, STORAGE_MODE_FULL), 3: (SCHEMA_V2, STORAGE_MODE_FULL)}
+        formats[4] = (SCHEMA_V1, STORAGE_MODE_DELTA)
+        for month, (version, mode) in formats.items():
+            repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+            repo.init_tables(2026, month)
+            for i in range(2):
+                repo.insert_batch(
+                    [
+                        {"parking_id": "A", "available_car": month * 10 + i},
+                        {"parking_id": "B", "available_car": 1},
+                    ],
+                    recorded_at=datetime(2026, month, 15, 12, 0) + STEP * i,
+                )
+        return AvailabilityRepository(tmp_path)
+
+    def test_rows_are_time_ordered_across_months(self, tmp_path: Path) -> None:
+        """測試跨月份結果依時間排序"""
+        repo = self._load_months(tmp_path)
+
+        rows = list(repo.query_range(datetime(2026, 2, 1), datetime(2026, 4, 30), ["A"]))
+
+        assert [row["available_car"] for row in rows] == [20, 21, 30, 31, 40, 41]
+        times = [datetime.fromisoformat(row["recorded_at"]) for row in rows]
+        assert times == sorted(times)
+
+    def test_range_bounds_are_pushed_down(self, tmp_path: Path) -> None:
+        """測試只回傳區間內的資料"""
+        repo = self._load_months(tmp_path)
+
+        rows = list(repo.query_range(datetime(2026, 3, 15, 12, 5), datetime(2026, 4, 15, 12, 0)))
+
+        assert [(row["parking_id"], row["available_car"]) for row in rows] == [
+            ("A", 31),
+            ("B", 1),
+            ("A", 40),
+            ("B", 1),
+        ]
+
+    def test_skips_months_outside_range(self, tmp_path: Path) -> None:
+        """測試不開啟區間外的月份檔案"""
+        repo = self._load_months(tmp_path)
+        get_monthly_db_path(tmp_path, 2026, 1).write_bytes(b"not a database")
+
+        rows = list(repo.query_range(datetime(2026, 3, 1), datetime(2026, 3, 31)))
+
+        assert len(rows) == 4
+
+    def test_early_stop_releases_attachment(self, tmp_path: Path) -> None:
+        """測試提前結束迭代後可再次查詢"""
+        repo = self._load_months(tmp_path)
+
+        rows = repo.query_range(datetime(2026, 2, 1), datetime(2026, 4, 30))
+        next(rows)
+        rows.close()
+
+        # 4 月為 delta 模式，B 第二次未變動不寫入
+        assert len(list(repo.query_range(datetime(2026, 2, 1), datetime(2026, 4, 30)))) == 11
+
+
+class TestFileSummary:
+    """月份檔案摘要測試"""
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [
+            (STORAGE_MODE_FULL, SCHEMA_V1),
+            (STORAGE_MODE_DELTA, SCHEMA_V1),
+            (STORAGE_MODE_FULL, SCHEMA_V2),
+            (STORAGE_MODE_DELTA, SCHEMA_V2),
+        ],
+    )
+    def test_summary_matches_scan(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試寫入時累加的摘要與掃描資料表的結果相同"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+
+        stats = repo.get_stats(2026, 3)
+
+        assert {key: stats[key] for key in compute_stats(db_path)} == compute_stats(db_path)
+
+    def test_current_month_is_not_frozen(self, tmp_path: Path) -> None:
+        """測試當月摘要持續累加，不凍結"""
+        repo = AvailabilityRepository(tmp_path)
+        repo.init_tables()
+        repo.insert_batch(SNAPSHOTS[0])
+
+        stats = repo.get_stats()
+
+        assert (stats["total_records"], stats["frozen"]) == (2, False)
+
+    def test_closed_month_is_frozen_and_reopened_by_backfill(self, tmp_path: Path) -> None:
+        """測試已結束月份凍結摘要，再寫入時重新計算"""
+        repo = AvailabilityRepository(tmp_path)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+
+        assert repo.get_stats(2026, 3)["frozen"] is True
+        with sqlite3.connect(db_path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert "file_summary_lots" not in tables
+
+        repo.init_tables(2026, 3)
+        repo.insert_batch([{"parking_id": "D", "available_car": 2}], BASE_TIME - STEP)
+        stats = repo.get_stats(2026, 3)
+
+        assert stats["frozen"] is True
+        assert (stats["total_records"], stats["unique_parking_ids"]) == (11, 4)
+        assert datetime.fromisoformat(stats["first_record"]) == (BASE_TIME - STEP).astimezone()
+
+    def test_existing_file_without_summary(self, tmp_path: Path) -> None:
+        """測試尚無摘要的既有檔案於首次查詢時計算"""
+        _load(AvailabilityRepository(tmp_path))
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DROP TABLE file_summary")
+
+        stats = AvailabilityRepository(tmp_path).get_stats(2026, 3)
+
+        assert stats["total_records"] == 10
+
+    def test_verify_repairs_mismatch(self, tmp_path: Path) -> None:
+        """測試 verify_stats 找出並修正不符的摘要"""
+        repo = AvailabilityRepository(tmp_path)
+        _load(repo)
+        repo.get_stats(2026, 3)
+        with sqlite3.connect(get_monthly_db_path(tmp_path, 2026, 3)) as conn:
+            conn.execute("UPDATE file_summary SET total_records = 99")
+
+        (result,) = repo.verify_stats()
+
+        assert result["matched"] is False
+        assert result["summary"]["total_records"] == 99
+        assert repo.get_stats(2026, 3)["total_records"] == 10
+        assert repo.verify_stats()[0]["matched"] is True
+
+
+class TestCompaction:
+    """已結束月份壓實測試"""
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [
+            (STORAGE_MODE_FULL, SCHEMA_V1),
+            (STORAGE_MODE_DELTA, SCHEMA_V1),
+            (STORAGE_MODE_FULL, SCHEMA_V2),
+            (STORAGE_MODE_DELTA, SCHEMA_V2),
+        ],
+    )
+    def test_compaction_preserves_data(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試壓實後查詢結果、摘要與最後已知值不變，檔案為唯讀並以 immutable 開啟"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        _load(repo)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        at = BASE_TIME + STEP * 2
+        snapshot = repo.get_snapshot_as_of(at)
+        stats = repo.get_stats(2026, 3)
+
+        (report,) = repo.compact_months(repo.pending_compaction())
+
+        assert report["rows"] == stats["total_records"]
+        assert repo.pending_compaction() == []
+        assert db_path.stat().st_mode & 0o222 == 0
+        assert repo.get_snapshot_as_of(at) == snapshot
+        compacted = repo.get_stats(2026, 3)
+        assert compacted["compacted"] is True
+        assert {key: compacted[key] for key in stats if key != "compacted"} == {
+            key: stats[key] for key in stats if key != "compacted"
+        }
+        with sqlite3.connect(db_path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert "sqlite_stat1" in tables
+        assert "sqlite_sequence" not in tables
+
+        # 回填時恢復為可寫入，delta 模式沿用最後已知值
+        repo.init_tables(2026, 3)
+        written = repo.insert_batch(SNAPSHOTS[-1], BASE_TIME + STEP * 4)
+        assert written == (0 if mode == STORAGE_MODE_DELTA else 3)
+        assert repo.get_stats(2026, 3)["compacted"] is False
+
+    def test_v1_rows_sorted_by_lot(self, tmp_path: Path) -> None:
+        """測試 v1 資料列依 (停車場, 時間) 順序重寫"""
+        repo = AvailabilityRepository(tmp_path)
+        _load(repo)
+        repo.compact_months([get_monthly_db_path(tmp_path, 2026, 3)])
+
+        with sqlite3.connect(get_monthly_db_path(tmp_path, 2026, 3)) as conn:
+            rows = conn.execute(
+                "SELECT parking_id, recorded_at FROM availability ORDER BY id"
+            ).fetchall()
+        assert rows == sorted(rows)
+
+    def test_process_pool_and_cold_copy(self, tmp_path: Path) -> None:
+        """測試多個月份以子程序壓實並輸出冷備份，尚未結束的月份不可壓實"""
+        repo = AvailabilityRepository(tmp_path / "availability")
+        _load(repo)
+        repo.init_tables(2026, 4)
+        repo.insert_batch(SNAPSHOTS[0], datetime(2026, 4, 1, 8))
+        repo.init_tables()
+
+        pending = repo.pending_compaction()
+        assert [path.name for path in pending] == [
+            "availability_202603.db",
+            "availability_202604.db",
+        ]
+        with pytest.raises(ValueError):
+            repo.compact_months([get_monthly_db_path(repo.db_dir)])
+
+        reports = repo.compact_months(pending, workers=2, cold_dir=tmp_path / "cold")
+
+        assert [report["rows"] for report in reports] == [10, 2]
+        for path, report in zip(pending, reports, strict=True):
+            assert gzip.decompress(Path(report["cold_copy"]).read_bytes()) == path.read_bytes()
+
+    def test_first_sync_of_month_compacts(self, tmp_path: Path) -> None:
+        """測試建立新月份檔案的同步會壓實已結束的月份"""
+        _load(AvailabilityRepository(tmp_path / "availability"))
+        body = "\ufeffID,AVAILABLECAR\r\nA,3\r\n".encode("utf-8")
+        api_client = APIClient(
+            base_url="",
+            responses_dir=tmp_path / "responses",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)),
+        )
+        sync = AvailabilitySync(tmp_path / "availability", api_client, auto_compact=True)
+        try:
+            first = sync.sync()
+            second = sync.sync()
+        finally:
+            api_client.close()
+            sync.repo.close()
+
+        assert "compact" in first.phases
+        assert "compact" not in second.phases
+        assert sync.repo.pending_compaction() == []
+        assert sync.repo.get_stats(2026, 3)["compacted"] is True
+
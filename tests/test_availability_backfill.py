@@ -0,0 +1,153 @@
+"""即時車位資料回填測試"""
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from parking_newtaipei.db.availability import (
+    SCHEMA_V2,
+    STORAGE_MODE_DELTA,
+    AvailabilityRepository,
+)
+from parking_newtaipei.etl.availability_backfill import CHECKPOINT_FILENAME, AvailabilityBackfill
+from parking_newtaipei.etl.availability_sync import AVAILABILITY_API_URL
+from parking_newtaipei.utils.storage import save_raw_response, save_response
+
+BASE_TIME = datetime(2026, 2, 28, 23, 50)
+STEP = timedelta(minutes=5)
+START = datetime(2026, 2, 1)
+END = datetime(2026, 3, 31, 23, 59)
+
+
+def _exchange(timestamp: datetime, status_code: int = 200) -> dict:
+    """建立即時車位交換記錄"""
+    return {
+        "timestamp": timestamp.isoformat(),
+        "request": {"method": "GET", "url": AVAILABILITY_API_URL, "endpoint": AVAILABILITY_API_URL},
+        "response": {"status_code": status_code, "headers": {}, "body": None},
+    }
+
+
+def _archive(responses_dir: Path, count: int = 6) -> list[datetime]:
+    """建立跨越月份的交換記錄（raw 與 json 格式交錯），回傳記錄時間"""
+    timestamps = [BASE_TIME + STEP * i for i in range(count)]
+    for i, timestamp in enumerate(timestamps):
+        body = f"\ufeffID,AVAILABLECAR\nA,{i}\nB,5\nC,-9\n"
+        if i % 2:
+            save_response(
+                {**_exchange(timestamp), "response": {"status_code": 200, "body": body}},
+                responses_dir,
+                AVAILABILITY_API_URL,
+                timestamp,
+            )
+        else:
+            save_raw_response(
+                _exchange(timestamp), body.encode("utf-8"), responses_dir,
+                AVAILABILITY_API_URL, timestamp,
+            )
+    return timestamps
+
+
+class TestAvailabilityBackfill:
+    """AvailabilityBackfill 測試"""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_backfill_uses_archive_timestamps(self, tmp_path: Path, workers: int) -> None:
+        """測試以交換記錄時間寫入對應月份（含平行解析）"""
+        timestamps = _archive(tmp_path / "responses")
+        backfill = AvailabilityBackfill(tmp_path / "db", tmp_path / "responses", workers=workers)
+
+        result = backfill.backfill(START, END)
+
+        assert (result.archives, result.backfilled, result.inserted) == (6, 6, 12)
+        repo = AvailabilityRepository(tmp_path / "db")
+        assert [path.name for path in repo.list_db_files()] == [
+            "availability_202602.db",
+            "availability_202603.db",
+        ]
+        value = repo.get_value_as_of("A", timestamps[-1])
+        assert value["available_car"] == 5
+        assert value["recorded_at"].startswith(timestamps[-1].isoformat())
+        assert not (tmp_path / "db" / CHECKPOINT_FILENAME).exists()
+
+    def test_rerun_is_idempotent(self, tmp_path: Path) -> None:
+        """測試重複執行不會重複寫入，非 200 回應不寫入"""
+        _archive(tmp_path / "responses")
+        save_raw_response(
+            _exchange(BASE_TIME + STEP * 10, status_code=500), b"error",
+            tmp_path / "responses", AVAILABILITY_API_URL, BASE_TIME + STEP * 10,
+        )
+        backfill = AvailabilityBackfill(tmp_path / "db", tmp_path / "responses", workers=1)
+
+        first = backfill.backfill(START, END)
+        second = backfill.backfill(START, END)
+
+        assert first.skipped_invalid == 1
+        assert (second.backfilled, second.already_recorded) == (0, 6)
+
+    def test_skips_times_already_synced(self, tmp_path: Path) -> None:
+        """測試同步時已寫入的時間點（時間略有差距）會跳過"""
+        timestamps = _archive(tmp_path / "responses")
+        repo = AvailabilityRepository(tmp_path / "db")
+        repo.init_tables(2026, 2)
+        repo.insert_batch(
+            [{"parking_id": "A", "available_car": 0}], timestamps[0] - timedelta(seconds=1)
+        )
+
+        result = AvailabilityBackfill(tmp_path / "db", tmp_path / "responses", workers=1).backfill(
+            START, END
+        )
+
+        assert (result.backfilled, result.already_recorded) == (5, 1)
+
+    def test_resumes_from_checkpoint(self, tmp_path: Path) -> None:
+        """測試由相同區間的檢查點繼續"""
+        timestamps = _archive(tmp_path / "responses")
+        checkpoint = {
+            "start": START.isoformat(),
+            "end": END.isoformat(),
+            "last": timestamps[3].isoformat(),
+        }
+        (tmp_path / "db").mkdir()
+        (tmp_path / "db" / CHECKPOINT_FILENAME).write_text(json.dumps(checkpoint))
+        backfill = AvailabilityBackfill(tmp_path / "db", tmp_path / "responses", workers=1)
+
+        result = backfill.backfill(START, END)
+
+        assert (result.resumed, result.backfilled) == (4, 2)
+
+    def test_delta_mode_backfills_forward(self, tmp_path: Path) -> None:
+        """測試 delta 模式（v2）只寫入變動"""
+        _archive(tmp_path / "responses")
+        backfill = AvailabilityBackfill(
+            tmp_path / "db", tmp_path / "responses", workers=1,
+            storage_mode=STORAGE_MODE_DELTA, schema_version=SCHEMA_V2,
+        )
+
+        first = backfill.backfill(START, END)
+        second = backfill.backfill(START, END)
+
+        # A 每次變動；B 在每個月份的首批寫入
+        assert first.inserted == 6 + 2
+        assert second.backfilled == 0
+
+    def test_records_snapshots_and_duplicates(self, tmp_path: Path) -> None:
+        """測試回填記錄快照，內容與前一次相同時只記錄重複快照"""
+        body = b"\xef\xbb\xbfID,AVAILABLECAR\nA,3\nB,5\n"
+        timestamps = [datetime(2026, 2, 10, 8) + STEP * i for i in range(3)]
+        for timestamp in timestamps:
+            save_raw_response(
+                _exchange(timestamp), body, tmp_path / "responses", AVAILABILITY_API_URL, timestamp
+            )
+
+        result = AvailabilityBackfill(tmp_path / "db", tmp_path / "responses", workers=1).backfill(
+            START, END
+        )
+
+        assert (result.backfilled, result.duplicates, result.inserted) == (3, 2, 2)
+        repo = AvailabilityRepository(tmp_path / "db")
+        stats = repo.get_stats(2026, 2)
+        assert (stats["snapshots"], stats["duplicate_snapshots"]) == (3, 2)
+        assert repo.get_value_as_of("A", timestamps[-1])["available_car"] == 3
@@ -0,0 +1,126 @@
+"""月份車位立方體測試"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from parking_newtaipei.db.availability import (  # noqa: E402
+    SCHEMA_V1,
+    SCHEMA_V2,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+    get_monthly_db_path,
+)
+from parking_newtaipei.db.availability_cube import MISSING, cube_paths, to_float  # noqa: E402
+
+# 測試用時間（固定在 2026 年 3 月，10 日 08:00 為時段 2,688）
+BASE_TIME = datetime(2026, 3, 10, 8, 0, 0)
+BASE_SLOT = 9 * 288 + 8 * 12
+STEP = timedelta(minutes=5)
+
+
+def _batch(**values: int) -> list[dict]:
+    return [
+        {"parking_id": parking_id, "available_car": value}
+        for parking_id, value in values.items()
+    ]
+
+
+class TestAvailabilityCube:
+    """月份車位立方體測試"""
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [(STORAGE_MODE_FULL, SCHEMA_V1), (STORAGE_MODE_DELTA, SCHEMA_V2)],
+    )
+    def test_build_matches_snapshots(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試每個時段為最後一次同步的值，重複快照沿用先前值，未同步的時段為 MISSING"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        repo.init_tables(2026, 3)
+        repo.insert_batch(_batch(A=10, B=5), BASE_TIME)
+        repo.insert_batch(_batch(A=9, B=5), BASE_TIME + timedelta(minutes=2))
+        repo.record_heartbeat(_batch(A=9, B=5), BASE_TIME + STEP, "same")
+        repo.insert_batch(_batch(A=8, B=5, C=1), BASE_TIME + STEP * 3)
+
+        cube = repo.get_cube(2026, 3)
+
+        assert cube.values.dtype == np.int16
+        assert cube.values.shape == (3, 31 * 288)
+        assert cube.time_of(BASE_SLOT) == BASE_TIME.astimezone()
+        window = cube.window(BASE_TIME, BASE_TIME + STEP * 4, parking_ids=["A", "B", "C"])
+        assert window.tolist() == [
+            [9, 9, MISSING, 8],
+            [5, 5, MISSING, 5],
+            [MISSING, MISSING, MISSING, 1],
+        ]
+        assert (cube.values[:, :BASE_SLOT] == MISSING).all()
+
+        # 單一停車場的切片為 memory-map 的 view，統計時略過 MISSING
+        curve = cube.lot("A", BASE_TIME, BASE_TIME + STEP * 4)
+        assert np.shares_memory(curve, cube.values)
+        assert np.nanmean(to_float(curve)) == pytest.approx((9 + 9 + 8) / 3)
+        assert np.nanpercentile(to_float(cube.window()), 50) == 5
+
+    @pytest.mark.parametrize("version", [SCHEMA_V1, SCHEMA_V2])
+    def test_snapshots_not_counted_twice(self, tmp_path: Path, version: int) -> None:
+        """測試同步時間帶有微秒時（v2 資料列只精確至秒），快照記錄不被當成另一次同步"""
+        repo = AvailabilityRepository(tmp_path, schema_version=version)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        repo.init_tables(2026, 3)
+        offset = timedelta(microseconds=250_000)
+        repo.insert_batches([_batch(A=10, B=5)], BASE_TIME + offset, content_hash="first")
+        repo.record_heartbeat(_batch(A=10, B=5), BASE_TIME + STEP + offset, "first")
+        repo.insert_batches([_batch(A=8, B=5)], BASE_TIME + STEP * 2 + offset, content_hash="next")
+
+        (report,) = repo.build_cubes([db_path])
+        cube = repo.get_cube(2026, 3, refresh=False)
+
+        assert report["snapshots"] == 3
+        assert cube.lot("A", BASE_TIME, BASE_TIME + STEP * 3).tolist() == [10, 10, 8]
+
+    def test_incremental_update(self, tmp_path: Path) -> None:
+        """測試只納入新的同步與新出現的停車場，回填較早的時間時全部重建"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=STORAGE_MODE_DELTA)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        repo.init_tables(2026, 3)
+        repo.insert_batch(_batch(A=10, B=5), BASE_TIME)
+        (first,) = repo.build_cubes([db_path])
+
+        repo.insert_batch(_batch(A=7, B=5, C=2), BASE_TIME + STEP)
+        (second,) = repo.build_cubes([db_path])
+        cube = repo.get_cube(2026, 3, refresh=False)
+
+        assert (first["rebuilt"], second["rebuilt"]) == (True, False)
+        assert (second["snapshots"], second["rows"]) == (1, 2)
+        assert cube.lots == ["A", "B", "C"]
+        assert cube.window(BASE_TIME, BASE_TIME + STEP * 2).tolist() == [
+            [10, 7],
+            [5, 5],
+            [MISSING, 2],
+        ]
+
+        repo.insert_batch(_batch(A=12, B=6), BASE_TIME - STEP)
+        (third,) = repo.build_cubes([db_path])
+        cube = repo.get_cube(2026, 3, refresh=False)
+
+        assert third["rebuilt"] is True
+        assert cube.lot("A", BASE_TIME - STEP, BASE_TIME + STEP * 2).tolist() == [12, 10, 7]
+
+    def test_built_at_month_close(self, tmp_path: Path) -> None:
+        """測試壓實已結束月份時一併建立立方體，之後以唯讀檔案更新不需重建"""
+        repo = AvailabilityRepository(tmp_path)
+        db_path = get_monthly_db_path(tmp_path, 2026, 3)
+        repo.init_tables(2026, 3)
+        repo.insert_batch(_batch(A=10, B=5), BASE_TIME)
+
+        repo.compact_months([db_path], cube=True)
+
+        assert all(path.exists() for path in cube_paths(db_path))
+        assert repo.get_cube(2026, 3).lot("B", BASE_TIME, BASE_TIME + STEP).tolist() == [5]
+        (report,) = repo.build_cubes([db_path])
+        assert (report["rebuilt"], report["snapshots"]) == (False, 0)
+        assert repo.get_cube(2026, 4) is None
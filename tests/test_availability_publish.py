@@ -0,0 +1,64 @@
+"""即時車位 JSON 發布測試"""
+
+import gzip
+import json
+from pathlib import Path
+
+from parking_newtaipei.etl.availability_publish import (
+    AREA_DIRNAME,
+    AVAILABILITY_JSON,
+    AvailabilityPublisher,
+)
+
+RECORDS = [
+    {"parking_id": "B", "available_car": 5},
+    {"parking_id": "A", "available_car": 10},
+]
+
+LOTS = {"A": ("板橋區", 10), "B": ("三重區", 20)}
+
+
+class TestAvailabilityPublisher:
+    """AvailabilityPublisher 測試"""
+
+    def test_compact_json_and_gzip(self, tmp_path: Path) -> None:
+        """測試輸出精簡 JSON（依 ID 排序）與內容相同的 gzip 檔，不留下暫存檔"""
+        result = AvailabilityPublisher(tmp_path).publish(RECORDS)
+
+        body = (tmp_path / AVAILABILITY_JSON).read_bytes()
+        data = json.loads(body)
+        assert result.version == data["version"] == 1
+        assert [record["parking_id"] for record in data["data"]] == ["A", "B"]
+        assert b"\n" not in body
+        assert gzip.decompress((tmp_path / (AVAILABILITY_JSON + ".gz")).read_bytes()) == body
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_unchanged_content_is_not_rewritten(self, tmp_path: Path) -> None:
+        """測試內容相同（順序不同）時不重寫，變更時版本遞增"""
+        publisher = AvailabilityPublisher(tmp_path)
+        publisher.publish(RECORDS)
+        json_path = tmp_path / AVAILABILITY_JSON
+        mtime = json_path.stat().st_mtime_ns
+
+        result = publisher.publish(list(reversed(RECORDS)))
+        assert (result.changed, result.version) == (False, 1)
+        assert json_path.stat().st_mtime_ns == mtime
+
+        result = publisher.publish([{"parking_id": "A", "available_car": 9}, RECORDS[0]])
+        assert (result.changed, result.version) == (True, 2)
+        assert publisher.read_version()["version"] == 2
+        assert json.loads(json_path.read_bytes())["version"] == 2
+
+    def test_split_by_area(self, tmp_path: Path) -> None:
+        """測試依行政區分檔，並移除已無資料的行政區檔案"""
+        publisher = AvailabilityPublisher(tmp_path, split_by_area=True)
+        publisher.publish(RECORDS, LOTS)
+
+        area_dir = tmp_path / AREA_DIRNAME
+        banqiao = json.loads((area_dir / "板橋區.json").read_bytes())
+        assert (banqiao["area"], banqiao["total_count"], banqiao["version"]) == ("板橋區", 1, 1)
+        assert (area_dir / "三重區.json.gz").exists()
+
+        result = publisher.publish(RECORDS[1:], LOTS)
+        assert f"{AREA_DIRNAME}/板橋區.json" in result.files
+        assert sorted(path.name for path in area_dir.iterdir()) == ["板橋區.json", "板橋區.json.gz"]
@@ -0,0 +1,182 @@
+"""即時車位彙總測試"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    SCHEMA_V2,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+    get_monthly_db_path,
+    rewrite_monthly_db,
+)
+from parking_newtaipei.db.availability_rollup import RollupAccumulator
+from parking_newtaipei.db.availability_summary import read_summary
+
+BASE_TIME = datetime(2026, 3, 10, 8, 50)
+STEP = timedelta(minutes=5)
+
+# A、B 位於板橋區，C 總車位未知
+LOTS = {"A": ("板橋區", 10), "B": ("板橋區", 20), "C": ("三重區", None)}
+
+# 08:50、08:55 兩次同步在 08 時，09:00 在 09 時
+SNAPSHOTS = [
+    [
+        {"parking_id": "A", "available_car": 10},
+        {"parking_id": "B", "available_car": 5},
+        {"parking_id": "C", "available_car": 1},
+    ],
+    [
+        {"parking_id": "A", "available_car": 4},
+        {"parking_id": "B", "available_car": 5},
+        {"parking_id": "C", "available_car": 1},
+    ],
+    [
+        {"parking_id": "A", "available_car": 2},
+        {"parking_id": "B", "available_car": 6},
+        {"parking_id": "C", "available_car": 3},
+    ],
+]
+
+
+def _sync(repo: AvailabilityRepository) -> None:
+    """以同步的方式（分批加上彙總）寫入 SNAPSHOTS"""
+    repo.init_tables(2026, 3)
+    for i, records in enumerate(SNAPSHOTS):
+        batches = [records[:2], records[2:]]
+        repo.insert_batches(batches, BASE_TIME + STEP * i, RollupAccumulator(LOTS))
+
+
+class TestRollups:
+    """每小時 / 每日彙總測試"""
+
+    def test_lot_hourly_stats(self, tmp_path: Path) -> None:
+        """測試停車場每小時的最小、最大、平均與佔用率"""
+        repo = AvailabilityRepository(tmp_path)
+        _sync(repo)
+
+        rows = repo.query_rollups("hour", BASE_TIME, BASE_TIME + STEP * 2, parking_id="A")
+
+        assert [row["bucket"] for row in rows] == ["2026-03-10T08:00", "2026-03-10T09:00"]
+        first = rows[0]
+        assert (first["samples"], first["min_available"], first["max_available"]) == (2, 4, 10)
+        assert first["avg_available"] == 7
+        assert first["avg_occupancy"] == pytest.approx(0.3)
+
+    def test_area_daily_stats(self, tmp_path: Path) -> None:
+        """測試行政區每日彙總（每次同步先加總）"""
+        repo = AvailabilityRepository(tmp_path)
+        _sync(repo)
+
+        (banqiao,) = repo.query_rollups("day", BASE_TIME, BASE_TIME, area="板橋區")
+        (sanchong,) = repo.query_rollups("day", BASE_TIME, BASE_TIME, area="三重區")
+
+        # 板橋區各次同步剩餘 15、9、8，總車位 30
+        assert (banqiao["samples"], banqiao["min_available"], banqiao["max_available"]) == (
+            3, 8, 15,
+        )
+        assert banqiao["avg_occupancy"] == pytest.approx(1 - 32 / 90)
+        assert sanchong["avg_occupancy"] is None
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [
+            (STORAGE_MODE_FULL, SCHEMA_V1),
+            (STORAGE_MODE_DELTA, SCHEMA_V1),
+            (STORAGE_MODE_DELTA, SCHEMA_V2),
+        ],
+    )
+    def test_rebuild_matches_incremental(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試重建結果與同步時累加的結果相同"""
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        _sync(repo)
+        end = BASE_TIME + STEP * 2
+        incremental = {
+            granularity: repo.query_rollups(granularity, BASE_TIME, end)
+            for granularity in ("hour", "day")
+        }
+
+        snapshots = repo.rebuild_rollups(get_monthly_db_path(tmp_path, 2026, 3), LOTS)
+
+        assert snapshots == 3
+        for granularity, rows in incremental.items():
+            assert repo.query_rollups(granularity, BASE_TIME, end) == rows
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [
+            (STORAGE_MODE_FULL, SCHEMA_V1),
+            (STORAGE_MODE_FULL, SCHEMA_V2),
+            (STORAGE_MODE_DELTA, SCHEMA_V1),
+            (STORAGE_MODE_DELTA, SCHEMA_V2),
+        ],
+    )
+    def test_rebuild_includes_heartbeats(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試重建時只記錄快照的重複同步沿用前一次同步的資料，與同步時累加的結果相同
+
+        同步時間帶有微秒（與實際同步相同），v2 的資料列只精確至秒，
+        快照記錄不可被當成另一次同步。
+        """
+        repo = AvailabilityRepository(tmp_path, storage_mode=mode, schema_version=version)
+        repo.init_tables(2026, 3)
+        offset = timedelta(microseconds=250_000)
+        for i, records in enumerate(SNAPSHOTS):
+            repo.insert_batches(
+                [records], BASE_TIME + STEP * i + offset, RollupAccumulator(LOTS), f"sync-{i}"
+            )
+        repo.record_heartbeat(
+            SNAPSHOTS[0], BASE_TIME + STEP / 2 + offset, "sync-0", RollupAccumulator(LOTS)
+        )
+        repo.record_heartbeat(
+            SNAPSHOTS[2], BASE_TIME + STEP * 3 + offset, "sync-2", RollupAccumulator(LOTS)
+        )
+        end = BASE_TIME + STEP * 3
+        incremental = {
+            granularity: repo.query_rollups(granularity, BASE_TIME, end)
+            for granularity in ("hour", "day")
+        }
+
+        snapshots = repo.rebuild_rollups(get_monthly_db_path(tmp_path, 2026, 3), LOTS)
+
+        assert snapshots == 5
+        (a,) = repo.query_rollups("hour", BASE_TIME, BASE_TIME, parking_id="A")
+        assert (a["samples"], a["min_available"], a["max_available"]) == (3, 4, 10)
+        for granularity, rows in incremental.items():
+            assert repo.query_rollups(granularity, BASE_TIME, end) == rows
+
+    @pytest.mark.parametrize(
+        "version, mode",
+        [(None, STORAGE_MODE_DELTA), (SCHEMA_V2, None), (SCHEMA_V2, STORAGE_MODE_DELTA)],
+    )
+    def test_rewrite_keeps_rollups_and_summary(
+        self, tmp_path: Path, version: int | None, mode: str | None
+    ) -> None:
+        """測試轉換版本或儲存模式後彙總不變，摘要依新檔重新計算"""
+        repo = AvailabilityRepository(tmp_path)
+        _sync(repo)
+        end = BASE_TIME + STEP * 2
+        before = {
+            granularity: repo.query_rollups(granularity, BASE_TIME, end)
+            for granularity in ("hour", "day")
+        }
+        repo.close()
+
+        report = rewrite_monthly_db(
+            get_monthly_db_path(tmp_path, 2026, 3),
+            schema_version=version,
+            storage_mode=mode,
+            keep_backup=False,
+        )
+
+        with sqlite3.connect(get_monthly_db_path(tmp_path, 2026, 3)) as conn:
+            summary = read_summary(conn)
+        assert summary["total_records"] == report["rows_after"]
+        assert summary["unique_parking_ids"] == 3
+        repo = AvailabilityRepository(tmp_path)
+        for granularity, rows in before.items():
+            assert repo.query_rollups(granularity, BASE_TIME, end) == rows
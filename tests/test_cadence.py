@@ -0,0 +1,105 @@
+"""上游更新週期學習測試"""
+
+from datetime import datetime, timedelta
+
+from parking_newtaipei.cadence import AdaptivePoller, simulate
+from parking_newtaipei.daemon import next_aligned_tick
+from parking_newtaipei.db.sync_runs import percentile
+
+START = datetime(2026, 3, 1)
+FIVE_MINUTES = timedelta(minutes=5)
+
+
+def _published(period: timedelta, phase: timedelta, days: int = 2) -> list[datetime]:
+    """每 period 發布一次（第 i 次延遲 i % 7 秒）"""
+    count = int(timedelta(days=days) / period)
+    return [START + phase + period * i + timedelta(seconds=i % 7) for i in range(count)]
+
+
+class TestAdaptivePoller:
+    """AdaptivePoller 測試"""
+
+    def test_learns_period_and_saves_fetches(self) -> None:
+        """測試學習上游週期後下載次數減少、延遲縮短，且不錯過任何版本"""
+        published = _published(timedelta(minutes=10), timedelta(minutes=3))
+        end = START + timedelta(days=2)
+        fixed = simulate(
+            published, lambda now: next_aligned_tick(now, FIVE_MINUTES), lambda *_: None, START, end
+        )
+        poller = AdaptivePoller()
+        adaptive = simulate(published, poller.next_poll, poller.observe, START, end)
+
+        estimate = poller.estimate()
+        assert abs(estimate.period - timedelta(minutes=10)) < timedelta(seconds=5)
+        assert adaptive.missed == 0
+        assert adaptive.fetches < fixed.fetches * 0.7
+        assert percentile(adaptive.lags, 50) < percentile(fixed.lags, 50)
+
+    def test_keeps_interval_while_learning(self) -> None:
+        """測試尚未估計週期時內容未變更仍以固定間隔同步（不知道上游何時更新，不退避）"""
+        poller = AdaptivePoller(max_interval=timedelta(minutes=30))
+        now = START
+        for _ in range(3):
+            poller.observe(now, changed=False)
+            following = poller.next_poll(now)
+            assert following - now == FIVE_MINUTES
+            now = following
+
+    def test_backs_off_while_stale_and_resumes(self) -> None:
+        """測試內容未變更時間隔加倍，但不超過下一個預期更新區間與半個週期，變更後恢復"""
+        poller = AdaptivePoller(max_interval=timedelta(minutes=30))
+        moment = START
+        for _ in range(6):
+            moment += timedelta(minutes=10)
+            poller.observe(moment - timedelta(minutes=1), changed=False)
+            poller.observe(moment, changed=True)
+        now = poller.next_poll(moment)
+        assert now - moment == timedelta(minutes=10, seconds=30)
+
+        intervals = []
+        for _ in range(6):
+            poller.observe(now, changed=False)
+            following = poller.next_poll(now)
+            intervals.append(following - now)
+            now = following
+
+        # 1、2、4 分鐘後於下一個預期更新區間之後同步，之後每半個週期一次
+        assert intervals == [timedelta(minutes=minutes) for minutes in (1, 2, 4, 3, 5, 5)]
+
+        poller.observe(now, changed=True)
+        assert poller.misses == 0
+
+    def test_no_missed_versions_across_quiet_hours(self) -> None:
+        """測試上游每日停止更新且發布時間有延遲時，不錯過任何版本且延遲不高於固定間隔"""
+        period = timedelta(minutes=10)
+        published = [
+            moment + timedelta(seconds=i * 7 % 20)
+            for i, moment in enumerate(
+                START + timedelta(minutes=3) + period * i for i in range(6 * 24 * 4)
+            )
+            if not 1 <= moment.hour < 6
+        ]
+        end = START + timedelta(days=4)
+        fixed = simulate(
+            published, lambda now: next_aligned_tick(now, FIVE_MINUTES), lambda *_: None, START, end
+        )
+        poller = AdaptivePoller()
+        adaptive = simulate(published, poller.next_poll, poller.observe, START, end)
+
+        assert adaptive.missed == 0
+        assert adaptive.fetches < fixed.fetches * 0.8
+        assert percentile(adaptive.lags, 95) <= percentile(fixed.lags, 95)
+
+    def test_skips_stall_when_estimating_period(self) -> None:
+        """測試停止更新的空窗不計入週期"""
+        poller = AdaptivePoller()
+        moment = START
+        for gap in (0, 15, 15, 15, 240, 15, 15):
+            moment += timedelta(minutes=gap)
+            poller.observe(moment - timedelta(minutes=2), changed=False)
+            poller.observe(moment, changed=True)
+
+        estimate = poller.estimate()
+        assert estimate.period == timedelta(minutes=15)
+        # 每次變更都發生在觀察前 2 分鐘內
+        assert estimate.uncertainty == timedelta(minutes=2)
@@ -0,0 +1,157 @@
+"""條件式下載（ETag / Last-Modified）測試"""
+
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.api.validators import ValidatorStore
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.etl import availability_sync, parking_sync
+from parking_newtaipei.etl.availability_sync import AvailabilitySync
+from parking_newtaipei.etl.parking_sync import ParkingLotSync
+from parking_newtaipei.utils.storage import list_responses
+
+PARKING_CSV = "\ufeffID,AREA,NAME,TOTALCAR\r\nA,板橋區,停車場A,10\r\nB,中和區,停車場B,20\r\n"
+AVAILABILITY_CSV = "\ufeffID,AVAILABLECAR\r\nA,3\r\nB,-9\r\n"
+
+
+class FeedServer:
+    """本機測試用 HTTP 伺服器，支援 ETag 與 If-None-Match"""
+
+    def __init__(self):
+        self.body = b""
+        self.etag = '"v1"'
+        self.requests: list[dict[str, str]] = []
+
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                feed.requests.append(dict(self.headers))
+                if self.headers.get("If-None-Match") == feed.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", feed.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv; charset=utf-8")
+                self.send_header("Content-Length", str(len(feed.body)))
+                self.send_header("ETag", feed.etag)
+                self.end_headers()
+                self.wfile.write(feed.body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/feed.csv"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    def __enter__(self) -> "FeedServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server() -> Iterator[FeedServer]:
+    """啟動本機測試伺服器"""
+    with FeedServer() as feed:
+        yield feed
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> Iterator[APIClient]:
+    """建立使用驗證值儲存的 API 客戶端"""
+    api_client = APIClient(
+        "",
+        tmp_path / "responses",
+        validator_store=ValidatorStore(tmp_path / "validators.json"),
+    )
+    yield api_client
+    api_client.close()
+
+
+class TestParkingLotSync:
+    """ParkingLotSync 條件式下載測試"""
+
+    @pytest.fixture(autouse=True)
+    def _feed(self, server: FeedServer, monkeypatch: pytest.MonkeyPatch) -> None:
+        server.body = PARKING_CSV.encode("utf-8")
+        monkeypatch.setattr(parking_sync, "PARKING_LOT_API_URL", server.url)
+
+    def test_not_modified_skips_sync(
+        self, tmp_path: Path, server: FeedServer, client: APIClient
+    ) -> None:
+        """測試 304 時跳過同步且不儲存交換記錄"""
+        sync = ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), client)
+
+        first = sync.sync()
+        assert (first.inserted, first.not_modified) == (2, False)
+
+        second = sync.sync()
+        assert second.skipped and second.not_modified
+        assert server.requests[1]["If-None-Match"] == '"v1"'
+        client.flush_archive()
+        assert len(list_responses(tmp_path / "responses")) == 1
+
+    def test_force_sends_unconditional_request(
+        self, tmp_path: Path, server: FeedServer, client: APIClient
+    ) -> None:
+        """測試強制同步不發送條件式請求"""
+        sync = ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), client)
+        sync.sync()
+
+        result = sync.sync(force=True)
+
+        assert not result.not_modified
+        assert "If-None-Match" not in server.requests[1]
+
+    def test_changed_etag_downloads_again(
+        self, tmp_path: Path, server: FeedServer, client: APIClient
+    ) -> None:
+        """測試 ETag 變更時重新下載並同步"""
+        sync = ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), client)
+        sync.sync()
+
+        server.etag = '"v2"'
+        server.body = PARKING_CSV.replace("停車場A", "新名稱").encode("utf-8")
+        result = sync.sync()
+
+        assert (result.updated, result.unchanged, result.not_modified) == (1, 1, False)
+        assert ValidatorStore(tmp_path / "validators.json").conditional_headers(server.url) == {
+            "If-None-Match": '"v2"'
+        }
+
+
+class TestAvailabilitySync:
+    """AvailabilitySync 條件式下載測試"""
+
+    def test_not_modified_writes_nothing(
+        self,
+        tmp_path: Path,
+        server: FeedServer,
+        client: APIClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """測試 304 時不寫入資料"""
+        server.body = AVAILABILITY_CSV.encode("utf-8")
+        monkeypatch.setattr(availability_sync, "AVAILABILITY_API_URL", server.url)
+        sync = AvailabilitySync(tmp_path / "availability", client)
+
+        first = sync.sync()
+        assert (first.inserted, first.skipped_invalid) == (1, 1)
+
+        second = sync.sync()
+        assert second.not_modified
+        assert second.inserted == 0
+        assert sync.repo.get_stats()["total_records"] == 1
@@ -0,0 +1,98 @@
+"""SQLite 連線管理測試"""
+
+from pathlib import Path
+
+import pytest
+
+from parking_newtaipei.db.connection import DatabaseConnection, close_all_connections
+
+
+@pytest.fixture(autouse=True)
+def _close_pool():
+    """每個測試結束後關閉常駐連線"""
+    yield
+    close_all_connections()
+
+
+class TestPersistentConnection:
+    """常駐連線模式測試"""
+
+    def test_reuses_same_connection(self, tmp_path: Path) -> None:
+        """測試同一 db_path 共用連線"""
+        db1 = DatabaseConnection(tmp_path / "test.db", persistent=True)
+        db2 = DatabaseConnection(tmp_path / "test.db", persistent=True)
+
+        with db1.get_connection() as conn1, db2.get_connection() as conn2:
+            assert conn1 is conn2
+
+    def test_pragmas_applied(self, tmp_path: Path) -> None:
+        """測試開啟時套用 PRAGMA 設定"""
+        db = DatabaseConnection(tmp_path / "test.db", persistent=True)
+
+        assert db.fetch_one("PRAGMA journal_mode")[0].lower() == "wal"
+        assert db.fetch_one("PRAGMA synchronous")[0] == 1  # NORMAL
+        assert db.fetch_one("PRAGMA temp_store")[0] == 2  # MEMORY
+
+    def test_custom_pragmas(self, tmp_path: Path) -> None:
+        """測試自訂 PRAGMA 設定"""
+        db = DatabaseConnection(
+            tmp_path / "test.db", persistent=True, pragmas={"cache_size": -2000}
+        )
+
+        assert db.fetch_one("PRAGMA cache_size")[0] == -2000
+
+    def test_data_visible_to_new_connection(self, tmp_path: Path) -> None:
+        """測試常駐連線寫入後其他連線可讀取"""
+        db = DatabaseConnection(tmp_path / "test.db", persistent=True)
+        db.execute("CREATE TABLE t (v INTEGER)")
+        db.execute("INSERT INTO t VALUES (1)")
+
+        other = DatabaseConnection(tmp_path / "test.db")
+        assert other.fetch_one("SELECT COUNT(*) FROM t")[0] == 1
+
+
+class TestTransaction:
+    """transaction() 測試"""
+
+    @pytest.mark.parametrize("persistent", [False, True])
+    def test_commit_once(self, tmp_path: Path, persistent: bool) -> None:
+        """測試交易內語句共用連線並一次 commit"""
+        db = DatabaseConnection(tmp_path / "test.db", persistent=persistent)
+        db.execute("CREATE TABLE t (v INTEGER)")
+
+        with db.transaction() as conn:
+            db.execute("INSERT INTO t VALUES (1)")
+            db.execute("INSERT INTO t VALUES (2)")
+            with db.get_connection() as inner:
+                assert inner is conn
+            # 交易尚未 commit，其他連線看不到
+            other = DatabaseConnection(tmp_path / "test.db")
+            assert other.fetch_one("SELECT COUNT(*) FROM t")[0] == 0
+
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 2
+
+    @pytest.mark.parametrize("persistent", [False, True])
+    def test_rollback_on_exception(self, tmp_path: Path, persistent: bool) -> None:
+        """測試發生例外時整個交易 rollback"""
+        db = DatabaseConnection(tmp_path / "test.db", persistent=persistent)
+        db.execute("CREATE TABLE t (v INTEGER)")
+
+        with pytest.raises(ValueError):
+            with db.transaction():
+                db.execute("INSERT INTO t VALUES (1)")
+                raise ValueError("測試例外")
+
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 0
+
+    def test_nested_transaction_joins_outer(self, tmp_path: Path) -> None:
+        """測試巢狀交易併入最外層"""
+        db = DatabaseConnection(tmp_path / "test.db")
+        db.execute("CREATE TABLE t (v INTEGER)")
+
+        with pytest.raises(ValueError):
+            with db.transaction():
+                with db.transaction():
+                    db.execute("INSERT INTO t VALUES (1)")
+                raise ValueError("測試例外")
+
+        assert db.fetch_one("SELECT COUNT(*) FROM t")[0] == 0
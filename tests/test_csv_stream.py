@@ -0,0 +1,36 @@
+"""串流 CSV 解析測試"""
+
+from parking_newtaipei.utils.csv_stream import iter_csv_rows, iter_lines
+
+CSV_BYTES = '\ufeffID,NAME\r\n1,板橋停車場\r\n2,"多行\n名稱"\r\n'.encode("utf-8")
+
+
+def _split(data: bytes, size: int) -> list[bytes]:
+    """將 bytes 切成固定大小的區塊"""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterLines:
+    """iter_lines 測試"""
+
+    def test_last_line_without_newline(self) -> None:
+        """測試最後一行沒有換行字元"""
+        assert list(iter_lines([b"a\nb"])) == ["a\n", "b"]
+
+
+class TestIterCsvRows:
+    """iter_csv_rows 測試"""
+
+    def test_any_chunk_size_gives_same_rows(self) -> None:
+        """測試 BOM 與多位元組字元被切在區塊邊界時結果相同"""
+        expected = [
+            {"ID": "1", "NAME": "板橋停車場"},
+            {"ID": "2", "NAME": "多行\n名稱"},
+        ]
+
+        for size in (1, 2, 3, 7, len(CSV_BYTES)):
+            assert list(iter_csv_rows(_split(CSV_BYTES, size))) == expected
+
+    def test_empty_input(self) -> None:
+        """測試空內容不產生資料列"""
+        assert list(iter_csv_rows([])) == []
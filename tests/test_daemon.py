@@ -0,0 +1,136 @@
+"""常駐排程測試"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from parking_newtaipei.cadence import AdaptivePoller
+from parking_newtaipei.daemon import Job, Scheduler, next_aligned_tick
+
+
+class TestNextAlignedTick:
+    """next_aligned_tick 測試"""
+
+    def test_five_minute_ticks(self) -> None:
+        """測試對齊到下一個 5 分鐘"""
+        interval = timedelta(minutes=5)
+
+        assert next_aligned_tick(datetime(2026, 3, 1, 8, 3, 20), interval) == datetime(
+            2026, 3, 1, 8, 5
+        )
+        # 剛好在時間點上時取下一個
+        assert next_aligned_tick(datetime(2026, 3, 1, 8, 5), interval) == datetime(
+            2026, 3, 1, 8, 10
+        )
+
+    def test_daily_offset(self) -> None:
+        """測試每日固定時間（午夜加位移）"""
+        interval = timedelta(days=1)
+        offset = timedelta(hours=2)
+
+        assert next_aligned_tick(datetime(2026, 3, 1, 1, 0), interval, offset) == datetime(
+            2026, 3, 1, 2, 0
+        )
+        assert next_aligned_tick(datetime(2026, 3, 1, 2, 0), interval, offset) == datetime(
+            2026, 3, 2, 2, 0
+        )
+
+
+class FakeClock:
+    """每次呼叫前進固定秒數的時鐘"""
+
+    def __init__(self, start: datetime, step: timedelta):
+        self.now = start
+        self.step = step
+
+    def __call__(self) -> datetime:
+        self.now += self.step
+        return self.now
+
+
+class TestScheduler:
+    """Scheduler 測試"""
+
+    def test_runs_due_jobs_in_order_and_records_latency(self) -> None:
+        """測試依時間順序執行作業並記錄延遲"""
+        clock = FakeClock(datetime(2026, 3, 1, 20, 0), timedelta(hours=1))
+        scheduler = Scheduler(clock=clock)
+        calls = []
+
+        def run(name: str) -> None:
+            calls.append(name)
+            if name == "daily":
+                scheduler.stop()
+
+        scheduler.add_job(Job("five", lambda: run("five"), timedelta(minutes=5)))
+        scheduler.add_job(
+            Job("daily", lambda: run("daily"), timedelta(days=1), offset=timedelta(hours=2))
+        )
+        scheduler.run()
+
+        # 每次呼叫時鐘前進 1 小時：21:05 起每次執行都錯過中間的時間點，直到隔天 02:00
+        assert calls[0] == "five"
+        assert calls[-1] == "daily"
+        summary = scheduler.summary()
+        assert summary["daily"]["runs"] == 1
+        assert summary["five"]["last_latency"] > 0
+
+    def test_failing_job_does_not_stop_scheduler(self) -> None:
+        """測試作業失敗時記錄失敗並繼續排程"""
+        scheduler = Scheduler(clock=FakeClock(datetime(2026, 3, 1), timedelta(minutes=5)))
+        attempts = []
+
+        def run() -> None:
+            attempts.append(1)
+            if len(attempts) == 2:
+                scheduler.stop()
+            raise RuntimeError("boom")
+
+        scheduler.add_job(Job("a", run, timedelta(minutes=5)))
+        scheduler.run()
+
+        assert scheduler.summary()["a"]["failures"] == 2
+
+    def test_stop_before_run(self) -> None:
+        """測試已要求結束時不執行任何作業"""
+        scheduler = Scheduler()
+        scheduler.add_job(Job("a", lambda: None, timedelta(minutes=5)))
+        scheduler.stop()
+
+        scheduler.run()
+
+        assert scheduler.summary()["a"]["runs"] == 0
+
+
+@dataclass
+class FakeResult:
+    """同步結果"""
+
+    skipped: bool = False
+    errors: list[str] = field(default_factory=list)
+
+
+class TestAdaptiveJob:
+    """使用 AdaptivePoller 的作業測試"""
+
+    def test_reports_changes_to_poller(self) -> None:
+        """測試依同步結果回報內容是否變更，失敗時不列入學習並以學習間隔重試"""
+        clock = FakeClock(datetime(2026, 3, 1), timedelta(minutes=10))
+        scheduler = Scheduler(clock=clock)
+        poller = AdaptivePoller()
+        results = [FakeResult(), FakeResult(skipped=True), FakeResult(errors=["下載失敗"])]
+
+        def run() -> FakeResult:
+            result = results.pop(0)
+            if not results:
+                scheduler.stop()
+            return result
+
+        scheduler.add_job(Job("sync-availability", run, timedelta(minutes=5), poller=poller))
+        scheduler.run()
+
+        job = scheduler.jobs[0]
+        assert (job.runs, job.failures) == (3, 1)
+        # 第一次為首次觀察（沒有前一次同步，不構成變更區間），第二次未變更，第三次失敗不列入
+        assert poller.misses == 1
+        assert not poller.changes
+        assert job.next_tick == clock.now + poller.interval
@@ -0,0 +1,227 @@
+"""停車場資料同步測試"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import pytest
+
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import CREATE_SYNC_METADATA_TABLE, ParkingLotRepository
+from parking_newtaipei.etl.parking_sync import ParkingLotSync
+from parking_newtaipei.utils.storage import list_responses, load_response
+
+# 測試用 CSV（含 BOM）
+FEED = "\ufeffID,AREA,NAME,TOTALCAR\r\nA,板橋區,停車場A,10\r\nB,中和區,停車場B,\r\n"
+
+
+def _lot(parking_id: str, name: str = "", total_car: int = 10) -> dict:
+    """建立測試用停車場資料"""
+    return {
+        "id": parking_id,
+        "area": "板橋區",
+        "name": name or f"停車場{parking_id}",
+        "type": "1",
+        "summary": "",
+        "address": "",
+        "tel": "",
+        "pay_ex": "",
+        "service_time": "",
+        "tw97x": 296000.0,
+        "tw97y": 2770000.0,
+        "total_car": total_car,
+        "total_motor": 0,
+        "total_bike": 0,
+    }
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> ParkingLotRepository:
+    """建立已初始化資料表的 repository"""
+    repository = ParkingLotRepository(DatabaseConnection(tmp_path / "parking.db"))
+    repository.init_tables()
+    return repository
+
+
+class TestBulkUpsert:
+    """ParkingLotRepository.bulk_upsert 測試"""
+
+    def test_insert_into_empty_table(self, repo: ParkingLotRepository) -> None:
+        """測試空資料表全部新增"""
+        result = repo.bulk_upsert([_lot("A"), _lot("B"), _lot("C")])
+
+        assert result == (3, 0, 0, 0)
+        assert repo.get_all_active_ids() == {"A", "B", "C"}
+
+    def test_update_and_soft_delete(self, repo: ParkingLotRepository) -> None:
+        """測試只更新內容變更的資料並軟刪除消失的資料"""
+        repo.bulk_upsert([_lot("A"), _lot("B"), _lot("C")])
+
+        result = repo.bulk_upsert([_lot("A", total_car=99), _lot("B"), _lot("D")])
+
+        assert result == (1, 1, 1, 1)
+        assert repo.get_all_active_ids() == {"A", "B", "D"}
+        row = repo.db.fetch_one("SELECT total_car FROM parking_lots WHERE id = ?", ("A",))
+        assert row["total_car"] == 99
+
+    def test_deleted_at_not_overwritten(self, repo: ParkingLotRepository) -> None:
+        """測試已刪除資料不重複更新刪除時間"""
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+        repo.bulk_upsert([_lot("A")])
+        first = repo.db.fetch_one("SELECT deleted_at FROM parking_lots WHERE id = ?", ("B",))
+
+        result = repo.bulk_upsert([_lot("A")])
+
+        assert result == (0, 0, 1, 0)
+        second = repo.db.fetch_one("SELECT deleted_at FROM parking_lots WHERE id = ?", ("B",))
+        assert first["deleted_at"] == second["deleted_at"]
+
+    def test_restore_deleted(self, repo: ParkingLotRepository) -> None:
+        """測試重新出現的資料恢復為有效"""
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+        repo.bulk_upsert([_lot("A")])
+
+        result = repo.bulk_upsert([_lot("A"), _lot("B")])
+
+        assert result == (0, 1, 1, 0)
+        assert repo.get_all_active_ids() == {"A", "B"}
+
+    def test_duplicate_ids_match_per_row_counts(self, repo: ParkingLotRepository) -> None:
+        """測試重複 ID 的計數與逐筆 upsert 相同，且以最後一筆為準"""
+        result = repo.bulk_upsert([_lot("A", name="first"), _lot("A", name="last")])
+
+        assert result == (1, 1, 0, 0)
+        row = repo.db.fetch_one("SELECT name FROM parking_lots WHERE id = ?", ("A",))
+        assert row["name"] == "last"
+
+    def test_empty_feed_deletes_all(self, repo: ParkingLotRepository) -> None:
+        """測試空資料時全部標記刪除"""
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+
+        assert repo.bulk_upsert([]) == (0, 0, 0, 2)
+        assert repo.get_all_active_ids() == set()
+
+
+def _updated_at(repo: ParkingLotRepository) -> dict[str, str]:
+    """取得各停車場的 updated_at"""
+    return {
+        row["id"]: row["updated_at"]
+        for row in repo.db.fetch_all("SELECT id, updated_at FROM parking_lots")
+    }
+
+
+class TestHistory:
+    """內容雜湊值與歷史版本測試"""
+
+    def test_unchanged_rows_are_not_rewritten(self, repo: ParkingLotRepository) -> None:
+        """測試只有內容變更的資料列更新 updated_at"""
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+        before = _updated_at(repo)
+
+        repo.bulk_upsert([_lot("A", total_car=20), _lot("B")])
+        after = _updated_at(repo)
+
+        assert after["A"] > before["A"]
+        assert after["B"] == before["B"]
+
+    def test_versions_record_changes(self, repo: ParkingLotRepository) -> None:
+        """測試每次變更新增版本並記錄變更欄位，刪除時結束目前版本"""
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+        repo.bulk_upsert([_lot("A"), _lot("B")])
+        repo.bulk_upsert([_lot("A", name="新名稱", total_car=20), _lot("B")])
+        repo.bulk_upsert([_lot("B")])
+
+        first, second = repo.get_history("A")
+        assert first["changed_fields"] is None
+        assert first["valid_to"] == second["valid_from"]
+        assert (second["changed_fields"], second["total_car"]) == ("name,total_car", 20)
+        assert second["valid_to"] is not None
+        (only,) = repo.get_history("B")
+        assert only["valid_to"] is None
+
+    def test_capacities_as_of(self, repo: ParkingLotRepository) -> None:
+        """測試依時間取得當時有效的總車位數"""
+        repo.bulk_upsert([_lot("A", total_car=10)])
+        between = datetime.now()
+        repo.bulk_upsert([_lot("A", total_car=30)])
+
+        assert repo.get_capacities_as_of(between) == {"A": ("板橋區", 10)}
+        assert repo.get_capacities_as_of(datetime.now()) == {"A": ("板橋區", 30)}
+
+    def test_per_row_upsert_matches_bulk(self, repo: ParkingLotRepository) -> None:
+        """測試逐筆 upsert 同樣略過未變更的資料並記錄版本"""
+        repo.upsert(_lot("A"))
+        before = _updated_at(repo)
+
+        assert repo.upsert(_lot("A")) == ("A", False)
+        assert _updated_at(repo) == before
+        repo.upsert(_lot("A", total_car=20))
+
+        assert [version["total_car"] for version in repo.get_history("A")] == [10, 20]
+        assert repo.bulk_upsert([_lot("A", total_car=20)]) == (0, 0, 1, 0)
+
+    def test_existing_table_is_upgraded(self, tmp_path: Path) -> None:
+        """測試既有資料表加入雜湊值並建立第一個版本，內容相同時不視為變更"""
+        db_path = tmp_path / "parking.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(CREATE_SYNC_METADATA_TABLE)
+            conn.execute(
+                """
+                CREATE TABLE parking_lots (
+                    id TEXT PRIMARY KEY, area TEXT, name TEXT, type TEXT, summary TEXT,
+                    address TEXT, tel TEXT, pay_ex TEXT, service_time TEXT,
+                    tw97x REAL, tw97y REAL, total_car INTEGER, total_motor INTEGER,
+                    total_bike INTEGER, created_at TEXT NOT NULL, updated_at TEXT NOT NULL,
+                    deleted_at TEXT DEFAULT NULL
+                )
+                """
+            )
+            lot = _lot("A")
+            conn.execute(
+                f"INSERT INTO parking_lots ({', '.join(lot)}, created_at, updated_at) "
+                f"VALUES ({', '.join('?' for _ in lot)}, '2026-01-01', '2026-03-01')",
+                tuple(lot.values()),
+            )
+
+        repo = ParkingLotRepository(DatabaseConnection(db_path))
+        repo.init_tables()
+
+        (version,) = repo.get_history("A")
+        assert (version["valid_from"], version["valid_to"]) == ("2026-01-01", None)
+        assert repo.bulk_upsert([_lot("A")]) == (0, 0, 1, 0)
+
+
+def _sync(tmp_path: Path, content: bytes) -> ParkingLotSync:
+    """建立以固定內容回應的同步器"""
+    client = APIClient("https://example.com", tmp_path / "responses")
+    client._client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=content))
+    )
+    return ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), client)
+
+
+class TestStreamingSync:
+    """ParkingLotSync 串流下載測試"""
+
+    def test_sync_and_skip_unchanged(self, tmp_path: Path) -> None:
+        """測試串流同步寫入資料，內容未變更時跳過"""
+        sync = _sync(tmp_path, FEED.encode("utf-8"))
+
+        result = sync.sync()
+        assert (result.inserted, result.errors) == (2, [])
+        row = sync.db.fetch_one("SELECT name, total_car FROM parking_lots WHERE id = ?", ("B",))
+        assert (row["name"], row["total_car"]) == ("停車場B", 0)
+
+        assert sync.sync().skipped
+        sync.api_client.close()
+
+    def test_archive_contains_body(self, tmp_path: Path) -> None:
+        """測試下載內容在同一次讀取中寫入交換記錄"""
+        sync = _sync(tmp_path, FEED.encode("utf-8"))
+        sync.sync()
+        sync.api_client.close()
+
+        (filepath,) = list_responses(tmp_path / "responses")
+        assert load_response(filepath)["response"]["body"] == FEED
@@ -0,0 +1,153 @@
+"""API 交換記錄重播測試"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+from parking_newtaipei.api import replay
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.api.replay import ReplayTransport
+from parking_newtaipei.db.availability import AvailabilityRepository
+from parking_newtaipei.etl.availability_sync import AVAILABILITY_API_URL, AvailabilitySync
+from parking_newtaipei.utils import storage
+from parking_newtaipei.utils.storage import read_index, save_raw_response, save_response
+
+BASE_TIME = datetime(2026, 3, 10, 9, 0)
+STEP = timedelta(minutes=5)
+
+
+def _exchange(timestamp: datetime, etag: str) -> dict:
+    """建立即時車位交換記錄"""
+    return {
+        "timestamp": timestamp.isoformat(),
+        "request": {"method": "GET", "url": AVAILABILITY_API_URL, "endpoint": AVAILABILITY_API_URL},
+        "response": {
+            "status_code": 200,
+            "headers": {"content-type": "text/csv", "etag": etag, "content-encoding": "gzip"},
+            "body": None,
+        },
+    }
+
+
+def _archive(responses_dir: Path, count: int = 4) -> list[datetime]:
+    """建立交換記錄（raw 與 json 格式交錯），回傳記錄時間"""
+    timestamps = [BASE_TIME + STEP * i for i in range(count)]
+    for i, timestamp in enumerate(timestamps):
+        body = f"\ufeffID,AVAILABLECAR\nA,{i}\nB,5\n"
+        exchange = _exchange(timestamp, f'"v{i}"')
+        if i % 2:
+            exchange["response"]["body"] = body
+            save_response(exchange, responses_dir, AVAILABILITY_API_URL, timestamp)
+        else:
+            save_raw_response(
+                exchange, body.encode("utf-8"), responses_dir, AVAILABILITY_API_URL, timestamp
+            )
+    return timestamps
+
+
+def _client(transport: ReplayTransport) -> httpx.Client:
+    return httpx.Client(transport=transport)
+
+
+class TestReplayTransport:
+    """ReplayTransport 測試"""
+
+    def test_sequence_in_time_order(self, tmp_path: Path) -> None:
+        """測試依時間順序重播，不保留 content-encoding，用完後回應 404"""
+        timestamps = _archive(tmp_path)
+        transport = ReplayTransport(tmp_path, start=timestamps[1])
+        client = _client(transport)
+
+        assert transport.pending(AVAILABILITY_API_URL) == 3
+        assert transport.next_timestamp(AVAILABILITY_API_URL) == timestamps[1]
+
+        bodies = [client.get(AVAILABILITY_API_URL).text for _ in range(3)]
+        assert [body.splitlines()[1] for body in bodies] == ["A,1", "A,2", "A,3"]
+
+        response = client.get(AVAILABILITY_API_URL)
+        assert response.status_code == 404
+        assert transport.pending(AVAILABILITY_API_URL) == 0
+
+    def test_month_index_read_once(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """測試依序重播時每個月份的索引只讀取一次（不隨交換記錄數重複解析）"""
+        _archive(tmp_path, count=8)
+        transport = ReplayTransport(tmp_path)
+        client = _client(transport)
+        assert transport.pending(AVAILABILITY_API_URL) == 8
+
+        calls = []
+
+        def counting_read_index(month_dir: Path) -> dict:
+            calls.append(month_dir)
+            return read_index(month_dir)
+
+        monkeypatch.setattr(storage, "read_index", counting_read_index)
+        monkeypatch.setattr(replay, "read_index", counting_read_index)
+        bodies = [client.get(AVAILABILITY_API_URL).text for _ in range(8)]
+
+        assert [body.splitlines()[1] for body in bodies] == [f"A,{i}" for i in range(8)]
+        assert len(calls) == 1
+
+    def test_at_timestamp(self, tmp_path: Path) -> None:
+        """測試時間點模式一律回應該時間之前最後一筆，並保留 ETag"""
+        timestamps = _archive(tmp_path)
+        transport = ReplayTransport(tmp_path, at=timestamps[2] + timedelta(minutes=1))
+        client = _client(transport)
+
+        for _ in range(2):
+            response = client.get(AVAILABILITY_API_URL)
+            assert response.text.splitlines()[1] == "A,2"
+            assert response.headers["etag"] == '"v2"'
+            assert "content-encoding" not in response.headers
+
+    def test_not_modified_on_matching_etag(self, tmp_path: Path) -> None:
+        """測試 If-None-Match 與記錄的 ETag 相符時回應 304"""
+        timestamps = _archive(tmp_path)
+        client = _client(ReplayTransport(tmp_path, at=timestamps[0]))
+
+        response = client.get(AVAILABILITY_API_URL, headers={"If-None-Match": '"v0"'})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_injected_errors(self, tmp_path: Path) -> None:
+        """測試注入錯誤（連線錯誤或狀態碼），錯誤的交換記錄視同遺漏"""
+        _archive(tmp_path)
+        transport = ReplayTransport(tmp_path, error_rate=1.0)
+        with pytest.raises(httpx.ConnectError):
+            _client(transport).get(AVAILABILITY_API_URL)
+        assert transport.pending(AVAILABILITY_API_URL) == 3
+
+        client = _client(ReplayTransport(tmp_path, error_rate=1.0, error_status=503))
+        assert client.get(AVAILABILITY_API_URL).status_code == 503
+
+        with pytest.raises(ValueError):
+            ReplayTransport(tmp_path, error_rate=1.5)
+
+
+class TestReplaySync:
+    """以重播驅動同步的測試"""
+
+    def test_availability_sync_uses_recorded_time(self, tmp_path: Path) -> None:
+        """測試重播所有交換記錄，資料以記錄時間寫入"""
+        timestamps = _archive(tmp_path / "responses")
+        transport = ReplayTransport(tmp_path / "responses")
+        api_client = APIClient(
+            base_url="", responses_dir=tmp_path / "responses", auto_save=False,
+            transport=transport,
+        )
+        sync = AvailabilitySync(tmp_path / "db", api_client)
+
+        runs = 0
+        while transport.pending(AVAILABILITY_API_URL):
+            result = sync.sync(recorded_at=transport.next_timestamp(AVAILABILITY_API_URL))
+            assert not result.errors
+            runs += 1
+        api_client.close()
+        sync.repo.close()
+
+        assert runs == 4
+        value = AvailabilityRepository(tmp_path / "db").get_value_as_of("A", timestamps[1])
+        assert value["available_car"] == 1
+        assert value["recorded_at"].startswith(timestamps[1].isoformat())
@@ -0,0 +1,163 @@
+"""讀取 API 伺服器測試"""
+
+import gzip
+import http.client
+import json
+import os
+import threading
+from pathlib import Path
+from urllib.parse import quote
+
+import pytest
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.server import ReadAPIServer, SnapshotCache, etag_matches
+
+LOTS = [
+    {"id": "A", "area": "板橋區", "name": "甲停車場", "total_car": 10},
+    {"id": "B", "area": "三重區", "name": "乙停車場", "total_car": 20},
+]
+
+
+def _write_availability(path: Path, updated_at: str, records: list[dict]) -> None:
+    """寫入 availability.json，並推進修改時間確保可被偵測"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": updated_at, "total_count": len(records), "data": records}, f)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> SnapshotCache:
+    repo = ParkingLotRepository(DatabaseConnection(tmp_path / "parking.db"))
+    repo.init_tables()
+    repo.bulk_upsert(LOTS)
+    repo.set_content_hash("h1")
+
+    availability_path = tmp_path / "availability.json"
+    _write_availability(
+        availability_path,
+        "2026-03-10T09:00:00+08:00",
+        [{"parking_id": "A", "available_car": 3}, {"parking_id": "B", "available_car": 7}],
+    )
+    cache = SnapshotCache(availability_path, tmp_path / "parking.db")
+    cache.reload(force=True)
+    return cache
+
+
+@pytest.fixture
+def client(cache: SnapshotCache):
+    server = ReadAPIServer(("127.0.0.1", 0), cache)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    yield conn
+    conn.close()
+    server.shutdown()
+    server.server_close()
+
+
+def _get(conn: http.client.HTTPConnection, path: str, **headers: str):
+    """送出 GET 並讀完回應（維持 keep-alive 連線）"""
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+class TestReadAPI:
+    """讀取 API 測試"""
+
+    def test_availability_joined_with_lots(self, client) -> None:
+        """測試即時車位合併停車場資料，單筆查詢與 404"""
+        response, body = _get(client, "/availability")
+        data = json.loads(body)
+
+        assert response.status == 200
+        assert data["total_count"] == 2
+        assert data["data"][0] == {
+            "parking_id": "A",
+            "available_car": 3,
+            "name": "甲停車場",
+            "area": "板橋區",
+            "total_car": 10,
+        }
+
+        response, body = _get(client, "/availability/B")
+        assert json.loads(body)["available_car"] == 7
+        assert json.loads(body)["updated_at"] == "2026-03-10T09:00:00+08:00"
+
+        response, _ = _get(client, "/availability/Z")
+        assert response.status == 404
+
+    def test_lots_area_filter(self, client) -> None:
+        """測試依行政區篩選停車場"""
+        _, body = _get(client, "/lots")
+        assert json.loads(body)["total_count"] == 2
+
+        _, body = _get(client, f"/lots?area={quote('三重區')}")
+        assert [lot["id"] for lot in json.loads(body)["data"]] == ["B"]
+
+        _, body = _get(client, f"/lots?area={quote('不存在')}")
+        assert json.loads(body) == {"total_count": 0, "data": []}
+
+    def test_etag_and_gzip(self, client) -> None:
+        """測試 If-None-Match 回 304，gzip 內容與原始內容相同"""
+        response, body = _get(client, "/availability")
+        etag = response.getheader("ETag")
+
+        response, not_modified = _get(client, "/availability", **{"If-None-Match": etag})
+        assert response.status == 304
+        assert not_modified == b""
+
+        response, compressed = _get(client, "/availability", **{"Accept-Encoding": "gzip"})
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert response.getheader("ETag") == etag
+        assert gzip.decompress(compressed) == body
+
+    def test_if_none_match_list(self, client) -> None:
+        """測試 If-None-Match 列表逐一以弱比較比對，只包含 ETag 子字串的值不符合"""
+        response, _ = _get(client, "/availability")
+        etag = response.getheader("ETag")
+        opaque = etag.removeprefix("W/")
+
+        response, _ = _get(client, "/availability", **{"If-None-Match": f'"other", {opaque}'})
+        assert response.status == 304
+
+        response, _ = _get(client, "/availability", **{"If-None-Match": f'"x{opaque[1:]}, {etag}x'})
+        assert response.status == 200
+
+    def test_etag_matches(self) -> None:
+        """測試 If-None-Match 的解析"""
+        etag = 'W/"abc"'
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"xyz" , W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"abcd"', etag)
+        assert not etag_matches('W/"abc"-old', etag)
+
+    def test_reload_on_new_sync(self, cache: SnapshotCache, client) -> None:
+        """測試新的同步結果寫入後重新載入，ETag 隨之變更"""
+        response, _ = _get(client, "/availability/A")
+        etag = response.getheader("ETag")
+        assert cache.reload() is False
+
+        _write_availability(
+            cache.availability_path,
+            "2026-03-10T09:05:00+08:00",
+            [{"parking_id": "A", "available_car": 0}],
+        )
+        assert cache.reload() is True
+
+        response, body = _get(client, "/availability/A", **{"If-None-Match": etag})
+        assert response.status == 200
+        assert json.loads(body)["available_car"] == 0
+
+    def test_partial_file_keeps_snapshot(self, cache: SnapshotCache) -> None:
+        """測試讀到寫入中（不完整）的檔案時沿用目前快照"""
+        snapshot = cache.snapshot
+        cache.availability_path.write_text('{"updated_at": ', encoding="utf-8")
+
+        assert cache.reload() is False
+        assert cache.snapshot is snapshot
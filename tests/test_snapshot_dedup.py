@@ -0,0 +1,168 @@
+"""即時車位重複快照測試"""
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.db.availability import (
+    SCHEMA_V1,
+    SCHEMA_V2,
+    STORAGE_MODE_DELTA,
+    STORAGE_MODE_FULL,
+    AvailabilityRepository,
+    get_monthly_db_path,
+    rewrite_monthly_db,
+)
+from parking_newtaipei.db.availability_schema import AvailabilitySchemaV1
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.sync_runs import STATUS_OK, STATUS_SKIPPED, SyncRunRepository
+from parking_newtaipei.etl import availability_sync
+from parking_newtaipei.etl.availability_publish import AVAILABILITY_JSON
+from parking_newtaipei.etl.availability_sync import AvailabilitySync, AvailabilitySyncResult
+from parking_newtaipei.utils.storage import list_responses
+
+AVAILABILITY_CSV = "\ufeffID,AVAILABLECAR\r\nA,3\r\nB,-9\r\nC,7\r\n"
+CHANGED_CSV = "\ufeffID,AVAILABLECAR\r\nA,4\r\nB,-9\r\nC,7\r\n"
+
+
+def _sync(
+    tmp_path: Path,
+    body: str,
+    recorded_at: datetime,
+    archive: str,
+    ledger: SyncRunRepository | None = None,
+    **options,
+) -> AvailabilitySyncResult:
+    """以指定內容執行一次同步（每次同步使用各自的交換記錄目錄，避免同一秒內檔名相同）"""
+    content = body.encode("utf-8")
+    api_client = APIClient(
+        base_url="",
+        responses_dir=tmp_path / archive,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=content)),
+    )
+    sync = AvailabilitySync(tmp_path / "availability", api_client, ledger=ledger, **options)
+    try:
+        return sync.sync(recorded_at)
+    finally:
+        api_client.close()
+        sync.repo.close()
+
+
+def _row_count(db_path: Path) -> int:
+    with DatabaseConnection(db_path).get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM availability").fetchone()[0]
+
+
+class TestSnapshotDedup:
+    """內容與上次同步相同時只記錄快照"""
+
+    def test_duplicate_records_heartbeat_only(self, tmp_path: Path) -> None:
+        """測試重複內容不寫入資料列、不保留交換記錄，並記錄於執行記錄與統計"""
+        ledger = SyncRunRepository(DatabaseConnection(tmp_path / "sync_runs.db"))
+        now = datetime.now().replace(day=15, hour=12)
+
+        first = _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=5), "first", ledger)
+        second = _sync(tmp_path, AVAILABILITY_CSV, now, "second", ledger)
+
+        assert (first.duplicate, first.inserted) == (False, 2)
+        assert (second.duplicate, second.inserted, second.unchanged) == (True, 0, 2)
+        assert (second.snapshots, second.duplicate_snapshots) == (2, 1)
+        assert second.dedup_ratio == 0.5
+        assert len(list_responses(tmp_path / "first")) == 1
+        assert list_responses(tmp_path / "second") == []
+
+        repo = AvailabilityRepository(tmp_path / "availability")
+        assert _row_count(get_monthly_db_path(repo.db_dir, now.year, now.month)) == 2
+        snapshot = repo.get_snapshot_as_of(now)
+        assert {lot: row["available_car"] for lot, row in snapshot.items()} == {"A": 3, "C": 7}
+
+        stats = repo.get_stats(now.year, now.month)
+        assert (stats["snapshots"], stats["duplicate_snapshots"]) == (2, 1)
+        assert stats["dedup_ratio"] == 0.5
+        assert [run["status"] for run in ledger.query()] == [STATUS_OK, STATUS_SKIPPED]
+
+        # 重複同步的時間點視為已記錄，回填時不會再寫入
+        assert repo.is_recorded(now + timedelta(seconds=30), timedelta(minutes=1))
+        repo.close()
+
+    def test_changed_content_writes_full_batch(self, tmp_path: Path) -> None:
+        """測試重複之後內容變更時再次寫入完整資料"""
+        now = datetime.now().replace(day=15, hour=12)
+        _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=10), "first")
+        _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=5), "second")
+        result = _sync(tmp_path, CHANGED_CSV, now, "third")
+
+        assert (result.duplicate, result.inserted) == (False, 2)
+        assert (result.snapshots, result.duplicate_snapshots) == (3, 1)
+        assert len(list_responses(tmp_path / "third")) == 1
+
+        repo = AvailabilityRepository(tmp_path / "availability")
+        assert repo.get_value_as_of("A", now)["available_car"] == 4
+        repo.close()
+
+    def test_rewrite_keeps_snapshots(self, tmp_path: Path) -> None:
+        """測試轉換儲存模式後保留快照記錄，下次重複內容仍可辨識"""
+        now = datetime.now().replace(day=15, hour=12)
+        _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=10), "first")
+        _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=5), "second")
+
+        db_path = get_monthly_db_path(tmp_path / "availability", now.year, now.month)
+        rewrite_monthly_db(db_path, storage_mode="delta", keep_backup=False)
+        result = _sync(tmp_path, AVAILABILITY_CSV, now, "third")
+
+        assert result.duplicate
+        assert (result.snapshots, result.duplicate_snapshots) == (3, 2)
+
+
+class TestStreamingWrite:
+    """邊解析邊寫入，發布的 JSON 由資料庫讀回"""
+
+    def test_batches_written_during_parse(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """測試每解析一批即寫入，不先收集整份資料"""
+        events = []
+        parse_csv = AvailabilitySync._parse_csv
+        insert = AvailabilitySchemaV1.insert
+
+        def tracing_parse(chunks, result):
+            for record in parse_csv(chunks, result):
+                events.append("parse")
+                yield record
+
+        def tracing_insert(self, conn, records, recorded_at, delta):
+            events.append("insert")
+            return insert(self, conn, records, recorded_at, delta)
+
+        monkeypatch.setattr(availability_sync, "BATCH_SIZE", 1)
+        monkeypatch.setattr(AvailabilitySync, "_parse_csv", staticmethod(tracing_parse))
+        monkeypatch.setattr(AvailabilitySchemaV1, "insert", tracing_insert)
+        result = _sync(tmp_path, AVAILABILITY_CSV, datetime.now().replace(day=15), "first")
+
+        assert result.inserted == 2
+        assert events == ["parse", "insert", "parse", "insert"]
+
+    @pytest.mark.parametrize(
+        "mode, version",
+        [(STORAGE_MODE_FULL, SCHEMA_V1), (STORAGE_MODE_DELTA, SCHEMA_V2)],
+    )
+    def test_published_json_read_back(self, tmp_path: Path, mode: str, version: int) -> None:
+        """測試發布的 JSON 包含本次同步的所有停車場（delta 模式含未變動者），重複內容不重新發布"""
+        now = datetime.now().replace(day=15, hour=12)
+        options = {"storage_mode": mode, "schema_version": version}
+        _sync(tmp_path, AVAILABILITY_CSV, now - timedelta(minutes=10), "first", **options)
+        changed = _sync(tmp_path, CHANGED_CSV, now - timedelta(minutes=5), "second", **options)
+        duplicate = _sync(tmp_path, CHANGED_CSV, now, "third", **options)
+
+        published = json.loads((tmp_path / "availability" / AVAILABILITY_JSON).read_text())
+        assert changed.inserted == (2 if mode == STORAGE_MODE_FULL else 1)
+        assert duplicate.duplicate
+        assert published["version"] == 2
+        assert published["data"] == [
+            {"parking_id": "A", "available_car": 4},
+            {"parking_id": "C", "available_car": 7},
+        ]
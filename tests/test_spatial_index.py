@@ -0,0 +1,99 @@
+"""空間索引測試"""
+
+import math
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.models import ParkingLotRepository
+from parking_newtaipei.utils.spatial_index import GridIndex
+
+
+def _points(count: int, seed: int = 1) -> list[tuple[str, float, float]]:
+    """產生隨機 TWD97 座標"""
+    rng = random.Random(seed)
+    return [
+        (f"P{i:04d}", rng.uniform(290000, 300000), rng.uniform(2760000, 2770000))
+        for i in range(count)
+    ]
+
+
+def _brute(points, x: float, y: float) -> list[tuple[str, float]]:
+    """依距離排序所有點"""
+    return sorted(
+        ((point_id, math.hypot(px - x, py - y)) for point_id, px, py in points),
+        key=lambda item: (item[1], item[0]),
+    )
+
+
+def _same(actual: list[tuple[str, float]], expected: list[tuple[str, float]]) -> bool:
+    """比較查詢結果（距離容許浮點誤差）"""
+    return [item[0] for item in actual] == [item[0] for item in expected] and [
+        item[1] for item in actual
+    ] == pytest.approx([item[1] for item in expected])
+
+
+class TestGridIndex:
+    """GridIndex 測試"""
+
+    @pytest.mark.parametrize("cell_size", [100.0, 500.0, 5000.0])
+    def test_matches_brute_force(self, cell_size: float) -> None:
+        """測試半徑與最近鄰查詢結果與逐筆計算相同（含資料範圍外的查詢點）"""
+        points = _points(500)
+        index = GridIndex(points, cell_size=cell_size)
+        rng = random.Random(2)
+
+        for _ in range(30):
+            x, y = rng.uniform(285000, 305000), rng.uniform(2755000, 2775000)
+            expected = _brute(points, x, y)
+            assert _same(index.nearest(x, y, 7), expected[:7])
+            assert _same(index.within(x, y, 800), [item for item in expected if item[1] <= 800])
+
+    def test_far_query_outside_bounds(self) -> None:
+        """測試遠在資料範圍外的查詢點（例如誤傳 WGS84 經緯度）不需逐圈掃描空網格"""
+        points = _points(2000)
+        index = GridIndex(points)
+
+        start = time.perf_counter()
+        result = index.nearest(121.46, 25.01, 3)
+        elapsed = time.perf_counter() - start
+
+        assert _same(result, _brute(points, 121.46, 25.01)[:3])
+        assert elapsed < 1.0
+
+    def test_empty_and_small(self) -> None:
+        """測試空索引與點數少於 k"""
+        assert GridIndex([]).nearest(0, 0, 3) == []
+        assert GridIndex([]).within(0, 0, 100) == []
+        assert [item[0] for item in GridIndex(_points(2)).nearest(295000, 2765000, 5)] == [
+            item[0] for item in _brute(_points(2), 295000, 2765000)
+        ]
+
+
+class TestParkingLotSpatialIndex:
+    """ParkingLotRepository.get_spatial_index 測試"""
+
+    def test_rebuilt_only_when_hash_changes(self, tmp_path: Path) -> None:
+        """測試內容雜湊值未變更時沿用索引"""
+        repo = ParkingLotRepository(DatabaseConnection(tmp_path / "parking.db"))
+        repo.init_tables()
+        lot = {"id": "A", "tw97x": 296000.0, "tw97y": 2770000.0}
+        repo.bulk_upsert([lot, {"id": "B", "tw97x": None, "tw97y": None}])
+        repo.set_content_hash("h1")
+
+        index = repo.get_spatial_index()
+        assert len(index) == 1
+        assert repo.get_spatial_index() is index
+
+        repo.bulk_upsert([lot, {"id": "C", "tw97x": 296100.0, "tw97y": 2770000.0}])
+        repo.set_content_hash("h2")
+
+        rebuilt = repo.get_spatial_index()
+        assert rebuilt is not index
+        assert [parking_id for parking_id, _ in rebuilt.within(296000.0, 2770000.0, 500)] == [
+            "A",
+            "C",
+        ]
@@ -1,15 +1,34 @@
 """儲存模組測試"""
 
-from datetime import datetime
+import sqlite3
+from datetime import date, datetime
 from pathlib import Path
 
+from parking_newtaipei.utils.response_catalog import CATALOG_FILENAME
 from parking_newtaipei.utils.storage import (
+    ResponseStreamWriter,
+    find_responses,
     generate_filename,
     list_responses,
+    load_raw_body,
     load_response,
+    pack_responses,
+    reindex_responses,
+    save_raw_response,
     save_response,
 )
 
+# raw 格式測試用交換記錄
+RAW_DATA = {
+    "timestamp": "2026-02-04T10:30:45",
+    "request": {"method": "GET", "url": "https://example.com/feed", "headers": {"a": "b"}},
+    "response": {
+        "status_code": 200,
+        "headers": {"Content-Type": "text/csv", "X-Other": "dropped"},
+        "body": None,
+    },
+}
+
 
 class TestGenerateFilename:
     """generate_filename 測試"""
@@ -95,6 +114,35 @@ class TestSaveResponse:
         assert loaded == data
 
 
+class TestResponseStreamWriter:
+    """ResponseStreamWriter 測試"""
+
+    def test_matches_save_response(self, tmp_path: Path) -> None:
+        """測試串流寫入的內容與 save_response 相同（含跨區塊的多位元組字元）"""
+        timestamp = datetime(2026, 2, 4, 10, 30, 45)
+        body = 'ID,NAME\n1,"中文 \\ 測試"\n'
+        data = {"request": {"url": "/api/test"}, "response": {"status_code": 200, "body": None}}
+
+        writer = ResponseStreamWriter(data, tmp_path / "stream", "/api/test", timestamp)
+        raw = body.encode("utf-8")
+        for i in range(len(raw)):
+            writer.write(raw[i:i + 1])
+        streamed = load_response(writer.close())
+
+        expected = {**data, "response": {**data["response"], "body": body}}
+        saved = load_response(save_response(expected, tmp_path / "saved", "/api/test", timestamp))
+        assert streamed == saved == expected
+
+    def test_abort_removes_file(self, tmp_path: Path) -> None:
+        """測試放棄寫入時刪除不完整的檔案"""
+        data = {"response": {"body": None}}
+        writer = ResponseStreamWriter(data, tmp_path, "/api/test")
+        writer.write(b"partial")
+        writer.abort()
+
+        assert not writer.filepath.exists()
+
+
 class TestListResponses:
     """list_responses 測試"""
 
@@ -132,3 +180,101 @@ class TestListResponses:
         """測試不存在目錄回傳空列表"""
         files = list_responses(tmp_path / "nonexistent")
         assert files == []
+
+
+class TestRawFormat:
+    """raw 格式與每日打包測試"""
+
+    def test_load_reconstructs_exchange(self, tmp_path: Path) -> None:
+        """測試 raw 格式可組回與 json 格式相同的結構"""
+        body = "ID,NAME\n1,中文\n".encode()
+        filepath = save_raw_response(
+            RAW_DATA, body, tmp_path, "/feed", datetime(2026, 2, 4, 10, 30, 45)
+        )
+
+        loaded = load_response(filepath)
+        assert loaded["response"]["body"] == body.decode("utf-8")
+        assert loaded["response"]["headers"] == {"content-type": "text/csv"}
+        assert "headers" not in loaded["request"]
+        assert load_raw_body(filepath) == body
+
+    def test_list_includes_both_formats(self, tmp_path: Path) -> None:
+        """測試同時列出 json 與 raw 格式（最新的在前）"""
+        save_response({"test": "data"}, tmp_path, "/old", datetime(2026, 1, 15))
+        raw_path = save_raw_response(RAW_DATA, b"x", tmp_path, "/feed", datetime(2026, 2, 4))
+
+        files = list_responses(tmp_path)
+
+        assert len(files) == 2
+        assert raw_path in files
+
+    def test_pack_days_before_today(self, tmp_path: Path) -> None:
+        """測試打包後檔案移除，但原路徑仍可載入"""
+        bodies = {datetime(2026, 2, 4, hour): f"body {hour}".encode() for hour in (1, 2)}
+        bodies[datetime(2026, 2, 5, 1)] = b"next day"
+        paths = {
+            timestamp: save_raw_response(
+                {**RAW_DATA, "timestamp": timestamp.isoformat()}, body, tmp_path, "/feed", timestamp
+            )
+            for timestamp, body in bodies.items()
+        }
+
+        assert pack_responses(tmp_path, before=date(2026, 2, 5)) == {date(2026, 2, 4): 2}
+        assert pack_responses(tmp_path, before=date(2026, 2, 5)) == {}
+
+        for timestamp, body in bodies.items():
+            assert paths[timestamp].exists() == (timestamp.day == 5)
+            assert load_raw_body(paths[timestamp]) == body
+        assert len(list_responses(tmp_path)) == 3
+
+
+class TestResponseCatalog:
+    """交換記錄目錄索引測試"""
+
+    def test_find_by_range_and_endpoint(self, tmp_path: Path) -> None:
+        """測試依時間區間與 endpoint 查詢"""
+        paths = {
+            (endpoint, hour): save_raw_response(
+                {**RAW_DATA, "timestamp": datetime(2026, 2, 4, hour).isoformat()},
+                b"x",
+                tmp_path,
+                endpoint,
+                datetime(2026, 2, 4, hour),
+            )
+            for endpoint in ("/a", "/b")
+            for hour in (1, 2, 3)
+        }
+
+        found = find_responses(
+            tmp_path, start=datetime(2026, 2, 4, 2), end=datetime(2026, 2, 4, 3), endpoint="/a"
+        )
+
+        assert found == [paths[("/a", 3)], paths[("/a", 2)]]
+
+    def test_records_size_and_hash(self, tmp_path: Path) -> None:
+        """測試記錄 URL、狀態碼與 body 大小 / 雜湊"""
+        save_raw_response(RAW_DATA, b"abc", tmp_path, "/feed", datetime(2026, 2, 4))
+
+        with sqlite3.connect(tmp_path / CATALOG_FILENAME) as conn:
+            row = conn.execute(
+                "SELECT url, status_code, body_size, body_sha256 FROM responses"
+            ).fetchone()
+        assert row == (
+            "https://example.com/feed",
+            200,
+            3,
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad",
+        )
+
+    def test_reindex_rebuilds_from_disk(self, tmp_path: Path) -> None:
+        """測試刪除目錄索引後由磁碟重建（含已打包的 raw 記錄）"""
+        save_response({"test": "data"}, tmp_path, "/old", datetime(2026, 1, 15))
+        save_raw_response(RAW_DATA, b"x", tmp_path, "/feed", datetime(2026, 2, 4))
+        pack_responses(tmp_path, before=date(2026, 2, 5))
+        expected = list_responses(tmp_path)
+
+        (tmp_path / CATALOG_FILENAME).unlink()
+
+        assert list_responses(tmp_path) == expected
+        assert reindex_responses(tmp_path) == 2
+        assert find_responses(tmp_path, endpoint="/old") == [expected[1]]
@@ -0,0 +1,162 @@
+"""階段計時與同步執行記錄測試"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from parking_newtaipei.api.client import APIClient
+from parking_newtaipei.db.connection import DatabaseConnection
+from parking_newtaipei.db.sync_runs import (
+    STATUS_ERROR,
+    STATUS_OK,
+    SyncRunRepository,
+    percentile,
+    summarize_runs,
+)
+from parking_newtaipei.etl.availability_sync import AvailabilitySync
+from parking_newtaipei.etl.parking_sync import ParkingLotSync
+from parking_newtaipei.utils.timing import PhaseTimer
+
+PARKING_CSV = "\ufeffID,AREA,NAME,TOTALCAR\r\nA,板橋區,停車場A,10\r\nB,中和區,停車場B,20\r\n"
+AVAILABILITY_CSV = "\ufeffID,AVAILABLECAR\r\nA,3\r\nB,-9\r\nC,7\r\n"
+
+
+class FakeClock:
+    """每次呼叫前由測試推進的時鐘"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _api_client(tmp_path: Path, handler) -> APIClient:
+    return APIClient(
+        base_url="",
+        responses_dir=tmp_path / "responses",
+        auto_save=False,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+class TestPhaseTimer:
+    """PhaseTimer 測試"""
+
+    def test_nested_spans_are_exclusive(self) -> None:
+        """測試巢狀階段的時間不計入外層"""
+        clock = FakeClock()
+        timer = PhaseTimer(clock)
+
+        with timer.span("write"):
+            clock.now += 1.0
+            with timer.span("parse"):
+                clock.now += 2.0
+            clock.now += 0.5
+
+        assert timer.phases == {"write": 1.5, "parse": 2.0}
+        assert timer.total == 3.5
+
+    def test_iterate_times_each_item(self) -> None:
+        """測試 iterate 將讀取下一項的時間計入階段，消費端的時間計入外層"""
+        clock = FakeClock()
+        timer = PhaseTimer(clock)
+
+        def source():
+            for i in range(3):
+                clock.now += 0.25
+                yield i
+
+        with timer.span("write"):
+            for _ in timer.iterate("download", source()):
+                clock.now += 1.0
+
+        assert timer.phases == {"write": 3.0, "download": 0.75}
+
+
+class TestSyncRunRepository:
+    """SyncRunRepository 測試"""
+
+    def test_record_query_and_summarize(self, tmp_path: Path) -> None:
+        """測試記錄、依作業與時間查詢，並統計各階段的百分位數"""
+        repo = SyncRunRepository(DatabaseConnection(tmp_path / "sync_runs.db"))
+        now = datetime.now()
+        for i in range(10):
+            repo.record(
+                "sync-availability",
+                now - timedelta(minutes=5 * i),
+                duration=float(i + 1),
+                status=STATUS_OK,
+                phases={"download": i * 0.1, "write": 0.5},
+                bytes_downloaded=1000,
+                rows_written=i,
+            )
+        repo.record("sync-parking", now, 2.0, STATUS_ERROR, {}, error="下載失敗")
+
+        runs = repo.query("sync-availability", since=now - timedelta(minutes=22))
+        assert [run["rows_written"] for run in runs] == [4, 3, 2, 1, 0]
+        assert runs[0]["phases"] == {"download": 0.4, "write": 0.5}
+        assert repo.query("sync-parking")[0]["error"] == "下載失敗"
+
+        summary = summarize_runs(repo.query("sync-availability"))
+        assert summary["total"] == {"count": 10, "p50": 5.0, "p95": 10.0, "max": 10.0}
+        assert summary["download"]["p95"] == 0.9
+        assert percentile([], 50) == 0.0
+
+    def test_query_without_table(self, tmp_path: Path) -> None:
+        """測試尚未記錄時查詢回傳空列表"""
+        repo = SyncRunRepository(DatabaseConnection(tmp_path / "sync_runs.db"))
+        assert repo.query() == []
+
+
+class TestSyncInstrumentation:
+    """同步作業的階段計時與記錄測試"""
+
+    def test_availability_sync_records_run(self, tmp_path: Path) -> None:
+        """測試即時車位同步記錄各階段耗時、下載 bytes 與寫入筆數"""
+        ledger = SyncRunRepository(DatabaseConnection(tmp_path / "sync_runs.db"))
+        body = AVAILABILITY_CSV.encode("utf-8")
+        api_client = _api_client(tmp_path, lambda request: httpx.Response(200, content=body))
+        sync = AvailabilitySync(tmp_path / "availability", api_client, ledger=ledger)
+
+        result = sync.sync()
+        api_client.close()
+        sync.repo.close()
+
+        assert (result.bytes_downloaded, result.rows_written) == (len(body), 2)
+        assert {"download", "parse", "write", "publish"} <= set(result.phases)
+        assert result.duration >= sum(result.phases.values()) - 1e-6
+
+        [run] = ledger.query("sync-availability")
+        assert (run["status"], run["rows_written"]) == (STATUS_OK, 2)
+        assert run["phases"] == result.phases
+
+    def test_parking_sync_records_failure(self, tmp_path: Path) -> None:
+        """測試停車場同步下載失敗時記錄錯誤狀態"""
+        ledger = SyncRunRepository(DatabaseConnection(tmp_path / "sync_runs.db"))
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ConnectError("連線失敗", request=request)
+
+        api_client = _api_client(tmp_path, handler)
+        sync = ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), api_client, ledger)
+        result = sync.sync()
+        api_client.close()
+
+        assert result.errors
+        [run] = ledger.query("sync-parking")
+        assert run["status"] == STATUS_ERROR
+        assert "連線失敗" in run["error"]
+
+    def test_parking_sync_counts_rows(self, tmp_path: Path) -> None:
+        """測試停車場同步的寫入筆數包含新增、更新與刪除"""
+        body = PARKING_CSV.encode("utf-8")
+        api_client = _api_client(tmp_path, lambda request: httpx.Response(200, content=body))
+        sync = ParkingLotSync(DatabaseConnection(tmp_path / "parking.db"), api_client)
+
+        result = sync.sync()
+        api_client.close()
+
+        assert (result.rows_written, result.bytes_downloaded) == (2, len(body))
+        assert {"download", "parse", "write"} <= set(result.phases)